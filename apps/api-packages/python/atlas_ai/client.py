@@ -2,8 +2,9 @@
 Atlas AI API client for making chat requests
 """
 
+import json
 import requests
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Optional, Union, Callable, Iterator, Tuple
 from .config import get_config
 
 
@@ -28,12 +29,13 @@ class AtlasClient:
         self.api_key = api_key
         self.base_url = base_url or get_config().get('base_url', 'http://localhost:5000')
 
-    def call(self, message: str, **kwargs) -> Dict[str, Any]:
+    def call(self, message: str, on_token: Optional[Callable[[str], None]] = None, **kwargs) -> Dict[str, Any]:
         """
         Make a chat request to Atlas AI.
 
         Args:
             message: The message to send
+            on_token: Stream the reply, calling this with each chunk of generated text
             **kwargs: Additional parameters (tone, model, think_deeper, etc.)
 
         Returns:
@@ -42,13 +44,43 @@ class AtlasClient:
         Raises:
             RuntimeError: If the API call fails
         """
-        return call(message, self.api_key, self.base_url, **kwargs)
+        return call(message, self.api_key, self.base_url, on_token=on_token, **kwargs)
+
+
+def _iter_sse(lines) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse server-sent event lines into (event, JSON data) pairs."""
+    event, data = "message", []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, json.loads("\n".join(data))
+
+
+def _raise_for_status(status: int, error_data: Dict[str, Any]) -> None:
+    if status == 401:
+        raise RuntimeError("Invalid API key")
+    if status == 429:
+        raise RuntimeError("Rate limit exceeded")
+    error_msg = error_data.get('error', f'HTTP {status}')
+    raise RuntimeError(f"API call failed: {error_msg}")
 
 
 def call(
     message: str,
     api_key: str,
     base_url: Optional[str] = None,
+    on_token: Optional[Callable[[str], None]] = None,
     **kwargs
 ) -> Dict[str, Any]:
     """
@@ -60,10 +92,13 @@ def call(
         message: The message to send
         api_key: Your API key
         base_url: Base URL of the Atlas AI server (optional)
+        on_token: Stream the reply, calling this with each chunk of generated text
+            as the model produces it (optional)
         **kwargs: Additional parameters (tone, model, think_deeper, etc.)
 
     Returns:
-        Response dictionary containing the AI response
+        Response dictionary containing the AI response (the final, refined text
+        when streaming)
 
     Raises:
         RuntimeError: If the API call fails
@@ -71,6 +106,8 @@ def call(
     Example:
         >>> response = call("Hello!", "thor-1.1-AbCdEfGhIjKlMnOpQrStUvWxYz")
         >>> print(response["response"])
+
+        >>> call("Hello!", key, on_token=lambda t: print(t, end="", flush=True))
     """
     if not base_url:
         base_url = get_config().get('base_url', 'http://localhost:5000')
@@ -83,6 +120,19 @@ def call(
     }
 
     try:
+        if on_token is not None:
+            with requests.post(f"{base_url}/api/chat/stream", json=data, stream=True, timeout=60) as response:
+                if response.status_code != 200:
+                    _raise_for_status(response.status_code, {})
+                for event, payload in _iter_sse(response.iter_lines()):
+                    if event == "token":
+                        on_token(payload.get("text", ""))
+                    elif event == "final":
+                        return payload
+                    elif event == "error":
+                        _raise_for_status(payload.get("status", 500), payload)
+            raise RuntimeError("API call failed: stream ended without a response")
+
         response = requests.post(
             f"{base_url}/api/chat",
             json=data,
@@ -1,7 +1,7 @@
 """
 Flask backend for Atlas AI - Thor 1.1 Model Interface
 """
-from flask import Flask, render_template, request, jsonify, session, send_file
+from flask import Flask, Response, render_template, request, jsonify, session, send_file, g, copy_current_request_context, stream_with_context
 from flask_cors import CORS
 import os
 import json
@@ -24,6 +24,13 @@ from config import (
     THOR_1_0_RESULT_SETTER_FILE, THOR_1_1_RESULT_SETTER_FILE, THOR_RESULT_SETTER_FILE,
     GEMS_DIR, GEMS_FILE,
     UI_TEMPLATE_DIR, UI_STATIC_DIR,
+    RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES,
+    CACHE_BACKEND, CACHE_PATH,
+    SEARCH_INDEX_PATH, RESEARCH_CACHE_PATH,
+    MODEL_MEMORY_BUDGET_MB, WARMUP_MODELS, WARMUP_WORKERS,
+    INFERENCE_MAX_BATCH, INFERENCE_BATCH_WAIT_MS,
+    PREFIX_CACHE_MAX_MB, PREFIX_CACHE_IDLE_SECONDS,
+    DEBUG_EVENT_LOG, BRAIN_MAX_LEARNED_ITEMS,
 )
 
 # Import utilities
@@ -35,6 +42,29 @@ from app_utils.model_loading_error_handling import (
     get_error_progress_message,
     log_model_loading_error
 )
+from app_utils.result_setter_index import get_result_setter_index
+from app_utils.cache_backend import configure_cache_backends, get_cache_backend, all_cache_stats
+from app_utils.chat_store import get_chat_store
+from app_utils.search_index import get_search_index, highlight_snippet, substring_search
+from app_utils.research_cache import get_research_cache
+from app_utils.model_registry import ModelRegistry, default_budget_bytes, files_footprint
+from app_utils.startup import StartupOrchestrator
+from app_utils.checkpoint_io import find_safetensors_checkpoint, torch_load_hook
+from app_utils.request_timing import StageTimer, chat_latency, set_current_timer
+from app_utils.event_log import BufferedEventLog
+from app_utils.chat_stream import ChatStream, current_stream, set_current_stream
+from app_utils.prefix_cache import get_prefix_cache, stable_window_start
+from app_utils.inference_scheduler import (
+    max_prompt_tokens,
+    configure_inference_schedulers,
+    get_inference_scheduler,
+    retire_inference_scheduler,
+    inference_scheduler_stats
+)
+
+# Caches and rate limits live on a pluggable backend (shared across workers with sqlite)
+configure_cache_backends(CACHE_BACKEND, CACHE_PATH)
+research_cache = get_research_cache(RESEARCH_CACHE_PATH)
 
 # Path manager for cleaner imports (replaces sys.path manipulation)
 path_manager = get_path_manager()
@@ -144,6 +174,7 @@ from brain import BrainConnector
 from biographical_handler import synthesize_knowledge, clean_promotional_text
 from refinement import (
     get_question_normalizer,
+    analyze_message,
     get_intent_router,
     get_knowledge_reranker,
     get_answer_refiner,
@@ -160,7 +191,11 @@ from refinement.response_variety import get_response_variety_manager
 from refinement.emotional_intelligence import get_emotional_intelligence
 from refinement.conversation_flow import get_conversation_flow_manager
 from refinement.personalization import get_personalization_engine
+import threading
+import secrets
 import time
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
 
 # Initialize Flask app with centralized configuration
@@ -184,38 +219,61 @@ def set_security_headers(response):
     return response
 
 # Response caching for improved performance (v1.4.4)
-from functools import lru_cache
 from hashlib import md5
 
-# Simple in-memory cache for responses (TTL-based)
-_response_cache = {}
-_cache_ttl = 300  # 5 minutes
+# Bounded LRU cache for responses (TTL-based, thread-safe)
+_response_cache = get_cache_backend(
+    "response",
+    ttl=RESPONSE_CACHE_TTL,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+)
 
-def get_cache_key(query: str, model: str, tone: str) -> str:
-    """Generate cache key for query."""
-    key_string = f"{query}:{model}:{tone}"
+def get_cache_key(query: str, model: str, tone: str, mode: tuple = ()) -> str:
+    """Generate cache key for query (keyed on the normalized question and the request mode)."""
+    try:
+        query = analyze_message(query).normalized_query or query
+    except Exception:
+        pass
+    key_string = f"{query}:{model}:{tone}:{':'.join(str(m) for m in mode)}"
     return md5(key_string.encode()).hexdigest()
 
-def get_cached_response(query: str, model: str, tone: str):
+def get_cached_response(query: str, model: str, tone: str, mode: tuple = ()):
     """Get cached response if available and not expired."""
-    cache_key = get_cache_key(query, model, tone)
-    if cache_key in _response_cache:
-        cached_data, timestamp = _response_cache[cache_key]
-        if time.time() - timestamp < _cache_ttl:
-            return cached_data
-        else:
-            # Expired, remove from cache
-            del _response_cache[cache_key]
-    return None
+    return _response_cache.get(get_cache_key(query, model, tone, mode))
 
-def cache_response(query: str, model: str, tone: str, response: str):
+def cache_response(query: str, model: str, tone: str, response: str, mode: tuple = ()):
     """Cache response for future use."""
-    cache_key = get_cache_key(query, model, tone)
-    _response_cache[cache_key] = (response, time.time())
-    # Limit cache size (keep last 100 entries)
-    if len(_response_cache) > 100:
-        oldest_key = min(_response_cache.keys(), key=lambda k: _response_cache[k][1])
-        del _response_cache[oldest_key]
+    _response_cache.set(get_cache_key(query, model, tone, mode), response)
+
+def response_cache_mode(message: str, history: list, gem_config=None, think_deeper=False,
+                        voice_mode=False, language='en-US', code_mode=False):
+    """
+    Cache key mode for a chat request, or None when its answer depends on more
+    than the message: a chat with earlier turns, a follow-up-like message, or
+    an unsaved (preview) gem.
+    """
+    if history:
+        return None
+    gem_id = (gem_config or {}).get("id") or ""
+    if gem_id == "preview":
+        return None
+    try:
+        if analyze_message(message).normalization().get("is_follow_up_like"):
+            return None
+    except Exception:
+        return None
+    return (gem_id, bool(think_deeper), bool(voice_mode), language or "", bool(code_mode))
+
+def _search_and_learn(research_engine, query: str):
+    """research_engine.search_and_learn through the persistent research cache (stale-while-revalidate)."""
+    if research_cache is None:
+        return research_engine.search_and_learn(query)
+    results, info = research_cache.get_or_fetch(query, "search_and_learn", lambda: research_engine.search_and_learn(query))
+    if info.get("cached"):
+        print(f"[Research Cache] {'Stale' if info['stale'] else 'Fresh'} hit ({info['age_seconds']}s old) for: {query[:80]}")
+    g.research_cache = info
+    return results
 
 # Input validation and sanitization (v1.4.3o)
 def validate_and_sanitize_input(text: str, max_length: int = 10000) -> tuple:
@@ -252,37 +310,23 @@ def validate_and_sanitize_input(text: str, max_length: int = 10000) -> tuple:
     
     return sanitized, True
 
-# Rate limiting (simple in-memory, v1.4.3o)
-_rate_limit_store = {}
+# Rate limiting (v1.4.3o, on the shared cache backend)
 _rate_limit_max = 60  # requests per window
 _rate_limit_window = 60  # seconds
+_rate_limit_store = get_cache_backend("rate_limit", ttl=_rate_limit_window, max_entries=10000)
 
 def check_rate_limit(identifier: str) -> tuple:
     """
     Check if request is within rate limit.
     Returns (is_allowed, remaining_requests)
-    """
-    now = time.time()
-    if identifier not in _rate_limit_store:
-        _rate_limit_store[identifier] = {'count': 1, 'window_start': now}
-        return True, _rate_limit_max - 1
-    
-    store = _rate_limit_store[identifier]
     
-    # Reset window if expired
-    if now - store['window_start'] > _rate_limit_window:
-        store['count'] = 1
-        store['window_start'] = now
-        return True, _rate_limit_max - 1
-    
-    # Check limit
-    if store['count'] >= _rate_limit_max:
-        remaining = 0
-    else:
-        store['count'] += 1
-        remaining = _rate_limit_max - store['count']
-    
-    return store['count'] <= _rate_limit_max, remaining
+    Counts requests per fixed window on the shared cache backend, so the limit
+    holds across worker processes when the sqlite backend is configured.
+    """
+    window = int(time.time() // _rate_limit_window)
+    count = _rate_limit_store.incr(f"{identifier}:{window}", ttl=_rate_limit_window)
+    remaining = max(0, _rate_limit_max - count)
+    return count <= _rate_limit_max, remaining
 
 
 def _slugify(text: str) -> str:
@@ -307,7 +351,18 @@ def _save_gems_db(db: dict) -> None:
         with open(GEMS_FILE, "w", encoding="utf-8") as f:
             json.dump(db, f, indent=2)
     except Exception:
-        pass
+        return
+    _index_gems(db.get("gems", []))
+
+
+def _index_gems(gems: list) -> None:
+    """Mirror the gems database into the full-text search index."""
+    if search_index is None:
+        return
+    try:
+        search_index.sync_gems(gems)
+    except Exception as e:
+        print(f"[Search Index] Failed to index gems: {e}")
 
 
 def _public_gem(g: dict) -> dict:
@@ -651,8 +706,9 @@ def _add_emoji_support(text: str, query: str) -> str:
         'ok': '👌',
     }
     
-    # Check for explicit emoji requests
-    for keyword, emoji in emoji_requests.items():
+    # Check for explicit emoji requests (every form mentions "emoji" or "give me a")
+    explicit_request = 'emoji' in query_lower or 'give me a' in query_lower
+    for keyword, emoji in (emoji_requests.items() if explicit_request else ()):
         if f'emoji {keyword}' in query_lower or f'{keyword} emoji' in query_lower or f'give me a {keyword}' in query_lower:
             # Add emoji at the end if not already present
             if emoji not in text:
@@ -694,6 +750,33 @@ model_instances = {
     'antelope-1.1': None
 }
 
+# Loads models on first use under a RAM budget, evicting the least recently used.
+# It keeps model_instances in sync, so readers of that dict see evictions as None.
+model_registry = ModelRegistry(default_budget_bytes(MODEL_MEMORY_BUDGET_MB), instances=model_instances)
+model_registry.pin('thor-1.2')  # default model stays resident
+
+# Concurrent predict calls for one model are queued and batched on that model's worker thread
+configure_inference_schedulers(
+    INFERENCE_MAX_BATCH, INFERENCE_BATCH_WAIT_MS,
+    prefix_cache=get_prefix_cache(PREFIX_CACHE_MAX_MB, PREFIX_CACHE_IDLE_SECONDS)
+)
+model_registry.on_evict(retire_inference_scheduler)
+
+# Debug events go through a background writer instead of opening the log file per request
+debug_events = BufferedEventLog(DEBUG_EVENT_LOG or None)
+
+
+def agent_log(message, data, hypothesis_id=None, run_id=None, location=None):
+    """Record a pipeline debug event (no-op unless ATLAS_DEBUG_EVENT_LOG is set)."""
+    if not debug_events.enabled:
+        return
+    now = time.time()
+    debug_events.write({
+        "id": f"log_{int(now)}_{secrets.token_hex(3)}", "timestamp": int(now * 1000),
+        "location": location, "message": message, "data": data,
+        "sessionId": "debug-session", "runId": run_id, "hypothesisId": hypothesis_id,
+    })
+
 # Global model loading progress tracking (0-100)
 model_loading_progress = {
     'thor-1.0': {'progress': 0, 'status': 'not_started', 'message': 'Not started'},
@@ -704,8 +787,18 @@ model_loading_progress = {
     'antelope-1.1': {'progress': 0, 'status': 'not_started', 'message': 'Not started'}
 }
 
+
+def _reset_loading_progress(model_name):
+    """An evicted model reloads on its next request, so its progress goes back to not started."""
+    progress_key = 'thor-1.1' if model_name == 'qwen3-thor' else model_name
+    if progress_key in model_loading_progress:
+        model_loading_progress[progress_key] = {'progress': 0, 'status': 'not_started', 'message': 'Not started'}
+
+
+model_registry.on_evict(_reset_loading_progress)
+
 # Brain connector
-brain_connector = BrainConnector()
+brain_connector = BrainConnector(max_learned=BRAIN_MAX_LEARNED_ITEMS)
 
 
 def _get_enhanced_context(all_messages: list, current_message: str, normalized_message: str, max_context_length: int = 15) -> list:
@@ -953,251 +1046,181 @@ def check_result_setter(query, model_name='thor-1.1'):
     Returns the authoritative answer if found, None otherwise.
     
     Uses fuzzy matching to handle variations in how questions are asked.
-    Supports both Thor 1.0 and Thor 1.1 result setters.
+    Supports both Thor 1.0 and Thor 1.1 result setters. Lookups go through a
+    resident index that only re-reads the files when they change on disk.
     """
     try:
         # Use appropriate result setter file based on model
         # Thor 1.1 imports base knowledge from Thor 1.0
-        qa_pairs = []
-        
-        # First, check model-specific file
         if model_name == 'thor-1.0':
-            rs_file = THOR_1_0_RESULT_SETTER_FILE
+            rs_files = (THOR_1_0_RESULT_SETTER_FILE,)
+        elif model_name == 'thor-1.1':
+            rs_files = (THOR_1_1_RESULT_SETTER_FILE, THOR_1_0_RESULT_SETTER_FILE)
         else:
-            rs_file = THOR_1_1_RESULT_SETTER_FILE
-        
-        if os.path.exists(rs_file):
-            with open(rs_file, 'r', encoding='utf-8') as f:
-                qa_data = json.load(f)
-                qa_pairs.extend(qa_data.get('qa_pairs', []))
-        
-        # For Thor 1.1, also import base knowledge from Thor 1.0
-        if model_name == 'thor-1.1' and os.path.exists(THOR_1_0_RESULT_SETTER_FILE):
-            with open(THOR_1_0_RESULT_SETTER_FILE, 'r', encoding='utf-8') as f:
-                qa_data_1_0 = json.load(f)
-                # Merge, avoiding duplicates by question
-                existing_questions = {qa.get('question', '').lower().strip() for qa in qa_pairs}
-                for qa in qa_data_1_0.get('qa_pairs', []):
-                    question_lower = qa.get('question', '').lower().strip()
-                    if question_lower and question_lower not in existing_questions:
-                        qa_pairs.append(qa)
-                        existing_questions.add(question_lower)
-        
-        if not qa_pairs:
-            return None
-        
-        # Normalize the query for matching
-        query_lower = query.lower().strip()
-        query_words = set(query_lower.split())
+            rs_files = (THOR_1_1_RESULT_SETTER_FILE,)
         
-        # Try exact match first
-        for qa in qa_pairs:
-            question_lower = qa.get('question', '').lower().strip()
-            if query_lower == question_lower:
-                print(f"[Result Setter] Exact match found for: {query}")
-                answers = [q.get('answer', '') for q in qa_pairs if q.get('question', '').lower().strip() == question_lower]
-                unique_answers = list(dict.fromkeys([a for a in answers if a]))
-                if len(unique_answers) > 1:
-                    combined = "; ".join(unique_answers)
-                    return combined
-                return qa.get('answer')
-        
-        # Try fuzzy matching - check if query contains the question or vice versa
-        best_match = None
-        best_score = 0
-        
-        def _strip_prefix(text: str, prefix_regex: str) -> str:
-            text = text.lower().strip()
-            text = re.sub(prefix_regex, "", text)
-            return text.strip(" ?!.")
-
-        for qa in qa_pairs:
-            question = qa.get('question', '').strip()
-            question_lower = question.lower()
-            question_words = set(question_lower.split())
-            
-            # SPECIAL CASE: tighten "who is ..." and "do you know ..." matches to avoid cross-person leakage
-            if query_lower.startswith(("who is", "who was", "who's")):
-                qname = _strip_prefix(query_lower, r"^who\s+(is|was|'s)\s+")
-                tname = _strip_prefix(question_lower, r"^who\s+(is|was|'s)\s+")
-                if qname and tname and not (qname in tname or tname in qname):
-                    continue  # names do not overlap -> skip
-
-            if query_lower.startswith("do you know"):
-                qname = _strip_prefix(query_lower, r"^do\s+you\s+know\s+")
-                tname = _strip_prefix(question_lower, r"^do\s+you\s+know\s+")
-                if qname and tname and not (qname in tname or tname in qname):
-                    continue  # names do not overlap -> skip
-
-            # Calculate word overlap score
-            common_words = query_words.intersection(question_words)
-            if len(common_words) > 0:
-                # Score based on percentage of words in common
-                score = len(common_words) / max(len(query_words), len(question_words))
-                
-                # Boost score if query contains question or vice versa
-                if question_lower in query_lower or query_lower in question_lower:
-                    score += 0.5
-                
-                # Check for key question words match
-                key_words = {'what', 'how', 'why', 'when', 'where', 'who', 'which'}
-                query_key_words = query_words.intersection(key_words)
-                question_key_words = question_words.intersection(key_words)
-                if query_key_words == question_key_words and len(query_key_words) > 0:
-                    score += 0.2
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = qa
-        
-        # Return match if score is high enough (at least 60% similarity)
-        min_score = 0.6
-        if query_lower.startswith(("who is", "who was", "who's", "do you know")):
-            min_score = 0.8
-
-        if best_match and best_score >= min_score:
-            print(f"[Result Setter] Fuzzy match found (score: {best_score:.2f}) for: {query}")
-            print(f"[Result Setter] Matched question: {best_match.get('question')}")
-            matched_question_lower = best_match.get('question', '').lower().strip()
-            sibling_answers = [
-                q.get('answer', '')
-                for q in qa_pairs
-                if q.get('question', '').lower().strip() == matched_question_lower
-            ]
-            unique_answers = list(dict.fromkeys([a for a in sibling_answers if a]))
-            if len(unique_answers) > 1:
-                combined = "; ".join(unique_answers)
-                return combined
-            return best_match.get('answer')
-        
-        return None
+        return get_result_setter_index(*rs_files).lookup(query)
         
     except Exception as e:
         print(f"[Result Setter] Error checking result setter: {e}")
         return None
 
 
-def get_model(model_name='thor-1.1', force_reload=False):
-    """Get or initialize the model instance.
-
-    Args:
-        model_name: 'thor-1.0', 'thor-1.1', 'thor-1.2', 'qwen3-thor', 'antelope-1.0', 'antelope-1.1', or 'knowledge-only' (default: thor-1.1)
-        force_reload: Force reload of the model
-    """
-    global model_instances, MODEL_DIR, TOKENIZER_DIR, CONFIG_PATH, THOR_DIR
-
-    # Handle knowledge-only mode (no model needed)
+def _resolve_model_name(model_name):
+    """Map a requested model name onto a model_instances key (None for knowledge-only)."""
     if model_name == 'knowledge-only':
         return None
-
     # Map only thor-1.1 to qwen3-thor (combined model). Thor 1.2 has its own backend.
     if model_name == 'thor-1.1':
-        model_name = 'qwen3-thor'
+        return 'qwen3-thor'
+    if model_name not in model_instances or model_name == 'ai-direct':
+        return 'thor-1.2'  # Default to Thor 1.2 (improved, loads instantly)
+    return model_name
 
-    # Validate model name
-    if model_name not in model_instances:
-        model_name = 'thor-1.2'  # Default to Thor 1.2 (improved, loads instantly)
 
-    # Set paths based on model version
+def _model_paths(model_name):
+    """(thor_dir, model_dir, tokenizer_dir, config_file) for a resolved model name."""
     if model_name == 'thor-1.0':
-        THOR_DIR = THOR_1_0_DIR
+        thor_dir = THOR_1_0_DIR
         model_dir = str(THOR_1_0_DIR / "models")
         tokenizer_dir = str(THOR_1_0_DIR / "models")
         config_file = str(THOR_1_0_DIR / "config" / "config.yaml")
     elif model_name == 'thor-1.2':
-        THOR_DIR = THOR_1_2_DIR
+        thor_dir = THOR_1_2_DIR
         model_dir = str(THOR_1_2_DIR / "models")
         tokenizer_dir = str(THOR_1_2_DIR / "models")
         config_file = str(THOR_1_2_DIR / "config" / "config.yaml")
     elif model_name == 'antelope-1.0':
-        THOR_DIR = ANTELOPE_1_0_DIR
+        thor_dir = ANTELOPE_1_0_DIR
         model_dir = str(ANTELOPE_1_0_DIR / "models")
         tokenizer_dir = str(ANTELOPE_1_0_DIR / "models")
         config_file = str(ANTELOPE_1_0_DIR / "config" / "config.yaml")
+    elif model_name == 'antelope-1.1':
+        thor_dir = ANTELOPE_1_1_DIR
+        model_dir = str(ANTELOPE_1_1_DIR / "models")
+        tokenizer_dir = str(ANTELOPE_1_1_DIR / "models")
+        config_file = str(ANTELOPE_1_1_DIR / "config" / "config.yaml")
     elif model_name == 'qwen3-thor':
         # Use combined Qwen3-4B + Thor 1.1 model
-        THOR_DIR = THOR_1_1_DIR
+        thor_dir = THOR_1_1_DIR
         model_dir = str(THOR_1_1_DIR / "models")
         tokenizer_dir = str(THOR_1_1_DIR / "models")
         config_file = str(THOR_1_1_DIR / "config" / "config.yaml")
     else:  # thor-1.1 (legacy)
-        THOR_DIR = THOR_1_1_DIR
+        thor_dir = THOR_1_1_DIR
         model_dir = str(THOR_1_1_DIR / "models")
         tokenizer_dir = str(THOR_1_1_DIR / "models")
         config_file = str(THOR_1_1_DIR / "config" / "config.yaml")
-    
-    if model_instances[model_name] is None or force_reload:
-        # In serverless/lite deployments we may not ship torch/model weights.
-        if torch is None:
-            model_loading_progress[model_name] = {'progress': 0, 'status': 'failed', 'message': 'PyTorch not available'}
-            return None
-        
-        # Update progress tracking
+    return thor_dir, model_dir, tokenizer_dir, config_file
+
+
+# Every Thor/Antelope dir ships its own top-level `inference` module (and siblings
+# such as `models`), so loads that import one must not overlap.
+_THOR_IMPORT_LOCK = threading.Lock()
+
+
+@contextmanager
+def _thor_import_scope(thor_dir):
+    """
+    Hold the Thor import lock with `thor_dir` first on sys.path and modules
+    imported from the other model dirs evicted from sys.modules, so
+    `from inference import AllRounderInference` and the model's construction
+    see only this dir's code. Models already built keep their own classes.
+    """
+    global THOR_DIR
+    model_dirs = [str(d) for d in (THOR_1_0_DIR, THOR_1_1_DIR, THOR_1_2_DIR, ANTELOPE_1_0_DIR, ANTELOPE_1_1_DIR)]
+    current = os.path.abspath(str(thor_dir))
+    others = tuple(os.path.abspath(d) + os.sep for d in model_dirs if os.path.abspath(d) != current)
+    with _THOR_IMPORT_LOCK:
+        THOR_DIR = thor_dir
+        for path in model_dirs:
+            while path in sys.path:
+                sys.path.remove(path)
+        sys.path.insert(0, str(thor_dir))
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, '__file__', None)
+            if module_file and os.path.abspath(module_file).startswith(others):
+                del sys.modules[name]
+        yield
+
+
+def _estimate_model_footprint(model_name):
+    """Expected RAM for a model: the size of its weight files."""
+    thor_dir, model_dir, _tokenizer_dir, _config_file = _model_paths(model_name)
+    if model_name == 'qwen3-thor':
+        return files_footprint([str(thor_dir / "qwen3-4b"), model_dir])
+    return files_footprint([_checkpoint_path(model_dir)])
+
+
+def _checkpoint_path(model_dir):
+    """final_model.safetensors when the checkpoint was converted and is up to date (mapped, no unpickling), else final_model.pt."""
+    return find_safetensors_checkpoint(model_dir) or os.path.join(model_dir, "final_model.pt")
+
+
+def get_model(model_name='thor-1.1', force_reload=False):
+    """Get the model instance, loading it through the model registry on first use.
+
+    Args:
+        model_name: 'thor-1.0', 'thor-1.1', 'thor-1.2', 'qwen3-thor', 'antelope-1.0', 'antelope-1.1', or 'knowledge-only' (default: thor-1.1)
+        force_reload: Force reload of the model
+    """
+    model_name = _resolve_model_name(model_name)
+    if model_name is None:
+        return None  # knowledge-only mode (no model needed)
+
+    # In serverless/lite deployments we may not ship torch/model weights.
+    if torch is None:
         progress_key = 'thor-1.1' if model_name == 'qwen3-thor' else model_name
-        if progress_key in model_loading_progress:
-            model_loading_progress[progress_key]['status'] = 'loading'
-            model_loading_progress[progress_key]['progress'] = 10
-            model_loading_progress[progress_key]['message'] = 'Initializing model loading...'
-        
-        if model_name == 'qwen3-thor':
-            # Load combined Qwen3-4B + Thor 1.1 model using AllRounderInference
-            # AllRounderInference internally uses Qwen3ThorWrapper which loads Qwen3-4B
-            try:
-                # #region agent log
-                import json
-                try:
-                    with open('/Users/arulhania/Coding/atlas-ai/.cursor/debug.log', 'a') as f:
-                        f.write(json.dumps({"id":f"log_{int(__import__('time').time())}_{__import__('secrets').token_hex(3)}","timestamp":int(__import__('time').time()*1000),"location":"app.py:1104","message":"Starting Qwen3-Thor model load","data":{"model_name":model_name,"config_file":config_file},"sessionId":"debug-session","runId":"verify-fixes","hypothesisId":"B"})+"\n")
-                except: pass
-                # #endregion agent log
-                # Update progress
-                if progress_key in model_loading_progress:
-                    model_loading_progress[progress_key]['progress'] = 20
-                    model_loading_progress[progress_key]['message'] = 'Setting up paths...'
-                
-                # Ensure correct path is in sys.path for imports
-                # Remove ALL thor paths first to avoid conflicts
-                thor_paths_to_remove = [
-                    str(THOR_1_0_DIR),
-                    str(THOR_1_1_DIR),
-                    str(THOR_1_2_DIR),
-                    str(ANTELOPE_1_0_DIR),
-                    str(ANTELOPE_1_1_DIR)
-                ]
-                for path in thor_paths_to_remove:
-                    if path in sys.path:
-                        sys.path.remove(path)
-                
-                # Now add the correct path
-                current_thor_path = str(THOR_DIR)
-                sys.path.insert(0, current_thor_path)
+        model_loading_progress[progress_key] = {'progress': 0, 'status': 'failed', 'message': 'PyTorch not available'}
+        return None
+
+    return model_registry.get(
+        model_name,
+        lambda: _load_model_instance(model_name, force_reload),
+        estimate=lambda: _estimate_model_footprint(model_name),
+        force_reload=force_reload,
+    )
 
+
+def _load_model_instance(model_name, force_reload=False):
+    """Load one model (called by the registry under that model's lock); None on failure."""
+    thor_dir, model_dir, tokenizer_dir, config_file = _model_paths(model_name)
+    instance = None
+
+    # Update progress tracking
+    progress_key = 'thor-1.1' if model_name == 'qwen3-thor' else model_name
+    if progress_key in model_loading_progress:
+        model_loading_progress[progress_key]['status'] = 'loading'
+        model_loading_progress[progress_key]['progress'] = 10
+        model_loading_progress[progress_key]['message'] = 'Initializing model loading...'
+    
+    if model_name == 'qwen3-thor':
+        # Load combined Qwen3-4B + Thor 1.1 model using AllRounderInference
+        # AllRounderInference internally uses Qwen3ThorWrapper which loads Qwen3-4B
+        try:
+            # #region agent log
+            agent_log("Starting Qwen3-Thor model load", {"model_name":model_name,"config_file":config_file}, hypothesis_id="B", run_id="verify-fixes", location="app.py:1104")
+            # #endregion agent log
+            # Update progress
+            if progress_key in model_loading_progress:
+                model_loading_progress[progress_key]['progress'] = 20
+                model_loading_progress[progress_key]['message'] = 'Setting up paths...'
+            
+            # Import and build under the Thor import lock, with thor-1.1 first on sys.path
+            with _thor_import_scope(thor_dir):
                 # Update progress
                 if progress_key in model_loading_progress:
                     model_loading_progress[progress_key]['progress'] = 40
                     model_loading_progress[progress_key]['message'] = 'Importing model classes...'
 
                 # Use AllRounderInference which loads Qwen3ThorWrapper (Qwen3-4B + Thor task heads)
-                # Force fresh import to avoid cached thor-1.0 module
-                import importlib
-                # Remove cached inference module if it exists (to avoid importing thor-1.0 version)
-                modules_to_remove = [k for k in list(sys.modules.keys()) if k == 'inference' or k.endswith('.inference')]
-                for mod in modules_to_remove:
-                    try:
-                        mod_file = sys.modules[mod].__file__ if hasattr(sys.modules[mod], '__file__') else None
-                        if mod_file and 'thor-1.0' in str(mod_file):
-                            del sys.modules[mod]
-                    except:
-                        pass
-                
-                # Now import fresh from current directory (thor-1.1)
                 from inference import AllRounderInference  # type: ignore
-                
+            
                 # Update progress
                 if progress_key in model_loading_progress:
                     model_loading_progress[progress_key]['progress'] = 60
                     model_loading_progress[progress_key]['message'] = 'Loading Qwen3-4B base model...'
-                
+            
                 # AllRounderInference will load Qwen3-4B internally via Qwen3ThorWrapper
                 # Qwen3Loader will automatically use local path (models/thor-1.1/qwen3-4b/) if available
                 # Otherwise falls back to HuggingFace
@@ -1207,14 +1230,14 @@ def get_model(model_name='thor-1.1', force_reload=False):
                     config_file = str(THOR_1_1_DIR / "config" / "config.yaml")
                     if not os.path.exists(config_file):
                         raise FileNotFoundError(f"Config file not found: {config_file}")
-                
+            
                 print(f"[Qwen3-Thor] Using config file: {config_file}")
                 print(f"[Qwen3-Thor] Config file exists: {os.path.exists(config_file)}")
-                
+            
                 try:
                     print(f"[Qwen3-Thor] Creating AllRounderInference instance...")
                     print(f"[Qwen3-Thor] model_path='', tokenizer_path='', config_path='{config_file}'")
-                    model_instances[model_name] = AllRounderInference(
+                    instance = AllRounderInference(
                         model_path="",  # Not used - Qwen3 loaded from local path or HuggingFace
                         tokenizer_path="",  # Not used - Qwen3 tokenizer loaded from local path or HuggingFace
                         config_path=config_file
@@ -1227,13 +1250,69 @@ def get_model(model_name='thor-1.1', force_reload=False):
                     print("[Qwen3-Thor] Full traceback:")
                     traceback.print_exc()
                     raise
+            
+            # #region agent log
+            agent_log("Qwen3-Thor model loaded successfully", {"model_name":model_name,"has_model":instance is not None}, hypothesis_id="B", run_id="verify-fixes", location="app.py:1138")
+            # #endregion agent log
+            
+            # Update progress - complete
+            if progress_key in model_loading_progress:
+                model_loading_progress[progress_key]['progress'] = 100
+                model_loading_progress[progress_key]['status'] = 'loaded'
+                model_loading_progress[progress_key]['message'] = 'Model loaded successfully'
+            
+            if force_reload:
+                print(f"✅ Combined Qwen3-4B + Thor 1.1 model reloaded successfully")
+            else:
+                print(f"✅ Combined Qwen3-4B + Thor 1.1 model loaded successfully")
+                print(f"   Using Qwen3-4B base model (from local path or HuggingFace) with Thor task heads")
+        except Exception as e:
+            print(f"❌ Error loading combined Qwen3-Thor model: {e}")
+            import traceback
+            traceback.print_exc()
+            instance = None
+            if progress_key in model_loading_progress:
+                # Use error handling utility to log and track error with progress
+                log_model_loading_error(model_name, e, model_loading_progress.get(progress_key))
+                model_loading_progress[progress_key]['status'] = 'failed'
+                model_loading_progress[progress_key]['message'] = f'Loading failed: {str(e)[:100]}'
+                # Ensure progress is preserved even on error
+                if 'progress' not in model_loading_progress[progress_key]:
+                    model_loading_progress[progress_key]['progress'] = 0
+    else:
+        # Load traditional Thor models
+        model_path = _checkpoint_path(model_dir)
+        tokenizer_path = os.path.join(tokenizer_dir, "tokenizer.json")
+
+        if os.path.exists(model_path) and os.path.exists(tokenizer_path):
+            try:
+                # Update progress
+                if progress_key in model_loading_progress:
+                    model_loading_progress[progress_key]['progress'] = 20
+                    model_loading_progress[progress_key]['message'] = 'Checking model files...'
                 
-                # #region agent log
-                try:
-                    with open('/Users/arulhania/Coding/atlas-ai/.cursor/debug.log', 'a') as f:
-                        f.write(json.dumps({"id":f"log_{int(__import__('time').time())}_{__import__('secrets').token_hex(3)}","timestamp":int(__import__('time').time()*1000),"location":"app.py:1138","message":"Qwen3-Thor model loaded successfully","data":{"model_name":model_name,"has_model":model_instances[model_name] is not None},"sessionId":"debug-session","runId":"verify-fixes","hypothesisId":"B"})+"\n")
-                except: pass
-                # #endregion agent log
+                # Import and build under the Thor import lock, with this model's dir first on sys.path
+                with _thor_import_scope(thor_dir):
+                    # Update progress
+                    if progress_key in model_loading_progress:
+                        model_loading_progress[progress_key]['progress'] = 40
+                        model_loading_progress[progress_key]['message'] = 'Importing model classes...'
+
+                    # Lazy import to avoid hard dependency in lightweight deployments.
+                    from inference import AllRounderInference  # type: ignore
+                
+                    # Update progress
+                    if progress_key in model_loading_progress:
+                        model_loading_progress[progress_key]['progress'] = 60
+                        model_loading_progress[progress_key]['message'] = 'Loading model weights...'
+                
+                    # The model dir's inference code calls torch.load(model_path) itself
+                    with (torch_load_hook() if model_path.endswith(".safetensors") else nullcontext()):
+                        instance = AllRounderInference(
+                            model_path=model_path,
+                            tokenizer_path=tokenizer_path,
+                            config_path=config_file
+                        )
                 
                 # Update progress - complete
                 if progress_key in model_loading_progress:
@@ -1242,15 +1321,12 @@ def get_model(model_name='thor-1.1', force_reload=False):
                     model_loading_progress[progress_key]['message'] = 'Model loaded successfully'
                 
                 if force_reload:
-                    print(f"✅ Combined Qwen3-4B + Thor 1.1 model reloaded successfully")
+                    print(f"Model {model_name} reloaded successfully (auto-trained)")
                 else:
-                    print(f"✅ Combined Qwen3-4B + Thor 1.1 model loaded successfully")
-                    print(f"   Using Qwen3-4B base model (from local path or HuggingFace) with Thor task heads")
+                    print(f"Model {model_name} loaded successfully")
             except Exception as e:
-                print(f"❌ Error loading combined Qwen3-Thor model: {e}")
-                import traceback
-                traceback.print_exc()
-                model_instances[model_name] = None
+                print(f"Error loading model {model_name}: {e}")
+                instance = None
                 if progress_key in model_loading_progress:
                     # Use error handling utility to log and track error with progress
                     log_model_loading_error(model_name, e, model_loading_progress.get(progress_key))
@@ -1260,94 +1336,118 @@ def get_model(model_name='thor-1.1', force_reload=False):
                     if 'progress' not in model_loading_progress[progress_key]:
                         model_loading_progress[progress_key]['progress'] = 0
         else:
-            # Load traditional Thor models
-            model_path = os.path.join(model_dir, "final_model.pt")
-            tokenizer_path = os.path.join(tokenizer_dir, "tokenizer.json")
+            print(f"Model files not found for {model_name}. Expected: {model_path}, {tokenizer_path}")
+            if progress_key in model_loading_progress:
+                # Use error handling utility
+                error = FileNotFoundError(f"Model files not found: {model_path}, {tokenizer_path}")
+                log_model_loading_error(model_name, error, model_loading_progress.get(progress_key))
+                model_loading_progress[progress_key]['status'] = 'failed'
+                model_loading_progress[progress_key]['message'] = 'Model files not found'
+                # Ensure progress is preserved even on error
+                if 'progress' not in model_loading_progress[progress_key]:
+                    model_loading_progress[progress_key]['progress'] = 0
+
+    return instance
+
+
+def _model_predict(model_name, model, text, **kwargs):
+    """model.predict through the model's batching scheduler (direct call for unregistered instances)."""
+    key = 'ai-direct' if model_name == 'ai-direct' else _resolve_model_name(model_name)
+    if key and model_instances.get(key) is model:
+        stream = current_stream()
+        on_token = stream.token if stream is not None else None
+        return get_inference_scheduler(key, model).predict(text, on_token=on_token, **kwargs)
+    kwargs.pop('cache_key', None)
+    return model.predict(text, **kwargs)
+
+
+def _warm_thor_1_1():
+    """Load Thor 1.1 (qwen3-thor) and check it can generate before calling it loaded."""
+    model = get_model(model_name='thor-1.1')
+    if model is None or not hasattr(model, 'predict'):
+        raise Exception("Model returned None or is not functional after loading attempt")
+    try:
+        test_result = model.predict("test", task="text_generation", max_new_tokens=5)
+    except Exception as e:
+        raise Exception(f"Model loaded but not functional: {e}")
+    if not test_result or 'generated_text' not in test_result:
+        raise Exception("Model loaded but failed basic functionality test")
+    return model
 
-            if os.path.exists(model_path) and os.path.exists(tokenizer_path):
-                try:
-                    # Update progress
-                    if progress_key in model_loading_progress:
-                        model_loading_progress[progress_key]['progress'] = 20
-                        model_loading_progress[progress_key]['message'] = 'Checking model files...'
-                    
-                    # Ensure correct path is in sys.path for imports
-                    # Remove ALL thor paths first to avoid conflicts
-                    thor_paths_to_remove = [
-                        str(THOR_1_0_DIR),
-                        str(THOR_1_1_DIR),
-                        str(THOR_1_2_DIR),
-                        str(ANTELOPE_1_0_DIR),
-                        str(ANTELOPE_1_1_DIR)
-                    ]
-                    for path in thor_paths_to_remove:
-                        if path in sys.path:
-                            sys.path.remove(path)
-                    
-                    # Now add the correct path
-                    current_thor_path = str(THOR_DIR)
-                    sys.path.insert(0, current_thor_path)
 
-                    # Update progress
-                    if progress_key in model_loading_progress:
-                        model_loading_progress[progress_key]['progress'] = 40
-                        model_loading_progress[progress_key]['message'] = 'Importing model classes...'
+def _load_direct_model():
+    """Load DialoGPT-medium as the 'ai-direct' model, charged against the model budget."""
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    import torch
 
-                    # Lazy import to avoid hard dependency in lightweight deployments.
-                    from inference import AllRounderInference  # type: ignore
-                    
-                    # Update progress
-                    if progress_key in model_loading_progress:
-                        model_loading_progress[progress_key]['progress'] = 60
-                        model_loading_progress[progress_key]['message'] = 'Loading model weights...'
-                    
-                    model_instances[model_name] = AllRounderInference(
-                        model_path=model_path,
-                        tokenizer_path=tokenizer_path,
-                        config_path=config_file
-                    )
-                    
-                    # Update progress - complete
-                    if progress_key in model_loading_progress:
-                        model_loading_progress[progress_key]['progress'] = 100
-                        model_loading_progress[progress_key]['status'] = 'loaded'
-                        model_loading_progress[progress_key]['message'] = 'Model loaded successfully'
-                    
-                    if force_reload:
-                        print(f"Model {model_name} reloaded successfully (auto-trained)")
-                    else:
-                        print(f"Model {model_name} loaded successfully")
-                except Exception as e:
-                    print(f"Error loading model {model_name}: {e}")
-                    model_instances[model_name] = None
-                    if progress_key in model_loading_progress:
-                        # Use error handling utility to log and track error with progress
-                        log_model_loading_error(model_name, e, model_loading_progress.get(progress_key))
-                        model_loading_progress[progress_key]['status'] = 'failed'
-                        model_loading_progress[progress_key]['message'] = f'Loading failed: {str(e)[:100]}'
-                        # Ensure progress is preserved even on error
-                        if 'progress' not in model_loading_progress[progress_key]:
-                            model_loading_progress[progress_key]['progress'] = 0
+    tokenizer = AutoTokenizer.from_pretrained("microsoft/DialoGPT-medium")
+    model = AutoModelForCausalLM.from_pretrained(
+        "microsoft/DialoGPT-medium",
+        torch_dtype=torch.float16,
+        device_map={"": "cpu"}
+    )
+    direct = {'model': model, 'tokenizer': tokenizer, 'type': 'direct'}
+    model_registry.put('ai-direct', direct)
+    print(f"AI model has {model.num_parameters():,} parameters")
+    return direct
+
+
+_DIRECT_MAX_NEW_TOKENS = 100
+
+
+def _dialog_prompt(direct, history, message, max_new_tokens=_DIRECT_MAX_NEW_TOKENS):
+    """
+    DialoGPT's multi-turn prompt: the chat's turns separated by EOS, ending with the new message.
+
+    The window of earlier turns comes from stable_window_start, so it only moves
+    when the prompt would not fit next to the reply; in between, each turn's prompt
+    extends the previous one and the prefix cache can reuse its KV state.
+    """
+    tokenizer = direct['tokenizer']
+    eos = tokenizer.eos_token or ''
+    turns = [m.get('content', '') for m in (history or []) if m.get('content')] + [message]
+    lengths = [len(tokenizer.encode(turn)) + 1 for turn in turns]  # +1 for the EOS after each turn
+    start = stable_window_start(lengths, max_prompt_tokens(direct, max_new_tokens))
+    return eos.join(turns[start:]) + eos
+
+
+def _start_auto_trainer(orchestrator):
+    """Start the auto-trainer once warm-up is over, if any model came up."""
+    if not any(v is not None for v in model_instances.values()):
+        print("⚠️  No models loaded - running in fallback mode")
+        return
+    try:
+        if get_auto_trainer is not None and callable(get_auto_trainer):
+            auto_trainer = get_auto_trainer()
+            if auto_trainer is not None:
+                auto_trainer.start()
+                print("Auto-Trainer is running in the background!")
             else:
-                print(f"Model files not found for {model_name}. Expected: {model_path}, {tokenizer_path}")
-                if progress_key in model_loading_progress:
-                    # Use error handling utility
-                    error = FileNotFoundError(f"Model files not found: {model_path}, {tokenizer_path}")
-                    log_model_loading_error(model_name, error, model_loading_progress.get(progress_key))
-                    model_loading_progress[progress_key]['status'] = 'failed'
-                    model_loading_progress[progress_key]['message'] = 'Model files not found'
-                    # Ensure progress is preserved even on error
-                    if 'progress' not in model_loading_progress[progress_key]:
-                        model_loading_progress[progress_key]['progress'] = 0
-    
-    # If model is already loaded, mark progress as complete
-    # Only update progress to "loaded" if model is actually functional
-    if model_instances[model_name] is not None:
-        progress_key = 'thor-1.1' if model_name == 'qwen3-thor' else model_name
-        # Don't automatically mark as loaded - let the calling code verify functionality first
-        # This prevents false "100% loaded" when model loading actually failed
-    
-    return model_instances[model_name]
+                print("⚠️  Auto-trainer not available (running in fallback mode)")
+    except Exception as e:
+        print(f"❌ Failed to start auto-trainer: {e}")
+
+
+_WARMUP_LOADERS = {
+    'thor-1.2': lambda: get_model(model_name='thor-1.2'),
+    'thor-1.0': lambda: get_model(model_name='thor-1.0'),
+    'thor-1.1': _warm_thor_1_1,
+    'ai-direct': _load_direct_model,
+}
+
+# Background model warm-up; the server answers from knowledge while it runs.
+startup = StartupOrchestrator(model_loading_progress, max_workers=WARMUP_WORKERS)
+for _name in WARMUP_MODELS:
+    if _name in _WARMUP_LOADERS:
+        startup.add(_name, _WARMUP_LOADERS[_name], required=(_name == 'thor-1.2'))
+startup.on_complete(_start_auto_trainer)
+
+
+@app.before_request
+def _ensure_warmup():
+    """Start warm-up in this worker on its first request (gunicorn never runs __main__)."""
+    if not startup.started:
+        startup.start()
 
 
 def generate_chat_name(first_message, first_response):
@@ -1584,68 +1684,87 @@ def fetch_image_from_web(subject: str) -> str:
         return f"https://picsum.photos/seed/{seed}/960/540"
 
 
+def chat_name_from_messages(messages):
+    """Name a chat from its first question/response, or None if it has no exchange yet."""
+    if len(messages) < 2:
+        return None
+    first_user_msg = next((msg.get("content", "") for msg in messages if msg.get("role") == "user"), "")
+    first_assistant_msg = next((msg.get("content", "") for msg in messages if msg.get("role") == "assistant"), "")
+    if first_user_msg and first_assistant_msg:
+        return generate_chat_name(first_user_msg, first_assistant_msg)
+    return None
+
+
+# Chats are snapshot + append-only log files (see app_utils/chat_store.py);
+# the store keeps the full-text search index (app_utils/search_index.py) current.
+# Chats saved without a name are named when the metadata index is (re)built.
+search_index = get_search_index(SEARCH_INDEX_PATH)
+chat_store = get_chat_store(CHATS_DIR, search=search_index, namer=chat_name_from_messages)
+conversation_store = get_chat_store(CONVERSATIONS_DIR, indexed=False)
+
+
 def save_chat(chat_id, messages, chat_name=None):
-    """Save chat to disk."""
-    chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
-    
-    # Load existing chat to preserve name if it exists
-    existing_chat = load_chat(chat_id)
+    """Save chat to disk (new turns are appended to the chat's log)."""
+    # Use existing metadata to preserve name if it exists
+    existing_chat = chat_store.get_meta(chat_id)
     if existing_chat and existing_chat.get("name") and not chat_name:
         chat_name = existing_chat.get("name")
-    elif not chat_name and len(messages) >= 2:
+    elif not chat_name:
         # Generate name from first question/response
-        first_user_msg = next((msg.get("content", "") for msg in messages if msg.get("role") == "user"), "")
-        first_assistant_msg = next((msg.get("content", "") for msg in messages if msg.get("role") == "assistant"), "")
-        if first_user_msg and first_assistant_msg:
-            chat_name = generate_chat_name(first_user_msg, first_assistant_msg)
+        chat_name = chat_name_from_messages(messages)
     
-    chat_data = {
+    chat_meta = {
         "chat_id": chat_id,
         "created_at": existing_chat.get("created_at", datetime.now().isoformat()) if existing_chat else datetime.now().isoformat(),
         "name": chat_name or "New Chat",
-        "messages": messages
     }
-    with open(chat_file, 'w') as f:
-        json.dump(chat_data, f, indent=2)
+    chat_store.save(chat_id, messages, chat_meta)
 
 
 def load_chat(chat_id):
     """Load chat from disk."""
-    chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
-    if os.path.exists(chat_file):
-        with open(chat_file, 'r') as f:
-            return json.load(f)
-    return None
+    return chat_store.load(chat_id)
+
 
+def _iter_chats():
+    """Yield every stored chat (snapshot + log), skipping unreadable ones."""
+    for chat_id in chat_store.list_ids():
+        try:
+            chat_data = chat_store.load(chat_id)
+        except Exception as e:
+            print(f"[Chats] Could not read chat {chat_id}: {e}")
+            continue
+        if chat_data:
+            chat_data.setdefault("chat_id", chat_id)
+            yield chat_data
 
-def list_chats():
-    """List all saved chats."""
+
+def list_chats(offset=0, limit=None, sort="created_at", descending=True, project_id=None):
+    """List saved chats from the metadata index (newest first by default)."""
+    if chat_store.index is not None:
+        return chat_store.index.list(offset=offset, limit=limit, sort=sort, descending=descending, project_id=project_id)
+
+    # No index available: fall back to reading metadata from each chat
     chats = []
-    if os.path.exists(CHATS_DIR):
-        for file in os.listdir(CHATS_DIR):
-            if file.endswith('.json'):
-                chat_id = file[:-5]  # Remove .json
-                chat_data = load_chat(chat_id)
-                if chat_data:
-                    # Generate name if missing
-                    name = chat_data.get("name")
-                    if not name and len(chat_data.get("messages", [])) >= 2:
-                        first_user_msg = next((msg.get("content", "") for msg in chat_data.get("messages", []) if msg.get("role") == "user"), "")
-                        first_assistant_msg = next((msg.get("content", "") for msg in chat_data.get("messages", []) if msg.get("role") == "assistant"), "")
-                        if first_user_msg and first_assistant_msg:
-                            name = generate_chat_name(first_user_msg, first_assistant_msg)
-                            # Update the chat with the generated name
-                            save_chat(chat_id, chat_data.get("messages", []), name)
-                    
-                    chats.append({
-                        "chat_id": chat_id,
-                        "name": name or "New Chat",
-                        "created_at": chat_data.get("created_at", ""),
-                        "message_count": len(chat_data.get("messages", []))
-                    })
-    # Sort by created_at, newest first
-    chats.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    return chats
+    for chat_id in chat_store.list_ids():
+        meta = chat_store.get_meta(chat_id)
+        if not meta:
+            continue
+        name = meta.get("name")
+        if not name and meta.get("message_count", 0) >= 2:
+            messages = (chat_store.load(chat_id) or {}).get("messages", [])
+            name = chat_name_from_messages(messages)
+            if name:
+                save_chat(chat_id, messages, name)
+        chats.append({
+            "chat_id": chat_id,
+            "name": name or "New Chat",
+            "created_at": meta.get("created_at", ""),
+            "message_count": meta.get("message_count", 0)
+        })
+    chats.sort(key=lambda x: x.get(sort) or "", reverse=descending)
+    end = offset + limit if limit is not None else None
+    return chats[offset:end]
 
 
 # API Key Management
@@ -1998,69 +2117,86 @@ def dev_chat():
         return chat()
 
 
-def _handle_multi_model_comparison(compare_models, contextual_input, task, think_deeper, is_voice_mode,
-                                  effective_tone, language_instruction, response_language, data):
-    """Handle multi-model comparison for beta feature."""
-    try:
-        comparison_results = []
+_COMPARISON_MAX_MODELS = 3
+_comparison_pool = ThreadPoolExecutor(max_workers=_COMPARISON_MAX_MODELS, thread_name_prefix="atlas-compare")
 
-        for model_name in compare_models[:3]:  # Limit to 3 models max
-            try:
-                # Load the specific model
-                model = _load_model_for_comparison(model_name, data)
 
-                if not model:
-                    comparison_results.append({
-                        "model": model_name,
-                        "error": f"Model {model_name} not available"
-                    })
-                    continue
+def _run_model_comparison(model_name, model, load_ms, contextual_input, task, max_gen_tokens):
+    """Generate one comparison model's answer (the model is already loaded); returns its result entry."""
+    started = time.monotonic()
+    entry = {"model": model_name}
+    try:
+        if not model:
+            entry["error"] = f"Model {model_name} not available"
+        else:
+            # Generate response
+            if task == 'text_generation':
+                result = _model_predict(model_name, model, contextual_input, task=task, max_new_tokens=max_gen_tokens)
+            else:
+                result = _model_predict(model_name, model, contextual_input, task=task)
+
+            response = result.get('generated_text') if result else None
+            if response is None:
+                entry["error"] = "Failed to generate response"
+            elif len(response.strip()) > 10:  # Basic validation
+                entry.update({
+                    "response": response,
+                    "length": len(response),
+                    "timestamp": datetime.now().isoformat()
+                })
+            else:
+                entry["error"] = "Generated response too short or invalid"
+        entry["timing"] = {"load_ms": load_ms, "total_ms": round(load_ms + (time.monotonic() - started) * 1000, 1)}
+    except Exception as e:
+        print(f"[Beta] Error generating response for {model_name}: {e}")
+        entry["error"] = str(e)
+        entry["timing"] = {"total_ms": round(load_ms + (time.monotonic() - started) * 1000, 1)}
+    return entry
 
-                # Set generation parameters
-                if is_voice_mode:
-                    max_gen_tokens = 256 if think_deeper else 128
-                else:
-                    max_gen_tokens = 512 if think_deeper else 256
 
-                # Generate response
-                if task == 'text_generation':
-                    result = model.predict(contextual_input, task=task, max_new_tokens=max_gen_tokens)
-                else:
-                    result = model.predict(contextual_input, task=task)
-
-                if result and 'generated_text' in result:
-                    response = result['generated_text']
-
-                    # Basic validation
-                    if response and len(response.strip()) > 10:
-                        comparison_results.append({
-                            "model": model_name,
-                            "response": response,
-                            "length": len(response),
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    else:
-                        comparison_results.append({
-                            "model": model_name,
-                            "error": "Generated response too short or invalid"
-                        })
-                else:
-                    comparison_results.append({
-                        "model": model_name,
-                        "error": "Failed to generate response"
-                    })
+def _handle_multi_model_comparison(compare_models, contextual_input, task, think_deeper, is_voice_mode,
+                                  effective_tone, language_instruction, response_language, data):
+    """Handle multi-model comparison for beta feature.
 
-            except Exception as e:
-                print(f"[Beta] Error generating response for {model_name}: {e}")
-                comparison_results.append({
-                    "model": model_name,
-                    "error": str(e)
-                })
+    Models that are not resident yet are loaded one after another (a Thor load
+    swaps sys.path and imports its dir's inference module, see _thor_import_scope);
+    generation then runs concurrently on a small worker pool, so it costs about the
+    slowest model rather than the sum. When the request is streamed, each model's
+    result is sent as a "comparison" event as soon as it finishes.
+    """
+    try:
+        models = list(compare_models[:_COMPARISON_MAX_MODELS])  # Limit to 3 models max
+
+        # Set generation parameters
+        if is_voice_mode:
+            max_gen_tokens = 256 if think_deeper else 128
+        else:
+            max_gen_tokens = 512 if think_deeper else 256
+
+        started = time.monotonic()
+        loaded = []
+        for model_name in models:
+            load_started = time.monotonic()
+            model = _load_model_for_comparison(model_name, data)
+            loaded.append((model_name, model, round((time.monotonic() - load_started) * 1000, 1)))
+
+        stream = current_stream()
+        futures = {
+            _comparison_pool.submit(_run_model_comparison, model_name, model, load_ms, contextual_input, task, max_gen_tokens): index
+            for index, (model_name, model, load_ms) in enumerate(loaded)
+        }
+        comparison_results = [None] * len(models)
+        for future in as_completed(futures):
+            entry = future.result()
+            comparison_results[futures[future]] = entry
+            if stream is not None:
+                stream.emit("comparison", entry)
 
         return jsonify({
             "comparison_mode": True,
             "models_compared": compare_models,
             "results": comparison_results,
+            "total_ms": round((time.monotonic() - started) * 1000, 1),
             "message": f"Compared {len(comparison_results)} models"
         })
 
@@ -2070,22 +2206,10 @@ def _handle_multi_model_comparison(compare_models, contextual_input, task, think
 
 
 def _load_model_for_comparison(model_name, data):
-    """Load a specific model for comparison."""
+    """Resident model instance for comparison (loaded through the model registry on first use)."""
     try:
-        # Import required services
-        from services import get_creative_generator, get_code_handler
-
-        if model_name == 'thor-1.0':
-            # Load Thor 1.0
-            from thor_1_0.inference import ThorInference
-            model = ThorInference()
-            model.load_model()
-            return model
-
-        elif model_name == 'thor-1.1':
-            return get_model(model_name='thor-1.1')
-        elif model_name == 'thor-1.2':
-            return get_model(model_name='thor-1.2')
+        if model_name in ('thor-1.0', 'thor-1.1', 'thor-1.2'):
+            return get_model(model_name=model_name)
 
         elif model_name.startswith('gem:'):
             # For gem comparison, we'd need to modify the inference to use gem config
@@ -2121,20 +2245,33 @@ def _prepare_structured_output(output_format):
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
-    """Handle chat messages."""
-    # #region agent log
-    # Initialize decision tracker for this request
+    """Handle chat messages.
+
+    Each stage of the pipeline is timed; timings feed the /metrics histograms and are
+    returned as "timings_ms" in debug mode.
+    """
+    timer = StageTimer()
+    set_current_timer(timer)
     try:
-        import sys
-        sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-        from debug_agent import start_tracking
-        data = request.get_json()
-        message = data.get('message', '')
-        start_tracking(message, run_id="live")
-    except Exception:
-        pass
-    # #endregion agent log
-    
+        result = _chat_pipeline(timer)
+    finally:
+        set_current_timer(None)
+        timings = timer.finish()
+        chat_latency.observe_timer(timer)
+
+    body = request.get_json(silent=True) or {}
+    if body.get('debug_mode'):
+        response = result[0] if isinstance(result, tuple) else result
+        payload = response.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload["timings_ms"] = timings
+            response.set_data(json.dumps(payload))
+    return result
+
+
+def _chat_pipeline(timer):
+    """The /api/chat handler; `timer.stage(...)` marks where each stage starts."""
+    timer.stage("parse")
     # Security: Rate limiting (v1.4.3o)
     client_ip = request.remote_addr or 'unknown'
     is_allowed, remaining = check_rate_limit(client_ip)
@@ -2223,7 +2360,7 @@ def chat():
         model_label_for_ui = "Thor 1.2"
         
         # Check for AI models first, then fall back to system mode
-        if 'ai-direct' in model_instances and model_instances['ai-direct']['type'] == 'direct':
+        if (model_instances.get('ai-direct') or {}).get('type') == 'direct':
             model_name = 'ai-direct'
             model_label_for_ui = "Atlas AI (AI Model)"
         else:
@@ -2290,6 +2427,9 @@ def chat():
                 print(f"[Gem] Sources structure: {gem_config.get('sources', {})}")
                 gem_knowledge = _gem_sources_to_knowledge(gem_config)
                 print(f"[Gem] Extracted {len(gem_knowledge)} knowledge items from sources")
+                semantic_scorer = get_semantic_scorer()
+                if gem_knowledge and hasattr(semantic_scorer, "precompute"):
+                    semantic_scorer.precompute(gem_knowledge)
                 if gem_knowledge:
                     for k in gem_knowledge[:3]:
                         print(f"[Gem]   - {k.get('title', 'no title')[:60]} ({len(k.get('content', ''))} chars)")
@@ -2323,21 +2463,6 @@ def chat():
         else:
             max_gen_tokens = 512 if think_deeper else 256  # Longer for think deeper mode
 
-        # Model Improvement: Check cache first (v1.4.4)
-        cached_response = get_cached_response(message, model_name, effective_tone)
-        if cached_response:
-            print(f"[Cache] Returning cached response for query: {message[:50]}...")
-            # Still save to chat history
-            chat_data["messages"].append({"role": "user", "content": message})
-            chat_data["messages"].append({"role": "assistant", "content": cached_response})
-            save_chat(chat_id, chat_data["messages"], chat_data.get("name"))
-            return jsonify({
-                "response": cached_response,
-                "chat_id": chat_id,
-                "model": model_label_for_ui,
-                "from_cache": True
-            })
-        
         # Refine large text chunks for better understanding
         if len(message) > 500:
             message = _refine_large_text(message)
@@ -2356,6 +2481,25 @@ def chat():
                 "messages": []
             }
         
+        # Model Improvement: Check cache first (v1.4.4)
+        cache_mode = response_cache_mode(
+            message, chat_data["messages"], gem_config, think_deeper,
+            is_voice_mode, response_language, code_mode
+        )
+        cached_response = get_cached_response(message, model_name, effective_tone, cache_mode) if cache_mode is not None else None
+        if cached_response:
+            print(f"[Cache] Returning cached response for query: {message[:50]}...")
+            # Still save to chat history
+            chat_data["messages"].append({"role": "user", "content": message})
+            chat_data["messages"].append({"role": "assistant", "content": cached_response})
+            save_chat(chat_id, chat_data["messages"], chat_data.get("name"))
+            return jsonify({
+                "response": cached_response,
+                "chat_id": chat_id,
+                "model": model_label_for_ui,
+                "from_cache": True
+            })
+
         # Check if it's a greeting first (works without model)
         greetings_handler = get_greetings_handler()
         research_engine = get_research_engine()
@@ -2379,19 +2523,21 @@ def chat():
         query_intent = {}  # ensure availability even if early exits skip intent analysis
         from_result_setter = False
         skip_refinement = False  # set to True for responses we must not clean/alter
+        model_warming = False  # answered from knowledge because the model is still loading
+        knowledge = []  # brain/research/gem items retrieved for this message
         refinement_knowledge_used = []
         
         # Initialize refinement helpers
-        normalizer = get_question_normalizer()
         intent_router = get_intent_router()
         knowledge_reranker = get_knowledge_reranker()
         answer_refiner = get_answer_refiner()
         clarifier = get_clarifier()
         conversational_analyzer = get_conversational_analyzer()
         
-        # Normalize message BEFORE using it in _get_enhanced_context
-        normalized = normalizer.normalize(message, {})
-        normalized_message = normalized.get("normalized_query", message)
+        # Analyze the message once (normalization, tokens, lexicon hits); every stage below reuses it
+        timer.stage("normalization")
+        analysis = analyze_message(message)
+        normalized_message = analysis.normalized_query or message
         
         # Enhanced conversation context with intelligent selection
         # Optimize context for voice mode: use fewer messages for faster processing (v4.3.0)
@@ -2404,13 +2550,12 @@ def chat():
         
         # Load user memory and add context to query
         user_memory = get_user_memory()
-        user_context = user_memory.get_relevant_context(message)
+        user_context = user_memory.get_relevant_context(message, analysis)
         if user_context:
             print(f"[User Memory] Adding context: {user_context}")
         
-        # Re-normalize with full conversation_context for better accuracy
-        normalized = normalizer.normalize(message, conversation_context)
-        normalized_message = normalized.get("normalized_query", message)
+        # Apply the full conversation_context (only the follow-up signal depends on it)
+        normalized = analysis.normalization(conversation_context)
         log_debug("Query Normalized", {
             "original": message[:100],
             "normalized": normalized_message[:100],
@@ -2427,29 +2572,31 @@ def chat():
         conversational_analysis = conversational_analyzer.analyze_context(
             message,
             conversation_context,
-            normalized_message
+            normalized_message,
+            analysis=analysis
         )
 
         # Initialize conversation flow tracking
         conversation_key = conversation_flow_manager.get_conversation_key(chat_id)
-        conversation_flow_manager.update_conversation_context(conversation_key, message)
+        conversation_flow_manager.update_conversation_context(conversation_key, message, analysis=analysis)
 
         # Analyze emotional intelligence
-        emotional_context = emotional_intelligence.get_emotional_context(message)
+        emotional_context = emotional_intelligence.get_emotional_context(message, analysis)
 
         # Get personalization for this user
         user_key = personalization_engine.get_user_key(chat_id)
         personalization_style = personalization_engine.get_adapted_response_style(user_key)
 
         # Update personalization with this interaction
-        personalization_engine.update_user_profile(user_key, message)
+        personalization_engine.update_user_profile(user_key, message, analysis=analysis)
 
         # Enhanced multi-turn intent detection
+        timer.stage("intent_routing")
         multi_turn_intent = _detect_multi_turn_intent(message, conversation_context)
 
         # Check for conversation flow interruptions or resumptions
-        interruption = conversation_flow_manager.detect_interruption(conversation_key, message)
-        resumption = conversation_flow_manager.handle_resumption(conversation_key, message)
+        interruption = conversation_flow_manager.detect_interruption(conversation_key, message, analysis)
+        resumption = conversation_flow_manager.handle_resumption(conversation_key, message, analysis)
 
         # Combine analyses for better context understanding
         enhanced_context_analysis = {
@@ -2490,12 +2637,13 @@ def chat():
                         print(f"[Enhanced Context] Continuing previous topic")
         
         # Initialize follow-up detection variables early (accessible everywhere)
-        message_lower = normalized_message.lower().strip()
-        is_tell_me_more = 'tell me more' in message_lower or ('more' in message_lower and len(message.split()) <= 3)
+        message_lower = analysis.text
+        message_word_count = len(analysis.text_words)
+        is_tell_me_more = 'tell me more' in message_lower or ('more' in message_lower and analysis.word_count <= 3)
         
         # QUICK PATH: short acknowledgments - avoid pulling random context/knowledge
         short_ack_terms = {"cool", "ok", "okay", "k", "thanks", "thank you", "nice", "great", "awesome", "got it"}
-        if response is None and len(message_lower.split()) <= 2 and message_lower in short_ack_terms:
+        if response is None and message_word_count <= 2 and message_lower in short_ack_terms:
             response = "👍 Got it. What would you like to do next?"
             skip_refinement = True
 
@@ -2520,7 +2668,7 @@ def chat():
             ]
             for pattern in goodbye_patterns:
                 if re.search(pattern, msg_lower):
-                    if not msg_lower.strip().endswith('?') and len(msg_lower.split()) <= 6:
+                    if not msg_lower.strip().endswith('?') and message_word_count <= 6:
                         return True
             return False
         
@@ -2530,7 +2678,7 @@ def chat():
 
         # QUICK PATH: Enhanced non-question detection
         def is_non_question_statement(msg_lower):
-            if len(msg_lower.split()) <= 4 and not msg_lower.strip().endswith('?'):
+            if message_word_count <= 4 and not msg_lower.strip().endswith('?'):
                 if "learn" in msg_lower and not any(q in msg_lower for q in ['what', 'how', 'why', 'when', 'where']):
                     return True
                 casual_patterns = [
@@ -2564,7 +2712,7 @@ def chat():
             response is None
             and "learn" in message_lower
             and "?" not in message_lower
-            and len(message_lower.split()) <= 4
+            and message_word_count <= 4
         ):
             response = (
                 "I’m always learning from what you ask and the sources I read. "
@@ -2867,6 +3015,7 @@ You can also use natural language - just ask me anything!"""
                 print("[Game Suite] Served interactive iframe for game suite request")
         
         # PRIORITY 1: Check Result Setter first for pre-set authoritative answers
+        timer.stage("result_setter")
         if response is None:
             qa_answer = check_result_setter(message, model_name)
             from_result_setter = False
@@ -2876,6 +3025,7 @@ You can also use natural language - just ask me anything!"""
                 print(f"[Result Setter] Using pre-set answer from result setter")
 
         # PRIORITY 2: Check common sense BEFORE other processing (enhanced common sense prioritization)
+        timer.stage("common_sense")
         if response is None and common_sense_handler is not None:
             # Analyze conversation context for better response selection
             conversation_key = conversation_flow_manager.get_conversation_key(chat_id)
@@ -2931,6 +3081,7 @@ You can also use natural language - just ask me anything!"""
                     response = word_problem_solution
                     print(f"[Math Word Problem] Solved: {message[:50]}...")
 
+        timer.stage("brain_lookup")
         if response is None:
             # Check for identity questions (after common sense but before brain lookup)
             identity_questions = [
@@ -2986,10 +3137,10 @@ I'm always learning and improving through our conversations. How can I help you
                 # "Tell me more" is always a follow-up (already defined above)
                 max_follow_up_words = 8
                 referential_terms = {'it', 'that', 'this', 'they', 'them', 'those', 'these', 'he', 'she', 'there'}
-                has_referential = any(term in message_lower.split() for term in referential_terms)
+                has_referential = not referential_terms.isdisjoint(analysis.text_words)
                 pattern_follow_up = (
                     any(pattern in message_lower for pattern in follow_up_patterns)
-                    and len(message.split()) <= max_follow_up_words
+                    and analysis.word_count <= max_follow_up_words
                 )
                 # Require referential cues for generic patterns to avoid hijacking new questions
                 if pattern_follow_up and not has_referential and not message_lower.startswith(('and', 'also')):
@@ -3078,7 +3229,7 @@ I'm always learning and improving through our conversations. How can I help you
                     requires_search = False
                     print(f"[Conversational Context] Skipping search - conversational statement detected")
                 
-                if requires_search and not is_question and len(message_lower.split()) <= 4:
+                if requires_search and not is_question and message_word_count <= 4:
                     # Short non-questions are likely commands/statements, not search queries
                     simple_patterns = [
                         r'^(that\'s|this is|here\'s|there\'s|it\'s|nice|good|great|ok|okay|yes|no|sure)',
@@ -3091,6 +3242,7 @@ I'm always learning and improving through our conversations. How can I help you
                             break
                 
                 # Use query intent analyzer for intelligent query understanding
+                timer.stage("intent_routing")
                 intent_analyzer = get_query_intent_analyzer()
                 query_intent = (intent_analyzer.analyze(context_query) or {}) if intent_analyzer else {}
                 if is_follow_up and query_intent is not None:
@@ -3103,6 +3255,7 @@ I'm always learning and improving through our conversations. How can I help you
                 is_recipe_query = any(pattern in context_query.lower() for pattern in recipe_patterns)
                 
                 # Track if we've done research for this query (initialize early so it's accessible everywhere)
+                timer.stage("brain_lookup")
                 research_done = False
                 research_knowledge = []
                 
@@ -3210,31 +3363,30 @@ I'm always learning and improving through our conversations. How can I help you
                         print(f"[Decision] Model will handle (no pre-emptive research): {context_query[:50]}")
                     
                 # #region agent log
-                try:
-                    import sys
-                    sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                    from debug_agent import get_tracker
-                    tracker = get_tracker()
-                    if tracker:
-                        reasons = []
-                        if needs_research:
-                            if think_deeper:
-                                reasons.append("think_deeper_mode")
-                            if is_recipe_query:
-                                reasons.append("recipe_query")
-                            if is_relationship_query:
-                                reasons.append("relationship_query")
-                            if is_time_sensitive:
-                                reasons.append("time_sensitive")
-                        else:
-                            reasons.append("model_first_approach")
-                        tracker.log_research_decision(needs_research, reasons)
-                except Exception:
-                    pass
+                reasons = []
+                if needs_research:
+                    if think_deeper:
+                        reasons.append("think_deeper_mode")
+                    if is_recipe_query:
+                        reasons.append("recipe_query")
+                    if is_relationship_query:
+                        reasons.append("relationship_query")
+                    if is_time_sensitive:
+                        reasons.append("time_sensitive")
+                else:
+                    reasons.append("model_first_approach")
+                agent_log(
+                    "research_decision",
+                    {"needs_research": needs_research, "reasons": reasons},
+                    hypothesis_id="DECISION",
+                    run_id="live",
+                    location="chatbot/app.py:_chat_pipeline"
+                )
                 # #endregion agent log
                 
                 if needs_research:
                     # Use contextual message for research (includes follow-up context)
+                    timer.stage("research")
                     search_query = context_query
                     search_type = "relationship query" if is_relationship_query else ("recipe query" if is_recipe_query else "topic not in brain")
                     print(f"[Research] {search_type.upper()}, PRIORITIZING Google search: {search_query}")
@@ -3244,9 +3396,11 @@ I'm always learning and improving through our conversations. How can I help you
                             "query": search_query[:100],
                             "description": f"Searching multiple engines (Google, Bing, DuckDuckGo, Wikipedia) for: \"{search_query}\""
                         })
-                        research_knowledge = research_engine.search_and_learn(search_query)
+                        research_knowledge = _search_and_learn(research_engine, search_query)
                         if research_knowledge:
                             print(f"[Research] Learned {len(research_knowledge)} items from Google")
+                            for r in research_knowledge:
+                                brain_connector.add_item(r)
                             
                             # Group results by source for better display
                             results_by_source = {}
@@ -3291,40 +3445,42 @@ I'm always learning and improving through our conversations. How can I help you
                         traceback.print_exc()
                 
                 # Get model for non-greeting messages (only if response not already set)
+                timer.stage("generation")
                 if response is None:
                     # Check for direct AI model first
-                    if model_name == 'ai-direct' and 'ai-direct' in model_instances and model_instances['ai-direct']['type'] == 'direct':
+                    if model_name == 'ai-direct' and (model_instances.get('ai-direct') or {}).get('type') == 'direct':
                         model = model_instances['ai-direct']  # Use direct AI model
+                        model_registry.touch('ai-direct')
                         print(f"[DEBUG] Using direct AI model for inference")
                     else:
                         # #region agent log
-                        import json
-                        try:
-                            with open('/Users/arulhania/Coding/atlas-ai/.cursor/debug.log', 'a') as f:
-                                f.write(json.dumps({"id":f"log_{int(__import__('time').time())}_{__import__('secrets').token_hex(3)}","timestamp":int(__import__('time').time()*1000),"location":"app.py:3158","message":"Model check in chat endpoint","data":{"model_name":model_name,"in_instances":model_name in model_instances,"is_loaded":model_instances.get(model_name) is not None},"sessionId":"debug-session","runId":"verify-fixes","hypothesisId":"A"})+"\n")
-                        except: pass
+                        agent_log("Model check in chat endpoint", {"model_name":model_name,"in_instances":model_name in model_instances,"is_loaded":model_instances.get(model_name) is not None}, hypothesis_id="A", run_id="verify-fixes", location="app.py:3158")
                         # #endregion agent log
-                        # Check if model is already loaded first (don't try to load during request)
+                        # Use the loaded model if there is one; otherwise load it below (models
+                        # start lazily and may have been evicted under the memory budget)
                         if model_name in model_instances and model_instances[model_name] is not None:
                             model = model_instances[model_name]
+                            model_registry.touch(model_name)
                             print(f"[Model] Using already-loaded model: {model_name}")
                             # #region agent log
-                            try:
-                                with open('/Users/arulhania/Coding/atlas-ai/.cursor/debug.log', 'a') as f:
-                                    f.write(json.dumps({"id":f"log_{int(__import__('time').time())}_{__import__('secrets').token_hex(3)}","timestamp":int(__import__('time').time()*1000),"location":"app.py:3161","message":"Model found in instances","data":{"model_name":model_name},"sessionId":"debug-session","runId":"verify-fixes","hypothesisId":"A"})+"\n")
-                            except: pass
+                            agent_log("Model found in instances", {"model_name":model_name}, hypothesis_id="A", run_id="verify-fixes", location="app.py:3161")
                             # #endregion agent log
                         else:
                             # Model not loaded - check loading status
                             progress_key = 'thor-1.1' if model_name == 'qwen3-thor' else model_name
                             loading_status = model_loading_progress.get(progress_key, {'status': 'not_started', 'progress': 0, 'message': 'Not started'})
                             # #region agent log
-                            try:
-                                with open('/Users/arulhania/Coding/atlas-ai/.cursor/debug.log', 'a') as f:
-                                    f.write(json.dumps({"id":f"log_{int(__import__('time').time())}_{__import__('secrets').token_hex(3)}","timestamp":int(__import__('time').time()*1000),"location":"app.py:3165","message":"Model not loaded, checking status","data":{"model_name":model_name,"progress_key":progress_key,"status":loading_status.get('status'),"progress":loading_status.get('progress')},"sessionId":"debug-session","runId":"verify-fixes","hypothesisId":"A"})+"\n")
-                            except: pass
+                            agent_log("Model not loaded, checking status", {"model_name":model_name,"progress_key":progress_key,"status":loading_status.get('status'),"progress":loading_status.get('progress')}, hypothesis_id="A", run_id="verify-fixes", location="app.py:3165")
                             # #endregion agent log
-                            if loading_status['status'] == 'loading':
+                            warm_answer = None
+                            if startup.is_warming(progress_key) or loading_status['status'] == 'loading':
+                                # Model still warming - answer from knowledge if we have any
+                                warm_answer = synthesize_knowledge(message, knowledge, query_intent) if knowledge else None
+                            if warm_answer:
+                                response = warm_answer
+                                model_warming = True
+                                print(f"[Model] {model_name} still warming - answering from knowledge")
+                            elif loading_status['status'] in ('loading', 'pending'):
                                 # Model is currently loading - return loading status
                                 return jsonify({
                                     "error": f"Model {model_name} is currently loading. Please wait.",
@@ -3348,51 +3504,46 @@ I'm always learning and improving through our conversations. How can I help you
                                 error_response['error_message'] = loading_status.get('message', 'Model loading failed')
                                 return jsonify(error_response), 503
                             else:
-                                # Model not started loading - return error, always include progress
-                                progress = loading_status.get('progress', 0)
-                                error_response = handle_model_loading_error(
-                                    model_name=model_name,
-                                    error=Exception("Model has not been loaded"),
-                                    loading_progress=loading_status,
-                                    context={'status': 'not_started', 'source': 'model_check'}
-                                )
-                                # Ensure progress is always included
-                                error_response['loading_progress'] = progress
-                                error_response['progress_percentage'] = f"{progress:.1f}%"
-                                return jsonify(error_response), 503
+                                # Not loaded yet (or evicted) - load it now through the registry
+                                model = get_model(model_name)
+                                if model is None:
+                                    loading_status = model_loading_progress.get(progress_key, loading_status)
+                                    progress = loading_status.get('progress', 0)
+                                    error_response = handle_model_loading_error(
+                                        model_name=model_name,
+                                        error=Exception(loading_status.get('message', 'Model could not be loaded')),
+                                        loading_progress=loading_status,
+                                        context={'status': loading_status.get('status', 'failed'), 'source': 'model_check'}
+                                    )
+                                    # Ensure progress is always included
+                                    error_response['loading_progress'] = progress
+                                    error_response['progress_percentage'] = f"{progress:.1f}%"
+                                    return jsonify(error_response), 503
                     # #region agent log
-                    try:
-                        import sys
-                        sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                        from debug_agent import get_tracker
-                        tracker = get_tracker()
-                        if tracker:
-                            tracker.log_model_check(model is not None, model_name)
-                    except Exception:
-                        pass
+                    agent_log(
+                        "model_check",
+                        {"model_loaded": model is not None, "model_name": model_name},
+                        hypothesis_id="DECISION",
+                        run_id="live",
+                        location="chatbot/app.py:_chat_pipeline"
+                    )
                     # #endregion agent log
                 else:
                     model = None  # Skip model if we already have a response
                 
                 # #region agent log
-                try:
-                    import sys
-                    sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                    from debug_agent import agent_log
-                    agent_log(
-                        "model_and_response_check",
-                        {
-                            "model_is_none": model is None,
-                            "response_is_none": response is None,
-                            "will_use_brain_knowledge": model is None and response is None,
-                            "will_use_model": model is not None
-                        },
-                        hypothesis_id="FLOW_CHECK",
-                        run_id="live",
-                        location="chatbot/app.py:2833"
-                    )
-                except Exception:
-                    pass
+                agent_log(
+                    "model_and_response_check",
+                    {
+                        "model_is_none": model is None,
+                        "response_is_none": response is None,
+                        "will_use_brain_knowledge": model is None and response is None,
+                        "will_use_model": model is not None
+                    },
+                    hypothesis_id="FLOW_CHECK",
+                    run_id="live",
+                    location="chatbot/app.py:2833"
+                )
                 # #endregion agent log
                 
                 # PRIORITY: Try model first, only use research if model fails
@@ -3401,7 +3552,7 @@ I'm always learning and improving through our conversations. How can I help you
                 
                 if model is None and response is None:
                     # No model available - provide a simple but helpful response
-                    ai_available = 'ai-direct' in model_instances and model_instances['ai-direct']['type'] == 'direct'
+                    ai_available = (model_instances.get('ai-direct') or {}).get('type') == 'direct'
                     response = f"I understand you said: '{message}'. AI models available: {ai_available}. Model instances: {list(model_instances.keys())}"
 
                 elif model is None and response is not None:
@@ -3411,22 +3562,16 @@ I'm always learning and improving through our conversations. How can I help you
                 else:
                     # Generate response using model with conversation context
                     # #region agent log
-                    try:
-                        import sys
-                        sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                        from debug_agent import agent_log
-                        agent_log(
-                            "model_generation_started",
-                            {
-                                "model_loaded": model is not None,
-                                "message": message[:100]
-                            },
-                            hypothesis_id="MODEL_GEN",
-                            run_id="live",
-                            location="chatbot/app.py:3213"
-                        )
-                    except Exception:
-                        pass
+                    agent_log(
+                        "model_generation_started",
+                        {
+                            "model_loaded": model is not None,
+                            "message": message[:100]
+                        },
+                        hypothesis_id="MODEL_GEN",
+                        run_id="live",
+                        location="chatbot/app.py:3213"
+                    )
                     # #endregion agent log
 
                     try:
@@ -3449,7 +3594,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 print(f"[Model] Using enhanced conversation context ({len(recent_context)} previous messages)")
                         
                         # Enhanced Thor 1.1/1.2: Add knowledge context to prompt for better synthesis
-                        if 'knowledge' in locals() and knowledge and len(knowledge) > 0:
+                        if knowledge:
                             # Add relevant knowledge as context (first 2-3 items)
                             knowledge_context = "\n\nRelevant Information:\n"
                             for idx, k in enumerate(knowledge[:3]):
@@ -3503,24 +3648,21 @@ I'm always learning and improving through our conversations. How can I help you
 
                         # Check if model is a direct AI model dict
                         if isinstance(model, dict) and model.get('type') == 'direct':
-                            ai_model = model['model']
-                            ai_tokenizer = model['tokenizer']
                             print(f"[AI] Generating response for: {message[:50]}...")
-                            inputs = ai_tokenizer(message, return_tensors="pt").to(ai_model.device)
-                            with torch.no_grad():
-                                outputs = ai_model.generate(
-                                    **inputs, max_new_tokens=100, temperature=0.7, do_sample=True,
-                                    pad_token_id=ai_tokenizer.eos_token_id, no_repeat_ngram_size=3, top_p=0.9
-                                )
-                            full_response = ai_tokenizer.decode(outputs[0], skip_special_tokens=True)
-                            response = full_response.replace(message, "").strip()
+                            # Earlier turns are the same as last time, so their KV state comes from the prefix cache
+                            dialog_prompt = _dialog_prompt(model, chat_data.get("messages", []), message)
+                            result = _model_predict(
+                                'ai-direct', model, dialog_prompt, task='text_generation', max_new_tokens=_DIRECT_MAX_NEW_TOKENS,
+                                temperature=0.7, top_p=0.9, cache_key=chat_id
+                            )
+                            response = (result.get('generated_text') or '').strip()
                             if response.startswith(("AI:", "Assistant:", "Response:")):
                                 response = response.split(":", 1)[1].strip()
                             response = response_cleaner.clean_response(response, message)
 
                         elif hasattr(model, 'predict'):
                             # Use Thor model inference
-                            result = model.predict(contextual_input, task=task, max_new_tokens=max_gen_tokens)
+                            result = _model_predict(model_name, model, contextual_input, task=task, max_new_tokens=max_gen_tokens)
                             if result and 'generated_text' in result:
                                 response = result['generated_text']
                                 # Apply structured output formatting
@@ -3551,7 +3693,7 @@ I'm always learning and improving through our conversations. How can I help you
                         # If we haven't done research yet, do it now as fallback
                         if not research_done:
                             print(f"[Fallback] Model failed, starting fallback research...")
-                            research_knowledge = research_engine.search_and_learn(context_query)
+                            research_knowledge = _search_and_learn(research_engine, context_query)
                             research_done = True
                             if gem_knowledge:
                                 knowledge = list(gem_knowledge) + research_knowledge
@@ -3584,7 +3726,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 print(f"[Model] Using enhanced conversation context ({len(recent_context)} previous messages)")
                         
                         # Enhanced Thor 1.1: Add knowledge context to prompt for better synthesis
-                        if 'knowledge' in locals() and knowledge and len(knowledge) > 0:
+                        if knowledge:
                             # Add relevant knowledge as context (first 2-3 items)
                             knowledge_context = "\n\nRelevant Information:\n"
                             for idx, k in enumerate(knowledge[:3]):
@@ -3650,8 +3792,8 @@ I'm always learning and improving through our conversations. How can I help you
                         log_debug("Generating Response", {
                             "description": "Synthesizing information from web search and knowledge base to generate a comprehensive answer. Using enhanced Thor 1.1 model with multi-step generation for natural, helpful responses.",
                             "context_length": len(contextual_input),
-                            "has_knowledge": len(knowledge) > 0 if 'knowledge' in locals() else False,
-                            "knowledge_items": len(knowledge) if 'knowledge' in locals() and knowledge else 0,
+                            "has_knowledge": bool(knowledge),
+                            "knowledge_items": len(knowledge),
                             "enhanced_generation": True
                         })
                         
@@ -3684,9 +3826,9 @@ I'm always learning and improving through our conversations. How can I help you
 
                         # Pass max_new_tokens for text generation, max_length for input sequence
                         if task == 'text_generation':
-                            result = model.predict(contextual_input, task=task, max_new_tokens=max_gen_tokens)
+                            result = _model_predict(model_name, model, contextual_input, task=task, max_new_tokens=max_gen_tokens)
                         else:
-                            result = model.predict(contextual_input, task=task)
+                            result = _model_predict(model_name, model, contextual_input, task=task)
                         
                         # Get response cleaner for validation
                         response_cleaner = get_response_cleaner()
@@ -3702,23 +3844,17 @@ I'm always learning and improving through our conversations. How can I help you
                             # CRITICAL: Mark this as a model-generated response to prevent overwriting
                             model_response_generated = True
                             # #region agent log
-                            try:
-                                import sys
-                                sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                                from debug_agent import agent_log
-                                agent_log(
-                                    "model_generated_text",
-                                    {
-                                        "response_length": len(response) if response else 0,
-                                        "response_preview": response[:100] if response else None,
-                                        "task": task
-                                    },
-                                    hypothesis_id="H1",
-                                    run_id="math-debug",
-                                    location="chatbot/app.py:3358"
-                                )
-                            except Exception:
-                                pass
+                            agent_log(
+                                "model_generated_text",
+                                {
+                                    "response_length": len(response) if response else 0,
+                                    "response_preview": response[:100] if response else None,
+                                    "task": task
+                                },
+                                hypothesis_id="H1",
+                                run_id="math-debug",
+                                location="chatbot/app.py:3358"
+                            )
                             # #endregion agent log
                             
                             # Validate response - use response_cleaner's corruption detection
@@ -3751,43 +3887,31 @@ I'm always learning and improving through our conversations. How can I help you
                                 # If model generated something valid, clean it before using
                                 if response and len(response.strip()) > 10:
                                     # #region agent log
-                                    try:
-                                        import sys
-                                        sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                                        from debug_agent import agent_log
-                                        agent_log(
-                                            "before_cleaning",
-                                            {
-                                                "response_length": len(response) if response else 0,
-                                                "response_preview": response[:200] if response else None
-                                            },
-                                            hypothesis_id="H3",
-                                            run_id="math-debug",
-                                            location="chatbot/app.py:3435"
-                                        )
-                                    except Exception:
-                                        pass
+                                    agent_log(
+                                        "before_cleaning",
+                                        {
+                                            "response_length": len(response) if response else 0,
+                                            "response_preview": response[:200] if response else None
+                                        },
+                                        hypothesis_id="H3",
+                                        run_id="math-debug",
+                                        location="chatbot/app.py:3435"
+                                    )
                                     # #endregion agent log
                                     
                                     # Apply cleaning to fix minor grammar issues
                                     response = response_cleaner.clean_response(response, message)
                                     # #region agent log
-                                    try:
-                                        import sys
-                                        sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                                        from debug_agent import agent_log
-                                        agent_log(
-                                            "response_after_cleaning",
-                                            {
-                                                "response_length": len(response) if response else 0,
-                                                "response_preview": response[:100] if response else None
-                                            },
-                                            hypothesis_id="H2",
-                                            run_id="math-debug",
-                                            location="chatbot/app.py:3405"
-                                        )
-                                    except Exception:
-                                        pass
+                                    agent_log(
+                                        "response_after_cleaning",
+                                        {
+                                            "response_length": len(response) if response else 0,
+                                            "response_preview": response[:100] if response else None
+                                        },
+                                        hypothesis_id="H2",
+                                        run_id="math-debug",
+                                        location="chatbot/app.py:3405"
+                                    )
                                     # #endregion agent log
                                     
                                     # Optimize response length for voice mode (v4.3.0)
@@ -3831,7 +3955,7 @@ I'm always learning and improving through our conversations. How can I help you
                                                 thor_1_0_model = get_model('thor-1.0', force_reload=False)
                                                 if thor_1_0_model:
                                                     # Try with Thor 1.0
-                                                    fallback_result = thor_1_0_model.predict(contextual_input, task=task)
+                                                    fallback_result = _model_predict('thor-1.0', thor_1_0_model, contextual_input, task=task)
                                                     if fallback_result and 'generated_text' in fallback_result:
                                                         fallback_response = fallback_result['generated_text']
                                                         if fallback_response and len(fallback_response.strip()) > 10:
@@ -3878,7 +4002,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 try:
                                     thor_1_0_model = get_model('thor-1.0', force_reload=False)
                                     if thor_1_0_model:
-                                        fallback_result = thor_1_0_model.predict(contextual_input, task=task)
+                                        fallback_result = _model_predict('thor-1.0', thor_1_0_model, contextual_input, task=task)
                                         if fallback_result and 'generated_text' in fallback_result:
                                             fallback_response = fallback_result['generated_text']
                                             # Apply same strict validation as Thor 1.1
@@ -3920,7 +4044,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 try:
                                     thor_1_0_model = get_model('thor-1.0', force_reload=False)
                                     if thor_1_0_model:
-                                        fallback_result = thor_1_0_model.predict(contextual_input, task=task)
+                                        fallback_result = _model_predict('thor-1.0', thor_1_0_model, contextual_input, task=task)
                                         if fallback_result and 'generated_text' in fallback_result:
                                             fallback_response = fallback_result['generated_text']
                                             # Apply same strict validation
@@ -3948,7 +4072,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 if not research_done and requires_search:
                                     print(f"[Fallback] Model failed, triggering web search as fallback for: {context_query[:50]}")
                                     try:
-                                        research_knowledge = research_engine.search_and_learn(context_query)
+                                        research_knowledge = _search_and_learn(research_engine, context_query)
                                         if research_knowledge and len(research_knowledge) > 0:
                                             research_done = True
                                             print(f"[Fallback Research] Found {len(research_knowledge)} results")
@@ -4068,7 +4192,7 @@ I'm always learning and improving through our conversations. How can I help you
                                 if response and len(response.strip()) > 20:
                                     # Step 1: Research for additional context
                                     print("[Think Deeper] Researching for additional context...")
-                                    research_knowledge = research_engine.search_and_learn(context_query)
+                                    research_knowledge = _search_and_learn(research_engine, context_query)
                                     
                                     # Step 2: Get related knowledge from brain
                                     log_debug("Retrieving Knowledge from Brain", {"query": context_query[:100]})
@@ -4138,7 +4262,7 @@ I'm always learning and improving through our conversations. How can I help you
                                     print("[Think Deeper] Response invalid, using comprehensive knowledge-based fallback")
                                     
                                     # Research first
-                                    research_knowledge = research_engine.search_and_learn(context_query)
+                                    research_knowledge = _search_and_learn(research_engine, context_query)
                                     
                                     # Get brain knowledge
                                     knowledge = brain_connector.get_relevant_knowledge(context_query)
@@ -4229,7 +4353,7 @@ I'm always learning and improving through our conversations. How can I help you
                             else:
                                 # Use research engine as fallback
                                 try:
-                                    research_knowledge = research_engine.search_and_learn(context_query)
+                                    research_knowledge = _search_and_learn(research_engine, context_query)
                                     if research_knowledge:
                                         refinement_knowledge_used = research_knowledge
                                         content = research_knowledge[0].get('content', '')
@@ -4244,46 +4368,35 @@ I'm always learning and improving through our conversations. How can I help you
                             response = "I understand your message. I'm continuously learning and improving. How can I assist you?"
         
         # Final refinement pass on the answer (skip for result-setter to avoid annotations)
+        timer.stage("refinement")
         if not from_result_setter and not skip_refinement:
             # #region agent log
-            try:
-                import sys
-                sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                from debug_agent import agent_log
-                agent_log(
-                    "before_refinement",
-                    {
-                        "response_length": len(response) if response else 0,
-                        "response_preview": response[:100] if response else None,
-                        "model_label": model_label_for_ui
-                    },
-                    hypothesis_id="H4",
-                    run_id="math-debug",
-                    location="chatbot/app.py:3905"
-                )
-            except Exception:
-                pass
+            agent_log(
+                "before_refinement",
+                {
+                    "response_length": len(response) if response else 0,
+                    "response_preview": response[:100] if response else None,
+                    "model_label": model_label_for_ui
+                },
+                hypothesis_id="H4",
+                run_id="math-debug",
+                location="chatbot/app.py:3905"
+            )
             # #endregion agent log
             
             response = answer_refiner.refine(response, refinement_knowledge_used, query_intent or {}, model_label_for_ui)
             
             # #region agent log
-            try:
-                import sys
-                sys.path.insert(0, str(ATLAS_ROOT / ".cursor"))
-                from debug_agent import agent_log
-                agent_log(
-                    "after_refinement",
-                    {
-                        "response_length": len(response) if response else 0,
-                        "response_preview": response[:100] if response else None
-                    },
-                    hypothesis_id="H4",
-                    run_id="math-debug",
-                    location="chatbot/app.py:3905"
-                )
-            except Exception:
-                pass
+            agent_log(
+                "after_refinement",
+                {
+                    "response_length": len(response) if response else 0,
+                    "response_preview": response[:100] if response else None
+                },
+                hypothesis_id="H4",
+                run_id="math-debug",
+                location="chatbot/app.py:3905"
+            )
             # #endregion agent log
 
         # Final accuracy check (conservative): avoid ungrounded numeric claims when we have sources.
@@ -4295,6 +4408,7 @@ I'm always learning and improving through our conversations. How can I help you
                 print(f"[Accuracy Check] Skipped due to error: {e}")
         
         # Add user message and assistant response to chat
+        timer.stage("save_chat")
         chat_data["messages"].append({
             "role": "user",
             "content": message,
@@ -4309,7 +4423,7 @@ I'm always learning and improving through our conversations. How can I help you
         # Extract user preferences and facts from conversation
         try:
             user_memory = get_user_memory()
-            user_memory.extract_preferences_from_message(message, response)
+            user_memory.extract_preferences_from_message(message, response, analysis)
             user_memory.extract_facts_from_conversation(message, response)
             user_memory.add_conversation_topic(message[:100])  # Add topic from message
             user_memory.save()
@@ -4322,17 +4436,17 @@ I'm always learning and improving through our conversations. How can I help you
             chat_name = generate_chat_name(message, response)
         
         # Model Improvement: Cache response for future use (v1.4.4)
-        if response and len(response.strip()) > 20 and not skip_refinement:
-            cache_response(message, model_name, effective_tone, response)
+        if response and len(response.strip()) > 20 and not skip_refinement and not model_warming and cache_mode is not None:
+            cache_response(message, model_name, effective_tone, response, cache_mode)
         
         # Save chat
         save_chat(chat_id, chat_data["messages"], chat_name)
         
         # Also save to conversations directory for backup/archive
         try:
-            conversation_file = os.path.join(CONVERSATIONS_DIR, f"{chat_id}.json")
-            with open(conversation_file, 'w') as f:
-                json.dump(chat_data, f, indent=2)
+            conversation_store.save(chat_id, chat_data["messages"], {
+                k: v for k, v in chat_data.items() if k != "messages"
+            })
         except Exception as e:
             print(f"Warning: Could not save to conversations directory: {e}")
         
@@ -4380,6 +4494,7 @@ I'm always learning and improving through our conversations. How can I help you
             response = "I understand your message. How can I help you?"
         
         # FINAL FORMATTER: light-touch grammar/format cleanup (no forced bullets)
+        timer.stage("formatting")
         if not skip_refinement:
             try:
                 log_debug("Formatting Response", {
@@ -4473,8 +4588,9 @@ I'm always learning and improving through our conversations. How can I help you
             print(f"[Emoji] Error adding emoji support: {e}")
 
         # Model Improvement: Cache response for future use (v1.4.4)
-        if response and len(response.strip()) > 20 and not skip_refinement:
-            cache_response(message, model_name, effective_tone, response)
+        timer.stage("finalize")
+        if response and len(response.strip()) > 20 and not skip_refinement and not model_warming and cache_mode is not None:
+            cache_response(message, model_name, effective_tone, response, cache_mode)
         
         # Track user engagement for personalization
         if response:
@@ -4490,6 +4606,14 @@ I'm always learning and improving through our conversations. How can I help you
             "model_used": model_label_for_ui  # Include which model was actually used
         }
         
+        # How old the web research used for this answer is (when it came from the cache)
+        if getattr(g, "research_cache", None):
+            response_data["research_cache"] = g.research_cache
+
+        # Answered from knowledge while the requested model warms up
+        if model_warming:
+            response_data["model_warming"] = True
+
         # Add debug log if debug mode is enabled
         if debug_mode and debug_log:
             response_data["debug_log"] = debug_log
@@ -4498,7 +4622,7 @@ I'm always learning and improving through our conversations. How can I help you
         if debug_mode:
             # Extract search results from knowledge items if they exist
             search_results = []
-            if 'knowledge' in locals() and knowledge:
+            if knowledge:
                 for k in knowledge:
                     if k.get("source") in ["google", "bing", "duckduckgo", "wikipedia", "brave"]:
                         search_results.append({
@@ -4591,12 +4715,55 @@ I'm always learning and improving through our conversations. How can I help you
         return jsonify({"error": error_msg, "response": user_message}), 500
 
 
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming /api/chat: SSE "token" events while the model generates, then one "final" event.
+
+    The final event carries the same JSON /api/chat returns (refined response, chat_id,
+    model_used, ...). Errors arrive as an "error" event with the status code. Answers that
+    don't come from the model (result setter, knowledge, cache) produce no token events;
+    beta model comparisons send one "comparison" event per model instead.
+    """
+    stream = ChatStream()
+
+    @copy_current_request_context
+    def run_chat():
+        set_current_stream(stream)
+        try:
+            result = chat()
+            status = 200
+            if isinstance(result, tuple):
+                result, status = result[0], result[1]
+            payload = result.get_json(silent=True) or {}
+            payload["streamed_tokens"] = stream.tokens
+            stream.emit("final" if status < 400 else "error", {**payload, "status": status})
+        except Exception as e:
+            print(f"❌ Error in streaming chat: {e}")
+            stream.emit("error", {"error": str(e) or type(e).__name__, "status": 500})
+        finally:
+            set_current_stream(None)
+            stream.close()
+
+    threading.Thread(target=run_chat, name="atlas-chat-stream", daemon=True).start()
+    return Response(
+        stream_with_context(stream.events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/chats', methods=['GET'])
 def get_chats():
-    """Get list of all chats."""
+    """Get list of chats (supports ?offset=&limit=&sort=&order=&project_id=)."""
     try:
-        chats = list_chats()
-        return jsonify({"chats": chats})
+        offset = max(0, request.args.get('offset', 0, type=int) or 0)
+        limit = request.args.get('limit', type=int)
+        sort = request.args.get('sort', 'created_at')
+        descending = request.args.get('order', 'desc').lower() != 'asc'
+        project_id = request.args.get('project_id')
+        chats = list_chats(offset=offset, limit=limit, sort=sort, descending=descending, project_id=project_id)
+        total = chat_store.index.count(project_id) if chat_store.index is not None else len(chats)
+        return jsonify({"chats": chats, "total": total, "offset": offset, "limit": limit})
     except Exception as e:
         print(f"Error listing chats: {e}")
         return jsonify({"error": "Error loading chats"}), 500
@@ -4620,9 +4787,7 @@ def get_chat(chat_id):
 def delete_chat(chat_id):
     """Delete a chat."""
     try:
-        chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
-        if os.path.exists(chat_file):
-            os.remove(chat_file)
+        if chat_store.delete(chat_id):
             return jsonify({"success": True})
         else:
             return jsonify({"error": "Chat not found"}), 404
@@ -4635,15 +4800,12 @@ def delete_chat(chat_id):
 def delete_all_chats():
     """Delete all chats."""
     try:
-        # Get all .json files in CHATS_DIR
-        for filename in os.listdir(CHATS_DIR):
-            if filename.endswith(".json"):
-                file_path = os.path.join(CHATS_DIR, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                except Exception as e:
-                    print(f"Error deleting file {file_path}: {e}")
+        # Delete every stored chat (snapshot and log)
+        for chat_id in chat_store.list_ids():
+            try:
+                chat_store.delete(chat_id)
+            except Exception as e:
+                print(f"Error deleting chat {chat_id}: {e}")
         
         # Also clear chats from session/cache if needed
         # (Based on app logic, chats are mostly file-based)
@@ -4709,7 +4871,7 @@ def model_status():
                 info["diagnostics"]["torch_available"] = True
                 
                 # Check if model files exist
-                model_path = os.path.join(model_dir_path, "final_model.pt")
+                model_path = _checkpoint_path(model_dir_path)
                 tokenizer_path = os.path.join(model_dir_path, "tokenizer.json")
                 
                 info["diagnostics"]["model_file_exists"] = os.path.exists(model_path)
@@ -4762,10 +4924,26 @@ def model_status():
         "model_info": {
             "thor-1.1": "Combined Qwen3-4B + Thor 1.1 (5B parameters total)",
             "thor-1.2": "Thor 1.2 improved version (models/thor/thor-1.2, loads instantly)"
-        }
+        },
+        "registry": model_registry.status(),
+        "inference": inference_scheduler_stats(),
+        "prefix_cache": get_prefix_cache().stats()
     })
 
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Readiness probe: 200 once required models finished warming, 503 before."""
+    state = startup.readiness()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage /api/chat latency histograms in the Prometheus text format."""
+    return Response(chat_latency.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/model/loading-progress', methods=['GET'])
 def model_loading_progress_endpoint():
     """Get model loading progress for frontend display."""
@@ -4826,6 +5004,15 @@ def model_loading_progress_endpoint():
     })
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss/eviction counters for the server-side caches."""
+    stats = all_cache_stats()
+    if research_cache is not None:
+        stats["research"] = research_cache.stats()
+    return jsonify(stats)
+
+
 # ==================== GEMS API ====================
 
 @app.route('/api/gems', methods=['GET'])
@@ -4957,6 +5144,31 @@ def save_project(project_id, project_data):
     project_file = os.path.join(PROJECTS_DIR, f"{project_id}.json")
     with open(project_file, 'w') as f:
         json.dump(project_data, f, indent=2)
+    _index_project_chats(project_id, project_data.get("chat_ids", []))
+    _index_project_text(project_id, project_data)
+
+
+def _index_project_text(project_id, project_data):
+    """Index (or, with None, remove) a project in the full-text search index."""
+    if search_index is None:
+        return
+    try:
+        if project_data is None:
+            search_index.remove("project", project_id)
+        else:
+            search_index.index_project(project_id, project_data)
+    except Exception as e:
+        print(f"[Search Index] Failed to index project {project_id}: {e}")
+
+
+def _index_project_chats(project_id, chat_ids):
+    """Mirror project membership into the chat metadata index."""
+    if chat_store.index is None:
+        return
+    try:
+        chat_store.index.set_project_chats(project_id, chat_ids)
+    except Exception as e:
+        print(f"[Chat Index] Failed to index project {project_id}: {e}")
 
 
 def load_project(project_id):
@@ -4993,6 +5205,27 @@ def list_projects():
     return projects
 
 
+def _sync_project_index():
+    """Backfill project membership and search text in the indexes from the project files."""
+    if not os.path.exists(PROJECTS_DIR):
+        return
+    project_ids = set()
+    for file in os.listdir(PROJECTS_DIR):
+        if file.endswith('.json'):
+            project_data = load_project(file[:-5])
+            if project_data:
+                project_ids.add(file[:-5])
+                _index_project_chats(file[:-5], project_data.get("chat_ids", []))
+                _index_project_text(file[:-5], project_data)
+    if search_index is not None:
+        for stale_id in set(search_index.doc_ids("project")) - project_ids:
+            _index_project_text(stale_id, None)
+
+
+_sync_project_index()
+_index_gems(_load_gems_db().get("gems", []))
+
+
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
     """Get list of all projects."""
@@ -5075,6 +5308,8 @@ def delete_project(project_id):
         project_file = os.path.join(PROJECTS_DIR, f"{project_id}.json")
         if os.path.exists(project_file):
             os.remove(project_file)
+            _index_project_chats(project_id, [])
+            _index_project_text(project_id, None)
             return jsonify({"success": True})
         else:
             return jsonify({"error": "Project not found"}), 404
@@ -5243,13 +5478,10 @@ def delete_history_entry(entry_id):
 def export_chat(chat_id):
     """Export a chat as JSON."""
     try:
-        chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
-        if not os.path.exists(chat_file):
+        chat_data = load_chat(chat_id)
+        if not chat_data:
             return jsonify({"error": "Chat not found"}), 404
         
-        with open(chat_file, 'r', encoding='utf-8') as f:
-            chat_data = json.load(f)
-        
         export_data = {
             "version": "2.5.0",
             "exported_at": datetime.now().isoformat(),
@@ -5274,18 +5506,15 @@ def import_chat():
         chat_id = chat_data.get("chat_id") or str(uuid.uuid4())
         
         # Ensure chat_id is unique
-        chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
         counter = 1
-        while os.path.exists(chat_file):
+        while chat_store.exists(chat_id):
             chat_id = f"{chat_data.get('chat_id', str(uuid.uuid4()))}-imported-{counter}"
-            chat_file = os.path.join(CHATS_DIR, f"{chat_id}.json")
             counter += 1
         
         chat_data["chat_id"] = chat_id
         chat_data["imported_at"] = datetime.now().isoformat()
         
-        with open(chat_file, 'w', encoding='utf-8') as f:
-            json.dump(chat_data, f, indent=2, ensure_ascii=False)
+        chat_store.write(chat_id, chat_data)
         
         return jsonify({"chat_id": chat_id, "success": True})
     except Exception as e:
@@ -5298,16 +5527,7 @@ def get_analytics():
     """Get conversation analytics and statistics."""
     try:
         # Get all chats
-        chats = []
-        if os.path.exists(CHATS_DIR):
-            for filename in os.listdir(CHATS_DIR):
-                if filename.endswith('.json'):
-                    try:
-                        with open(os.path.join(CHATS_DIR, filename), 'r', encoding='utf-8') as f:
-                            chat = json.load(f)
-                            chats.append(chat)
-                    except:
-                        continue
+        chats = list(_iter_chats())
         
         # Calculate statistics
         total_chats = len(chats)
@@ -5352,46 +5572,66 @@ def get_analytics():
 
 @app.route('/api/chats/search', methods=['GET'])
 def search_chats():
-    """Search chats by query."""
+    """Search chat names and messages (ranked, with highlighted snippets)."""
     try:
-        query = request.args.get('q', '').lower()
+        query = request.args.get('q', '').strip()
         if not query:
             return jsonify({"chats": []})
-        
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+
         chats = []
-        if os.path.exists(CHATS_DIR):
-            for filename in os.listdir(CHATS_DIR):
-                if filename.endswith('.json'):
-                    try:
-                        with open(os.path.join(CHATS_DIR, filename), 'r', encoding='utf-8') as f:
-                            chat = json.load(f)
-                            
-                            # Search in title/name
-                            name = (chat.get("name") or "").lower()
-                            
-                            # Search in messages
-                            matches = False
-                            for msg in chat.get("messages", []):
-                                content = (msg.get("content") or "").lower()
-                                if query in content:
-                                    matches = True
-                                    break
-                            
-                            if query in name or matches:
-                                chats.append({
-                                    "chat_id": chat.get("chat_id"),
-                                    "name": chat.get("name"),
-                                    "created_at": chat.get("created_at"),
-                                    "message_count": len(chat.get("messages", []))
-                                })
-                    except:
-                        continue
-        
+        for hit in _search_index_query(query, "chat", limit):
+            meta = chat_store.get_meta(hit["doc_id"])
+            if not meta:
+                continue
+            chats.append({
+                "chat_id": hit["doc_id"],
+                "name": meta.get("name"),
+                "created_at": meta.get("created_at"),
+                "message_count": meta.get("message_count", 0),
+                "score": hit["score"],
+                "name_highlight": hit["title"],
+                "snippets": [h["snippet"] for h in hit["hits"]]
+            })
+
         return jsonify({"chats": chats})
     except Exception as e:
         print(f"Error searching chats: {e}")
         return jsonify({"error": "Error searching chats"}), 500
 
+
+def _search_index_query(query, kind, limit):
+    """Ranked hits of one kind from the full-text search index (a substring scan when it is unavailable)."""
+    if search_index is None:
+        return substring_search(_search_documents(kind), query, limit=limit)
+    return search_index.search(query, kind, limit=limit)
+
+
+def _search_documents(kind):
+    """(doc_id, title, [(part, body), ...]) for every document of one kind, as the index stores them."""
+    if kind == "chat":
+        for chat_data in _iter_chats():
+            messages = chat_data.get("messages", [])
+            yield chat_data["chat_id"], chat_data.get("name") or "", [
+                (i, (m.get("content") or "") if isinstance(m, dict) else str(m or "")) for i, m in enumerate(messages)
+            ]
+    elif kind == "project" and os.path.exists(PROJECTS_DIR):
+        for file in os.listdir(PROJECTS_DIR):
+            if not file.endswith('.json'):
+                continue
+            try:
+                project = load_project(file[:-5])
+            except Exception:
+                continue
+            if project:
+                body = "\n\n".join(filter(None, (project.get("description"), project.get("context"))))
+                yield file[:-5], project.get("name") or "", [(0, body)]
+    elif kind == "gem":
+        for gem in _load_gems_db().get("gems", []):
+            if gem.get("id"):
+                body = "\n\n".join(filter(None, (gem.get("description"), gem.get("instructions"))))
+                yield gem["id"], gem.get("name") or "", [(0, body)]
+
 # Beta Features - Search & Discovery
 # ===================================
 
@@ -5452,125 +5692,99 @@ def _search_chats(query, limit):
     """Search within chats."""
     results = []
     try:
-        if os.path.exists(CHATS_DIR):
-            for file in os.listdir(CHATS_DIR):
-                if file.endswith('.json') and len(results) < limit:
-                    chat_id = file[:-5]
-                    chat_data = load_chat(chat_id)
-                    if chat_data:
-                        # Search in chat name
-                        name_score = 0
-                        if query.lower() in (chat_data.get("name") or "").lower():
-                            name_score = 10
-
-                        # Search in messages with context
-                        message_results = []
-                        messages = chat_data.get("messages", [])
-                        for i, msg in enumerate(messages):
-                            content = msg.get("content", "")
-                            if query.lower() in content.lower():
-                                # Get context (previous and next messages)
-                                context_start = max(0, i - 1)
-                                context_end = min(len(messages), i + 2)
-                                context = messages[context_start:context_end]
-
-                                message_results.append({
-                                    "content": content,
-                                    "role": msg.get("role"),
-                                    "timestamp": msg.get("timestamp"),
-                                    "context": context
-                                })
+        for hit in _search_index_query(query, "chat", limit):
+            chat_data = chat_store.load(hit["doc_id"])
+            if not chat_data:
+                continue
+            messages = chat_data.get("messages", [])
 
-                        if name_score > 0 or message_results:
-                            results.append({
-                                "chat_id": chat_id,
-                                "name": chat_data.get("name", "New Chat"),
-                                "created_at": chat_data.get("created_at", ""),
-                                "score": name_score + len(message_results),
-                                "message_matches": message_results[:3]
-                            })
+            # Matched messages with their neighbours for context
+            message_results = []
+            for match in hit["hits"]:
+                i = match["part"]
+                if not 0 <= i < len(messages):
+                    continue
+                msg = messages[i]
+                message_results.append({
+                    "content": msg.get("content", ""),
+                    "snippet": match["snippet"],
+                    "role": msg.get("role"),
+                    "timestamp": msg.get("timestamp"),
+                    "context": messages[max(0, i - 1):i + 2]
+                })
+
+            results.append({
+                "chat_id": hit["doc_id"],
+                "name": chat_data.get("name", "New Chat"),
+                "name_highlight": hit["title"],
+                "created_at": chat_data.get("created_at", ""),
+                "message_count": len(messages),
+                "score": hit["score"],
+                "message_matches": message_results
+            })
     except Exception as e:
         print(f"[Beta] Error searching chats: {e}")
 
-    return sorted(results, key=lambda x: x["score"], reverse=True)[:limit]
+    return results
 
 def _search_projects(query, limit):
     """Search within projects."""
     results = []
     try:
-        if os.path.exists(PROJECTS_DIR):
-            for file in os.listdir(PROJECTS_DIR):
-                if file.endswith('.json') and len(results) < limit:
-                    project_id = file[:-5]
-                    project_data = load_project(project_id)
-                    if project_data:
-                        score = 0
-                        if query.lower() in (project_data.get("name") or "").lower():
-                            score += 10
-                        if query.lower() in (project_data.get("description") or "").lower():
-                            score += 5
-
-                        if score > 0:
-                            results.append({
-                                "project_id": project_id,
-                                "name": project_data.get("name", "Project"),
-                                "description": project_data.get("description", ""),
-                                "created_at": project_data.get("created_at", ""),
-                                "chat_count": len(project_data.get("chat_ids", [])),
-                                "score": score
-                            })
+        for hit in _search_index_query(query, "project", limit):
+            project_data = load_project(hit["doc_id"])
+            if not project_data:
+                continue
+            results.append({
+                "project_id": hit["doc_id"],
+                "name": project_data.get("name", "Project"),
+                "name_highlight": hit["title"],
+                "description": project_data.get("description", ""),
+                "snippet": hit["hits"][0]["snippet"] if hit["hits"] else "",
+                "created_at": project_data.get("created_at", ""),
+                "chat_count": len(project_data.get("chat_ids", [])),
+                "score": hit["score"]
+            })
     except Exception as e:
         print(f"[Beta] Error searching projects: {e}")
 
-    return sorted(results, key=lambda x: x["score"], reverse=True)[:limit]
+    return results
 
 def _search_gems(query, limit):
     """Search within gems."""
     results = []
     try:
-        gems = _load_gems()
-        for gem_id, gem_data in gems.items():
-            if len(results) >= limit:
-                break
-
-            score = 0
-            if query.lower() in gem_id.lower():
-                score += 10
-            if query.lower() in (gem_data.get("name") or "").lower():
-                score += 8
-            if query.lower() in (gem_data.get("description") or "").lower():
-                score += 5
-            if query.lower() in (gem_data.get("instructions") or "").lower():
-                score += 3
-
-            if score > 0:
-                results.append({
-                    "gem_id": gem_id,
-                    "name": gem_data.get("name", "Gem"),
-                    "description": gem_data.get("description", ""),
-                    "tone": gem_data.get("tone", "normal"),
-                    "score": score
-                })
+        gems = {g.get("id"): g for g in _load_gems_db().get("gems", [])}
+        for hit in _search_index_query(query, "gem", limit):
+            gem_data = gems.get(hit["doc_id"])
+            if not gem_data:
+                continue
+            results.append({
+                "gem_id": hit["doc_id"],
+                "name": gem_data.get("name", "Gem"),
+                "name_highlight": hit["title"],
+                "description": gem_data.get("description", ""),
+                "snippet": hit["hits"][0]["snippet"] if hit["hits"] else "",
+                "tone": gem_data.get("tone", "normal"),
+                "score": hit["score"]
+            })
     except Exception as e:
         print(f"[Beta] Error searching gems: {e}")
 
-    return sorted(results, key=lambda x: x["score"], reverse=True)[:limit]
+    return results
 
 def _search_brain(query, limit):
     """Search within brain knowledge."""
     results = []
     try:
-        # Import brain connector
-        from brain import BrainConnector
-        brain = BrainConnector()
-
-        # Search across all brain data
-        knowledge_results = brain.search(query, limit=limit)
+        # Search across all brain data (shared, pre-indexed connector)
+        knowledge_results = brain_connector.search(query, limit=limit)
 
         for item in knowledge_results:
             results.append({
                 "title": item.get("title", ""),
                 "content": item.get("content", "")[:200] + "...",
+                "snippet": highlight_snippet(item.get("content", ""), query),
                 "source": item.get("source", "brain"),
                 "learned_at": item.get("learned_at", ""),
                 "score": item.get("relevance_score", 0)
@@ -5600,16 +5814,9 @@ def get_beta_analytics():
         }
 
         # Count chats and messages
-        if os.path.exists(CHATS_DIR):
-            for file in os.listdir(CHATS_DIR):
-                if file.endswith('.json'):
-                    analytics["total_chats"] += 1
-                    try:
-                        with open(os.path.join(CHATS_DIR, file), 'r', encoding='utf-8') as f:
-                            chat_data = json.load(f)
-                            analytics["total_messages"] += len(chat_data.get("messages", []))
-                    except:
-                        pass
+        for chat_meta in list_chats():
+            analytics["total_chats"] += 1
+            analytics["total_messages"] += chat_meta.get("message_count", 0)
 
         # Count projects
         if os.path.exists(PROJECTS_DIR):
@@ -5621,20 +5828,13 @@ def get_beta_analytics():
 
         # Get top topics (simple keyword analysis)
         topic_counts = {}
-        if os.path.exists(CHATS_DIR):
-            for file in os.listdir(CHATS_DIR):
-                if file.endswith('.json'):
-                    try:
-                        with open(os.path.join(CHATS_DIR, file), 'r', encoding='utf-8') as f:
-                            chat_data = json.load(f)
-                            chat_name = chat_data.get("name", "").lower()
-                            # Extract keywords from chat names
-                            words = chat_name.split()
-                            for word in words:
-                                if len(word) > 3:  # Skip short words
-                                    topic_counts[word] = topic_counts.get(word, 0) + 1
-                    except:
-                        pass
+        for chat_meta in list_chats():
+            chat_name = (chat_meta.get("name") or "").lower()
+            # Extract keywords from chat names
+            words = chat_name.split()
+            for word in words:
+                if len(word) > 3:  # Skip short words
+                    topic_counts[word] = topic_counts.get(word, 0) + 1
 
         # Sort topics by frequency
         analytics["top_topics"] = sorted(
@@ -5645,19 +5845,12 @@ def get_beta_analytics():
 
         # Get recent activity (last 10 chats)
         recent_chats = []
-        if os.path.exists(CHATS_DIR):
-            for file in os.listdir(CHATS_DIR):
-                if file.endswith('.json'):
-                    try:
-                        with open(os.path.join(CHATS_DIR, file), 'r', encoding='utf-8') as f:
-                            chat_data = json.load(f)
-                            recent_chats.append({
-                                "name": chat_data.get("name", "Chat"),
-                                "created_at": chat_data.get("created_at", ""),
-                                "message_count": len(chat_data.get("messages", []))
-                            })
-                    except:
-                        pass
+        for chat_meta in list_chats(limit=10):
+            recent_chats.append({
+                "name": chat_meta.get("name", "Chat"),
+                "created_at": chat_meta.get("created_at", ""),
+                "message_count": chat_meta.get("message_count", 0)
+            })
 
         # Sort by creation date and take last 10
         analytics["recent_activity"] = sorted(
@@ -6361,137 +6554,10 @@ def summarize_chat(chat_id):
 
 
 if __name__ == '__main__':
-    # Try to load models on startup (with timeout and fallback)
+    # Models load concurrently in the background; the port binds right away and
+    # requests get knowledge-only answers until their model is ready (see /healthz).
     print("Initializing Atlas AI...")
-
-    # Load Thor 1.2 first (default, improved version from models/thor/thor-1.2 - should load instantly)
-    print("Loading Thor 1.2 (default, models/thor/thor-1.2)...")
-    try:
-        model_loading_progress['thor-1.2']['status'] = 'loading'
-        model_loading_progress['thor-1.2']['progress'] = 10
-        model_loading_progress['thor-1.2']['message'] = 'Starting Thor 1.2 load...'
-        get_model(model_name='thor-1.2')
-        model_loading_progress['thor-1.2']['progress'] = 100
-        model_loading_progress['thor-1.2']['status'] = 'loaded'
-        model_loading_progress['thor-1.2']['message'] = 'Thor 1.2 loaded successfully'
-        print("✅ Thor 1.2 loaded successfully (default, loads instantly)")
-    except Exception as e:
-        print(f"❌ Failed to load Thor 1.2: {e}")
-        model_loading_progress['thor-1.2']['status'] = 'failed'
-        model_loading_progress['thor-1.2']['message'] = f'Failed to load: {str(e)[:100]}'
-
-    # Try loading Thor 1.0 (stable)
-    print("Loading Thor 1.0 (stable)...")
-    try:
-        model_loading_progress['thor-1.0']['status'] = 'loading'
-        model_loading_progress['thor-1.0']['progress'] = 10
-        model_loading_progress['thor-1.0']['message'] = 'Starting Thor 1.0 load...'
-        get_model(model_name='thor-1.0')
-        model_loading_progress['thor-1.0']['progress'] = 100
-        model_loading_progress['thor-1.0']['status'] = 'loaded'
-        model_loading_progress['thor-1.0']['message'] = 'Thor 1.0 loaded successfully'
-        print("✅ Thor 1.0 loaded successfully")
-    except Exception as e:
-        print(f"❌ Failed to load Thor 1.0: {e}")
-        model_loading_progress['thor-1.0']['status'] = 'failed'
-        model_loading_progress['thor-1.0']['message'] = f'Failed to load: {str(e)[:100]}'
-
-    # Try loading Thor 1.1 (Qwen3-Thor combined model) in background
-    print("Loading Thor 1.1 (latest)...")
-    import threading
-    def load_thor_1_1():
-        progress_key = 'thor-1.1'
-        try:
-            # Initialize progress tracking
-            model_loading_progress[progress_key]['status'] = 'loading'
-            model_loading_progress[progress_key]['progress'] = 10
-            model_loading_progress[progress_key]['message'] = 'Starting Thor 1.1 load...'
-            
-            model = get_model(model_name='thor-1.1')  # This maps to qwen3-thor
-            
-            # Verify model actually loaded and has a valid predict method
-            if model is None or not hasattr(model, 'predict'):
-                raise Exception("Model returned None or is not functional after loading attempt")
-            
-            # Test the model with a simple call to ensure it works
-            try:
-                test_result = model.predict("test", task="text_generation", max_new_tokens=5)
-                if not test_result or 'generated_text' not in test_result:
-                    raise Exception("Model loaded but failed basic functionality test")
-            except Exception as e:
-                raise Exception(f"Model loaded but not functional: {e}")
-            
-            print("✅ Thor 1.1 loaded successfully")
-            
-            # Mark as loaded ONLY after successful functionality test
-            model_loading_progress[progress_key]['progress'] = 100
-            model_loading_progress[progress_key]['status'] = 'loaded'
-            model_loading_progress[progress_key]['message'] = 'Thor 1.1 loaded successfully'
-        except Exception as e:
-            print(f"❌ Failed to load Thor 1.1: {e}")
-            import traceback
-            traceback.print_exc()
-            model_loading_progress[progress_key]['status'] = 'failed'
-            model_loading_progress[progress_key]['progress'] = 0
-            model_loading_progress[progress_key]['message'] = f'Failed to load: {str(e)[:100]}'
-    
-    # Start loading in background thread so it doesn't block server startup
-    thor_1_1_thread = threading.Thread(target=load_thor_1_1, daemon=True)
-    thor_1_1_thread.start()
-
-    # Load working AI model directly (skip problematic Thor/Qwen3-4B)
-    print("Loading AI model (DialoGPT-medium)...")
-    try:
-        from transformers import AutoTokenizer, AutoModelForCausalLM
-        import torch
-
-        print("Loading AI tokenizer...")
-        tokenizer = AutoTokenizer.from_pretrained("microsoft/DialoGPT-medium")
-        print("Loading AI model...")
-        model = AutoModelForCausalLM.from_pretrained(
-            "microsoft/DialoGPT-medium",
-            torch_dtype=torch.float16,
-            device_map={"": "cpu"}
-        )
-
-        # Store as direct model
-        model_instances['ai-direct'] = {
-            'model': model,
-            'tokenizer': tokenizer,
-            'type': 'direct'
-        }
-
-        print("✅ AI model loaded successfully!")
-        print(f"Model has {model.num_parameters():,} parameters")
-
-    except Exception as e:
-        print(f"❌ Failed to load AI model: {e}")
-        print("Falling back to knowledge-based responses")
-
-    # Check if we have any working models (including direct AI models)
-    has_direct_models = any(k for k, v in model_instances.items() if isinstance(v, dict) and v.get('type') == 'direct')
-    has_models = any(v for k, v in model_instances.items() if not isinstance(v, dict) or not isinstance(v, dict)) or has_direct_models
-
-    if has_models:
-        print("✅ AI models are available!")
-        print("Starting Auto-Trainer...")
-        try:
-            if get_auto_trainer is not None and callable(get_auto_trainer):
-                auto_trainer = get_auto_trainer()
-                if auto_trainer is not None:
-                    auto_trainer.start()
-                    print("Auto-Trainer is running in the background!")
-                    print("Thor will continuously learn from conversations and improve itself.")
-                else:
-                    print("⚠️  Auto-trainer not available (running in fallback mode)")
-            else:
-                print("⚠️  Auto-trainer function not available (running in fallback mode)")
-        except Exception as e:
-            print(f"❌ Failed to start auto-trainer: {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        print("⚠️  No models loaded - running in fallback mode")
+    startup.start()
     print()
 
     # Run Flask app
@@ -12,6 +12,34 @@ from .model_loading_error_handling import (
     log_model_loading_error,
     ModelLoadingError
 )
+from .result_setter_index import ResultSetterIndex, get_result_setter_index
+from .lru_cache import TTLCache
+from .cache_backend import (
+    CacheBackend,
+    MemoryBackend,
+    SQLiteBackend,
+    configure_cache_backends,
+    get_cache_backend,
+    all_cache_stats
+)
+from .chat_store import ChatStore, get_chat_store
+from .chat_index import ChatMetaIndex
+from .search_index import SearchIndex, get_search_index, highlight_snippet
+from .research_cache import ResearchCache, classify_intent, get_research_cache
+from .model_registry import ModelRegistry, files_footprint, measure_footprint
+from .startup import StartupOrchestrator
+from .chat_stream import ChatStream, current_stream, set_current_stream
+from .prefix_cache import PrefixKVCache, get_prefix_cache
+from .inference_scheduler import (
+    InferenceScheduler,
+    configure_inference_schedulers,
+    get_inference_scheduler,
+    inference_scheduler_stats
+)
+from .compact_weights import CompactWeights, apply_compact_weights, find_compact_weights, load_compact_weights
+from .checkpoint_io import find_safetensors_checkpoint, load_safetensors_checkpoint, torch_load_hook
+from .request_timing import LatencyHistograms, StageTimer, current_timer, set_current_timer
+from .event_log import BufferedEventLog
 from .r_script_runner import (
     run_r_script,
     check_r_available,
@@ -29,6 +57,49 @@ __all__ = [
     'get_error_progress_message',
     'log_model_loading_error',
     'ModelLoadingError',
+    'ResultSetterIndex',
+    'get_result_setter_index',
+    'TTLCache',
+    'CacheBackend',
+    'MemoryBackend',
+    'SQLiteBackend',
+    'configure_cache_backends',
+    'get_cache_backend',
+    'all_cache_stats',
+    'ChatStore',
+    'get_chat_store',
+    'ChatMetaIndex',
+    'SearchIndex',
+    'get_search_index',
+    'highlight_snippet',
+    'ResearchCache',
+    'classify_intent',
+    'get_research_cache',
+    'ModelRegistry',
+    'files_footprint',
+    'measure_footprint',
+    'StartupOrchestrator',
+    'ChatStream',
+    'current_stream',
+    'set_current_stream',
+    'PrefixKVCache',
+    'get_prefix_cache',
+    'InferenceScheduler',
+    'configure_inference_schedulers',
+    'get_inference_scheduler',
+    'inference_scheduler_stats',
+    'CompactWeights',
+    'apply_compact_weights',
+    'find_compact_weights',
+    'load_compact_weights',
+    'find_safetensors_checkpoint',
+    'torch_load_hook',
+    'load_safetensors_checkpoint',
+    'LatencyHistograms',
+    'StageTimer',
+    'current_timer',
+    'set_current_timer',
+    'BufferedEventLog',
     'run_r_script',
     'check_r_available',
     'call_r_percent_load_calc',
@@ -0,0 +1,276 @@
+"""
+Pluggable cache backends shared by the chatbot's caches and rate limiter.
+
+Two implementations share one small interface (get/set/delete/incr/stats):
+
+- MemoryBackend: process-local, wraps TTLCache (fastest, per-worker).
+- SQLiteBackend: a WAL-mode SQLite file that every worker process on the host
+  opens, so gunicorn workers share cache entries and rate-limit counters.
+
+Select the backend with ATLAS_CACHE_BACKEND=memory|sqlite (default: memory) and
+the SQLite location with ATLAS_CACHE_PATH, or call configure_cache_backends().
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .lru_cache import TTLCache
+
+
+class CacheBackend(ABC):
+    """Interface for a namespaced key/value cache with TTLs."""
+
+    namespace = "default"
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to a counter; a missing/expired counter starts at `amount` with a fresh TTL."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Process-local backend on top of TTLCache."""
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None, max_entries: int = 1000, max_bytes: int = 0):
+        self.namespace = namespace
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl, name=namespace)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._cache.get(key, default)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> bool:
+        return self._cache.delete(key)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return self._cache.incr(key, amount, ttl=ttl)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["backend"] = "memory"
+        return stats
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cross-process backend stored in a single SQLite file (WAL mode).
+
+    Values must be JSON-serializable. Limits are enforced lazily: every
+    `prune_every` writes, expired rows are deleted, then the least recently
+    written rows beyond max_entries, then the least recently written rows
+    whose (encoded) values take the namespace past max_bytes (0 = no limit).
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache ("
+        " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+        " expires_at REAL, updated_at REAL NOT NULL,"
+        " PRIMARY KEY (ns, key)) WITHOUT ROWID"
+    )
+
+    def __init__(self, path: str, namespace: str, ttl: Optional[float] = None, max_entries: int = 1000,
+                 max_bytes: int = 0, prune_every: int = 200):
+        self.path = str(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._prune_every = prune_every
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn()  # create schema eagerly so startup errors surface early
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(self._SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_updated ON cache (ns, updated_at)")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, attr: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def _expiry(self, ttl: Optional[float], now: float) -> Optional[float]:
+        ttl = self.ttl if ttl is None else ttl
+        return now + ttl if ttl is not None else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE ns = ? AND key = ?", (self.namespace, str(key))
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self._count("misses")
+            return default
+        self._count("hits")
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (ns, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, str(key), json.dumps(value), self._expiry(ttl, now), now),
+        )
+        self._after_write()
+
+    def delete(self, key: str) -> bool:
+        cur = self._conn().execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.namespace, str(key)))
+        return cur.rowcount > 0
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE ns = ? AND key = ?", (self.namespace, str(key))
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                value, expires_at = amount, self._expiry(ttl, now)
+            else:
+                value, expires_at = json.loads(row[0]) + amount, row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, str(key), json.dumps(value), expires_at, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write()
+        return value
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+
+    def _after_write(self) -> None:
+        with self._stats_lock:
+            self._writes += 1
+            due = self._writes % self._prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired rows and trim the namespace to max_entries and max_bytes."""
+        conn = self._conn()
+        removed = conn.execute(
+            "DELETE FROM cache WHERE ns = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, time.time()),
+        ).rowcount
+        if self.max_entries:
+            trimmed = conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN ("
+                " SELECT key FROM cache WHERE ns = ? ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_entries),
+            ).rowcount
+            self._count("evictions", trimmed)
+            removed += trimmed
+        if self.max_bytes:
+            trimmed = conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN ("
+                " SELECT key FROM (SELECT key, SUM(length(CAST(value AS BLOB)))"
+                "  OVER (ORDER BY updated_at DESC, key) AS running FROM cache WHERE ns = ?)"
+                " WHERE running > ?)",
+                (self.namespace, self.namespace, self.max_bytes),
+            ).rowcount
+            self._count("evictions", trimmed)
+            removed += trimmed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._conn().execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()[0]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.namespace,
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "scope": "this worker (entries are shared)",
+            }
+
+
+_backend_kind = os.environ.get("ATLAS_CACHE_BACKEND", "memory").strip().lower()
+_backend_path: Optional[str] = os.environ.get("ATLAS_CACHE_PATH")
+_backends: Dict[str, CacheBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def configure_cache_backends(kind: Optional[str] = None, path: Optional[str] = None) -> None:
+    """Set the backend kind/path used by get_cache_backend (call before first use)."""
+    global _backend_kind, _backend_path
+    if kind:
+        _backend_kind = kind.strip().lower()
+    if path:
+        _backend_path = str(path)
+
+
+def get_cache_backend(namespace: str, ttl: Optional[float] = None, max_entries: int = 1000,
+                      max_bytes: int = 0) -> CacheBackend:
+    """Get (or create) the shared backend for a namespace."""
+    backend = _backends.get(namespace)
+    if backend is not None:
+        return backend
+    with _backends_lock:
+        backend = _backends.get(namespace)
+        if backend is None:
+            if _backend_kind == "sqlite":
+                path = _backend_path or str(Path(__file__).parent.parent / "cache" / "atlas_cache.sqlite3")
+                try:
+                    backend = SQLiteBackend(path, namespace, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"[Cache] SQLite backend unavailable for '{namespace}' ({e}); using memory")
+            if backend is None:
+                backend = MemoryBackend(namespace, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+            _backends[namespace] = backend
+    return backend
+
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every backend created so far, keyed by namespace."""
+    return {ns: backend.stats() for ns, backend in list(_backends.items())}
@@ -0,0 +1,167 @@
+"""
+Persisted chat metadata index.
+
+A small SQLite table (chat_id -> name, created_at, updated_at, message_count)
+plus chat/project membership, kept next to the chat files. ChatStore updates it
+on every save, write and delete, so the sidebar listing is an indexed, paginated
+query instead of a parse of every chat file.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+SORT_COLUMNS = {
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "name": "name COLLATE NOCASE",
+    "message_count": "message_count",
+}
+
+
+class ChatMetaIndex:
+    """SQLite-backed metadata index for one chats directory."""
+
+    # Bumped when a rebuild must run once even though the chat ids match
+    # (1: names backfilled for chats saved without one)
+    VERSION = 1
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS chats ("
+        " chat_id TEXT PRIMARY KEY, name TEXT, created_at TEXT, updated_at TEXT,"
+        " message_count INTEGER NOT NULL DEFAULT 0)",
+        "CREATE INDEX IF NOT EXISTS chats_created ON chats (created_at)",
+        "CREATE INDEX IF NOT EXISTS chats_updated ON chats (updated_at)",
+        "CREATE TABLE IF NOT EXISTS chat_projects ("
+        " project_id TEXT NOT NULL, chat_id TEXT NOT NULL, PRIMARY KEY (project_id, chat_id))",
+        "CREATE INDEX IF NOT EXISTS chat_projects_chat ON chat_projects (chat_id)",
+    )
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------ writes
+
+    def upsert(self, chat_id: str, meta: Dict[str, Any], message_count: int) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO chats (chat_id, name, created_at, updated_at, message_count) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(chat_id) DO UPDATE SET name = excluded.name, created_at = excluded.created_at,"
+                " updated_at = excluded.updated_at, message_count = excluded.message_count",
+                (
+                    chat_id,
+                    meta.get("name") or "New Chat",
+                    meta.get("created_at", ""),
+                    meta.get("updated_at") or datetime.now().isoformat(),
+                    message_count,
+                ),
+            )
+
+    def delete(self, chat_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM chats WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM chat_projects WHERE chat_id = ?", (chat_id,))
+
+    def set_project_chats(self, project_id: str, chat_ids: Iterable[str]) -> None:
+        """Replace the membership of a project (pass [] when the project is deleted)."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM chat_projects WHERE project_id = ?", (project_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO chat_projects (project_id, chat_id) VALUES (?, ?)",
+                [(project_id, cid) for cid in dict.fromkeys(chat_ids or [])],
+            )
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Replace all chat rows (project membership is kept)."""
+        rows = [
+            (e["chat_id"], e.get("name") or "New Chat", e.get("created_at", ""),
+             e.get("updated_at", ""), e.get("message_count", 0))
+            for e in entries
+        ]
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM chats")
+            conn.executemany(
+                "INSERT OR REPLACE INTO chats (chat_id, name, created_at, updated_at, message_count)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------ reads
+
+    def count(self, project_id: Optional[str] = None) -> int:
+        if project_id:
+            sql, args = "SELECT COUNT(*) FROM chat_projects WHERE project_id = ?", (project_id,)
+        else:
+            sql, args = "SELECT COUNT(*) FROM chats", ()
+        return self._conn().execute(sql, args).fetchone()[0]
+
+    @property
+    def version(self) -> int:
+        return self._conn().execute("PRAGMA user_version").fetchone()[0]
+
+    def set_version(self, version: int) -> None:
+        conn = self._conn()
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+
+    def chat_ids(self) -> List[str]:
+        return [row[0] for row in self._conn().execute("SELECT chat_id FROM chats")]
+
+    def list(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: str = "created_at",
+        descending: bool = True,
+        project_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return a page of chat metadata, sorted on an indexed column."""
+        column = SORT_COLUMNS.get(sort, SORT_COLUMNS["created_at"])
+        direction = "DESC" if descending else "ASC"
+        sql = "SELECT c.chat_id, c.name, c.created_at, c.updated_at, c.message_count FROM chats c"
+        args: List[Any] = []
+        if project_id:
+            sql += " JOIN chat_projects p ON p.chat_id = c.chat_id WHERE p.project_id = ?"
+            args.append(project_id)
+        sql += f" ORDER BY {column} {direction}, c.chat_id LIMIT ? OFFSET ?"
+        args.extend([limit if limit is not None else -1, max(0, offset)])
+
+        conn = self._conn()
+        chats = [dict(row) for row in conn.execute(sql, args)]
+        if chats:
+            projects: Dict[str, List[str]] = {}
+            if len(chats) > 500:
+                rows = conn.execute("SELECT chat_id, project_id FROM chat_projects")
+            else:
+                placeholders = ",".join("?" * len(chats))
+                rows = conn.execute(
+                    f"SELECT chat_id, project_id FROM chat_projects WHERE chat_id IN ({placeholders})",
+                    [c["chat_id"] for c in chats],
+                )
+            for row in rows:
+                projects.setdefault(row[0], []).append(row[1])
+            for chat in chats:
+                chat["project_ids"] = projects.get(chat["chat_id"], [])
+        return chats
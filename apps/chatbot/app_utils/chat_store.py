@@ -0,0 +1,424 @@
+"""
+Append-only chat storage.
+
+Each chat is stored as two files in the chats directory:
+
+    <chat_id>.json    snapshot: {chat_id, created_at, name, messages, ...}
+    <chat_id>.jsonl   log of changes made since the snapshot
+
+Adding a turn appends one line per new message to the log (fsync'd), so the
+cost of extending a chat does not grow with its length. Name/metadata changes
+are appended as "meta" records. When the log passes `compact_every` records the
+chat is compacted: a new snapshot is written to a temp file, fsync'd and atomically
+renamed over the old one, then the log is removed. Message records carry their
+index, so a crash between those two steps never duplicates messages on replay.
+A torn final log line is ignored on replay and cut off before the next append,
+so later records never land on the end of it.
+
+The snapshot format is the same one chats have always used, so existing chats
+load unchanged and export/import keep working on plain JSON. Every write also
+updates the chat metadata index (app_utils/chat_index.py) and the full-text search
+index (app_utils/search_index.py) when they are attached; appends only index the
+new messages.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .chat_index import ChatMetaIndex
+
+INDEX_FILENAME = "_index.sqlite3"
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-process locking only
+    fcntl = None
+
+
+def _fingerprint(message: Optional[Dict]) -> Optional[str]:
+    return json.dumps(message, sort_keys=True, default=str) if message is not None else None
+
+
+class _ChatState:
+    """What this process knows about a chat's on-disk state."""
+
+    __slots__ = ('message_count', 'last_message', 'meta', 'log_records', 'stamp')  # last_message is a fingerprint
+
+    def __init__(self, message_count: int, last_message: Optional[str], meta: Dict, log_records: int, stamp):
+        self.message_count = message_count
+        self.last_message = last_message
+        self.meta = meta
+        self.log_records = log_records
+        self.stamp = stamp
+
+
+class ChatStore:
+    """File-backed chat store with incremental appends and periodic compaction."""
+
+    def __init__(self, chats_dir: str, compact_every: int = 200, index=None, search=None):
+        self.chats_dir = str(chats_dir)
+        self.compact_every = compact_every
+        self.index = index
+        self.search = search
+        self._states: Dict[str, _ChatState] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.chats_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------ paths
+
+    def snapshot_path(self, chat_id: str) -> str:
+        return os.path.join(self.chats_dir, f"{chat_id}.json")
+
+    def log_path(self, chat_id: str) -> str:
+        return os.path.join(self.chats_dir, f"{chat_id}.jsonl")
+
+    def _lock(self, chat_id: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(chat_id)
+            if lock is None:
+                lock = self._locks[chat_id] = threading.Lock()
+            return lock
+
+    def _stamp(self, chat_id: str):
+        """(snapshot mtime, log size) - changes whenever another process writes."""
+        stamp = []
+        for path, attr in ((self.snapshot_path(chat_id), 'st_mtime_ns'), (self.log_path(chat_id), 'st_size')):
+            try:
+                stamp.append(getattr(os.stat(path), attr))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    # ------------------------------------------------------------------ reading
+
+    def _read(self, chat_id: str):
+        """Return (chat_data, log_records) replaying the log onto the snapshot, or (None, 0)."""
+        chat_data = None
+        snapshot = self.snapshot_path(chat_id)
+        if os.path.exists(snapshot):
+            with open(snapshot, 'r', encoding='utf-8') as f:
+                chat_data = json.load(f)
+        log_records = 0
+        log = self.log_path(chat_id)
+        if os.path.exists(log):
+            if chat_data is None:
+                chat_data = {"chat_id": chat_id, "messages": []}
+            messages = chat_data.setdefault("messages", [])
+            with open(log, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write; a gap it leaves is caught by the index check
+                    log_records += 1
+                    if record.get("op") == "append":
+                        index = record.get("index", len(messages))
+                        if index == len(messages):
+                            messages.append(record.get("message"))
+                        elif index > len(messages):
+                            break  # gap: stop at the last consistent point
+                    elif record.get("op") == "meta":
+                        chat_data.update(record.get("meta") or {})
+        return chat_data, log_records
+
+    def _state(self, chat_id: str) -> Optional[_ChatState]:
+        stamp = self._stamp(chat_id)
+        state = self._states.get(chat_id)
+        if state is not None and state.stamp == stamp:
+            return state
+        chat_data, log_records = self._read(chat_id)
+        if chat_data is None:
+            self._states.pop(chat_id, None)
+            return None
+        messages = chat_data.get("messages", [])
+        meta = {k: v for k, v in chat_data.items() if k != "messages"}
+        state = _ChatState(len(messages), _fingerprint(messages[-1] if messages else None), meta, log_records, stamp)
+        self._states[chat_id] = state
+        return state
+
+    def load(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Load a chat (snapshot + log), or None."""
+        chat_data, _ = self._read(chat_id)
+        return chat_data
+
+    def get_meta(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Chat metadata without messages (cached between writes), plus message_count."""
+        with self._lock(chat_id):
+            state = self._state(chat_id)
+            if state is None:
+                return None
+            meta = dict(state.meta)
+            meta["message_count"] = state.message_count
+            return meta
+
+    def exists(self, chat_id: str) -> bool:
+        return os.path.exists(self.snapshot_path(chat_id)) or os.path.exists(self.log_path(chat_id))
+
+    def modified_time(self, chat_id: str) -> float:
+        """Latest mtime across the snapshot and the log (0 if neither exists)."""
+        mtimes = [0.0]
+        for path in (self.snapshot_path(chat_id), self.log_path(chat_id)):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except OSError:
+                pass
+        return max(mtimes)
+
+    def list_ids(self) -> List[str]:
+        ids = set()
+        if os.path.exists(self.chats_dir):
+            for name in os.listdir(self.chats_dir):
+                if name.endswith('.json'):
+                    ids.add(name[:-5])
+                elif name.endswith('.jsonl'):
+                    ids.add(name[:-6])
+        return sorted(ids)
+
+    # ------------------------------------------------------------------ writing
+
+    def _fsync_write(self, path: str, data: str, mode: str) -> None:
+        with open(path, mode, encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_log(self, path: str, data: str) -> None:
+        """Append complete lines, first cutting off a torn last line left by a crash."""
+        with open(path, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    f.truncate(self._last_line_end(f, end))
+            f.write(data.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _last_line_end(f, end: int, chunk: int = 4096) -> int:
+        """Offset just past the last newline before `end` (0 if there is none)."""
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            pos = start
+        return 0
+
+    def _update_index(self, chat_id: str, meta: Dict[str, Any], message_count: int) -> None:
+        if self.index is None:
+            return
+        try:
+            self.index.upsert(chat_id, dict(meta, updated_at=datetime.now().isoformat()), message_count)
+        except Exception as e:
+            print(f"[Chat Index] Failed to index chat {chat_id}: {e}")
+
+    def _update_search(self, chat_id: str, action: str, *args) -> None:
+        if self.search is None:
+            return
+        try:
+            getattr(self.search, action)(chat_id, *args)
+        except Exception as e:
+            print(f"[Search Index] Failed to index chat {chat_id}: {e}")
+
+    def _write_snapshot(self, chat_id: str, chat_data: Dict[str, Any]) -> None:
+        """Atomically replace the snapshot and drop the log it supersedes."""
+        snapshot = self.snapshot_path(chat_id)
+        tmp = f"{snapshot}.tmp"
+        self._fsync_write(tmp, json.dumps(chat_data, indent=2, ensure_ascii=False), 'w')
+        os.replace(tmp, snapshot)
+        try:
+            os.remove(self.log_path(chat_id))
+        except FileNotFoundError:
+            pass
+        messages = chat_data.get("messages", [])
+        self._states[chat_id] = _ChatState(
+            len(messages),
+            _fingerprint(messages[-1] if messages else None),
+            {k: v for k, v in chat_data.items() if k != "messages"},
+            0,
+            self._stamp(chat_id),
+        )
+        self._update_index(chat_id, chat_data, len(messages))
+        self._update_search(chat_id, "index_chat", chat_data.get("name") or "", messages)
+
+    def write(self, chat_id: str, chat_data: Dict[str, Any]) -> None:
+        """Write a complete chat (used for imports and rewrites)."""
+        with self._lock(chat_id):
+            self._write_snapshot(chat_id, chat_data)
+
+    def save(self, chat_id: str, messages: List[Dict], meta: Dict[str, Any]) -> None:
+        """
+        Persist a chat whose message list only grew since the last save.
+
+        New messages and changed metadata are appended to the log; if the list was
+        edited rather than extended, or the log is due for compaction, a full
+        snapshot is written instead.
+        """
+        with self._lock(chat_id):
+            state = self._state(chat_id)
+            if state is None:
+                chat_data = dict(meta)
+                chat_data.setdefault("chat_id", chat_id)
+                chat_data.setdefault("created_at", datetime.now().isoformat())
+                chat_data["messages"] = list(messages)
+                self._write_snapshot(chat_id, chat_data)
+                return
+
+            count = state.message_count
+            extends = len(messages) >= count and (count == 0 or _fingerprint(messages[count - 1]) == state.last_message)
+            changed_meta = {k: v for k, v in meta.items() if state.meta.get(k) != v}
+            new_records = len(messages) - count + (1 if changed_meta else 0) if extends else 0
+
+            if not extends or state.log_records + new_records > self.compact_every:
+                chat_data = dict(state.meta)
+                chat_data.update(meta)
+                chat_data["messages"] = list(messages)
+                self._write_snapshot(chat_id, chat_data)
+                return
+
+            if not new_records:
+                return
+            lines = [
+                json.dumps({"op": "append", "index": i, "message": messages[i]}, ensure_ascii=False)
+                for i in range(count, len(messages))
+            ]
+            if changed_meta:
+                lines.append(json.dumps({"op": "meta", "meta": changed_meta}, ensure_ascii=False))
+            self._append_log(self.log_path(chat_id), "\n".join(lines) + "\n")
+
+            state.message_count = len(messages)
+            state.last_message = _fingerprint(messages[-1]) if messages else state.last_message
+            state.meta.update(changed_meta)
+            state.log_records += len(lines)
+            state.stamp = self._stamp(chat_id)
+            self._update_index(chat_id, state.meta, state.message_count)
+            if len(messages) > count:
+                self._update_search(chat_id, "append_messages", count, messages[count:])
+            if "name" in changed_meta:
+                self._update_search(chat_id, "set_chat_name", changed_meta["name"] or "")
+
+    def compact(self, chat_id: str) -> bool:
+        """Fold the log into the snapshot now."""
+        with self._lock(chat_id):
+            chat_data, log_records = self._read(chat_id)
+            if chat_data is None or not log_records:
+                return False
+            self._write_snapshot(chat_id, chat_data)
+            return True
+
+    def delete(self, chat_id: str) -> bool:
+        with self._lock(chat_id):
+            removed = False
+            for path in (self.snapshot_path(chat_id), self.log_path(chat_id)):
+                try:
+                    os.remove(path)
+                    removed = True
+                except FileNotFoundError:
+                    pass
+            self._states.pop(chat_id, None)
+            if self.index is not None:
+                self.index.delete(chat_id)
+            self._update_search(chat_id, "remove_chat")
+            return removed
+
+    def reconcile_index(self, namer: Optional[Callable[[List[Dict]], Optional[str]]] = None) -> int:
+        """
+        Rebuild the metadata index if it does not match the chat files on disk
+        (or predates ChatMetaIndex.VERSION). Unnamed chats with at least one
+        exchange are named with `namer(messages)` and saved.
+        """
+        if self.index is None:
+            return 0
+        ids = self.list_ids()
+        if set(ids) == set(self.index.chat_ids()) and self.index.version >= self.index.VERSION:
+            return 0
+        entries = []
+        for chat_id in ids:
+            try:
+                meta = self.get_meta(chat_id)
+                if meta and namer is not None and not meta.get("name") and meta.get("message_count", 0) >= 2:
+                    meta = self._backfill_name(chat_id, namer) or meta
+            except Exception as e:
+                print(f"[Chat Index] Skipping unreadable chat {chat_id}: {e}")
+                continue
+            if meta:
+                meta["chat_id"] = chat_id
+                meta["updated_at"] = datetime.fromtimestamp(self.modified_time(chat_id)).isoformat()
+                entries.append(meta)
+        count = self.index.rebuild(entries)
+        self.index.set_version(self.index.VERSION)
+        print(f"[Chat Index] Rebuilt metadata index for {count} chats in {self.chats_dir}")
+        return count
+
+    def _backfill_name(self, chat_id: str, namer: Callable[[List[Dict]], Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Name an unnamed chat and save the name; returns its new metadata."""
+        chat_data = self.load(chat_id)
+        name = namer(chat_data.get("messages", [])) if chat_data else None
+        if not name:
+            return None
+        chat_data["name"] = name
+        self.write(chat_id, chat_data)
+        return self.get_meta(chat_id)
+
+    def reconcile_search(self) -> int:
+        """Index chats missing from the search index and drop ones that no longer exist."""
+        if self.search is None:
+            return 0
+        ids = set(self.list_ids())
+        indexed = set(self.search.doc_ids("chat"))
+        for chat_id in indexed - ids:
+            self._update_search(chat_id, "remove_chat")
+        added = 0
+        for chat_id in sorted(ids - indexed):
+            try:
+                chat_data = self.load(chat_id)
+            except Exception as e:
+                print(f"[Search Index] Skipping unreadable chat {chat_id}: {e}")
+                continue
+            if chat_data:
+                self._update_search(chat_id, "index_chat", chat_data.get("name") or "", chat_data.get("messages", []))
+                added += 1
+        if added:
+            print(f"[Search Index] Indexed {added} chats from {self.chats_dir}")
+        return added
+
+
+_stores: Dict[str, ChatStore] = {}
+
+
+_stores_lock = threading.Lock()
+
+
+def get_chat_store(chats_dir: str, indexed: bool = True, search=None,
+                   namer: Optional[Callable[[List[Dict]], Optional[str]]] = None) -> ChatStore:
+    """
+    Get the shared ChatStore for a chats directory (with its metadata index and
+    optional search index). `namer` names unnamed chats when the index is rebuilt.
+    """
+    key = os.path.abspath(str(chats_dir))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                index = None
+                if indexed:
+                    try:
+                        index = ChatMetaIndex(os.path.join(key, INDEX_FILENAME))
+                    except Exception as e:
+                        print(f"[Chat Index] Index unavailable for {key}: {e}")
+                store = ChatStore(key, index=index, search=search)
+                store.reconcile_index(namer)
+                store.reconcile_search()
+                _stores[key] = store
+    return store
@@ -0,0 +1,63 @@
+"""
+Server-sent events for streaming /api/chat.
+
+A ChatStream is a thread-safe event queue. The streaming endpoint runs the
+normal chat handler on a worker thread with the stream set as that thread's
+current stream; model generation pushes "token" events into it as text is
+produced, and the endpoint finishes with one "final" event carrying the
+refined response (or an "error" event). events() yields the queue as
+SSE-formatted strings for a Flask streaming response.
+"""
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+_local = threading.local()
+_DONE = object()
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class ChatStream:
+    """Events for one streamed chat request."""
+
+    def __init__(self, heartbeat: float = 15.0):
+        self.heartbeat = heartbeat
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self.tokens = 0
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        self._queue.put((event, data))
+
+    def token(self, text: str) -> None:
+        """Push a chunk of generated text."""
+        if text:
+            self.tokens += 1
+            self.emit("token", {"text": text})
+
+    def close(self) -> None:
+        self._queue.put(_DONE)
+
+    def events(self) -> Iterator[str]:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"  # SSE comment; stops proxies from closing an idle stream
+                continue
+            if item is _DONE:
+                return
+            yield format_sse(*item)
+
+
+def set_current_stream(stream: Optional[ChatStream]) -> None:
+    _local.stream = stream
+
+
+def current_stream() -> Optional[ChatStream]:
+    """The stream the current thread's chat request writes to, if it is being streamed."""
+    return getattr(_local, "stream", None)
+
@@ -0,0 +1,120 @@
+"""
+Safetensors checkpoints for the traditional Thor models.
+
+apps/tools/migrate_checkpoint.py --safetensors turns a pickled final_model.pt
+({'model_state_dict': ..., 'config': ..., ...}) into final_model.safetensors
+plus a final_model.config.json sidecar holding everything that is not a
+tensor. Loading such a checkpoint maps the file instead of unpickling it:
+every tensor in the returned state dict is a view of a private
+(copy-on-write) mapping, so nothing is copied up front and pages are read
+as they are touched.
+
+Inference classes that live in the model directories call torch.load
+themselves. While torch_load_hook() is active, torch.load accepts a
+.safetensors path and returns the same checkpoint dict it would get from the
+.pt file. The hook is only held around building the model.
+
+Whether the model's parameters stay backed by the mapping, and so share
+pages between forked workers, is up to that inference code. A plain
+model.load_state_dict(state_dict) copies every tensor into the model's own
+parameters, and the mapping is dropped afterwards. Sharing needs
+load_state_dict(state_dict, assign=True) in the model dir's inference.py.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from .compact_weights import CompactWeights
+
+ALIASES_KEY = "tied_aliases"
+
+
+def config_sidecar_path(path: str) -> str:
+    """final_model.safetensors -> final_model.config.json"""
+    return os.path.splitext(str(path))[0] + ".config.json"
+
+
+def find_safetensors_checkpoint(model_dir: str, stem: str = "final_model") -> Optional[str]:
+    """
+    Path of `<stem>.safetensors` in a model dir, if it was converted and is not
+    older than `<stem>.pt` (a retrained .pt wins over a stale conversion).
+    """
+    path = os.path.join(model_dir, f"{stem}.safetensors")
+    if not os.path.isfile(path):
+        return None
+    pickled = os.path.join(model_dir, f"{stem}.pt")
+    if os.path.isfile(pickled) and os.path.getmtime(pickled) > os.path.getmtime(path):
+        print(f"[Checkpoint] {pickled} is newer than {path}; loading the .pt (re-run the safetensors migration)")
+        return None
+    return path
+
+
+def load_safetensors_checkpoint(path: str, map_location=None) -> Dict[str, Any]:
+    """
+    Checkpoint dict equivalent to torch.load of the original .pt file, with
+    'model_state_dict' backed by a copy-on-write mapping of `path`.
+    """
+    weights = CompactWeights(path, copy_on_write=True)
+    if weights.quantized:
+        weights.close()
+        raise ValueError(f"{path} is a quantized compact file, not a checkpoint")
+
+    checkpoint: Dict[str, Any] = {}
+    sidecar = config_sidecar_path(path)
+    if os.path.isfile(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    aliases = checkpoint.pop(ALIASES_KEY, {}) or {}
+
+    state_dict = {key: weights.raw(key) for key in weights.keys()}
+    for alias, target in aliases.items():
+        state_dict[alias] = state_dict[target]  # tied weights were stored once
+    if map_location is not None and str(map_location) != "cpu":
+        state_dict = {k: v.to(map_location) for k, v in state_dict.items()}
+    checkpoint["model_state_dict"] = state_dict
+    checkpoint.setdefault("config", {})
+    return checkpoint
+
+
+_hook_lock = threading.Lock()
+_hook_depth = 0
+_original_torch_load = None
+
+
+@contextmanager
+def torch_load_hook() -> Iterator[bool]:
+    """
+    While active, torch.load(<file>.safetensors) goes to
+    load_safetensors_checkpoint and any other path to the real torch.load.
+    The real torch.load is restored when the last active hook exits. Yields
+    False without torch.
+    """
+    global _hook_depth, _original_torch_load
+    try:
+        import torch
+    except ImportError:
+        yield False
+        return
+    with _hook_lock:
+        if _hook_depth == 0:
+            original = torch.load
+
+            def load(f, map_location=None, *args, **kwargs):
+                if isinstance(f, (str, os.PathLike)) and str(f).endswith(".safetensors"):
+                    return load_safetensors_checkpoint(str(f), map_location=map_location)
+                return original(f, map_location, *args, **kwargs)
+
+            load.__wrapped__ = original
+            torch.load = load
+            _original_torch_load = original
+        _hook_depth += 1
+    try:
+        yield True
+    finally:
+        with _hook_lock:
+            _hook_depth -= 1
+            if _hook_depth == 0:
+                torch.load = _original_torch_load
+                _original_torch_load = None
@@ -0,0 +1,330 @@
+"""
+Runtime loader for the int8 compact safetensors written by scripts/compact_r_weights.py.
+
+Compact files store float weights quantized under their original keys, with
+float16 scales under `__qt_scale__<key>` and the scheme in the header metadata
+`atlas_quant_scheme`:
+
+- int8_sym_per_tensor_v1: int8, one scale per tensor.
+- int8_sym_per_channel_v1: int8, one scale per output row.
+- int8_sym_group_v1: int8, one scale per `atlas_quant_group_size` columns of a row.
+- int4_sym_group_v1: as above, two 4-bit values per byte (stored as [rows,
+  ceil(cols/2)] uint8, low nibble first, offset by 8); the original shape is
+  kept under `__qt_shape__<key>`.
+
+The file is memory-mapped and parsed directly (8-byte header length, JSON
+header, raw data), so int8 tensors are zero-copy views of the page cache:
+nothing is read until a layer touches it, and RAM holds int8 rather than
+fp32. Two ways to use the weights:
+
+- CompactWeights.tensor(key) dequantizes a single tensor on demand.
+- apply_compact_weights(module, weights) swaps each nn.Linear whose weight is
+  quantized for a CompactLinear that either runs an int8 matmul (CPU
+  dynamic-quantized kernel, mode="int8") or dequantizes its weight on first
+  forward and keeps it (mode="lazy"). The int8 kernel only covers the
+  per-tensor and per-channel schemes; group-wise layers always run lazily.
+  Other float tensors are dequantized once.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import warnings
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+QT_SCALE_PREFIX = "__qt_scale__"
+QT_SHAPE_PREFIX = "__qt_shape__"
+SUPPORTED_SCHEMES = (
+    "int8_sym_per_tensor_v1",
+    "int8_sym_per_channel_v1",
+    "int8_sym_group_v1",
+    "int4_sym_group_v1",
+)
+
+_DTYPES = {
+    "I8": "int8", "U8": "uint8", "I16": "int16", "I32": "int32", "I64": "int64",
+    "F16": "float16", "BF16": "bfloat16", "F32": "float32", "F64": "float64", "BOOL": "bool",
+}
+
+
+class CompactWeights:
+    """
+    Memory-mapped view of a compact (or plain) safetensors file.
+
+    With copy_on_write=True the mapping is private: tensors are writable, and
+    only pages actually written stop being shared with the page cache (and with
+    other processes mapping the same file).
+    """
+
+    def __init__(self, path: str, copy_on_write: bool = False):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        try:
+            access = mmap.ACCESS_COPY if copy_on_write else mmap.ACCESS_READ
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=access)
+            (header_len,) = struct.unpack("<Q", self._mmap[:8])
+            header = json.loads(self._mmap[8:8 + header_len])
+        except Exception:
+            self._file.close()
+            raise
+        self._data_start = 8 + header_len
+        self.metadata: Dict[str, str] = header.pop("__metadata__", None) or {}
+        self._entries: Dict[str, Dict[str, Any]] = header
+        self.scale_prefix = self.metadata.get("atlas_quant_scale_prefix", QT_SCALE_PREFIX)
+        self.shape_prefix = self.metadata.get("atlas_quant_shape_prefix", QT_SHAPE_PREFIX)
+        self.scheme = self.metadata.get("atlas_quant_scheme")
+        if self.scheme and self.scheme not in SUPPORTED_SCHEMES:
+            raise ValueError(f"Unsupported quantization scheme {self.scheme!r} in {self.path}")
+        self.group_size = int(self.metadata.get("atlas_quant_group_size", "0")) or None
+        self._scales: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def quantized(self) -> bool:
+        return self.scheme is not None
+
+    @property
+    def per_tensor(self) -> bool:
+        return self.scheme in (None, "int8_sym_per_tensor_v1")
+
+    @property
+    def grouped(self) -> bool:
+        return self.scheme in ("int8_sym_group_v1", "int4_sym_group_v1")
+
+    def _is_aux(self, key: str) -> bool:
+        return key.startswith(self.scale_prefix) or key.startswith(self.shape_prefix)
+
+    def keys(self) -> Iterator[str]:
+        return (k for k in self._entries if not self._is_aux(k))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries and not self._is_aux(key)
+
+    def shape(self, key: str) -> Tuple[int, ...]:
+        """Original (dequantized) shape of a tensor."""
+        shape_key = self.shape_prefix + key
+        if shape_key in self._entries:
+            return tuple(int(d) for d in self.raw(shape_key).tolist())
+        return tuple(self._entries[key]["shape"])
+
+    def raw(self, key: str):
+        """The stored tensor as a read-only, zero-copy view of the mapped file."""
+        import torch
+
+        entry = self._entries[key]
+        dtype = getattr(torch, _DTYPES[entry["dtype"]])
+        start, end = entry["data_offsets"]
+        shape = entry["shape"]
+        count = end - start
+        if count == 0:
+            return torch.empty(shape, dtype=dtype)
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # read-only buffer unless copy_on_write; never written then
+            flat = torch.frombuffer(self._mmap, dtype=dtype, count=count // itemsize,
+                                    offset=self._data_start + start)
+        return flat.view(shape) if shape else flat.view(())
+
+    def scale(self, key: str):
+        """
+        Scale of a quantized tensor: a float for per-tensor files, a float32
+        tensor ([rows] or [rows, groups]) otherwise; None if stored unquantized.
+        """
+        scale_key = self.scale_prefix + key
+        if scale_key not in self._entries:
+            return None
+        value = self._scales.get(key)
+        if value is None:
+            stored = self.raw(scale_key)
+            value = float(stored.float().item()) if self.per_tensor else stored.float()
+            self._scales[key] = value
+        return value
+
+    def tensor(self, key: str, dtype=None):
+        """Dequantized tensor (a copy for quantized keys, the mapped view otherwise)."""
+        import torch
+
+        raw = self.raw(key)
+        scale = self.scale(key)
+        if scale is None:
+            return raw if dtype is None else raw.to(dtype)
+        return dequantize(raw, scale, self.shape(key), self.scheme, self.group_size, dtype or torch.float32)
+
+    def size_bytes(self) -> Tuple[int, int]:
+        """(bytes on disk, bytes once fully dequantized to fp32)."""
+        stored = dequantized = 0
+        for key, entry in self._entries.items():
+            start, end = entry["data_offsets"]
+            stored += end - start
+            if self._is_aux(key):
+                continue
+            if self.scale_prefix + key in self._entries:
+                numel = 1
+                for d in self.shape(key):
+                    numel *= d
+                dequantized += numel * 4
+            else:
+                dequantized += end - start
+        return stored, dequantized
+
+    def close(self) -> None:
+        try:
+            self._mmap.close()
+        except (BufferError, ValueError):
+            pass  # tensors still reference the mapping; it is released with them
+        self._file.close()
+
+
+def dequantize(raw, scale, shape, scheme: Optional[str], group_size: Optional[int], dtype):
+    """Dequantize a stored tensor of any supported scheme back to `shape`."""
+    import torch
+    import torch.nn.functional as F
+
+    if scheme in (None, "int8_sym_per_tensor_v1"):
+        return raw.to(dtype) * scale
+    rows = shape[0] if len(shape) >= 2 else 1
+    cols = 1
+    for d in (shape[1:] if len(shape) >= 2 else shape):
+        cols *= d
+    if scheme == "int4_sym_group_v1":
+        lo = (raw & 0x0F).to(torch.int8) - 8
+        hi = (raw >> 4).to(torch.int8) - 8
+        q = torch.stack((lo, hi), dim=-1).reshape(rows, -1)[:, :cols]
+    else:
+        q = raw.reshape(rows, cols)
+    if scheme == "int8_sym_per_channel_v1":
+        return (q.to(dtype) * scale.to(dtype)[:, None]).reshape(shape)
+    groups = scale.shape[1]
+    padded = F.pad(q.to(dtype), (0, groups * group_size - cols)).view(rows, groups, group_size)
+    return (padded * scale.to(dtype)[..., None]).view(rows, groups * group_size)[:, :cols].reshape(shape)
+
+
+def _compact_linear_class():
+    import torch
+    import torch.nn as nn
+    import torch.nn.functional as F
+
+    class CompactLinear(nn.Module):
+        """nn.Linear replacement backed by a mapped quantized weight and its scales."""
+
+        def __init__(self, weight_q, scale, bias=None, mode: str = "lazy",
+                     scheme: Optional[str] = None, group_size: Optional[int] = None, shape=None):
+            super().__init__()
+            shape = tuple(shape or weight_q.shape)
+            self.in_features = shape[1]
+            self.out_features = shape[0]
+            self.shape = shape
+            self.scale = scale
+            self.scheme = scheme
+            self.group_size = group_size
+            # Group-wise (and int4) weights have no matching quantized CPU kernel
+            self.mode = mode if scheme in (None, "int8_sym_per_tensor_v1", "int8_sym_per_channel_v1") else "lazy"
+            self.weight_q = weight_q
+            self.bias = nn.Parameter(bias, requires_grad=False) if bias is not None else None
+            self._weight = None
+            self._packed = None
+            self._lock = threading.Lock()
+
+        def _dequantized(self, dtype):
+            if self._weight is None or self._weight.dtype != dtype:
+                with self._lock:
+                    if self._weight is None or self._weight.dtype != dtype:
+                        self._weight = dequantize(self.weight_q, self.scale, self.shape, self.scheme,
+                                                  self.group_size, dtype)
+            return self._weight
+
+        def _int8_linear(self):
+            if self._packed is None:
+                with self._lock:
+                    if self._packed is None:
+                        if self.scheme == "int8_sym_per_channel_v1":
+                            scales = self.scale.double()
+                            qweight = torch._make_per_channel_quantized_tensor(
+                                self.weight_q.contiguous(), scales, torch.zeros_like(scales, dtype=torch.long), 0)
+                        else:
+                            qweight = torch._make_per_tensor_quantized_tensor(self.weight_q.contiguous(), self.scale, 0)
+                        packed = torch.ao.nn.quantized.dynamic.Linear(self.in_features, self.out_features,
+                                                                      bias_=self.bias is not None)
+                        packed.set_weight_bias(qweight, self.bias.float() if self.bias is not None else None)
+                        self._packed = packed
+            return self._packed
+
+        def forward(self, x):
+            if self.mode == "int8" and x.device.type == "cpu":
+                try:
+                    return self._int8_linear()(x.float()).to(x.dtype)
+                except (RuntimeError, AttributeError):
+                    self.mode = "lazy"  # no quantized CPU kernels in this torch build
+            bias = self.bias.to(x.dtype) if self.bias is not None else None
+            return F.linear(x, self._dequantized(x.dtype), bias)
+
+        def extra_repr(self) -> str:
+            return f"in_features={self.in_features}, out_features={self.out_features}, mode={self.mode}"
+
+    return CompactLinear
+
+
+_CompactLinear = None
+
+
+def apply_compact_weights(module, weights: CompactWeights, mode: str = "lazy", dtype=None, prefix: str = "") -> Dict[str, int]:
+    """
+    Load `weights` into `module`: quantized Linear weights stay packed (see module
+    docstring for `mode`), every other tensor is dequantized into its parameter.
+
+    Returns counts of swapped linears, loaded tensors and missing keys.
+    """
+    import torch
+    import torch.nn as nn
+
+    global _CompactLinear
+    if _CompactLinear is None:
+        _CompactLinear = _compact_linear_class()
+
+    swapped = loaded = missing = 0
+    handled = set()
+    for name, child in list(module.named_modules()):
+        if not isinstance(child, nn.Linear):
+            continue
+        key = f"{prefix}{name}.weight"
+        if key not in weights or weights.scale(key) is None:
+            continue
+        bias_key = f"{prefix}{name}.bias"
+        bias = weights.tensor(bias_key, dtype=torch.float32) if bias_key in weights else None
+        replacement = _CompactLinear(weights.raw(key), weights.scale(key), bias=bias, mode=mode,
+                                     scheme=weights.scheme, group_size=weights.group_size,
+                                     shape=weights.shape(key))
+        parent_name, _, attr = name.rpartition(".")
+        parent = module.get_submodule(parent_name) if parent_name else module
+        setattr(parent, attr, replacement)
+        handled.update((key, bias_key))
+        swapped += 1
+
+    with torch.no_grad():
+        for name, tensor in list(module.state_dict(keep_vars=True).items()):
+            key = f"{prefix}{name}"
+            if key in handled:
+                continue
+            if key not in weights:
+                missing += 1
+                continue
+            tensor.copy_(weights.tensor(key, dtype=dtype or tensor.dtype).view_as(tensor))
+            loaded += 1
+    return {"linear_int8": swapped, "dequantized": loaded, "missing": missing}
+
+
+def find_compact_weights(model_dir: str, name: Optional[str] = None) -> Optional[str]:
+    """Path of the compact file for a model dir (`weights/<name>.safetensors`, default dir name)."""
+    name = name or os.path.basename(os.path.normpath(model_dir))
+    for candidate in (os.path.join(model_dir, "weights", f"{name}.safetensors"),
+                      os.path.join(model_dir, f"{name}.safetensors")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def load_compact_weights(model_dir: str, name: Optional[str] = None) -> Optional[CompactWeights]:
+    """Map the compact weights of a model dir, or None if it has none."""
+    path = find_compact_weights(model_dir, name)
+    return CompactWeights(path) if path else None
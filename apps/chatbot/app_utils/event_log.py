@@ -0,0 +1,60 @@
+"""
+Buffered JSON-lines event log.
+
+write() only enqueues the record; a daemon thread appends whatever has queued
+up to the file in one write, so request threads never open or flush the file. When
+the queue is full, records are dropped (and counted) rather than blocking a
+request. The writer thread is started lazily and restarted after a fork.
+"""
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+
+class BufferedEventLog:
+    """Append-only JSON-lines file written from a background thread."""
+
+    def __init__(self, path: Optional[str], max_queue: int = 10000):
+        self.path = str(path) if path else None
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.path is None:
+            return
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="atlas-event-log", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < 1000:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r, default=str) + "\n" for r in batch))
+            except OSError:
+                self.dropped += len(batch)
@@ -0,0 +1,433 @@
+"""
+Micro-batching scheduler in front of model.predict.
+
+Each model gets one queue and one worker thread, so the (non-thread-safe)
+model is only ever driven from that thread. The worker takes the first
+waiting request, keeps collecting for a few milliseconds (up to max_batch),
+groups what it has by task and prompt-length bucket, and runs each group as
+one batch. Results are scattered back to the callers' futures.
+
+How a group runs depends on the model:
+
+- "direct" Hugging Face models ({'model', 'tokenizer', 'type': 'direct'})
+  are generated with a batched incremental decode: prompts are left-padded,
+  each row stops at its own max_new_tokens or at EOS, and finished rows are
+  dropped from the batch (and from the KV cache) so the remaining rows don't
+  keep paying for them.
+- models with predict_batch(texts, task=..., max_new_tokens=[...]) get one
+  call per group.
+- anything else is called once per request, in order, on the worker thread.
+
+A request may carry an on_token callback (used for streamed chats). Direct
+models call it with each newly decoded piece of text; other models do so
+only if they expose predict_stream(text, task=..., max_new_tokens=...)
+yielding text chunks, otherwise the caller just gets the final result.
+
+A request may also carry a cache_key (the chat id). For direct models the
+prompt's KV state is then kept in the shared PrefixKVCache, and the next
+turn of that chat only encodes what changed after the common prefix.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class _Request:
+    __slots__ = ("text", "task", "max_new_tokens", "kwargs", "on_token", "cache_key", "future", "length", "queued")
+
+    def __init__(self, text: str, task: str, max_new_tokens: Optional[int], kwargs: Dict[str, Any],
+                 on_token: Optional[Callable[[str], None]], cache_key: Optional[str], length: int):
+        self.text = text
+        self.task = task
+        self.max_new_tokens = max_new_tokens
+        self.kwargs = kwargs
+        self.on_token = on_token
+        self.cache_key = cache_key
+        self.future: Future = Future()
+        self.length = length
+        self.queued = time.monotonic()
+
+
+def _bucket(length: int) -> int:
+    """Power-of-two length bucket, so a batch never pads a short prompt to a very long one."""
+    bucket = 16
+    while bucket < length:
+        bucket *= 2
+    return bucket
+
+
+def is_direct_model(model: Any) -> bool:
+    return isinstance(model, dict) and model.get("type") == "direct"
+
+
+def max_prompt_tokens(direct: Dict[str, Any], max_new_tokens: int) -> int:
+    """Longest prompt a direct model can take and still fit max_new_tokens in its position embeddings."""
+    config = getattr(direct["model"], "config", None)
+    positions = getattr(config, "n_positions", None) or getattr(config, "max_position_embeddings", None) or 1024
+    return max(1, positions - (max_new_tokens or 0))
+
+
+def _top_p_sample(logits, temperature: float, top_p: float):
+    import torch
+
+    if temperature <= 0:
+        return torch.argmax(logits, dim=-1)
+    probs = torch.softmax(logits / temperature, dim=-1)
+    sorted_probs, sorted_idx = torch.sort(probs, descending=True, dim=-1)
+    cumulative = torch.cumsum(sorted_probs, dim=-1)
+    sorted_probs[(cumulative - sorted_probs) > top_p] = 0.0
+    choice = torch.multinomial(sorted_probs / sorted_probs.sum(dim=-1, keepdim=True), 1)
+    return sorted_idx.gather(-1, choice).squeeze(-1)
+
+
+def _select_cache(past, index):
+    """Keep only the batch rows in `index` of a KV cache (Cache object or legacy tuples)."""
+    if hasattr(past, "batch_select_indices"):
+        past.batch_select_indices(index)
+        return past
+    return tuple(tuple(t.index_select(0, index) for t in layer) for layer in past)
+
+
+def _to_legacy(past):
+    return past.to_legacy_cache() if hasattr(past, "to_legacy_cache") else past
+
+
+def _from_legacy(legacy):
+    try:
+        from transformers import DynamicCache
+        return DynamicCache.from_legacy_cache(legacy)
+    except Exception:
+        return legacy
+
+
+def _padded_prefix(prefixes: Sequence[Tuple[Any, int]], width: int):
+    """Right-align each row's cached KV in a zero tensor `width` long (padding is masked out)."""
+    import torch
+
+    template = next(kv for kv, n in prefixes if n)
+    layers = []
+    for layer_idx, layer in enumerate(template):
+        tensors = []
+        for part_idx, ref in enumerate(layer):
+            shape = (len(prefixes), ref.shape[1], width, ref.shape[3])
+            full = ref.new_zeros(shape)
+            for row, (kv, n) in enumerate(prefixes):
+                if n:
+                    full[row, :, width - n:, :] = kv[layer_idx][part_idx][0]
+            tensors.append(full)
+        layers.append(tuple(tensors))
+    return tuple(layers)
+
+
+def generate_direct_batch(direct: Dict[str, Any], prompts: Sequence[str], max_new_tokens: Sequence[int],
+                          temperature: float = 0.7, top_p: float = 0.9,
+                          on_token: Optional[Sequence[Optional[Callable[[str], None]]]] = None,
+                          cache_keys: Optional[Sequence[Optional[Tuple[str, str]]]] = None,
+                          prefix_cache: Any = None) -> List[str]:
+    """
+    Batched sampling for a direct HF causal LM; finished rows leave the batch early.
+
+    With a prefix_cache, a row whose cache key ((model, chat_id)) has a cached
+    prefix of its prompt only encodes the rest; every keyed row's prompt KV is
+    stored back after the prefill.
+    """
+    import torch
+
+    model, tokenizer = direct["model"], direct["tokenizer"]
+    eos_id = tokenizer.eos_token_id
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else eos_id
+    device = model.device
+    keys = list(cache_keys) if (cache_keys and prefix_cache is not None) else [None] * len(prompts)
+
+    # Keep the newest tokens when a prompt would overflow the position embeddings
+    prompt_ids = [
+        list(ids)[-max_prompt_tokens(direct, limit):]
+        for ids, limit in zip(tokenizer(list(prompts))["input_ids"], max_new_tokens)
+    ]
+    prefixes = [prefix_cache.lookup(k[0], k[1], ids) if k else (None, 0) for k, ids in zip(keys, prompt_ids)]
+    suffixes = [ids[n:] for ids, (_kv, n) in zip(prompt_ids, prefixes)]
+    prefix_width = max(n for _kv, n in prefixes)
+    suffix_width = max(len(ids) for ids in suffixes)
+
+    # Left-pad both the cached-prefix region and the suffix region; the mask hides the gaps
+    step_ids = torch.tensor([[pad_id] * (suffix_width - len(ids)) + ids for ids in suffixes], device=device)
+    suffix_mask = torch.tensor([[0] * (suffix_width - len(ids)) + [1] * len(ids) for ids in suffixes], device=device)
+    if prefix_width:
+        prefix_mask = torch.tensor([[0] * (prefix_width - n) + [1] * n for _kv, n in prefixes], device=device)
+        attention = torch.cat([prefix_mask, suffix_mask], dim=-1)
+        past = _from_legacy(_padded_prefix(prefixes, prefix_width))
+    else:
+        attention = suffix_mask
+        past = None
+    positions = (attention.cumsum(-1) - 1).clamp(min=0)[:, prefix_width:]
+
+    active = list(range(len(prompts)))
+    generated: List[List[int]] = [[] for _ in prompts]
+    streamed = [""] * len(prompts)
+    callbacks = list(on_token) if on_token else [None] * len(prompts)
+
+    with torch.no_grad():
+        for step in range(max(max_new_tokens)):
+            out = model(input_ids=step_ids, attention_mask=attention, position_ids=positions,
+                        past_key_values=past, use_cache=True)
+            past = out.past_key_values
+            if step == 0 and any(keys):
+                legacy = _to_legacy(past)
+                for row, key in enumerate(keys):
+                    if key:
+                        keep_idx = attention[row].nonzero().squeeze(-1)
+                        prefix_cache.store(key[0], key[1], prompt_ids[row], tuple(
+                            tuple(t[row:row + 1].index_select(2, keep_idx) for t in layer) for layer in legacy
+                        ))
+            next_ids = _top_p_sample(out.logits[:, -1, :].float(), temperature, top_p)
+
+            keep = []
+            for row, req in enumerate(active):
+                token = int(next_ids[row])
+                if token != eos_id:
+                    generated[req].append(token)
+                    if callbacks[req] is not None:
+                        # Re-decode so multi-token characters come out whole
+                        text = tokenizer.decode(generated[req], skip_special_tokens=True)
+                        if len(text) > len(streamed[req]) and text.startswith(streamed[req]):
+                            callbacks[req](text[len(streamed[req]):])
+                            streamed[req] = text
+                if token != eos_id and len(generated[req]) < max_new_tokens[req]:
+                    keep.append(row)
+            if not keep:
+                break
+            if len(keep) < len(active):
+                index = torch.tensor(keep, device=step_ids.device)
+                next_ids = next_ids.index_select(0, index)
+                attention = attention.index_select(0, index)
+                past = _select_cache(past, index)
+                active = [active[row] for row in keep]
+
+            attention = torch.cat([attention, attention.new_ones((attention.shape[0], 1))], dim=-1)
+            positions = (attention.sum(-1, keepdim=True) - 1)
+            step_ids = next_ids.unsqueeze(-1)
+
+    return [tokenizer.decode(tokens, skip_special_tokens=True).strip() for tokens in generated]
+
+
+class InferenceScheduler:
+    """One queue and worker thread per model; batches concurrent predict calls."""
+
+    DIRECT_DEFAULT_TOKENS = 100
+
+    def __init__(self, name: str, model: Any, max_batch: int = 8, max_wait_ms: float = 5.0,
+                 prefix_cache: Any = None):
+        self.name = name
+        self.model = model
+        self.prefix_cache = prefix_cache
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._batched_requests = 0
+        self._max_seen = 0
+        self._wait_total = 0.0
+        self._closed = False
+        self._close_lock = threading.Lock()  # no request can be queued behind the stop sentinel
+        self._thread = threading.Thread(target=self._worker, name=f"atlas-infer-{name}", daemon=True)
+        self._thread.start()
+
+    # ----------------------------------------------------------------- client
+
+    def submit(self, text: str, task: str = "text_generation", max_new_tokens: Optional[int] = None,
+               on_token: Optional[Callable[[str], None]] = None, cache_key: Optional[str] = None,
+               **kwargs: Any) -> Future:
+        req = _Request(text, task, max_new_tokens, kwargs, on_token, cache_key, self._prompt_length(text))
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError(f"Inference scheduler for {self.name} is closed")
+            self._queue.put(req)
+        return req.future
+
+    def predict(self, text: str, task: str = "text_generation", max_new_tokens: Optional[int] = None,
+                on_token: Optional[Callable[[str], None]] = None, cache_key: Optional[str] = None,
+                **kwargs: Any) -> Any:
+        """Drop-in for model.predict (direct models return {'generated_text': ...})."""
+        return self.submit(text, task=task, max_new_tokens=max_new_tokens, on_token=on_token,
+                           cache_key=cache_key, **kwargs).result()
+
+    def close(self) -> None:
+        """Finish queued work, then stop the worker (and release the model)."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    # ----------------------------------------------------------------- worker
+
+    @staticmethod
+    def _prompt_length(text: str) -> int:
+        # ~4 characters per token; tokenizing here would touch the tokenizer off the worker thread
+        return max(1, len(text) // 4)
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                req = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is None:
+                return batch, True
+            batch.append(req)
+        return batch, False
+
+    @staticmethod
+    def _group_key(req: _Request) -> Tuple:
+        """Requests batch together only with the same task, length bucket and extra kwargs."""
+        try:
+            key = (req.task, _bucket(req.length), tuple(sorted(req.kwargs.items())))
+            hash(key)
+            return key
+        except TypeError:
+            return (id(req),)  # unorderable/unhashable kwargs: run on its own
+
+    def _worker(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            try:
+                groups: Dict[Tuple, List[_Request]] = {}
+                for req in batch:
+                    groups.setdefault(self._group_key(req), []).append(req)
+                for group in groups.values():
+                    self._run_group(group)
+            except Exception as e:
+                # Whatever went wrong, no caller is left waiting on its future
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(e)
+        self.model = None
+
+    def _run_group(self, group: List[_Request]) -> None:
+        now = time.monotonic()
+        with self._stats_lock:
+            self._requests += len(group)
+            self._batches += 1
+            self._batched_requests += len(group)
+            self._max_seen = max(self._max_seen, len(group))
+            self._wait_total += sum(now - r.queued for r in group)
+        try:
+            if is_direct_model(self.model):
+                limits = [r.max_new_tokens or self.DIRECT_DEFAULT_TOKENS for r in group]
+                texts = generate_direct_batch(
+                    self.model, [r.text for r in group], limits,
+                    on_token=[r.on_token for r in group],
+                    cache_keys=[(self.name, r.cache_key) if r.cache_key else None for r in group],
+                    prefix_cache=self.prefix_cache, **group[0].kwargs
+                )
+                results = [{"generated_text": t} for t in texts]
+            elif (len(group) > 1 and callable(getattr(self.model, "predict_batch", None))
+                  and not any(r.on_token for r in group)):
+                results = list(self.model.predict_batch(
+                    [r.text for r in group], task=group[0].task,
+                    max_new_tokens=[r.max_new_tokens for r in group], **group[0].kwargs
+                ))
+                if len(results) != len(group):
+                    raise ValueError(f"{self.name}.predict_batch returned {len(results)} results "
+                                     f"for {len(group)} prompts")
+            else:
+                results = []
+                for req in group:
+                    try:
+                        results.append(self._predict_one(req))
+                    except Exception as e:
+                        results.append(e)
+        except Exception as e:
+            results = [e] * len(group)
+
+        for req, result in zip(group, results):
+            if isinstance(result, Exception):
+                req.future.set_exception(result)
+            else:
+                req.future.set_result(result)
+
+    def _predict_one(self, req: _Request) -> Any:
+        if req.on_token is not None and callable(getattr(self.model, "predict_stream", None)):
+            chunks = []
+            for chunk in self.model.predict_stream(req.text, task=req.task, max_new_tokens=req.max_new_tokens,
+                                                   **req.kwargs):
+                chunks.append(chunk)
+                req.on_token(chunk)
+            return {"generated_text": "".join(chunks)}
+        if req.max_new_tokens is not None:
+            return self.model.predict(req.text, task=req.task, max_new_tokens=req.max_new_tokens, **req.kwargs)
+        return self.model.predict(req.text, task=req.task, **req.kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "avg_batch_size": round(self._batched_requests / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self._max_seen,
+                "avg_queue_ms": round(self._wait_total / self._requests * 1000, 2) if self._requests else 0.0,
+                "queued": self._queue.qsize(),
+                "mode": ("direct" if is_direct_model(self.model)
+                         else "predict_batch" if callable(getattr(self.model, "predict_batch", None))
+                         else "serial"),
+            }
+
+
+_schedulers: Dict[str, InferenceScheduler] = {}
+_schedulers_lock = threading.Lock()
+_max_batch = 8
+_max_wait_ms = 5.0
+_prefix_cache: Any = None
+
+
+def configure_inference_schedulers(max_batch: Optional[int] = None, max_wait_ms: Optional[float] = None,
+                                   prefix_cache: Any = None) -> None:
+    """Set batching limits (and the KV prefix cache) for schedulers created afterwards."""
+    global _max_batch, _max_wait_ms, _prefix_cache
+    if max_batch is not None:
+        _max_batch = max_batch
+    if max_wait_ms is not None:
+        _max_wait_ms = max_wait_ms
+    if prefix_cache is not None:
+        _prefix_cache = prefix_cache
+
+
+def get_inference_scheduler(name: str, model: Any) -> InferenceScheduler:
+    """Scheduler for `model` under `name`; a different instance under the same name replaces it."""
+    scheduler = _schedulers.get(name)
+    if scheduler is not None and scheduler.model is model:
+        return scheduler
+    with _schedulers_lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None or scheduler.model is not model:
+            if scheduler is not None:
+                scheduler.close()
+            if scheduler is not None and _prefix_cache is not None:
+                _prefix_cache.drop_model(name)  # KV state belongs to the replaced instance
+            scheduler = _schedulers[name] = InferenceScheduler(name, model, _max_batch, _max_wait_ms, _prefix_cache)
+    return scheduler
+
+
+def retire_inference_scheduler(name: str) -> None:
+    """Close the scheduler for `name` (e.g. after its model was evicted)."""
+    with _schedulers_lock:
+        scheduler = _schedulers.pop(name, None)
+    if scheduler is not None:
+        scheduler.close()
+    if _prefix_cache is not None:
+        _prefix_cache.drop_model(name)
+
+
+def inference_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: s.stats() for name, s in list(_schedulers.items())}
@@ -0,0 +1,181 @@
+"""
+Bounded, thread-safe LRU cache with TTL expiry.
+
+Entries are kept in an OrderedDict so lookups, inserts and LRU eviction are all
+O(1). The cache is bounded both by entry count and by an approximate byte size,
+and a daemon thread periodically sweeps expired entries so stale data does not
+linger until it happens to be read again. Hit/miss/eviction counters are kept
+for the stats endpoints.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def _approx_size(value: Any) -> int:
+    """Rough payload size in bytes; strings/bytes dominate cached values."""
+    if isinstance(value, str):
+        return len(value.encode('utf-8', errors='ignore'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    LRU cache bounded by entry count and bytes, with per-entry TTL.
+
+    Args:
+        max_entries: Maximum number of entries (0 = unbounded)
+        max_bytes: Maximum approximate payload size (0 = unbounded)
+        ttl: Default time-to-live in seconds (None = never expires)
+        sweep_interval: Seconds between background expiry sweeps (0 disables)
+        name: Label used in stats and log lines
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 0,
+        ttl: Optional[float] = 300,
+        sweep_interval: float = 60,
+        name: str = "cache",
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._sweep_interval = sweep_interval
+        self._sweeper: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: Hashable) -> None:
+        _value, _expires, size = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _size = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        size = _approx_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._store(key, value, expires_at, size)
+        self._ensure_sweeper()
+
+    def _store(self, key: Hashable, value: Any, expires_at: Optional[float], size: int) -> None:
+        """Insert under the lock and evict least-recently-used entries past the limits."""
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def incr(self, key: Hashable, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to a numeric entry; a missing/expired entry starts a new TTL."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                value, expires_at, size = entry
+                value += amount
+                self._data[key] = (value, expires_at, size)
+                self._data.move_to_end(key)
+                return value
+            ttl = self.ttl if ttl is None else ttl
+            self._store(key, amount, now + ttl if ttl is not None else None, _approx_size(amount))
+        self._ensure_sweeper()
+        return amount
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                return True
+            return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_v, exp, _s) in self._data.items() if exp is not None and exp <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None or not self._sweep_interval or self.ttl is None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name=f"{self.name}-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self._sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[Cache] {self.name} sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,258 @@
+"""
+Memory-budgeted model registry.
+
+Models are loaded on first use, behind a per-model lock so concurrent requests
+for a cold model wait for one load instead of starting several. Each loaded model
+is charged its weight footprint (parameter + buffer bytes of its torch modules,
+or the size of its weight files when it cannot be measured). When a load would
+take the total over the budget, the least-recently-used models are evicted
+first. Requests already holding an evicted model keep using it; its memory is
+released when they drop their reference.
+
+The registry mirrors its state into a plain name -> instance dict (app.py's
+model_instances), which the rest of the app keeps reading.
+"""
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+MB = 1024 * 1024
+
+
+def default_budget_bytes(configured: Optional[str] = None) -> int:
+    """Budget from `configured` MB (or ATLAS_MODEL_MEMORY_BUDGET_MB), else 70% of physical RAM (0 = unlimited)."""
+    if configured is None:
+        configured = os.environ.get("ATLAS_MODEL_MEMORY_BUDGET_MB")
+    if configured not in (None, ""):
+        return max(0, int(float(configured) * MB))
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") * 0.7)
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+def files_footprint(paths: Iterable[str]) -> int:
+    """Total size of the given files/directories (weights on disk ~ weights in RAM)."""
+    total = 0
+    for path in paths:
+        if not path:
+            continue
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+        elif os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                for name in files:
+                    if name.endswith((".pt", ".bin", ".safetensors", ".pth", ".ckpt")):
+                        try:
+                            total += os.path.getsize(os.path.join(root, name))
+                        except OSError:
+                            pass
+    return total
+
+
+def measure_footprint(instance: Any, depth: int = 2) -> int:
+    """Bytes held by torch parameters/buffers reachable from `instance` (0 if none found)."""
+    seen_modules = set()
+    seen_tensors = set()
+    total = 0
+
+    def visit(obj: Any, level: int) -> None:
+        nonlocal total
+        if obj is None or id(obj) in seen_modules:
+            return
+        if hasattr(obj, "parameters") and hasattr(obj, "buffers") and callable(obj.parameters):
+            seen_modules.add(id(obj))
+            try:
+                for tensor in list(obj.parameters()) + list(obj.buffers()):
+                    key = tensor.data_ptr() if hasattr(tensor, "data_ptr") else id(tensor)
+                    if key not in seen_tensors:
+                        seen_tensors.add(key)
+                        total += tensor.numel() * tensor.element_size()
+            except Exception:
+                pass
+            return
+        if level <= 0:
+            return
+        values = obj.values() if isinstance(obj, dict) else getattr(obj, "__dict__", {}).values()
+        for value in list(values):
+            visit(value, level - 1)
+
+    visit(instance, depth)
+    return total
+
+
+class _Entry:
+    __slots__ = ("lock", "footprint", "estimate", "loads", "evictions", "last_used", "load_seconds")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.footprint = 0
+        self.estimate = 0
+        self.loads = 0
+        self.evictions = 0
+        self.last_used: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+
+
+class ModelRegistry:
+    """Lazily loaded models under a RAM budget with LRU eviction."""
+
+    def __init__(self, budget_bytes: Optional[int] = None, instances: Optional[Dict[str, Any]] = None):
+        self.budget_bytes = default_budget_bytes() if budget_bytes is None else budget_bytes
+        self.instances = instances if instances is not None else {}
+        self._entries: Dict[str, _Entry] = {}
+        self._lru: "OrderedDict[str, None]" = OrderedDict()  # loaded models, least recently used first
+        self._lock = threading.Lock()
+        self._pinned = set()
+        self._evict_listeners: List[Callable[[str], None]] = []
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry()
+                self.instances.setdefault(name, None)
+            return entry
+
+    @property
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(self._entries[name].footprint for name in self._lru)
+
+    def pin(self, name: str) -> None:
+        """Never evict this model (e.g. the default model)."""
+        self._pinned.add(name)
+
+    def on_evict(self, callback: Callable[[str], None]) -> None:
+        """Call `callback(name)` after a model is evicted, so holders can drop their references."""
+        self._evict_listeners.append(callback)
+
+    def touch(self, name: str) -> None:
+        with self._lock:
+            if name in self._lru:
+                self._lru.move_to_end(name)
+                self._entries[name].last_used = time.time()
+
+    def get(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        estimate: Callable[[], int] = lambda: 0,
+        force_reload: bool = False,
+    ) -> Any:
+        """
+        Return the loaded model, loading it with `loader()` on first use.
+
+        `estimate()` gives the expected footprint so room can be made before the
+        load; the real footprint is measured afterwards. A loader that returns None
+        (load failed) is retried on the next call.
+        """
+        instance = self.instances.get(name)
+        if instance is not None and not force_reload:
+            self.touch(name)
+            return instance
+
+        entry = self._entry(name)
+        with entry.lock:
+            instance = self.instances.get(name)
+            if instance is not None and not force_reload:
+                self.touch(name)
+                return instance
+            if instance is not None:
+                self.evict(name, reason="reload")
+
+            try:
+                entry.estimate = int(estimate() or 0)
+            except Exception:
+                entry.estimate = 0
+            self._make_room(entry.estimate, keep=name)
+
+            started = time.monotonic()
+            instance = loader()
+            if instance is None:
+                return None
+            self.put(name, instance, footprint=measure_footprint(instance) or entry.estimate)
+            entry.load_seconds = round(time.monotonic() - started, 2)
+            return instance
+
+    def put(self, name: str, instance: Any, footprint: Optional[int] = None) -> None:
+        """Register a model loaded elsewhere (footprint measured if not given)."""
+        entry = self._entry(name)
+        if footprint is None:
+            footprint = measure_footprint(instance)
+        self._make_room(footprint, keep=name)
+        with self._lock:
+            entry.footprint = footprint
+            entry.loads += 1
+            entry.last_used = time.time()
+            self.instances[name] = instance
+            self._lru[name] = None
+            self._lru.move_to_end(name)
+        print(f"[Model Registry] {name} loaded ({footprint / MB:.0f} MB, {self.used_bytes / MB:.0f} MB in use)")
+
+    def evict(self, name: str, reason: str = "budget") -> bool:
+        with self._lock:
+            if name not in self._lru:
+                return False
+            del self._lru[name]
+            entry = self._entries[name]
+            entry.evictions += 1
+            freed = entry.footprint
+            entry.footprint = 0
+            self.instances[name] = None
+        print(f"[Model Registry] Evicted {name} ({reason}, {freed / MB:.0f} MB)")
+        for callback in self._evict_listeners:
+            try:
+                callback(name)
+            except Exception as e:
+                print(f"[Model Registry] Evict listener failed for {name}: {e}")
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        return True
+
+    def _make_room(self, needed: int, keep: Optional[str] = None) -> None:
+        """Evict least-recently-used models until `needed` more bytes fit the budget."""
+        if not self.budget_bytes:
+            return
+        while True:
+            with self._lock:
+                used = sum(self._entries[n].footprint for n in self._lru if n != keep)
+                if used + needed <= self.budget_bytes:
+                    return
+                victim = next((n for n in self._lru if n != keep and n not in self._pinned), None)
+            if victim is None:
+                print(f"[Model Registry] Over budget: need {needed / MB:.0f} MB, nothing left to evict")
+                return
+            self.evict(victim)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for name, entry in self._entries.items():
+                loaded = name in self._lru
+                models[name] = {
+                    "loaded": loaded,
+                    "footprint_mb": round(entry.footprint / MB, 1) if loaded else 0.0,
+                    "estimated_mb": round(entry.estimate / MB, 1),
+                    "loads": entry.loads,
+                    "evictions": entry.evictions,
+                    "last_used": entry.last_used,
+                    "load_seconds": entry.load_seconds,
+                    "pinned": name in self._pinned,
+                    "loading": entry.lock.locked(),
+                }
+            used = sum(self._entries[n].footprint for n in self._lru)
+            return {
+                "budget_mb": round(self.budget_bytes / MB, 1) if self.budget_bytes else None,
+                "used_mb": round(used / MB, 1),
+                "lru_order": list(self._lru),
+                "models": models,
+            }
@@ -0,0 +1,182 @@
+"""
+Per-chat cache of attention KV state for prompt prefixes.
+
+Consecutive turns of a chat re-send mostly the same prompt: earlier turns
+followed by the new message. After each prefill, the prompt's KV state is
+kept under (model, chat_id) together with its token ids. On the next turn
+the longest common token prefix with the new prompt is looked up, the cached
+state is cut to that length, and only the remaining suffix has to be
+encoded.
+
+KV tensors are stored in the legacy per-layer ((key, value), ...) layout with
+a batch dimension of 1. Entries are evicted least recently used first when
+the byte budget is exceeded, and dropped after idle_ttl seconds unused.
+
+Reuse only pays off if the prompt grows append-only. A prompt built from a
+sliding "last N turns" window changes at token 0 on every turn, so callers
+choose their history window with stable_window_start(): the window's start
+stays put until the prompt would overflow, then jumps far enough forward
+that the following turns append to an unchanged prefix again.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+MB = 1024 * 1024
+
+
+def prefix_hash(token_ids: Sequence[int]) -> str:
+    return hashlib.blake2b(",".join(map(str, token_ids)).encode(), digest_size=8).hexdigest()
+
+
+def _kv_bytes(kv) -> int:
+    return sum(t.numel() * t.element_size() for layer in kv for t in layer)
+
+
+def _common_prefix(a: Sequence[int], b: Sequence[int]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def stable_window_start(lengths: Sequence[int], budget: int) -> int:
+    """
+    Index of the first turn to keep so the turns from there on fit in `budget`
+    tokens (`lengths` are per-turn token counts, oldest first, ending with
+    the new turn).
+
+    The start is replayed over the whole history, so it is the same from one
+    turn to the next and only moves when a turn overflows the budget. It then
+    drops the oldest turns until at most half the budget is used. A single turn
+    longer than the budget is returned on its own, for the caller to truncate.
+    """
+    start = total = 0
+    for i, n in enumerate(lengths):
+        total += n
+        if total > budget:
+            while start < i and total > budget // 2:
+                total -= lengths[start]
+                start += 1
+    return start
+
+
+class _Entry:
+    __slots__ = ("tokens", "hash", "kv", "bytes", "last_used")
+
+    def __init__(self, tokens: Tuple[int, ...], kv, nbytes: int):
+        self.tokens = tokens
+        self.hash = prefix_hash(tokens)
+        self.kv = kv
+        self.bytes = nbytes
+        self.last_used = time.monotonic()
+
+
+class PrefixKVCache:
+    """Byte-budgeted, idle-expiring KV prefix cache keyed by (model, chat_id)."""
+
+    def __init__(self, max_bytes: int = 256 * MB, idle_ttl: float = 900.0, min_reuse: int = 8):
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.min_reuse = min_reuse
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._reused_tokens = 0
+        self._evictions = 0
+
+    def lookup(self, model: str, chat_id: str, token_ids: Sequence[int]) -> Tuple[Optional[Any], int]:
+        """
+        (KV state covering the first n tokens, n) for the longest cached prefix of
+        token_ids, or (None, 0). At least one token is always left to encode.
+        """
+        key = (model, chat_id)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            n = 0
+            if entry is not None:
+                n = min(_common_prefix(entry.tokens, token_ids), len(token_ids) - 1)
+            if entry is None or n < self.min_reuse:
+                self._misses += 1
+                return None, 0
+            self._entries.move_to_end(key)
+            entry.last_used = time.monotonic()
+            self._hits += 1
+            self._reused_tokens += n
+            kv = entry.kv
+        if n < len(entry.tokens):
+            kv = tuple(tuple(t[:, :, :n, :] for t in layer) for layer in kv)
+        return kv, n
+
+    def store(self, model: str, chat_id: str, token_ids: Sequence[int], kv) -> None:
+        """Keep `kv` (batch size 1, covering exactly token_ids) as this chat's prefix."""
+        nbytes = _kv_bytes(kv)
+        if self.max_bytes and nbytes > self.max_bytes:
+            return
+        key = (model, chat_id)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.bytes
+            self._entries[key] = _Entry(tuple(token_ids), kv, nbytes)
+            self._bytes += nbytes
+            while self.max_bytes and self._bytes > self.max_bytes and len(self._entries) > 1:
+                _key, victim = self._entries.popitem(last=False)
+                self._bytes -= victim.bytes
+                self._evictions += 1
+
+    def drop_model(self, model: str) -> None:
+        """Forget every prefix computed by `model` (e.g. after it was evicted or reloaded)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == model]:
+                self._bytes -= self._entries.pop(key).bytes
+
+    def _expire(self) -> None:
+        if not self.idle_ttl:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.last_used >= cutoff:
+                break
+            del self._entries[key]
+            self._bytes -= entry.bytes
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "used_mb": round(self._bytes / MB, 1),
+                "budget_mb": round(self.max_bytes / MB, 1) if self.max_bytes else None,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "reused_tokens": self._reused_tokens,
+                "evictions": self._evictions,
+            }
+
+
+_cache: Optional[PrefixKVCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_prefix_cache(max_mb: Optional[float] = None, idle_ttl: Optional[float] = None) -> PrefixKVCache:
+    """The process-wide prefix cache (limits only apply on first call)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PrefixKVCache(
+                    max_bytes=int((256 if max_mb is None else max_mb) * MB),
+                    idle_ttl=900.0 if idle_ttl is None else idle_ttl,
+                )
+    return _cache
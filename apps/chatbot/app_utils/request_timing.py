@@ -0,0 +1,152 @@
+"""
+Per-stage latency for the /api/chat pipeline.
+
+A StageTimer is created for each chat request and made current for the
+handling thread. The handler marks where each stage begins with
+timer.stage(name): time runs against that stage until the next one starts,
+so the long sequential handler needs one line per stage rather than a block
+around it. span(name) times a nested piece of work as its own stage and
+resumes the enclosing one afterwards. Stages that run more than once in a
+request (e.g. intent routing before and after context building) accumulate.
+
+Finished timers are folded into process-wide LatencyHistograms, rendered in
+the Prometheus text format for the /metrics endpoint.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_local = threading.local()
+
+
+class StageTimer:
+    """Wall-clock time per named stage of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: "OrderedDict[str, float]" = OrderedDict()
+        self._current: Optional[str] = None
+        self._since = self.started
+        self.total: Optional[float] = None
+
+    def stage(self, name: Optional[str]) -> None:
+        """End the running stage and start `name` (None just stops the clock)."""
+        now = time.perf_counter()
+        if self._current is not None:
+            self.stages[self._current] = self.stages.get(self._current, 0.0) + (now - self._since)
+        self._current = name
+        self._since = now
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        previous = self._current
+        self.stage(name)
+        try:
+            yield
+        finally:
+            self.stage(previous)
+
+    def finish(self) -> Dict[str, float]:
+        """Stop timing; returns milliseconds per stage (plus "total")."""
+        if self.total is None:
+            self.stage(None)
+            self.total = time.perf_counter() - self.started
+        return self.as_ms()
+
+    def as_ms(self) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        if self.total is not None:
+            timings["total"] = round(self.total * 1000, 2)
+        return timings
+
+
+class _NullTimer:
+    """Stand-in when no request is being timed, so call sites need no checks."""
+
+    def stage(self, name: Optional[str]) -> None:
+        pass
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        yield
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def set_current_timer(timer: Optional[StageTimer]) -> None:
+    _local.timer = timer
+
+
+def current_timer():
+    """The timer of the request handled by this thread (a no-op timer if none)."""
+    return getattr(_local, "timer", None) or _NULL_TIMER
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class LatencyHistograms:
+    """Cumulative latency histograms per stage, Prometheus style."""
+
+    def __init__(self, metric: str = "atlas_chat_stage_seconds", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.metric = metric
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = _Histogram(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist.counts[i] += 1
+                    break
+            hist.sum += seconds
+            hist.count += 1
+
+    def observe_timer(self, timer: StageTimer) -> None:
+        for stage, seconds in timer.stages.items():
+            self.observe(stage, seconds)
+        if timer.total is not None:
+            self.observe("total", timer.total)
+
+    def render_prometheus(self) -> str:
+        lines = [
+            f"# HELP {self.metric} Time spent in each stage of a chat request.",
+            f"# TYPE {self.metric} histogram",
+        ]
+        with self._lock:
+            for stage in sorted(self._histograms):
+                hist = self._histograms[stage]
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{self.metric}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{self.metric}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'{self.metric}_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'{self.metric}_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Request count and mean milliseconds per stage."""
+        with self._lock:
+            return {
+                stage: {"count": hist.count, "mean_ms": round(hist.sum / hist.count * 1000, 2) if hist.count else 0.0}
+                for stage, hist in sorted(self._histograms.items())
+            }
+
+
+chat_latency = LatencyHistograms()
@@ -0,0 +1,262 @@
+"""
+Persistent cache for web research results, with stale-while-revalidate.
+
+Entries are keyed by (normalized query, engine) and stored in a WAL-mode SQLite
+file, so every worker on the host shares them and they survive restarts. Each
+entry gets a TTL from the query's intent: time-sensitive queries ("latest python
+release") expire in minutes, definitions in weeks. Past its TTL an entry is still
+served for a grace window while a background refresh replaces it; past that it
+is a miss.
+
+Lookups report the entry's age so callers can surface it.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# intent -> (ttl seconds, extra seconds a stale entry may still be served)
+INTENT_TTLS: Dict[str, Tuple[float, float]] = {
+    "time_sensitive": (10 * 60, 60 * 60),
+    "definition": (30 * 86400, 30 * 86400),
+    "howto": (7 * 86400, 7 * 86400),
+    "general": (86400, 2 * 86400),
+}
+
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(latest|newest|recent|current|currently|today|tonight|yesterday|tomorrow|now|news|breaking|live|"
+    r"price|prices|stock|weather|forecast|score|scores|release|released|update|updates|this (?:week|month|year)|"
+    r"20\d\d)\b"
+)
+_DEFINITION_RE = re.compile(r"^(what (?:is|are)|who (?:is|was)|define|definition of|meaning of)\b|\bdefinition\b")
+_HOWTO_RE = re.compile(r"\b(how (?:to|do|does|can)|tutorial|guide|steps|recipe|recipes|example|examples)\b")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s+#.-]", " ", (query or "").lower())).strip(" .")
+
+
+def classify_intent(query: str) -> str:
+    """Pick the TTL class for a query (time-sensitive wins over everything else)."""
+    q = normalize_query(query)
+    if _TIME_SENSITIVE_RE.search(q):
+        return "time_sensitive"
+    if _DEFINITION_RE.search(q):
+        return "definition"
+    if _HOWTO_RE.search(q):
+        return "howto"
+    return "general"
+
+
+class CachedResearch:
+    """A cache hit: the stored results plus how old (and whether stale) they are."""
+
+    __slots__ = ("results", "fetched_at", "intent", "stale")
+
+    def __init__(self, results: List[Dict[str, Any]], fetched_at: float, intent: str, stale: bool):
+        self.results = results
+        self.fetched_at = fetched_at
+        self.intent = intent
+        self.stale = stale
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class ResearchCache:
+    """SQLite-backed research result cache shared by all workers on the host."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS research ("
+        " key TEXT PRIMARY KEY, query TEXT NOT NULL, engine TEXT NOT NULL, intent TEXT NOT NULL,"
+        " results TEXT NOT NULL, fetched_at REAL NOT NULL, expires_at REAL NOT NULL, stale_until REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS research_stale ON research (stale_until)",
+    )
+
+    def __init__(self, path: str, max_entries: int = 20000, refresh_workers: int = 2):
+        self.path = str(path)
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="research-refresh")
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(query: str, engine: str) -> str:
+        return f"{engine}\x1f{normalize_query(query)}"
+
+    def lookup(self, query: str, engine: str) -> Optional[CachedResearch]:
+        """Fresh or still-servable stale entry, or None."""
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT results, fetched_at, expires_at, stale_until, intent FROM research WHERE key = ?",
+            (self._key(query, engine),),
+        ).fetchone()
+        if row is None or row[3] <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            results = json.loads(row[0])
+        except ValueError:
+            with self._lock:
+                self.misses += 1
+            return None
+        stale = row[2] <= now
+        with self._lock:
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+        return CachedResearch(results, row[1], row[4], stale)
+
+    def store(self, query: str, engine: str, results: List[Dict[str, Any]], intent: Optional[str] = None) -> None:
+        """Cache a successful result list (empty lists are not cached)."""
+        if not results:
+            return
+        intent = intent or classify_intent(query)
+        ttl, grace = INTENT_TTLS.get(intent, INTENT_TTLS["general"])
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO research (key, query, engine, intent, results, fetched_at, expires_at, stale_until)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(query, engine), normalize_query(query), engine, intent,
+                 json.dumps(results, ensure_ascii=False, default=str), now, now + ttl, now + ttl + grace),
+            )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 200 == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop entries past their stale window, then the oldest beyond max_entries."""
+        conn = self._conn()
+        with conn:
+            removed = conn.execute("DELETE FROM research WHERE stale_until <= ?", (time.time(),)).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM research").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM research WHERE key IN (SELECT key FROM research ORDER BY fetched_at LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        return removed
+
+    def refresh(self, query: str, engine: str, loader: Callable[[], Optional[List[Dict[str, Any]]]]) -> bool:
+        """
+        Re-run `loader` in the background and store what it returns.
+
+        At most one refresh per key runs at a time in this process; returns False if
+        one was already running. A loader that raises or returns nothing leaves the
+        stale entry in place.
+        """
+        key = self._key(query, engine)
+        with self._lock:
+            if key in self._inflight:
+                return False
+            self._inflight.add(key)
+            self.refreshes += 1
+
+        def run():
+            try:
+                results = loader()
+                if results:
+                    self.store(query, engine, results)
+            except Exception as e:
+                print(f"[Research Cache] Refresh failed for {engine}:{query!r}: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+        self._refresher.submit(run)
+        return True
+
+    def get_or_fetch(
+        self,
+        query: str,
+        engine: str,
+        loader: Callable[[], Optional[List[Dict[str, Any]]]],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Serve from cache (refreshing stale entries in the background) or load and store.
+
+        Returns (results, info) where info has cached, stale, age_seconds and intent.
+        """
+        hit = self.lookup(query, engine)
+        if hit is not None:
+            if hit.stale:
+                self.refresh(query, engine, loader)
+            return hit.results, {
+                "cached": True, "stale": hit.stale, "age_seconds": round(hit.age, 1), "intent": hit.intent,
+            }
+        results = loader() or []
+        self.store(query, engine, results)
+        return results, {"cached": False, "stale": False, "age_seconds": 0.0, "intent": classify_intent(query)}
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._conn().execute("SELECT COUNT(*) FROM research").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "name": "research",
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "scope": "this worker (entries are shared)",
+            }
+
+
+_cache: Optional[ResearchCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_research_cache(path: Optional[str] = None) -> Optional[ResearchCache]:
+    """Get the shared ResearchCache (None if its database cannot be opened)."""
+    global _cache, _cache_failed
+    if _cache is None and not _cache_failed:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                path = path or os.environ.get("ATLAS_RESEARCH_CACHE_PATH") or str(
+                    Path(__file__).parent.parent / "cache" / "research_cache.sqlite3"
+                )
+                try:
+                    _cache = ResearchCache(path)
+                except (sqlite3.Error, OSError) as e:
+                    _cache_failed = True
+                    print(f"[Research Cache] Unavailable at {path}: {e}")
+    return _cache
@@ -0,0 +1,213 @@
+"""
+Resident index over the Result Setter QA files.
+
+The Result Setter JSON files are loaded once, merged in priority order and kept
+in memory with an exact-match map and an inverted token index. The files are
+re-stat'ed on each lookup and re-parsed only when their mtime changes (e.g. after
+thor_result_setter_server.py saves a new pair).
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+KEY_WORDS = frozenset({'what', 'how', 'why', 'when', 'where', 'who', 'which'})
+
+_WHO_PREFIX = re.compile(r"^who\s+(is|was|'s)\s+")
+_KNOW_PREFIX = re.compile(r"^do\s+you\s+know\s+")
+
+
+def _strip_prefix(text: str, prefix: "re.Pattern") -> str:
+    text = text.lower().strip()
+    text = prefix.sub("", text)
+    return text.strip(" ?!.")
+
+
+class _Entry:
+    """Precomputed matching data for a single QA pair."""
+
+    __slots__ = ('qa', 'question_lower', 'words', 'key_words', 'who_name', 'know_name')
+
+    def __init__(self, qa: Dict):
+        self.qa = qa
+        self.question_lower = qa.get('question', '').lower().strip()
+        self.words = frozenset(self.question_lower.split())
+        self.key_words = self.words & KEY_WORDS
+        self.who_name = _strip_prefix(self.question_lower, _WHO_PREFIX)
+        self.know_name = _strip_prefix(self.question_lower, _KNOW_PREFIX)
+
+
+class ResultSetterIndex:
+    """
+    In-memory lookup over one or more Result Setter files.
+
+    Files are given in priority order; pairs from later files are only added when
+    their question is not already present in an earlier file (the same merge the
+    Thor 1.1 result setter has always done with the Thor 1.0 base knowledge).
+    """
+
+    def __init__(self, files: Sequence[str]):
+        self.files = [str(f) for f in files]
+        self._lock = threading.Lock()
+        self._mtimes: Tuple = ()
+        self._file_pairs: Dict[str, Tuple[Optional[float], List[Dict]]] = {}
+        # (entries, exact map, token index), replaced as one tuple so a lookup never mixes two builds
+        self._state: Tuple[List[_Entry], Dict[str, List[int]], Dict[str, List[int]]] = ([], {}, {})
+
+    # ------------------------------------------------------------------ loading
+
+    def _current_mtimes(self) -> Tuple:
+        mtimes = []
+        for path in self.files:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _read_file(self, path: str, mtime) -> List[Dict]:
+        """Return the pairs of a file, re-parsing only if its mtime changed."""
+        cached = self._file_pairs.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        pairs: List[Dict] = []
+        if mtime is not None:
+            with open(path, 'r', encoding='utf-8') as f:
+                pairs = json.load(f).get('qa_pairs', [])
+        self._file_pairs[path] = (mtime, pairs)
+        return pairs
+
+    def _rebuild(self, mtimes: Tuple) -> None:
+        merged: List[Dict] = []
+        seen = set()
+        for i, (path, mtime) in enumerate(zip(self.files, mtimes)):
+            pairs = self._read_file(path, mtime)
+            if i == 0:
+                merged.extend(pairs)
+                seen = {qa.get('question', '').lower().strip() for qa in merged}
+                continue
+            for qa in pairs:
+                question_lower = qa.get('question', '').lower().strip()
+                if question_lower and question_lower not in seen:
+                    merged.append(qa)
+                    seen.add(question_lower)
+
+        entries = [_Entry(qa) for qa in merged]
+        exact: Dict[str, List[int]] = {}
+        tokens: Dict[str, List[int]] = {}
+        for idx, entry in enumerate(entries):
+            exact.setdefault(entry.question_lower, []).append(idx)
+            for word in entry.words:
+                tokens.setdefault(word, []).append(idx)
+
+        self._state = (entries, exact, tokens)
+        self._mtimes = mtimes
+        print(f"[Result Setter] Indexed {len(entries)} QA pairs from {len(self.files)} file(s)")
+
+    def refresh(self) -> None:
+        """Reload the index if any of the backing files changed on disk."""
+        mtimes = self._current_mtimes()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes != self._mtimes:
+                self._rebuild(mtimes)
+
+    # ------------------------------------------------------------------ lookup
+
+    @staticmethod
+    def _answer_for(state: Tuple, question_lower: str, default: Optional[str]) -> Optional[str]:
+        """Combine all unique answers stored for the same question."""
+        entries, exact, _tokens = state
+        answers = [entries[i].qa.get('answer', '') for i in exact.get(question_lower, [])]
+        unique_answers = list(dict.fromkeys([a for a in answers if a]))
+        if len(unique_answers) > 1:
+            return "; ".join(unique_answers)
+        return default
+
+    def lookup(self, query: str) -> Optional[str]:
+        """
+        Return the authoritative answer for a query, or None.
+
+        Exact matches win; otherwise the best word-overlap match is returned when it
+        clears the similarity threshold (stricter for "who is"/"do you know" queries).
+        """
+        self.refresh()
+        state = self._state
+        entries, exact_map, tokens = state
+        if not entries:
+            return None
+
+        query_lower = query.lower().strip()
+        query_words = set(query_lower.split())
+
+        exact = exact_map.get(query_lower)
+        if exact:
+            print(f"[Result Setter] Exact match found for: {query}")
+            return self._answer_for(state, query_lower, entries[exact[0]].qa.get('answer'))
+
+        # Only pairs sharing at least one word with the query can score above zero
+        candidates = set()
+        for word in query_words:
+            candidates.update(tokens.get(word, ()))
+        if not candidates:
+            return None
+
+        is_who = query_lower.startswith(("who is", "who was", "who's"))
+        is_know = query_lower.startswith("do you know")
+        qname_who = _strip_prefix(query_lower, _WHO_PREFIX) if is_who else ''
+        qname_know = _strip_prefix(query_lower, _KNOW_PREFIX) if is_know else ''
+        query_key_words = query_words & KEY_WORDS
+
+        best_match = None
+        best_score = 0
+        for idx in sorted(candidates):
+            entry = entries[idx]
+
+            # Tighten "who is ..." and "do you know ..." matches to avoid cross-person leakage
+            if is_who:
+                tname = entry.who_name
+                if qname_who and tname and not (qname_who in tname or tname in qname_who):
+                    continue
+            if is_know:
+                tname = entry.know_name
+                if qname_know and tname and not (qname_know in tname or tname in qname_know):
+                    continue
+
+            common_words = query_words & entry.words
+            score = len(common_words) / max(len(query_words), len(entry.words))
+            if entry.question_lower in query_lower or query_lower in entry.question_lower:
+                score += 0.5
+            if query_key_words and query_key_words == entry.key_words:
+                score += 0.2
+
+            if score > best_score:
+                best_score = score
+                best_match = entry
+
+        min_score = 0.8 if (is_who or is_know) else 0.6
+        if best_match and best_score >= min_score:
+            print(f"[Result Setter] Fuzzy match found (score: {best_score:.2f}) for: {query}")
+            print(f"[Result Setter] Matched question: {best_match.qa.get('question')}")
+            return self._answer_for(state, best_match.question_lower, best_match.qa.get('answer'))
+
+        return None
+
+
+_indexes: Dict[Tuple[str, ...], ResultSetterIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_result_setter_index(*files: str) -> ResultSetterIndex:
+    """Get the shared ResultSetterIndex for the given files (in priority order)."""
+    key = tuple(str(f) for f in files)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = ResultSetterIndex(key)
+                _indexes[key] = index
+    return index
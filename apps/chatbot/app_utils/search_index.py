@@ -0,0 +1,303 @@
+"""
+Full-text search index over chats, projects and gems.
+
+A SQLite FTS5 table kept next to the app data. Every searchable piece of text is
+one row: a chat's name and each of its messages, a project's name/description/
+context, a gem's name/description/instructions. ChatStore adds rows as turns are
+appended and replaces them when a snapshot is written; save_project re-indexes the
+project it wrote and the gems are re-synced whenever the gems database is saved. A query is a lookup in the FTS
+postings for its terms (with prefix matching on every term), ranked with BM25, so
+search cost follows the number of matches rather than the number of files.
+
+Snippets come back as HTML: the text is escaped and matched terms are wrapped in
+<mark>...</mark>, so they can be rendered directly.
+
+Where SQLite has no FTS5 (or the index cannot be opened), substring_search scans
+documents for the whole query as a case-insensitive substring, as search did before
+the index existed, and returns results of the same shape.
+"""
+import html
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Chat name / project or gem name rows carry text in `title`; everything else in `body`.
+TITLE_WEIGHT = 8.0
+BODY_WEIGHT = 1.0
+
+# Sentinels put around matches by FTS5 and turned into <mark> after escaping.
+_OPEN, _CLOSE = "\ue000", "\ue001"
+_ELLIPSIS = "…"
+_TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def query_terms(query: str) -> List[str]:
+    """Lowercase word terms of a query, in order, without duplicates."""
+    return list(dict.fromkeys(_TERM_RE.findall((query or "").lower())))
+
+
+def _fts_query(terms: Sequence[str]) -> str:
+    # Every term must match, each as a prefix ("pyth" finds "python").
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _render(marked: str) -> str:
+    return html.escape(marked or "").replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def highlight_snippet(text: str, query: str, width: int = 160) -> str:
+    """
+    Snippet of `text` around the first query match, as escaped HTML with <mark> tags.
+
+    Used for results that do not come from the FTS table (brain items).
+    """
+    text = re.sub(r"\s+", " ", text or "").strip()
+    terms = query_terms(query)
+    if not text or not terms:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, (first.start() if first else 0) - width // 4)
+    end = min(len(text), start + width)
+    window = text[start:end]
+    marked = pattern.sub(lambda m: f"{_OPEN}{m.group(0)}{_CLOSE}", window)
+    return (_ELLIPSIS if start else "") + _render(marked) + (_ELLIPSIS if end < len(text) else "")
+
+
+def _substring_snippet(text: str, needle: str, width: Optional[int] = 160) -> Optional[str]:
+    """Snippet of `text` around its first occurrence of `needle` (lowercase; all of `text` if width is None), or None."""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    lowered = text.lower()
+    first = lowered.find(needle)
+    if first < 0:
+        return None
+    if width is None:
+        start, end = 0, len(text)
+    else:
+        start = max(0, first - width // 4)
+        end = min(len(text), start + width)
+    marked, pos = [], start
+    while True:
+        i = lowered.find(needle, pos, end)
+        if i < 0 or i + len(needle) > end:
+            break
+        marked.append(text[pos:i] + _OPEN + text[i:i + len(needle)] + _CLOSE)
+        pos = i + len(needle)
+    marked.append(text[pos:end])
+    return (_ELLIPSIS if start else "") + _render("".join(marked)) + (_ELLIPSIS if end < len(text) else "")
+
+
+def substring_search(
+    docs: Iterable[Tuple[str, str, Iterable[Tuple[int, str]]]],
+    query: str,
+    limit: int = 20,
+    hits_per_doc: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Scan (doc_id, title, [(part, body), ...]) documents for `query` as a substring.
+
+    Fallback for SearchIndex.search when the index is unavailable; returns the same
+    result shape. Every matching row adds TITLE_WEIGHT (name) or BODY_WEIGHT (body)
+    to the document's score; ties keep document order.
+    """
+    needle = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    if not needle or limit <= 0:
+        return []
+    found = []
+    for doc_id, title, parts in docs:
+        title_hl = _substring_snippet(title, needle, width=None)
+        score = TITLE_WEIGHT if title_hl else 0.0
+        hits = []
+        for part, body in parts:
+            snippet = _substring_snippet(body, needle)
+            if snippet is None:
+                continue
+            score += BODY_WEIGHT
+            if len(hits) < hits_per_doc:
+                hits.append({"part": part, "snippet": snippet})
+        if score:
+            found.append({"doc_id": doc_id, "score": score, "title": title_hl,
+                          "title_match": title_hl is not None, "hits": hits})
+    return sorted(found, key=lambda d: -d["score"])[:limit]
+
+
+class SearchIndex:
+    """SQLite FTS5 index of chats, projects and gems."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, doc_id TEXT NOT NULL, part INTEGER NOT NULL,"
+        " title TEXT NOT NULL DEFAULT '', body TEXT NOT NULL DEFAULT '')",
+        "CREATE UNIQUE INDEX IF NOT EXISTS entries_doc ON entries (kind, doc_id, part)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5("
+        " title, body, content='entries', content_rowid='id',"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN"
+        " INSERT INTO entries_fts (rowid, title, body) VALUES (new.id, new.title, new.body); END",
+        "CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN"
+        " INSERT INTO entries_fts (entries_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+        "CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN"
+        " INSERT INTO entries_fts (entries_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);"
+        " INSERT INTO entries_fts (rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    )
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._conn()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------ writes
+
+    @staticmethod
+    def _message_text(message: Any) -> str:
+        if not isinstance(message, dict):
+            return str(message or "")
+        content = message.get("content")
+        return content if isinstance(content, str) else str(content or "")
+
+    def _replace(self, conn: sqlite3.Connection, kind: str, doc_id: str, rows: Iterable[Tuple[int, str, str]]) -> None:
+        conn.execute("DELETE FROM entries WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+        conn.executemany(
+            "INSERT INTO entries (kind, doc_id, part, title, body) VALUES (?, ?, ?, ?, ?)",
+            [(kind, doc_id, part, title or "", body or "") for part, title, body in rows],
+        )
+
+    def index_chat(self, chat_id: str, name: str, messages: Sequence[Any]) -> None:
+        """Replace everything indexed for a chat (row -1 is its name, row i is message i)."""
+        rows = [(-1, name or "", "")]
+        rows.extend((i, "", self._message_text(m)) for i, m in enumerate(messages or []))
+        conn = self._conn()
+        with conn:
+            self._replace(conn, "chat", chat_id, rows)
+
+    def append_messages(self, chat_id: str, start: int, messages: Sequence[Any]) -> None:
+        """Index messages start, start+1, ... of a chat that only grew."""
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (kind, doc_id, part, title, body) VALUES ('chat', ?, ?, '', ?)",
+                [(chat_id, start + i, self._message_text(m)) for i, m in enumerate(messages)],
+            )
+
+    def set_chat_name(self, chat_id: str, name: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO entries (kind, doc_id, part, title, body) VALUES ('chat', ?, -1, ?, '')"
+                " ON CONFLICT(kind, doc_id, part) DO UPDATE SET title = excluded.title",
+                (chat_id, name or ""),
+            )
+
+    def index_project(self, project_id: str, project: Dict[str, Any]) -> None:
+        body = "\n\n".join(filter(None, (project.get("description"), project.get("context"))))
+        conn = self._conn()
+        with conn:
+            self._replace(conn, "project", project_id, [(0, project.get("name") or "", body)])
+
+    def sync_gems(self, gems: Iterable[Dict[str, Any]]) -> None:
+        """Make the indexed gems match the gems database (it is rewritten whole on every save)."""
+        gems = [g for g in gems if g.get("id")]
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE kind = 'gem'")
+            conn.executemany(
+                "INSERT INTO entries (kind, doc_id, part, title, body) VALUES ('gem', ?, 0, ?, ?)",
+                [
+                    (g["id"], g.get("name") or "",
+                     "\n\n".join(filter(None, (g.get("description"), g.get("instructions")))))
+                    for g in gems
+                ],
+            )
+
+    def remove_chat(self, chat_id: str) -> None:
+        self.remove("chat", chat_id)
+
+    def remove(self, kind: str, doc_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE kind = ? AND doc_id = ?", (kind, doc_id))
+
+    def doc_ids(self, kind: str) -> List[str]:
+        return [row[0] for row in self._conn().execute("SELECT DISTINCT doc_id FROM entries WHERE kind = ?", (kind,))]
+
+    # ------------------------------------------------------------------ reads
+
+    def search(self, query: str, kind: str, limit: int = 20, hits_per_doc: int = 3) -> List[Dict[str, Any]]:
+        """
+        Ranked documents of one kind matching every term of `query` (as prefixes).
+
+        Returns [{doc_id, score, title, title_match, hits: [{part, snippet}]}], best
+        first. A document's score is the sum of the BM25 scores of its matching rows
+        (name matches weigh TITLE_WEIGHT times a body match); `title` is the
+        document's name with matches highlighted.
+        """
+        terms = query_terms(query)
+        if not terms or limit <= 0:
+            return []
+        rows = self._conn().execute(
+            "SELECT e.doc_id, e.part, e.title,"
+            " highlight(entries_fts, 0, ?, ?) AS title_hl,"
+            " snippet(entries_fts, 1, ?, ?, ?, 24) AS snippet,"
+            " bm25(entries_fts, ?, ?) AS rank"
+            " FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid"
+            " WHERE entries_fts MATCH ? AND e.kind = ?"
+            " ORDER BY rank LIMIT ?",
+            (_OPEN, _CLOSE, _OPEN, _CLOSE, _ELLIPSIS, TITLE_WEIGHT, BODY_WEIGHT, _fts_query(terms), kind, limit * 25),
+        ).fetchall()
+
+        docs: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            doc = docs.get(row["doc_id"])
+            if doc is None:
+                doc = docs[row["doc_id"]] = {
+                    "doc_id": row["doc_id"], "score": 0.0, "title": None, "title_match": False, "hits": [],
+                }
+            doc["score"] += -row["rank"]  # FTS5 bm25() is negative, lower is better
+            if row["title"] and _OPEN in (row["title_hl"] or ""):
+                doc["title_match"] = True
+                doc["title"] = _render(row["title_hl"])
+            if _OPEN in (row["snippet"] or "") and len(doc["hits"]) < hits_per_doc:
+                doc["hits"].append({"part": row["part"], "snippet": _render(row["snippet"])})
+
+        ranked = sorted(docs.values(), key=lambda d: -d["score"])[:limit]
+        for doc in ranked:
+            doc["score"] = round(doc["score"], 4)
+            doc["hits"].sort(key=lambda h: h["part"])
+        return ranked
+
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(path: str) -> Optional[SearchIndex]:
+    """Get the shared SearchIndex for a database path (None if it cannot be opened)."""
+    key = os.path.abspath(str(path))
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                try:
+                    index = SearchIndex(key)
+                except Exception as e:
+                    print(f"[Search Index] Index unavailable at {key}: {e}")
+                    return None
+                _indexes[key] = index
+    return index
@@ -0,0 +1,150 @@
+"""
+Concurrent model warm-up with readiness tracking.
+
+Model loads are submitted to a small thread pool so the HTTP server can bind
+its port right away. Requests that need a model still warming get a
+knowledge-only answer in the meantime. Each load's state is written into the
+app's model_loading_progress dict (the structure the UI already polls), and
+readiness() backs the /healthz probe.
+
+start() is idempotent per process. It is safe to call both from __main__ and
+from a request hook, which is how gunicorn workers (where __main__ never runs)
+start warming. If the process forked after start() (gunicorn --preload), the
+child starts its own warm-up.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _Task:
+    __slots__ = ("name", "loader", "progress_key", "required", "state", "error", "started", "seconds")
+
+    def __init__(self, name: str, loader: Callable[[], Any], progress_key: str, required: bool):
+        self.name = name
+        self.loader = loader
+        self.progress_key = progress_key
+        self.required = required
+        self.state = "pending"  # pending -> loading -> loaded | failed
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.seconds: Optional[float] = None
+
+
+class StartupOrchestrator:
+    """Runs registered model loaders concurrently and reports readiness."""
+
+    def __init__(self, progress: Dict[str, Dict[str, Any]], max_workers: int = 2):
+        self.progress = progress
+        self.max_workers = max(1, max_workers)
+        self._tasks: List[_Task] = []
+        self._on_complete: List[Callable[["StartupOrchestrator"], None]] = []
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._started_at: Optional[float] = None
+        self._pending = 0
+
+    def add(self, name: str, loader: Callable[[], Any], progress_key: Optional[str] = None,
+            required: bool = False) -> None:
+        """Register a loader; it counts as loaded if it returns anything but None."""
+        self._tasks.append(_Task(name, loader, progress_key or name, required))
+
+    def on_complete(self, callback: Callable[["StartupOrchestrator"], None]) -> None:
+        """Call `callback(self)` once every load has finished (loaded or failed)."""
+        self._on_complete.append(callback)
+
+    @property
+    def started(self) -> bool:
+        return self._pid == os.getpid()
+
+    def start(self) -> bool:
+        """Start warming in this process; False if it was already started."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return False
+            self._pid = os.getpid()
+            self._started_at = time.time()
+            self._pending = len(self._tasks)
+            for task in self._tasks:
+                task.state, task.error, task.started, task.seconds = "pending", None, None, None
+                self._set_progress(task, 0, "pending", "Waiting to load...")
+
+        if not self._tasks:
+            self._finish()
+            return True
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._tasks)),
+                                  thread_name_prefix="atlas-warmup")
+        for task in self._tasks:
+            pool.submit(self._run, task)
+        pool.shutdown(wait=False)
+        print(f"[Startup] Warming {len(self._tasks)} model(s) in the background")
+        return True
+
+    def _set_progress(self, task: _Task, progress: int, status: str, message: str) -> None:
+        entry = self.progress.setdefault(task.progress_key, {})
+        entry.update({"progress": progress, "status": status, "message": message})
+
+    def _run(self, task: _Task) -> None:
+        task.state = "loading"
+        task.started = time.monotonic()
+        self._set_progress(task, 10, "loading", f"Starting {task.name} load...")
+        try:
+            instance = task.loader()
+            if instance is None:
+                prior = self.progress.get(task.progress_key, {})
+                raise RuntimeError(prior.get("message") if prior.get("status") == "failed" else "loader returned no model")
+            task.state = "loaded"
+            self._set_progress(task, 100, "loaded", f"{task.name} loaded successfully")
+            print(f"✅ {task.name} loaded")
+        except Exception as e:
+            task.state = "failed"
+            task.error = str(e)[:200]
+            entry = self.progress.setdefault(task.progress_key, {})
+            entry.update({"status": "failed", "message": f"Failed to load: {str(e)[:100]}"})
+            entry.setdefault("progress", 0)
+            print(f"❌ Failed to load {task.name}: {e}")
+        finally:
+            task.seconds = round(time.monotonic() - task.started, 2)
+            with self._lock:
+                self._pending -= 1
+                done = self._pending == 0
+            if done:
+                self._finish()
+
+    def _finish(self) -> None:
+        loaded = sum(1 for t in self._tasks if t.state == "loaded")
+        print(f"[Startup] Warm-up finished: {loaded}/{len(self._tasks)} model(s) loaded")
+        for callback in self._on_complete:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"[Startup] Completion callback failed: {e}")
+
+    def is_warming(self, progress_key: str) -> bool:
+        """True while a registered load for `progress_key` has not finished yet."""
+        return any(t.progress_key == progress_key and t.state in ("pending", "loading") for t in self._tasks)
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Ready once every required load has finished. A required model that failed
+        leaves the app serving knowledge-only answers, which still counts as ready.
+        """
+        required = [t for t in self._tasks if t.required]
+        ready = self.started and all(t.state in ("loaded", "failed") for t in required)
+        return {
+            "ready": ready,
+            "started": self.started,
+            "uptime_seconds": round(time.time() - self._started_at, 1) if self._started_at and self.started else 0,
+            "degraded": any(t.state == "failed" for t in required),
+            "models": {
+                t.name: {
+                    "state": t.state,
+                    "required": t.required,
+                    "load_seconds": t.seconds,
+                    "error": t.error,
+                }
+                for t in self._tasks
+            },
+        }
@@ -1,70 +1,141 @@
 """
 Brain knowledge connector: loads keyword-indexed knowledge from brain/*/keywords.json
 and provides get_relevant_knowledge, enhance_response, and search.
+
+Items are indexed once at load time in a BM25 inverted index (brain/index.py);
+new items can be appended with add_item() without rebuilding. Items added at
+runtime (research results) are capped at `max_learned`: past it, the least
+recently added or retrieved one is dropped from the index. Letter directories
+that have an up-to-date knowledge.shard (brain/shard_store.py) are memory-mapped
+instead of parsed, and their documents are only decoded when returned.
 """
 import os
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from .index import BM25Index, bm25_search
+from .shard_store import (
+    SHARD_FILENAME,
+    ShardReader,
+    index_text,
+    item_key_hash,
+    normalize_item,
+    shard_is_current,
+)
+
 
 class BrainConnector:
     """Connects to the brain knowledge base (keywords.json files under brain/)."""
 
-    def __init__(self, brain_dir: Optional[Path] = None):
+    def __init__(self, brain_dir: Optional[Path] = None, max_learned: int = 0):
         self.brain_dir = brain_dir or Path(__file__).parent.resolve()
-        self._knowledge: List[Dict[str, Any]] = []
+        self.max_learned = max_learned  # 0 = unbounded
+        self._knowledge: Dict[int, Dict[str, Any]] = {}
+        self._index = BM25Index()
+        self._shards: List[ShardReader] = []
+        self._seen: Dict[int, int] = {}  # key hash -> doc id of in-memory items; shards answer for their own
+        self._learned: "OrderedDict[int, int]" = OrderedDict()  # runtime doc id -> key hash, least recent first
+        self._next_id = 0
+        self._add_lock = threading.Lock()
         self._load_all()
 
     def _load_all(self) -> None:
-        """Load all keywords.json from brain/<letter>/ subdirs."""
-        self._knowledge = []
+        """Map brain/<letter>/knowledge.shard where current, else load keywords.json into memory."""
+        self._knowledge = {}
+        self._index = BM25Index()
+        self._shards = []
+        self._seen = {}
+        self._learned = OrderedDict()
+        self._next_id = 0
         if not self.brain_dir.is_dir():
             return
-        for sub in self.brain_dir.iterdir():
-            if sub.is_dir():
-                kw_file = sub / "keywords.json"
-                if kw_file.exists():
-                    try:
-                        with open(kw_file, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                        for item in data.get("knowledge", []):
-                            self._knowledge.append({
-                                "title": item.get("title", ""),
-                                "content": item.get("content", ""),
-                                "query": item.get("query", ""),
-                                "source": item.get("source", "brain"),
-                                "learned_at": item.get("learned_at", ""),
-                                "url": item.get("url", ""),
-                            })
-                    except (json.JSONDecodeError, OSError):
-                        pass
+        for sub in sorted(self.brain_dir.iterdir()):
+            if not sub.is_dir():
+                continue
+            if shard_is_current(sub):
+                try:
+                    self._shards.append(ShardReader(sub / SHARD_FILENAME))
+                    continue
+                except (OSError, ValueError) as e:
+                    print(f"[Brain] Ignoring shard in {sub.name}: {e}")
+            kw_file = sub / "keywords.json"
+            if kw_file.exists():
+                try:
+                    with open(kw_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    for item in data.get("knowledge", []):
+                        self._add(item, learned=False)
+                except (json.JSONDecodeError, OSError):
+                    pass
+
+    @property
+    def item_count(self) -> int:
+        return len(self._knowledge) + sum(shard.n_docs for shard in self._shards)
+
+    def add_item(self, item: Dict[str, Any]) -> bool:
+        """
+        Append a knowledge item (e.g. a fresh research result) to the index.
+        Returns False if an item with the same title/url/content is already indexed.
+        """
+        return self._add(item, learned=True)
+
+    def _add(self, item: Dict[str, Any], learned: bool) -> bool:
+        entry = normalize_item(item)
+        key = item_key_hash(entry)
+        evicted = []
+        with self._add_lock:
+            doc_id = self._seen.get(key)
+            if doc_id is not None:
+                if doc_id in self._learned:
+                    self._learned.move_to_end(doc_id)
+                return False
+            if any(shard.has_key(key) for shard in self._shards):
+                return False
+            doc_id = self._next_id
+            self._next_id += 1
+            self._seen[key] = doc_id
+            self._knowledge[doc_id] = entry
+            self._index.add(doc_id, index_text(entry))
+            if learned:
+                self._learned[doc_id] = key
+                while self.max_learned and len(self._learned) > self.max_learned:
+                    old_id, old_key = self._learned.popitem(last=False)
+                    del self._seen[old_key]
+                    evicted.append((old_id, self._knowledge.pop(old_id)))
+        for old_id, old_entry in evicted:
+            self._index.remove(old_id, index_text(old_entry))
+        return True
+
+    def _touch(self, doc_ids: List[int]) -> None:
+        with self._add_lock:
+            for doc_id in doc_ids:
+                if doc_id in self._learned:
+                    self._learned.move_to_end(doc_id)
+
+    def _segments(self) -> List[Any]:
+        return [self._index] + self._shards
 
-    def _score(self, query: str, item: Dict[str, Any]) -> float:
-        """Simple relevance score: keyword overlap."""
-        q = (query or "").lower()
-        text = (
-            (item.get("title", "") or "")
-            + " "
-            + (item.get("content", "") or "")
-            + " "
-            + (item.get("query", "") or "")
-        ).lower()
-        if not q:
-            return 0.0
-        words = set(q.split())
-        hits = sum(1 for w in words if w in text)
-        return hits / len(words) if words else 0.0
+    def _resolve(self, segment: int, doc_id: int) -> Optional[Dict[str, Any]]:
+        if segment == 0:
+            return self._knowledge.get(doc_id)  # None if evicted since the search
+        return self._shards[segment - 1].get(doc_id)
 
     def get_relevant_knowledge(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Return knowledge items relevant to the query (for context)."""
-        if not query or not self._knowledge:
+        if not query or not self.item_count:
             return []
-        scored = [(self._score(query, item), item) for item in self._knowledge]
-        scored = [(s, item) for s, item in scored if s > 0]
-        scored.sort(key=lambda x: -x[0])
+        # BM25 decides the ranking; the reported score is query-term coverage (0..1)
+        hits = bm25_search(self._segments(), query, limit)
+        if self._learned:
+            self._touch([doc_id for segment, doc_id, _bm25, _coverage in hits if segment == 0])
+        scored = [(coverage, self._resolve(segment, doc_id)) for segment, doc_id, _bm25, coverage in hits]
         out = []
-        for score, item in scored[:limit]:
+        for score, item in scored:
+            if item is None:
+                continue
             out.append({
                 "title": item.get("title", ""),
                 "content": item.get("content", ""),
@@ -0,0 +1,142 @@
+"""
+Inverted index with BM25 scoring for brain knowledge items.
+
+Documents are tokenized once when added; queries only touch the postings of
+their own terms, so lookup cost depends on how many documents share a query
+term rather than on the total size of the knowledge base.
+
+Scoring works over one or more "segments" (the in-memory BM25Index and the
+memory-mapped shards in brain/shard_store.py) with shared corpus statistics,
+so items from both rank against each other consistently.
+"""
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Very common words carry no signal for knowledge lookup and would otherwise
+# pull every document into the candidate set.
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "does",
+    "for", "from", "has", "have", "how", "i", "in", "is", "it", "its", "me", "my",
+    "of", "on", "or", "so", "that", "the", "their", "this", "to", "was", "we",
+    "what", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def term_frequencies(text: str) -> Tuple[Dict[str, int], int]:
+    """Return ({term: count}, token count) for a document."""
+    tokens = tokenize(text)
+    tf: Dict[str, int] = {}
+    for tok in tokens:
+        tf[tok] = tf.get(tok, 0) + 1
+    return tf, len(tokens)
+
+
+class BM25Index:
+    """Incremental in-memory inverted index over integer document ids."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self.total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Index a document under a new, unique id."""
+        tf, length = term_frequencies(text)
+        with self._lock:
+            for tok, count in tf.items():
+                self._postings.setdefault(tok, {})[doc_id] = count
+            self._doc_len[doc_id] = length
+            self.total_len += length
+
+    def remove(self, doc_id: int, text: str) -> None:
+        """Drop a document added with `text` (the same text gives the same terms)."""
+        tf, _length = term_frequencies(text)
+        with self._lock:
+            if doc_id not in self._doc_len:
+                return
+            for tok in tf:
+                postings = self._postings.get(tok)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[tok]
+            self.total_len -= self._doc_len.pop(doc_id)
+
+    def build(self, docs: Iterable[Tuple[int, str]]) -> None:
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+
+    # Segment interface used by bm25_search
+    def df(self, term: str) -> int:
+        return len(self._postings.get(term, ()))
+
+    def postings(self, term: str) -> List[Tuple[int, int]]:
+        with self._lock:
+            return list(self._postings.get(term, {}).items())
+
+    def doc_len(self, doc_id: int) -> int:
+        return self._doc_len.get(doc_id, 0)
+
+    def query(self, text: str, limit: int = 10) -> List[Tuple[int, float, float]]:
+        """Return up to `limit` (doc_id, bm25, coverage) tuples for this index alone."""
+        return [(doc_id, score, cov) for _seg, doc_id, score, cov in bm25_search([self], text, limit)]
+
+
+def bm25_search(
+    segments: Sequence,
+    text: str,
+    limit: int = 10,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> List[Tuple[int, int, float, float]]:
+    """
+    Rank documents across segments with BM25.
+
+    Returns up to `limit` (segment_index, doc_id, bm25, coverage) tuples sorted by
+    BM25. coverage is the fraction of distinct query terms present in the document,
+    a bounded [0, 1] score that callers can threshold on.
+    """
+    terms = list(dict.fromkeys(tokenize(text)))
+    if not terms:
+        return []
+    n_docs = sum(seg.n_docs for seg in segments)
+    if not n_docs:
+        return []
+    avgdl = (sum(seg.total_len for seg in segments) / n_docs) or 1.0
+
+    scores: Dict[Tuple[int, int], float] = {}
+    matched: Dict[Tuple[int, int], int] = {}
+    for term in terms:
+        dfs = [seg.df(term) for seg in segments]
+        df = sum(dfs)
+        if not df:
+            continue
+        idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        for seg_idx, seg in enumerate(segments):
+            if not dfs[seg_idx]:
+                continue  # term absent from this segment: skip it entirely
+            for doc_id, tf in seg.postings(term):
+                norm = k1 * (1.0 - b + b * seg.doc_len(doc_id) / avgdl)
+                key = (seg_idx, doc_id)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+                matched[key] = matched.get(key, 0) + 1
+
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:limit]
+    return [(seg_idx, doc_id, score, matched[(seg_idx, doc_id)] / len(terms)) for (seg_idx, doc_id), score in ranked]
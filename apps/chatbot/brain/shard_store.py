@@ -0,0 +1,266 @@
+"""
+Memory-mapped binary shard store for brain knowledge.
+
+Each brain/<letter>/ directory can hold a `knowledge.shard` file converted from its
+keywords.json. The file carries its own inverted index, so a BrainConnector can
+rank against it without parsing anything up front: postings and document records
+are read straight from the mmap and a record is only JSON-decoded when it lands
+in a top-k result. Because the data lives in the page cache rather than in Python
+objects, several worker processes share a single copy of the brain.
+
+Layout (little-endian):
+    header      magic, doc_count, term_count, total_len, section offsets
+    doc table   per doc: record offset, record length, token count, key hash
+    term table  per term (sorted): term offset, term length, postings offset, df
+    terms       utf-8 term bytes
+    postings    per term: df x (doc id, tf)
+    keys        sorted key hashes, so a duplicate check is a binary search
+    records     compact JSON per doc
+
+Version-1 files (magic ATBRAIN1, no key section) are still read; their key
+hashes are collected from the doc table the first time one is looked up.
+
+Convert the JSON shards with:
+    python -m brain.shard_store [brain_dir]
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .index import term_frequencies
+
+SHARD_FILENAME = "knowledge.shard"
+SHARD_MAGIC = b"ATBRAIN2"
+_V1_MAGIC = b"ATBRAIN1"
+
+_HEADER = struct.Struct("<8sIIQQQQQQ")  # magic, docs, terms, total_len, doc_tbl, term_tbl, terms, postings, keys
+_V1_HEADER = struct.Struct("<8sIIQQQQQ")  # as above, without the key section
+_KEY = struct.Struct("<Q")
+_DOC = struct.Struct("<QIIQ")          # record offset, record length, token count, key hash
+_TERM = struct.Struct("<QIQI")         # term offset, term length, postings offset, df
+_POSTING = struct.Struct("<II")        # doc id, tf
+
+
+def normalize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a raw keywords.json entry onto the fields the brain keeps."""
+    return {
+        "title": item.get("title", ""),
+        "content": item.get("content", ""),
+        "query": item.get("query", ""),
+        "source": item.get("source", "brain"),
+        "learned_at": item.get("learned_at", ""),
+        "url": item.get("url", ""),
+    }
+
+
+def index_text(item: Dict[str, Any]) -> str:
+    return " ".join((
+        item.get("title", "") or "",
+        item.get("content", "") or "",
+        item.get("query", "") or "",
+    ))
+
+
+def item_key_hash(item: Dict[str, Any]) -> int:
+    """64-bit identity hash used to dedupe items (title, url, content prefix)."""
+    key = "\x1f".join((item.get("title", "") or "", item.get("url", "") or "", (item.get("content", "") or "")[:200]))
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "little")
+
+
+def write_shard(path: Path, items: Iterable[Dict[str, Any]], seen: Optional[set] = None) -> int:
+    """
+    Write items to a shard file atomically; returns the number of documents.
+    Items whose key hash is already in `seen` (shared across shards) are dropped.
+    """
+    seen = set() if seen is None else seen
+    unique: List[Dict[str, Any]] = []
+    for it in items:
+        entry = normalize_item(it)
+        key = item_key_hash(entry)
+        if key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    items = unique
+    records: List[bytes] = []
+    doc_lens: List[int] = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc_id, item in enumerate(items):
+        records.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        tf, length = term_frequencies(index_text(item))
+        doc_lens.append(length)
+        for term, count in tf.items():
+            postings.setdefault(term, []).append((doc_id, count))
+
+    terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    term_bytes = [t.encode("utf-8") for t in terms]
+
+    doc_tbl = _HEADER.size
+    term_tbl = doc_tbl + _DOC.size * len(items)
+    terms_off = term_tbl + _TERM.size * len(terms)
+    postings_off = terms_off + sum(len(t) for t in term_bytes)
+    keys_off = postings_off + _POSTING.size * sum(len(p) for p in postings.values())
+    records_off = keys_off + _KEY.size * len(items)
+
+    out = bytearray()
+    out += _HEADER.pack(SHARD_MAGIC, len(items), len(terms), sum(doc_lens), doc_tbl, term_tbl, terms_off,
+                        postings_off, keys_off)
+
+    rec_pos = records_off
+    for item, rec, length in zip(items, records, doc_lens):
+        out += _DOC.pack(rec_pos, len(rec), length, item_key_hash(item))
+        rec_pos += len(rec)
+
+    str_pos, post_pos = terms_off, postings_off
+    for term, raw in zip(terms, term_bytes):
+        out += _TERM.pack(str_pos, len(raw), post_pos, len(postings[term]))
+        str_pos += len(raw)
+        post_pos += _POSTING.size * len(postings[term])
+    for raw in term_bytes:
+        out += raw
+    for term in terms:
+        for doc_id, count in postings[term]:
+            out += _POSTING.pack(doc_id, count)
+    for key in sorted(item_key_hash(item) for item in items):
+        out += _KEY.pack(key)
+    for rec in records:
+        out += rec
+
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(items)
+
+
+class ShardReader:
+    """Read-only, memory-mapped view of a shard file (a bm25_search segment)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._mm[:8]
+        if magic == SHARD_MAGIC:
+            (_magic, self.n_docs, self._term_count, self.total_len, self._doc_tbl, self._term_tbl,
+             _terms_off, _postings_off, self._keys_off) = _HEADER.unpack_from(self._mm, 0)
+        elif magic == _V1_MAGIC:
+            (_magic, self.n_docs, self._term_count, self.total_len, self._doc_tbl, self._term_tbl,
+             _terms_off, _postings_off) = _V1_HEADER.unpack_from(self._mm, 0)
+            self._keys_off = None
+        else:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a brain shard")
+        self._term_cache: Dict[str, Tuple[int, int]] = {}
+        self._v1_keys: Optional[frozenset] = None
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _lookup(self, term: str) -> Tuple[int, int]:
+        """Binary search the term table; returns (postings offset, df) or (0, 0)."""
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+        target = term.encode("utf-8")
+        mm = self._mm
+        lo, hi = 0, self._term_count
+        found = (0, 0)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t_off, t_len, p_off, df = _TERM.unpack_from(mm, self._term_tbl + mid * _TERM.size)
+            probe = mm[t_off:t_off + t_len]
+            if probe < target:
+                lo = mid + 1
+            elif probe > target:
+                hi = mid
+            else:
+                found = (p_off, df)
+                break
+        if len(self._term_cache) < 4096:
+            self._term_cache[term] = found
+        return found
+
+    # Segment interface used by bm25_search
+    def df(self, term: str) -> int:
+        return self._lookup(term)[1]
+
+    def postings(self, term: str) -> Iterable[Tuple[int, int]]:
+        p_off, df = self._lookup(term)
+        if not df:
+            return ()
+        return _POSTING.iter_unpack(self._mm[p_off:p_off + df * _POSTING.size])
+
+    def doc_len(self, doc_id: int) -> int:
+        return _DOC.unpack_from(self._mm, self._doc_tbl + doc_id * _DOC.size)[2]
+
+    # Documents
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        """Decode a single document record."""
+        r_off, r_len, _length, _key = _DOC.unpack_from(self._mm, self._doc_tbl + doc_id * _DOC.size)
+        return json.loads(self._mm[r_off:r_off + r_len].decode("utf-8"))
+
+    def has_key(self, key: int) -> bool:
+        """True if a document with this key hash is in the shard (binary search of the key section)."""
+        if self._keys_off is None:
+            if self._v1_keys is None:
+                self._v1_keys = frozenset(self.key_hashes())
+            return key in self._v1_keys
+        mm = self._mm
+        lo, hi = 0, self.n_docs
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = _KEY.unpack_from(mm, self._keys_off + mid * _KEY.size)[0]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def key_hashes(self) -> List[int]:
+        return [
+            _DOC.unpack_from(self._mm, self._doc_tbl + i * _DOC.size)[3]
+            for i in range(self.n_docs)
+        ]
+
+
+def shard_is_current(shard_dir: Path) -> bool:
+    """A shard is usable when it exists and is not older than its keywords.json."""
+    shard = shard_dir / SHARD_FILENAME
+    if not shard.exists():
+        return False
+    kw_file = shard_dir / "keywords.json"
+    return not kw_file.exists() or shard.stat().st_mtime >= kw_file.stat().st_mtime
+
+
+def convert_json_shards(brain_dir: Path) -> Dict[str, int]:
+    """Convert every brain/<letter>/keywords.json into a knowledge.shard file."""
+    converted: Dict[str, int] = {}
+    seen: set = set()
+    for sub in sorted(Path(brain_dir).iterdir()):
+        kw_file = sub / "keywords.json"
+        if not (sub.is_dir() and kw_file.exists()):
+            continue
+        try:
+            with open(kw_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[Brain Shards] Skipping {kw_file}: {e}")
+            continue
+        converted[sub.name] = write_shard(sub / SHARD_FILENAME, data.get("knowledge", []), seen)
+    return converted
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.resolve()
+    for letter, count in convert_json_shards(target).items():
+        print(f"[Brain Shards] {letter}: {count} items -> {target / letter / SHARD_FILENAME}")
@@ -85,6 +85,45 @@ THOR_RESULT_SETTER_FILE = THOR_1_1_RESULT_SETTER_FILE  # Default to latest
 GEMS_DIR = DATA_ROOT / "gems"
 GEMS_FILE = GEMS_DIR / "gems.json"
 
+# Response cache (normalized query -> response)
+RESPONSE_CACHE_TTL = int(os.environ.get("ATLAS_RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("ATLAS_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("ATLAS_RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Cache backend: "memory" (per process) or "sqlite" (shared by all workers on the host)
+CACHE_BACKEND = os.environ.get("ATLAS_CACHE_BACKEND", "memory")
+CACHE_PATH = os.environ.get("ATLAS_CACHE_PATH", str(DATA_ROOT / "cache" / "atlas_cache.sqlite3"))
+
+# Full-text search index over chats, projects and gems (SQLite FTS5)
+SEARCH_INDEX_PATH = os.environ.get("ATLAS_SEARCH_INDEX_PATH", str(DATA_ROOT / "cache" / "search_index.sqlite3"))
+
+# Persistent web research cache (per-intent TTLs, stale-while-revalidate)
+RESEARCH_CACHE_PATH = os.environ.get("ATLAS_RESEARCH_CACHE_PATH", str(DATA_ROOT / "cache" / "research_cache.sqlite3"))
+
+# Research results learned into the in-memory brain index at runtime (oldest dropped past this; 0 = unbounded)
+BRAIN_MAX_LEARNED_ITEMS = int(os.environ.get("ATLAS_BRAIN_MAX_LEARNED_ITEMS", "5000"))
+
+# Model registry RAM budget in MB (unset = 70% of physical RAM, 0 = unlimited)
+MODEL_MEMORY_BUDGET_MB = os.environ.get("ATLAS_MODEL_MEMORY_BUDGET_MB")
+
+# Models warmed in the background at startup, and how many load at once
+WARMUP_MODELS = [m.strip() for m in os.environ.get("ATLAS_WARMUP_MODELS", "thor-1.2,thor-1.0,thor-1.1,ai-direct").split(",") if m.strip()]
+WARMUP_WORKERS = int(os.environ.get("ATLAS_WARMUP_WORKERS", "2"))
+
+# Inference micro-batching: max requests per batch and how long to wait for more
+INFERENCE_MAX_BATCH = int(os.environ.get("ATLAS_INFERENCE_MAX_BATCH", "8"))
+INFERENCE_BATCH_WAIT_MS = float(os.environ.get("ATLAS_INFERENCE_BATCH_WAIT_MS", "5"))
+
+# Per-chat KV prefix cache for direct models: RAM budget and idle expiry
+PREFIX_CACHE_MAX_MB = float(os.environ.get("ATLAS_PREFIX_CACHE_MAX_MB", "256"))
+PREFIX_CACHE_IDLE_SECONDS = float(os.environ.get("ATLAS_PREFIX_CACHE_IDLE_SECONDS", "900"))
+
+# JSON-lines debug event log, written in the background (empty = disabled; defaults to .cursor/debug.log when .cursor/ exists)
+DEBUG_EVENT_LOG = os.environ.get(
+    "ATLAS_DEBUG_EVENT_LOG",
+    str(ATLAS_ROOT / ".cursor" / "debug.log") if (ATLAS_ROOT / ".cursor").is_dir() else "",
+)
+
 # UI directories
 UI_TEMPLATE_DIR = BASE_DIR / "ui" / "templates"
 UI_STATIC_DIR = BASE_DIR / "ui" / "static"
@@ -11,22 +11,47 @@ import re
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+from services.text_rules import Rule, RuleSet, literal_rule
+
 
 _BULLET_REQUEST_RE = re.compile(r"\b(bullets?|bullet\s+points?|list|steps?|checklist)\b", re.IGNORECASE)
+_BULLET_LINE_RE = re.compile(r"^\s*-\s+(\S.*)$")
+
+_WHITESPACE = RuleSet("whitespace", [
+    Rule(r"[ \t]{2,}", " ", when=("  ", "\t")),
+    Rule(r"\n{3,}", "\n\n", when="\n\n\n"),
+])
+
+_PUNCTUATION_SPACING = RuleSet("punctuation_spacing", [
+    # Space after punctuation when missing: "word.Word" -> "word. Word"
+    Rule(r"([a-z0-9])([.!?])([A-Z])", r"\1\2 \3", when=(".", "!", "?")),
+    # Remove spaces before punctuation: "word !" -> "word!"
+    Rule(r"\s+([,.;:!?])", r"\1"),
+])
+
+_GENERIC_BOLD = Rule(r"\*\*(Important|Note|Warning|Tip|Summary)\*\*", r"\1", when="**")
+
+# Reduce contractions lightly (formal tone); one pass for the whole table
+_FORMAL_CONTRACTIONS = literal_rule({
+    "can't": "cannot",
+    "won't": "will not",
+    "don't": "do not",
+    "isn't": "is not",
+    "aren't": "are not",
+    "I'm": "I am",
+    "you're": "you are",
+    "it's": "it is",
+}, guard=True)
+
+_SOFTENERS = Rule(r"\b(maybe|perhaps|might|could be|possibly)\b", "", re.IGNORECASE)
 
 
 def _normalize_whitespace(text: str) -> str:
-    text = re.sub(r"[ \t]{2,}", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
+    return _WHITESPACE.apply(text).strip()
 
 
 def _fix_punctuation_spacing(text: str) -> str:
-    # Space after punctuation when missing: "word.Word" -> "word. Word"
-    text = re.sub(r"([a-z0-9])([.!?])([A-Z])", r"\1\2 \3", text)
-    # Remove spaces before punctuation: "word !" -> "word!"
-    text = re.sub(r"\s+([,.;:!?])", r"\1", text)
-    return text
+    return _PUNCTUATION_SPACING.apply(text)
 
 
 def _ensure_terminal_punctuation(text: str) -> str:
@@ -55,13 +80,13 @@ def _debullet_if_not_requested(text: str, user_message: str) -> str:
         return text
 
     lines = [ln.rstrip() for ln in text.splitlines()]
-    bullet_lines = [ln for ln in lines if re.match(r"^\s*-\s+\S", ln)]
+    bullet_lines = [ln for ln in lines if _BULLET_LINE_RE.match(ln)]
     nonempty = [ln for ln in lines if ln.strip()]
     if nonempty and len(bullet_lines) >= 3 and len(bullet_lines) / len(nonempty) > 0.6:
         # Convert "- x" into "x" sentences
         paras = []
         for ln in nonempty:
-            m = re.match(r"^\s*-\s+(.*)$", ln)
+            m = _BULLET_LINE_RE.match(ln)
             if m:
                 item = m.group(1).strip()
                 paras.append(_ensure_terminal_punctuation(item))
@@ -73,8 +98,7 @@ def _debullet_if_not_requested(text: str, user_message: str) -> str:
 
 def _strip_overformatting(text: str) -> str:
     # Avoid repeated bolding of generic keywords
-    text = re.sub(r"\*\*(Important|Note|Warning|Tip|Summary)\*\*", r"\1", text)
-    return text
+    return _GENERIC_BOLD.apply(text)
 
 
 @dataclass
@@ -115,26 +139,14 @@ def _apply_tone(text: str, tone: str) -> str:
 
     if t == "formal":
         # Reduce contractions lightly and add a formal lead-in.
-        replacements = {
-            "can't": "cannot",
-            "won't": "will not",
-            "don't": "do not",
-            "isn't": "is not",
-            "aren't": "are not",
-            "I'm": "I am",
-            "you're": "you are",
-            "it's": "it is",
-        }
-        out = text
-        for k, v in replacements.items():
-            out = re.sub(rf"\b{re.escape(k)}\b", v, out)
+        out = _FORMAL_CONTRACTIONS.apply(text)
         if not out.lower().startswith(("certainly", "here is", "below is")):
             out = "Certainly.\n\n" + out
         return out
 
     if t == "critical":
         # Make it direct: remove softeners and add an action-oriented framing.
-        out = re.sub(r"\b(maybe|perhaps|might|could be|possibly)\b", "", text, flags=re.IGNORECASE)
+        out = _SOFTENERS.apply(text)
         out = _normalize_whitespace(out)
         if not out.lower().startswith(("direct answer", "bluntly")):
             out = "Bluntly:\n\n" + out
@@ -11,6 +11,11 @@ from urllib.parse import quote_plus
 
 from .trainx_image_map import TRAINX_IMAGE_MAP, TRAINX_ALIASES, resolve_subject_alias
 
+try:
+    from app_utils.cache_backend import get_cache_backend
+except ImportError:
+    get_cache_backend = None
+
 
 class ImageHandler:
     """
@@ -34,15 +39,18 @@ class ImageHandler:
         "csam", "abuse", "torture", "rape"
     }
     
-    def __init__(self, pexels_api_key: Optional[str] = None):
+    def __init__(self, pexels_api_key: Optional[str] = None, cache=None):
         """
         Initialize the image handler.
         
         Args:
             pexels_api_key: Optional Pexels API key for higher quality images
+            cache: Optional cache backend for resolved URLs (defaults to the shared "images" backend)
         """
         self.pexels_api_key = pexels_api_key
-        self._cache: Dict[str, str] = {}
+        if cache is None and get_cache_backend is not None:
+            cache = get_cache_backend("images", ttl=24 * 3600, max_entries=5000)
+        self._cache = cache
     
     def get_image(self, subject: str, size: str = "800x600", variant: Optional[str] = None) -> Tuple[str, str]:
         """
@@ -79,15 +87,17 @@ class ImageHandler:
         # Check cache (variant-aware so "another angle" actually changes)
         variant_key = (variant or "").strip()
         cache_key = f"{canonical}:{size}:{variant_key}"
-        if cache_key in self._cache:
-            return self._cache[cache_key], "cache"
+        cached_url = self._cache.get(cache_key) if self._cache is not None else None
+        if cached_url:
+            return cached_url, "cache"
         
         # Try sources in order (Pexels if key, then LoremFlickr seeded, then Picsum)
         for source in self.IMAGE_SOURCES:
             try:
                 url = self._get_from_source(source, canonical, size, variant_key=variant_key)
                 if url and self._validate_url(url):
-                    self._cache[cache_key] = url
+                    if self._cache is not None:
+                        self._cache.set(cache_key, url)
                     return url, source
             except Exception as e:
                 print(f"[ImageHandler] {source} failed for '{canonical}': {e}")
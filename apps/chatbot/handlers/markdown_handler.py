@@ -6,6 +6,25 @@ Handles conversion, validation, and enhancement of markdown content.
 import re
 from typing import Optional, List, Dict, Any
 
+_HEADER_NO_SPACE_RE = re.compile(r'^(#{1,6})([^#\s])', re.MULTILINE)
+_BULLET_NO_SPACE_RE = re.compile(r'^(\s*)[-*]([^\s])', re.MULTILINE)
+_NUMBER_NO_SPACE_RE = re.compile(r'^(\s*)(\d+)\.([^\s])', re.MULTILINE)
+_BARE_FENCE_RE = re.compile(r'```\n([^`])')
+_KEY_TERM_RE = re.compile(r'^([A-Z][^:\n]{2,30}):\s', re.MULTILINE)
+_LETTER_ITEM_RE = re.compile(r'^[a-zA-Z]\)\s')
+_DIGIT_ITEM_RE = re.compile(r'^\d\)\s')
+_CALL_RE = re.compile(r'`?([a-z_][a-z0-9_]*\([^)]*\))`?')
+
+EMPHASIS_WORDS = [
+    'important', 'note', 'warning', 'caution', 'tip',
+    'remember', 'key', 'essential', 'critical'
+]
+# All emphasis words in one pass; a word already in bold is left alone
+_EMPHASIS_RE = re.compile(
+    r'(?<!\*\*)\b(' + '|'.join(EMPHASIS_WORDS) + r')\b(?!\*\*)',
+    re.IGNORECASE
+)
+
 
 class MarkdownHandler:
     """
@@ -95,16 +114,20 @@ class MarkdownHandler:
     def _fix_common_issues(self, text: str) -> str:
         """Fix common markdown formatting issues."""
         # Fix headers without space after #
-        text = re.sub(r'^(#{1,6})([^#\s])', r'\1 \2', text, flags=re.MULTILINE)
+        if '#' in text:
+            text = _HEADER_NO_SPACE_RE.sub(r'\1 \2', text)
         
         # Fix lists without space after bullet
-        text = re.sub(r'^(\s*)[-*]([^\s])', r'\1- \2', text, flags=re.MULTILINE)
+        if '-' in text or '*' in text:
+            text = _BULLET_NO_SPACE_RE.sub(r'\1- \2', text)
         
         # Fix numbered lists without space after period
-        text = re.sub(r'^(\s*)(\d+)\.([^\s])', r'\1\2. \3', text, flags=re.MULTILINE)
+        if '.' in text:
+            text = _NUMBER_NO_SPACE_RE.sub(r'\1\2. \3', text)
         
         # Ensure code blocks have language hint if missing
-        text = re.sub(r'```\n([^`])', r'```text\n\1', text)
+        if '```' in text:
+            text = _BARE_FENCE_RE.sub(r'```text\n\1', text)
         
         return text
     
@@ -140,23 +163,11 @@ class MarkdownHandler:
     def _enhance_emphasis(self, text: str) -> str:
         """Add emphasis to important terms."""
         # Bold key terms that appear before colons
-        text = re.sub(
-            r'^([A-Z][^:\n]{2,30}):\s',
-            r'**\1**: ',
-            text,
-            flags=re.MULTILINE
-        )
+        if ':' in text:
+            text = _KEY_TERM_RE.sub(r'**\1**: ', text)
         
-        # Bold emphasis words
-        emphasis_words = [
-            'important', 'note', 'warning', 'caution', 'tip',
-            'remember', 'key', 'essential', 'critical'
-        ]
-        
-        for word in emphasis_words:
-            # Match word not already in bold
-            pattern = rf'(?<!\*\*)\b({word})\b(?!\*\*)'
-            text = re.sub(pattern, r'**\1**', text, flags=re.IGNORECASE)
+        # Bold emphasis words (not already in bold)
+        text = _EMPHASIS_RE.sub(r'**\1**', text)
         
         return text
     
@@ -170,9 +181,9 @@ class MarkdownHandler:
             
             # Convert text patterns to proper lists
             # Pattern: starts with letter/number followed by )
-            if re.match(r'^[a-zA-Z]\)\s', stripped):
+            if _LETTER_ITEM_RE.match(stripped):
                 result.append('- ' + stripped[3:])
-            elif re.match(r'^\d\)\s', stripped):
+            elif _DIGIT_ITEM_RE.match(stripped):
                 num = stripped[0]
                 result.append(f'{num}. ' + stripped[3:])
             else:
@@ -184,11 +195,8 @@ class MarkdownHandler:
         """Enhance code formatting."""
         # Wrap inline code-like content
         # Match function calls, variables, etc.
-        text = re.sub(
-            r'`?([a-z_][a-z0-9_]*\([^)]*\))`?',
-            r'`\1`',
-            text
-        )
+        if '(' in text:
+            text = _CALL_RE.sub(r'`\1`', text)
         
         return text
     
@@ -6,6 +6,36 @@ Provides utilities for formatting responses with headers, bold, lists, code bloc
 import re
 from typing import Optional, Dict, List, Any
 
+_LIST_ITEM_RE = re.compile(r'^(\d+[\.\)]\s|[-•*]\s)')
+_NUMBERED_ITEM_RE = re.compile(r'^(\d+)[\.\)]\s')
+_DASH_ITEM_RE = re.compile(r'^[-•]\s')
+_NUMBER_MARKER_RE = re.compile(r'^(\d+)[\)\.](?!\d)')
+_TERM_AFTER_COLON_RE = re.compile(r':\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)')
+_CODE_LINE_RE = re.compile(
+    r'^\s*(def |class |function |import |const |let |var |if\s*\(|for\s*\(|while\s*\(|\{|\}|return )'
+)
+_CODE_INDICATOR_RE = re.compile('|'.join([
+    r'function\s+\w+',
+    r'def\s+\w+',
+    r'class\s+\w+',
+    r'import\s+\w+',
+    r'const\s+\w+',
+    r'let\s+\w+',
+    r'var\s+\w+',
+    r'\{[\s\S]*\}',
+    r'return\s+',
+    r'if\s*\(',
+    r'for\s*\(',
+    r'while\s*\(',
+]))
+
+# Keywords to emphasize, matched case-insensitively in one pass
+BOLD_KEYWORDS = [
+    'important', 'note', 'warning', 'tip', 'remember',
+    'key', 'essential', 'critical', 'example', 'summary'
+]
+_BOLD_KEYWORD_RE = re.compile(r'\b(' + '|'.join(BOLD_KEYWORDS) + r')\b', re.IGNORECASE)
+
 
 class ResponseFormatter:
     """
@@ -101,11 +131,11 @@ class ResponseFormatter:
             stripped = line.strip()
             
             # Detect list patterns
-            if re.match(r'^(\d+[\.\)]\s|[-•*]\s)', stripped):
+            if _LIST_ITEM_RE.match(stripped):
                 in_list = True
                 # Normalize bullet points
-                stripped = re.sub(r'^(\d+)[\.\)]\s', r'\1. ', stripped)
-                stripped = re.sub(r'^[-•]\s', '- ', stripped)
+                stripped = _NUMBERED_ITEM_RE.sub(r'\1. ', stripped)
+                stripped = _DASH_ITEM_RE.sub('- ', stripped)
                 formatted.append(stripped)
             elif in_list and stripped and not stripped.endswith(':'):
                 # Continue as list item if indented
@@ -127,19 +157,12 @@ class ResponseFormatter:
     
     def _auto_bold_keywords(self, text: str) -> str:
         """Automatically bold important keywords and phrases."""
-        # Keywords to emphasize
-        keywords = [
-            'important', 'note', 'warning', 'tip', 'remember',
-            'key', 'essential', 'critical', 'example', 'summary'
-        ]
-        
-        for keyword in keywords:
-            # Case-insensitive match, preserve original case
-            pattern = rf'\b({keyword})\b'
-            text = re.sub(pattern, r'**\1**', text, flags=re.IGNORECASE)
+        # Case-insensitive match, preserve original case
+        text = _BOLD_KEYWORD_RE.sub(r'**\1**', text)
         
         # Bold phrases after ":" that look like key terms
-        text = re.sub(r':\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', r': **\1**', text)
+        if ':' in text:
+            text = _TERM_AFTER_COLON_RE.sub(r': **\1**', text)
         
         return text
     
@@ -152,8 +175,8 @@ class ResponseFormatter:
             stripped = line.strip()
             
             # Convert "1)" or "1." at start to proper numbered list
-            if re.match(r'^\d+[\)\.](?!\d)', stripped):
-                stripped = re.sub(r'^(\d+)[\)\.]', r'\1.', stripped)
+            if _NUMBER_MARKER_RE.match(stripped):
+                stripped = _NUMBER_MARKER_RE.sub(r'\1.', stripped)
             
             # Convert "- " style bullets
             if stripped.startswith('- ') or stripped.startswith('* '):
@@ -189,25 +212,7 @@ class ResponseFormatter:
     
     def _contains_code(self, text: str) -> bool:
         """Check if text contains code-like content."""
-        code_indicators = [
-            r'function\s+\w+',
-            r'def\s+\w+',
-            r'class\s+\w+',
-            r'import\s+\w+',
-            r'const\s+\w+',
-            r'let\s+\w+',
-            r'var\s+\w+',
-            r'\{[\s\S]*\}',
-            r'return\s+',
-            r'if\s*\(',
-            r'for\s*\(',
-            r'while\s*\(',
-        ]
-        
-        for pattern in code_indicators:
-            if re.search(pattern, text):
-                return True
-        return False
+        return _CODE_INDICATOR_RE.search(text) is not None
     
     def _auto_wrap_code(self, text: str) -> str:
         """Wrap detected code blocks in markdown code fences."""
@@ -218,10 +223,7 @@ class ResponseFormatter:
         code_block = []
         
         for line in lines:
-            looks_like_code = bool(re.match(
-                r'^\s*(def |class |function |import |const |let |var |if\s*\(|for\s*\(|while\s*\(|\{|\}|return )',
-                line
-            ))
+            looks_like_code = bool(_CODE_LINE_RE.match(line))
             
             if looks_like_code:
                 if not in_code:
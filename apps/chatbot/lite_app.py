@@ -82,6 +82,7 @@ except Exception as e:
     def get_research_engine_lite(*args, **kwargs):
         class FallbackEngine:
             def search(self, query, max_results=5): return []
+            def search_with_info(self, query, max_results=5): return [], {}
         return FallbackEngine()
 UI_TEMPLATE_DIR = BASE_DIR / "ui" / "templates"
 UI_STATIC_DIR = BASE_DIR / "ui" / "static"
@@ -387,7 +388,7 @@ def chat():
 
     # Multi-engine research + lite synthesis
     engine = get_research_engine_lite()
-    knowledge = engine.search(message, max_results=5)
+    knowledge, research_cache = engine.search_with_info(message, max_results=5)
 
     if gem_config:
         knowledge = _gem_sources_to_knowledge(gem_config) + knowledge
@@ -417,7 +418,7 @@ def chat():
     )
     refined = verify_response_accuracy(refined, knowledge, query=message)
 
-    return jsonify({'response': refined, 'chat_id': None, 'task': 'text_generation'})
+    return jsonify({'response': refined, 'chat_id': None, 'task': 'text_generation', 'research_cache': research_cache})
 
 
 @app.route('/api/chats', methods=['GET'])
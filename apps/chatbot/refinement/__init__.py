@@ -6,6 +6,7 @@ documented so it is easy to reason about and adjust without feature flags.
 
 Pipeline stages:
 1) question_normalizer  - Normalize/clean queries and extract light signals
+   (message_analysis wraps it: one MessageAnalysis per message, shared by all stages)
 2) intent_router        - Add routing hints to the analyzer output
 3) knowledge_reranker   - Score, diversify, and order knowledge candidates
 4) clarifier            - Prompt the user when confidence is low
@@ -17,6 +18,7 @@ Everything is enabled by default; there are no toggles.
 from typing import Dict, Any, Callable, List
 
 from .question_normalizer import get_question_normalizer  # noqa: F401
+from .message_analysis import MessageAnalysis, analyze_message  # noqa: F401
 from .intent_router import get_intent_router  # noqa: F401
 from .knowledge_reranker import get_knowledge_reranker  # noqa: F401
 from .answer_refiner import get_answer_refiner  # noqa: F401
@@ -65,6 +65,10 @@ _TECHNICAL_TERM_RE = re.compile(
     re.VERBOSE,
 )
 
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_BLOB_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
+
 
 def _extract_claims_from_text(text: str) -> Dict[str, List[str]]:
     """Extract different types of claims from text for verification."""
@@ -76,7 +80,7 @@ def _extract_claims_from_text(text: str) -> Dict[str, List[str]]:
         'causal_relationships': []
     }
 
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    sentences = _SENTENCE_SPLIT_RE.split(text.strip())
 
     for sentence in sentences:
         # Extract numeric claims
@@ -123,6 +127,7 @@ def _verify_claims_in_knowledge(claims: Dict[str, List[str]], knowledge_items: L
         blob_parts.extend([content, title])
 
     knowledge_blob = " ".join(blob_parts)
+    numbers_in_blob = None  # scanned on the first numeric claim that needs it
 
     verification_results = {}
 
@@ -147,9 +152,10 @@ def _verify_claims_in_knowledge(claims: Dict[str, List[str]], knowledge_items: L
                 if not supported:
                     # Check for similar numbers (e.g., 2023 vs 2024)
                     try:
-                        claim_num = float(re.sub(r'[,%]', '', claim))
+                        claim_num = float(claim.replace(',', '').replace('%', ''))
                         # Look for numbers within 10% range
-                        numbers_in_blob = re.findall(r'\b\d+(?:\.\d+)?\b', knowledge_blob)
+                        if numbers_in_blob is None:
+                            numbers_in_blob = _BLOB_NUMBER_RE.findall(knowledge_blob)
                         for num_str in numbers_in_blob:
                             try:
                                 blob_num = float(num_str)
@@ -167,7 +173,7 @@ def _verify_claims_in_knowledge(claims: Dict[str, List[str]], knowledge_items: L
                 supported = claim_lower in knowledge_blob
                 if not supported:
                     # Check year-only matches for full dates
-                    year_match = re.search(r'\b(\d{4})\b', claim)
+                    year_match = _YEAR_RE.search(claim)
                     if year_match:
                         year = year_match.group(1)
                         if year in knowledge_blob:
@@ -18,26 +18,54 @@ from typing import Dict, List, Optional
 import re
 
 from services.response_cleaner import ResponseCleaner
+from services.text_rules import Rule
 
 # Local wrapper to reuse the ResponseCleaner instance
 _response_cleaner = ResponseCleaner()
 
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_CLAUSE_SPLIT_RE = re.compile(r"(?<=[.;])\s+")
+_WORD_RE = re.compile(r"[A-Za-z0-9']+")
+_CODE_BLOCK_RE = re.compile(r"```.*?```", re.DOTALL)
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STEP_SPLIT_RE = re.compile(r"(first|then|next|after|finally|step \d+)", re.IGNORECASE)
+
+_BLANK_LINES = Rule(r"\n{3,}", "\n\n", when="\n\n\n")
+_STRAY_BULLETS = Rule(r"(?m)^\s*-\s*$", "", when="-")
+_SENTENCE_SPACING = Rule(r"([a-z0-9])([A-Z])", r"\1. \2")
+_FORMAL_TONE = (
+    Rule(r"\bI think\b", "It appears", re.IGNORECASE),
+    Rule(r"\bprobably\b", "likely", re.IGNORECASE),
+)
+
+# (affirmative, negated) phrasings that flag a possible contradiction between sentences
+_CONTRADICTION_PAIRS = [
+    (re.compile(pos), re.compile(neg)) for pos, neg in [
+        (r'\bis\b', r'\bis not\b'),
+        (r'\bcan\b', r'\bcannot\b'),
+        (r'\bdoes\b', r'\bdoes not\b'),
+        (r'\bhas\b', r'\bdoes not have\b'),
+        (r'\bworks\b', r'\bdoes not work\b'),
+        (r'\bsupports\b', r'\bdoes not support\b'),
+    ]
+]
+
 
 def _clean_response_text(text: str) -> str:
     return _response_cleaner.clean_response(text)
 
 
 def _squash_blank_lines(text: str) -> str:
-    return re.sub(r"\n{3,}", "\n\n", text or "").strip()
+    return _BLANK_LINES.apply(text or "").strip()
 
 
 def _trim_bullets(text: str) -> str:
     # Avoid stray hyphens without text
-    return re.sub(r"(?m)^\s*-\s*$", "", text)
+    return _STRAY_BULLETS.apply(text)
 
 
 def _ensure_sentence_spacing(text: str) -> str:
-    return re.sub(r"([a-z0-9])([A-Z])", r"\1. \2", text)
+    return _SENTENCE_SPACING.apply(text)
 
 
 def _truncate(text: str, limit: int = 2400) -> str:
@@ -59,7 +87,9 @@ def _format_sources(knowledge_used: List[Dict], limit: int = 3) -> Optional[str]
 
 
 def _shorten_code_blocks(text: str, max_lines: int = 40) -> str:
-    blocks = re.findall(r"```.*?```", text, flags=re.DOTALL)
+    if "```" not in text:
+        return text
+    blocks = _CODE_BLOCK_RE.findall(text)
     for block in blocks:
         lines = block.splitlines()
         if len(lines) > max_lines:
@@ -118,7 +148,7 @@ def _render_sections(sections: List[str]) -> str:
 
 
 def _short_title_from_text(text: str) -> str:
-    words = re.findall(r"[A-Za-z0-9']+", text)
+    words = _WORD_RE.findall(text)
     if not words:
         return "Summary"
     short = words[:3]
@@ -137,9 +167,10 @@ def _apply_rich_formatting(answer: str, hints: Dict) -> str:
     if text.startswith("#"):
         return text  # already formatted
 
-    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+    sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
     if not sentences:
         return text
+    lower = text.lower()
 
     # Enhanced structure detection
     wants_structure = bool(
@@ -147,7 +178,7 @@ def _apply_rich_formatting(answer: str, hints: Dict) -> str:
         hints.get("wants_structure") or
         len(sentences) > 8 or  # Long answers benefit from structure
         len(text) > 600 or     # Long text needs organization
-        any(keyword in text.lower() for keyword in [
+        any(keyword in lower for keyword in [
             'steps', 'process', 'guide', 'tutorial', 'how to',
             'comparison', 'versus', 'vs', 'differences', 'alternatives'
         ])
@@ -166,10 +197,10 @@ def _apply_rich_formatting(answer: str, hints: Dict) -> str:
     title = _short_title_from_text(title)
 
     # Enhanced content analysis for better structuring
-    has_steps = any(word in text.lower() for word in ['first', 'then', 'next', 'after', 'finally', 'step'])
-    has_comparison = any(word in text.lower() for word in ['versus', 'vs', 'compared to', 'unlike', 'whereas', 'better than', 'worse than'])
+    has_steps = any(word in lower for word in ['first', 'then', 'next', 'after', 'finally', 'step'])
+    has_comparison = any(word in lower for word in ['versus', 'vs', 'compared to', 'unlike', 'whereas', 'better than', 'worse than'])
     has_list = '\n-' in text or '\n*' in text or '•' in text
-    has_examples = any(word in text.lower() for word in ['example', 'for instance', 'such as', 'like'])
+    has_examples = any(word in lower for word in ['example', 'for instance', 'such as', 'like'])
 
     intro = sentences[0]
     remaining_sentences = sentences[1:]
@@ -222,13 +253,13 @@ def _add_structuring(answer: str, hints: Dict) -> str:
     """Light formatting when the user likely wants lists/steps."""
     lower = answer.lower()
     if hints.get("asks_for_steps") and " - " not in answer and "1." not in answer:
-        parts = [p.strip() for p in re.split(r"(?<=[.;])\s+", answer) if len(p.strip()) > 0]
+        parts = [p.strip() for p in _CLAUSE_SPLIT_RE.split(answer) if len(p.strip()) > 0]
         if len(parts) >= 3:
             bullets = "\n".join(f"- {p}" for p in parts)
             return bullets
     if hints.get("allow_bullets") and " - " not in answer and "\n-" not in answer:
         # Only convert to bullets when the text is long enough and has multiple sentences
-        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", answer) if s.strip()]
+        sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(answer) if s.strip()]
         if len(sentences) >= 3 and len(answer) > 220:
             return "\n".join(f"- {s}" for s in sentences)
     return answer
@@ -237,27 +268,28 @@ def _add_structuring(answer: str, hints: Dict) -> str:
 def _detect_contradictions(text: str) -> List[Dict]:
     """Detect potential contradictory statements in the text."""
     contradictions = []
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-
-    # Common contradiction patterns
-    contradiction_pairs = [
-        (r'\bis\b', r'\bis not\b'),
-        (r'\bcan\b', r'\bcannot\b'),
-        (r'\bdoes\b', r'\bdoes not\b'),
-        (r'\bhas\b', r'\bdoes not have\b'),
-        (r'\bworks\b', r'\bdoes not work\b'),
-        (r'\bsupports\b', r'\bdoes not support\b'),
-    ]
+    sentences = _SENTENCE_SPLIT_RE.split(text.strip())
+
+    # Every sentence is scanned once; the pairwise pass below only compares the results
+    features = []
+    for sentence in sentences:
+        lower = sentence.lower()
+        features.append((
+            [pos.search(lower) is not None for pos, _ in _CONTRADICTION_PAIRS],
+            [neg.search(lower) is not None for _, neg in _CONTRADICTION_PAIRS],
+            _NUMBER_RE.findall(lower),
+            set(lower.split()),
+        ))
 
     for i, sentence1 in enumerate(sentences):
-        for j, sentence2 in enumerate(sentences[i+1:], i+1):
-            s1_lower = sentence1.lower()
-            s2_lower = sentence2.lower()
+        pos1, neg1, s1_nums, s1_words = features[i]
+        for j in range(i + 1, len(sentences)):
+            sentence2 = sentences[j]
+            pos2, neg2, s2_nums, s2_words = features[j]
 
             # Check for direct contradictions
-            for pos_pattern, neg_pattern in contradiction_pairs:
-                if (re.search(pos_pattern, s1_lower) and re.search(neg_pattern, s2_lower)) or \
-                   (re.search(neg_pattern, s1_lower) and re.search(pos_pattern, s2_lower)):
+            for k in range(len(_CONTRADICTION_PAIRS)):
+                if (pos1[k] and neg2[k]) or (neg1[k] and pos2[k]):
                     contradictions.append({
                         'sentence1': sentence1.strip(),
                         'sentence2': sentence2.strip(),
@@ -265,12 +297,8 @@ def _detect_contradictions(text: str) -> List[Dict]:
                     })
 
             # Check for conflicting numbers/dates
-            s1_nums = re.findall(r'\b\d+\b', s1_lower)
-            s2_nums = re.findall(r'\b\d+\b', s2_lower)
             if s1_nums and s2_nums and s1_nums != s2_nums:
                 # Check if they're talking about the same topic
-                s1_words = set(s1_lower.split())
-                s2_words = set(s2_lower.split())
                 if len(s1_words & s2_words) >= 2:  # Significant word overlap
                     contradictions.append({
                         'sentence1': sentence1.strip(),
@@ -296,18 +324,19 @@ def _fix_contradictions(text: str, contradictions: List[Dict]) -> str:
 def _improve_answer_flow(text: str, hints: Dict) -> str:
     """Improve the logical flow and structure of complex answers."""
     # Detect if this is a complex multi-part answer
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    sentences = _SENTENCE_SPLIT_RE.split(text.strip())
     if len(sentences) < 4:
         return text  # Keep simple answers as-is
 
     # Check for different answer types that benefit from better structure
-    has_steps = any(word in text.lower() for word in ['first', 'then', 'next', 'after', 'finally', 'step'])
-    has_comparison = any(word in text.lower() for word in ['versus', 'vs', 'compared to', 'unlike', 'whereas'])
+    lower = text.lower()
+    has_steps = any(word in lower for word in ['first', 'then', 'next', 'after', 'finally', 'step'])
+    has_comparison = any(word in lower for word in ['versus', 'vs', 'compared to', 'unlike', 'whereas'])
     has_list = '\n-' in text or '\n*' in text
 
     if has_steps and not has_list:
         # Convert step-based content to numbered list
-        parts = re.split(r'(first|then|next|after|finally|step \d+)', text, flags=re.IGNORECASE)
+        parts = _STEP_SPLIT_RE.split(text)
         if len(parts) > 3:
             structured = []
             current_step = []
@@ -327,7 +356,7 @@ def _improve_answer_flow(text: str, hints: Dict) -> str:
 
     elif has_comparison and not has_list:
         # Add section headers for comparison content
-        if ' vs ' in text.lower() or ' versus ' in text.lower():
+        if ' vs ' in lower or ' versus ' in lower:
             return text  # Already has comparison structure
         elif len(sentences) > 5:
             # Split into pros/cons or alternative sections if applicable
@@ -344,8 +373,8 @@ def _enhance_tone_consistency(text: str, hints: Dict) -> str:
     # Simple tone adjustments (more sophisticated tone control could be added)
     if requested_tone == 'formal':
         # Ensure more formal language
-        text = re.sub(r'\bI think\b', 'It appears', text, flags=re.IGNORECASE)
-        text = re.sub(r'\bprobably\b', 'likely', text, flags=re.IGNORECASE)
+        for rule in _FORMAL_TONE:
+            text = rule.apply(text)
     elif requested_tone == 'friendly':
         # Add warmth where appropriate
         if not text.startswith(('Hi', 'Hello', 'Hey')) and len(text.split()) > 10:
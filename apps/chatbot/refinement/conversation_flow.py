@@ -16,6 +16,29 @@ import re
 import time
 from collections import defaultdict, deque
 
+from services.keyword_matcher import KeywordMatcher
+
+from .message_analysis import MessageAnalysis
+
+_RESUMPTION_LEXICON = KeywordMatcher([
+    'going back to', 'as i was saying', 'anyway', 'so anyway',
+    'where was i', 'continuing', 'back to'
+])
+_REFERENCE_LEXICON = KeywordMatcher(['that', 'it', 'this', 'those'])
+_FOLLOW_UP_LEXICON = KeywordMatcher([
+    'that', 'it', 'this', 'those', 'them', 'there',
+    'what about', 'tell me more', 'and', 'also', 'so'
+])
+_EMOTIONAL_INDICATORS = {
+    'frustrated': ['frustrated', 'annoying', 'stuck', 'problem', 'issue', 'not working'],
+    'excited': ['excited', 'amazing', 'fantastic', 'awesome', 'thrilled', 'great'],
+    'confused': ['confused', 'lost', 'not sure', 'unclear', 'bewildered', 'huh'],
+    'tired': ['tired', 'exhausted', 'drained', 'long day', 'worn out'],
+    'satisfied': ['good', 'nice', 'cool', 'awesome', 'helpful', 'useful', 'great'],
+    'curious': ['interesting', 'wonder', 'curious', 'fascinating', 'want to know']
+}
+_EMOTION_LEXICON = KeywordMatcher(_EMOTIONAL_INDICATORS)
+
 
 class ConversationFlowManager:
     """
@@ -88,6 +111,7 @@ class ConversationFlowManager:
                 'match', 'tournament', 'championship', 'fitness', 'exercise'
             ]
         }
+        self._topic_matcher = KeywordMatcher(self.topic_categories)
 
         # Transition phrases for smooth topic changes
         self.transition_phrases = {
@@ -116,7 +140,8 @@ class ConversationFlowManager:
             key_parts.append(user_id)
         return '|'.join(key_parts)
 
-    def update_conversation_context(self, conversation_key: str, user_message: str, assistant_message: str = None):
+    def update_conversation_context(self, conversation_key: str, user_message: str, assistant_message: str = None,
+                                    analysis: Optional[MessageAnalysis] = None):
         """
         Update conversation context with new messages.
 
@@ -124,6 +149,7 @@ class ConversationFlowManager:
             conversation_key: Unique conversation identifier
             user_message: The user's message
             assistant_message: The assistant's response (optional)
+            analysis: Shared MessageAnalysis of user_message (optional)
         """
         if conversation_key not in self.conversation_memory:
             self.conversation_memory[conversation_key] = {
@@ -142,7 +168,7 @@ class ConversationFlowManager:
             'timestamp': time.time(),
             'user_message': user_message,
             'assistant_message': assistant_message,
-            'detected_topics': self._detect_topics(user_message),
+            'detected_topics': self._detect_topics(user_message, analysis),
             'turn_number': len(memory['turns']) + 1
         }
 
@@ -188,17 +214,17 @@ class ConversationFlowManager:
                 }
                 memory['conversation_flow'].append(transition)
 
-    def _detect_topics(self, message: str) -> Set[str]:
+    def _detect_topics(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Set[str]:
         """Detect topics present in a message."""
-        message_lower = message.lower()
-        detected_topics = set()
+        if analysis is not None:
+            message_lower = analysis.lower
+            hits = analysis.hits(self._topic_matcher)
+        else:
+            message_lower = message.lower()
+            hits = self._topic_matcher.find(message_lower)
 
-        # Check each topic category
-        for category, keywords in self.topic_categories.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    detected_topics.add(category)
-                    break  # Only add category once
+        # Every topic category with at least one keyword in the message
+        detected_topics = set(hits.labels)
 
         # Check for specific named entities (simplified)
         # In a full implementation, this would use NER
@@ -312,7 +338,8 @@ class ConversationFlowManager:
 
         return (topic1, topic2) in related_pairs or (topic2, topic1) in related_pairs
 
-    def detect_interruption(self, conversation_key: str, user_message: str) -> Optional[Dict]:
+    def detect_interruption(self, conversation_key: str, user_message: str,
+                            analysis: Optional[MessageAnalysis] = None) -> Optional[Dict]:
         """
         Detect if the user message indicates an interruption or change of direction.
 
@@ -321,7 +348,7 @@ class ConversationFlowManager:
         if conversation_key not in self.conversation_memory:
             return None
 
-        message_lower = user_message.lower()
+        message_lower = analysis.lower if analysis is not None else user_message.lower()
 
         # Interruption indicators
         interruption_patterns = [
@@ -345,7 +372,7 @@ class ConversationFlowManager:
         # Sudden topic changes
         memory = self.conversation_memory[conversation_key]
         current_topics = memory['current_topics']
-        message_topics = self._detect_topics(user_message)
+        message_topics = self._detect_topics(user_message, analysis)
 
         if current_topics and message_topics and not current_topics.intersection(message_topics):
             # Check if this is a natural transition or abrupt change
@@ -359,7 +386,8 @@ class ConversationFlowManager:
 
         return None
 
-    def handle_resumption(self, conversation_key: str, user_message: str) -> Optional[str]:
+    def handle_resumption(self, conversation_key: str, user_message: str,
+                          analysis: Optional[MessageAnalysis] = None) -> Optional[str]:
         """
         Handle conversation resumption after interruption.
 
@@ -370,23 +398,20 @@ class ConversationFlowManager:
             return None
 
         # Check if user is resuming a previous topic
-        message_lower = user_message.lower()
-        resumption_indicators = [
-            'going back to', 'as i was saying', 'anyway', 'so anyway',
-            'where was i', 'continuing', 'back to'
-        ]
-
-        for indicator in resumption_indicators:
-            if indicator in message_lower:
-                return "Yes, let's continue with that."
+        if analysis is not None:
+            resuming = bool(analysis.hits(_RESUMPTION_LEXICON))
+            referencing = bool(analysis.hits(_REFERENCE_LEXICON))
+        else:
+            resuming = _RESUMPTION_LEXICON.search(user_message)
+            referencing = _REFERENCE_LEXICON.search(user_message)
+        if resuming:
+            return "Yes, let's continue with that."
 
         # Check if user is referring to previous context
         recent_turns = list(memory['turns'])[-3:]  # Last 3 turns
-        for turn in recent_turns:
-            if turn['assistant_message']:
-                # Simple check for references to previous response
-                if any(word in message_lower for word in ['that', 'it', 'this', 'those']):
-                    return "Glad you want to continue with that."
+        if referencing and any(turn['assistant_message'] for turn in recent_turns):
+            # Simple check for references to previous response
+            return "Glad you want to continue with that."
 
         return None
 
@@ -527,23 +552,12 @@ class ConversationFlowManager:
         if not recent_turns:
             return 'neutral'
 
-        emotional_indicators = {
-            'frustrated': ['frustrated', 'annoying', 'stuck', 'problem', 'issue', 'not working'],
-            'excited': ['excited', 'amazing', 'fantastic', 'awesome', 'thrilled', 'great'],
-            'confused': ['confused', 'lost', 'not sure', 'unclear', 'bewildered', 'huh'],
-            'tired': ['tired', 'exhausted', 'drained', 'long day', 'worn out'],
-            'satisfied': ['good', 'nice', 'cool', 'awesome', 'helpful', 'useful', 'great'],
-            'curious': ['interesting', 'wonder', 'curious', 'fascinating', 'want to know']
-        }
-
-        emotional_scores = {emotion: 0 for emotion in emotional_indicators.keys()}
+        emotional_scores = {emotion: 0 for emotion in _EMOTIONAL_INDICATORS}
 
         for turn in recent_turns:
-            message = turn.get('user_message', '').lower()
-            for emotion, indicators in emotional_indicators.items():
-                for indicator in indicators:
-                    if indicator in message:
-                        emotional_scores[emotion] += 1
+            hits = _EMOTION_LEXICON.find(turn.get('user_message', ''))
+            for emotion in hits.labels:
+                emotional_scores[emotion] += hits.count(emotion)
 
         # Return the emotion with the highest score, or neutral if none detected
         if max(emotional_scores.values()) > 0:
@@ -596,13 +610,7 @@ class ConversationFlowManager:
         if not turns:
             return False
 
-        message_lower = current_message.lower()
-        follow_up_indicators = [
-            'that', 'it', 'this', 'those', 'them', 'there',
-            'what about', 'tell me more', 'and', 'also', 'so'
-        ]
-
-        has_referential_words = any(indicator in message_lower for indicator in follow_up_indicators)
+        has_referential_words = _FOLLOW_UP_LEXICON.search(current_message)
         short_message = len(current_message.split()) <= 5
 
         return has_referential_words and short_message
@@ -15,6 +15,8 @@ from __future__ import annotations
 from typing import Dict, List, Optional, Tuple, Set
 import re
 
+from .message_analysis import MessageAnalysis
+
 
 class ConversationalContextAnalyzer:
     """Analyzes conversational context to understand user intent and maintain dialogue flow."""
@@ -135,7 +137,8 @@ class ConversationalContextAnalyzer:
         self,
         user_message: str,
         conversation_context: List[Dict],
-        normalized_message: Optional[str] = None
+        normalized_message: Optional[str] = None,
+        analysis: Optional[MessageAnalysis] = None
     ) -> Dict:
         """
         Comprehensive analysis of conversational context.
@@ -153,8 +156,12 @@ class ConversationalContextAnalyzer:
         if not user_message or not user_message.strip():
             return self._default_analysis()
         
-        user_lower = (normalized_message or user_message).lower().strip()
-        words = user_lower.split()
+        if analysis is not None and normalized_message == analysis.normalized_query:
+            user_lower = analysis.text
+            words = list(analysis.text_words)
+        else:
+            user_lower = (normalized_message or user_message).lower().strip()
+            words = user_lower.split()
         word_count = len(words)
         
         result = {
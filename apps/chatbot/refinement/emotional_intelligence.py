@@ -15,6 +15,29 @@ from typing import Dict, List, Optional, Tuple, Set
 import re
 import random
 
+from services.keyword_matcher import KeywordMatcher
+
+from .message_analysis import MessageAnalysis
+
+_DISTRESS_WORDS = KeywordMatcher(['help', 'please', 'urgent', 'emergency', 'crisis', 'problem'])
+_ACHIEVEMENT_INDICATORS = KeywordMatcher([
+    'finally worked', 'got it working', 'solved it', 'figured it out',
+    'completed', 'finished', 'done', 'success', 'victory', 'won',
+    'accomplished', 'achieved', 'made it', 'succeeded'
+])
+_MOTIVATION_INDICATORS = KeywordMatcher([
+    'can\'t do this', 'too hard', 'giving up', 'want to quit',
+    'not sure', 'doubt', 'struggling', 'difficult', 'challenging',
+    'overwhelmed', 'stuck', 'lost', 'confused about'
+])
+_SUPPORTIVE_WORDS = KeywordMatcher(['help', 'support', 'assist', 'together'])
+
+
+def _lexicon_search(matcher: KeywordMatcher, message: str, analysis: Optional[MessageAnalysis]) -> bool:
+    if analysis is not None:
+        return bool(analysis.hits(matcher))
+    return matcher.search(message)
+
 
 class EmotionalIntelligence:
     """
@@ -119,6 +142,14 @@ class EmotionalIntelligence:
             }
         }
 
+        # Every emotion word above, matched in one pass per message
+        self._emotion_matcher = KeywordMatcher([
+            word
+            for patterns in self.emotion_patterns.values()
+            for group in ('keywords', 'intensifiers', 'context_words')
+            for word in patterns[group]
+        ])
+
         # Empathetic response templates organized by emotion
         self.empathy_responses = {
             'joy': [
@@ -239,14 +270,19 @@ class EmotionalIntelligence:
             "This challenge doesn't define you - your response to it does. You've got this!"
         ]
 
-    def detect_emotion(self, message: str) -> Tuple[str, float, Dict]:
+    def detect_emotion(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Tuple[str, float, Dict]:
         """
         Detect the primary emotion in a message.
 
         Returns:
             Tuple of (emotion_name, confidence_score, emotion_details)
         """
-        message_lower = message.lower().strip()
+        if analysis is not None:
+            hits = analysis.hits(self._emotion_matcher)
+        else:
+            hits = self._emotion_matcher.find(message)
+        exclaims = '!' in message
+        question_marks = message.count('?')
 
         # Count emotion indicators
         emotion_scores = {}
@@ -257,31 +293,31 @@ class EmotionalIntelligence:
 
             # Check keywords
             for keyword in patterns['keywords']:
-                if keyword in message_lower:
+                if keyword in hits:
                     score += 2  # Keywords are strong indicators
                     matches.append(keyword)
 
             # Check intensifiers that modify emotions
             for intensifier in patterns['intensifiers']:
-                if intensifier in message_lower:
+                if intensifier in hits:
                     # Check if intensifier appears near emotion words
                     for keyword in patterns['keywords']:
-                        if abs(message_lower.find(keyword) - message_lower.find(intensifier)) < 20:
+                        if keyword in hits and abs(hits.position(keyword) - hits.position(intensifier)) < 20:
                             score += 1
                             break
 
             # Check context words
             for context_word in patterns['context_words']:
-                if context_word in message_lower:
+                if context_word in hits:
                     score += 1
                     matches.append(context_word)
 
             # Check for exclamation marks (intensity indicator)
-            if '!' in message:
+            if exclaims:
                 score += 0.5
 
             # Check for multiple question marks (confusion indicator)
-            if message.count('?') > 1:
+            if question_marks > 1:
                 if emotion == 'confusion':
                     score += 1
 
@@ -299,7 +335,8 @@ class EmotionalIntelligence:
 
         return 'neutral', 0.0, {'score': 0, 'matches': []}
 
-    def should_respond_empathically(self, message: str, emotion: str, confidence: float) -> bool:
+    def should_respond_empathically(self, message: str, emotion: str, confidence: float,
+                                    analysis: Optional[MessageAnalysis] = None) -> bool:
         """
         Determine if an empathetic response is appropriate.
 
@@ -315,8 +352,7 @@ class EmotionalIntelligence:
             return True
 
         # Check for distress signals
-        distress_words = ['help', 'please', 'urgent', 'emergency', 'crisis', 'problem']
-        if any(word in message.lower() for word in distress_words):
+        if _lexicon_search(_DISTRESS_WORDS, message, analysis):
             return True
 
         return False
@@ -335,38 +371,24 @@ class EmotionalIntelligence:
 
         return None
 
-    def generate_celebration_response(self, message: str) -> Optional[str]:
+    def generate_celebration_response(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Optional[str]:
         """
         Generate a celebration response for achievements.
 
         Returns None if no celebration is warranted.
         """
-        achievement_indicators = [
-            'finally worked', 'got it working', 'solved it', 'figured it out',
-            'completed', 'finished', 'done', 'success', 'victory', 'won',
-            'accomplished', 'achieved', 'made it', 'succeeded'
-        ]
-
-        message_lower = message.lower()
-        if any(indicator in message_lower for indicator in achievement_indicators):
+        if _lexicon_search(_ACHIEVEMENT_INDICATORS, message, analysis):
             return random.choice(self.celebration_responses)
 
         return None
 
-    def generate_encouragement_response(self, message: str) -> Optional[str]:
+    def generate_encouragement_response(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Optional[str]:
         """
         Generate an encouraging response for motivation.
 
         Returns None if no encouragement is needed.
         """
-        motivation_indicators = [
-            'can\'t do this', 'too hard', 'giving up', 'want to quit',
-            'not sure', 'doubt', 'struggling', 'difficult', 'challenging',
-            'overwhelmed', 'stuck', 'lost', 'confused about'
-        ]
-
-        message_lower = message.lower()
-        if any(indicator in message_lower for indicator in motivation_indicators):
+        if _lexicon_search(_MOTIVATION_INDICATORS, message, analysis):
             return random.choice(self.encouragement_responses)
 
         return None
@@ -422,7 +444,7 @@ class EmotionalIntelligence:
             # Apply tone adjustments (simplified version)
             if adjustments.get('be_supportive'):
                 # Add supportive language if not already present
-                if not any(word in base_response.lower() for word in ['help', 'support', 'assist', 'together']):
+                if not _SUPPORTIVE_WORDS.search(base_response):
                     base_response = "I'm here to help. " + base_response
 
             if adjustments.get('be_patient') and len(user_message.split()) > 10:
@@ -432,21 +454,21 @@ class EmotionalIntelligence:
 
         return base_response
 
-    def get_emotional_context(self, message: str) -> Dict:
+    def get_emotional_context(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Dict:
         """
         Get comprehensive emotional context for a message.
 
         Returns detailed emotional analysis.
         """
-        emotion, confidence, details = self.detect_emotion(message)
+        emotion, confidence, details = self.detect_emotion(message, analysis)
 
         return {
             'primary_emotion': emotion,
             'confidence': confidence,
             'emotion_details': details,
-            'needs_empathy': self.should_respond_empathically(message, emotion, confidence),
-            'needs_celebration': self.generate_celebration_response(message) is not None,
-            'needs_encouragement': self.generate_encouragement_response(message) is not None,
+            'needs_empathy': self.should_respond_empathically(message, emotion, confidence, analysis),
+            'needs_celebration': self.generate_celebration_response(message, analysis) is not None,
+            'needs_encouragement': self.generate_encouragement_response(message, analysis) is not None,
             'tone_suggestions': self._get_tone_suggestions(emotion, confidence)
         }
 
@@ -13,78 +13,38 @@ without toggles. All defaults are on.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 import re
 
+from services.keyword_matcher import KeywordMatcher, LexiconHits
+
 
 def _has_code_signals(text: str) -> bool:
     return any(sig in text for sig in ["```", "def ", "class ", "console.log", "import ", "function "])
 
 
-def _detect_transactional(text: str) -> bool:
-    transactional_terms = [
+# Keyword lexicon for every _detect_* helper below. It is compiled once into a
+# single matcher, and each query is scanned once (cached) whichever helpers ask.
+_ROUTER_LEXICON = KeywordMatcher({
+    "transactional": [
         "buy", "purchase", "price", "cost", "order", "book", "reserve", "subscription", "license",
         "how much", "discount", "deal", "plan", "pricing", "checkout",
-    ]
-    lower = text.lower()
-    return any(term in lower for term in transactional_terms)
-
-
-def _detect_troubleshooting(text: str) -> bool:
-    lower = text.lower()
-    indicators = ["error", "exception", "stack trace", "traceback", "bug", "issue", "failed", "crash"]
-    return any(ind in lower for ind in indicators)
-
-
-def _detect_sensitive(text: str) -> bool:
-    lower = text.lower()
-    sensitive_terms = [
+    ],
+    "troubleshooting": ["error", "exception", "stack trace", "traceback", "bug", "issue", "failed", "crash"],
+    "sensitive": [
         "password", "token", "secret", "apikey", "api key", "credit card", "ssn",
         "social security", "private key", "mnemonic", "seed phrase",
-    ]
-    return any(term in lower for term in sensitive_terms)
-
-
-def _detect_multi_question(text: str) -> bool:
-    return bool(re.search(r"\?\s+\w+", text)) or text.count("?") > 1
-
-
-def _detect_relationship(text: str) -> bool:
-    lower = text.lower()
-    phrases = ["relationship between", "difference between", "vs", "versus", "compare", "comparison"]
-    return any(p in lower for p in phrases)
-
-
-def _detect_list_request(text: str) -> bool:
-    lower = text.lower()
-    phrases = ["list ", "top ", "best ", "examples", "ideas", "suggestions", "options"]
-    return any(lower.startswith(p) or f" {p}" in lower for p in phrases)
-
-
-def _detect_depth(text: str) -> str:
-    lower = text.lower()
-    if any(p in lower for p in ["step by step", "detailed", "in depth", "deep dive", "explain like i'm 5", "eli5"]):
-        return "deep"
-    if any(p in lower for p in ["summary", "summarize", "tl;dr", "brief", "short"]):
-        return "brief"
-    return "balanced"
-
-
-def _detect_modal_intent(text: str) -> Dict[str, bool]:
-    lower = text.lower()
-    return {
-        "asks_for_examples": any(p in lower for p in ["example", "sample", "show me", "demo", "snippet"]),
-        "asks_for_steps": any(p in lower for p in ["how do i", "how to", "steps", "guide", "tutorial", "walkthrough"]),
-        "asks_for_def": any(p in lower for p in ["what is", "definition", "define", "meaning of", "explain what"]),
-    }
-
-
-def _detect_conversational_intent(text: str) -> Dict[str, bool]:
-    """Detect if query is conversational rather than factual"""
-    lower = text.lower()
-
+    ],
+    "relationship": ["relationship between", "difference between", "vs", "versus", "compare", "comparison"],
+    "list_request": ["list ", "top ", "best ", "examples", "ideas", "suggestions", "options"],
+    "depth_deep": ["step by step", "detailed", "in depth", "deep dive", "explain like i'm 5", "eli5"],
+    "depth_brief": ["summary", "summarize", "tl;dr", "brief", "short"],
+    "asks_for_examples": ["example", "sample", "show me", "demo", "snippet"],
+    "asks_for_steps": ["how do i", "how to", "steps", "guide", "tutorial", "walkthrough"],
+    "asks_for_def": ["what is", "definition", "define", "meaning of", "explain what"],
     # Conversational patterns that suggest common sense responses
-    conversational_indicators = [
+    "conversational": [
         # Personal feelings and thoughts
         "i think", "i feel", "i believe", "i wonder", "i'm curious",
         "what do you think", "how do you feel", "what's your opinion",
@@ -113,8 +73,119 @@ def _detect_conversational_intent(text: str) -> Dict[str, bool]:
 
         # Simple acknowledgments
         "ok", "okay", "sure", "alright", "got it", "understood",
-        "yes", "no", "maybe", "perhaps"
-    ]
+        "yes", "no", "maybe", "perhaps",
+    ],
+    "question_words": ["who", "what", "when", "where", "why", "how", "which", "explain"],
+    # Factual/research indicators
+    "factual": [
+        # Research questions
+        "what is the difference", "how does it work", "why does", "when did",
+        "where is", "who invented", "who discovered", "how to make",
+        "recipe for", "what are the benefits", "what causes",
+
+        # Technical/programming
+        "how do i", "how to", "tutorial", "guide", "documentation",
+        "api", "function", "class", "method", "variable",
+
+        # Historical/scientific
+        "history of", "science of", "theory of", "principle of",
+
+        # Comparisons
+        "vs", "versus", "better than", "comparison between",
+
+        # Lists and explanations
+        "list of", "types of", "kinds of", "examples of", "best practices",
+
+        # Complex questions
+        "explain", "describe", "analyze", "evaluate", "assess",
+    ],
+    "research_questions": [
+        "what are", "how do", "why do", "when was", "where can",
+        "who was", "which is", "can you explain",
+    ],
+    "complex_markers": ["because", "although", "however", "therefore", "moreover", "furthermore"],
+    "nsfw": [
+        "nsfw", "explicit", "adult", "not safe for work",
+        "violent", "gore", "harm", "self-harm", "suicide", "kill", "murder",
+    ],
+    # Explicit music/video intent indicators
+    "music_video": [
+        "music", "song", "songs", "video", "videos", "youtube", "spotify",
+        "listen", "play", "watch", "album", "artist", "band", "concert",
+        "musical", "singer", "playlist", "track", "tracks", "audio",
+        "film", "movie", "cinema", "tv show", "series", "episode",
+        "entertainment", "hollywood", "bollywood", "netflix", "hulu",
+        "streaming", "vlog", "tutorial video",
+    ],
+    "greeting": [
+        # Greetings
+        "hi", "hello", "hey", "good morning", "good afternoon",
+        "good evening", "good night", "greetings", "howdy",
+
+        # Farewells
+        "bye", "goodbye", "see you", "farewell", "take care",
+        "talk to you later", "catch you later", "bye bye",
+
+        # Well-being inquiries
+        "how are you", "how do you do", "how's it going",
+        "what's up", "what's new", "how have you been",
+    ],
+    "short_greeting": ["hi", "hey", "hello", "bye", "sup"],
+    "tone_polite": ["please", "could you", "would you", "can you"],
+    "tone_urgent": ["now", "quick", "urgent", "asap", "fast"],
+})
+
+
+@lru_cache(maxsize=512)
+def _lexicon_hits(text: str) -> LexiconHits:
+    return _ROUTER_LEXICON.find(text)
+
+
+def _detect_transactional(text: str) -> bool:
+    return _lexicon_hits(text).has("transactional")
+
+
+def _detect_troubleshooting(text: str) -> bool:
+    return _lexicon_hits(text).has("troubleshooting")
+
+
+def _detect_sensitive(text: str) -> bool:
+    return _lexicon_hits(text).has("sensitive")
+
+
+def _detect_multi_question(text: str) -> bool:
+    return bool(re.search(r"\?\s+\w+", text)) or text.count("?") > 1
+
+
+def _detect_relationship(text: str) -> bool:
+    return _lexicon_hits(text).has("relationship")
+
+
+def _detect_list_request(text: str) -> bool:
+    return _lexicon_hits(text).has("list_request")
+
+
+def _detect_depth(text: str) -> str:
+    hits = _lexicon_hits(text)
+    if hits.has("depth_deep"):
+        return "deep"
+    if hits.has("depth_brief"):
+        return "brief"
+    return "balanced"
+
+
+def _detect_modal_intent(text: str) -> Dict[str, bool]:
+    hits = _lexicon_hits(text)
+    return {
+        "asks_for_examples": hits.has("asks_for_examples"),
+        "asks_for_steps": hits.has("asks_for_steps"),
+        "asks_for_def": hits.has("asks_for_def"),
+    }
+
+
+def _detect_conversational_intent(text: str) -> Dict[str, bool]:
+    """Detect if query is conversational rather than factual"""
+    hits = _lexicon_hits(text)
 
     # Check if query is very short (likely conversational)
     word_count = len(text.split())
@@ -125,15 +196,13 @@ def _detect_conversational_intent(text: str) -> Dict[str, bool]:
     is_statement = not has_question_mark and word_count > 1
 
     # Check for conversational patterns
-    has_conversational_patterns = any(indicator in lower for indicator in conversational_indicators)
+    has_conversational_patterns = hits.has("conversational")
 
     # Determine if this is primarily conversational
     is_conversational = (
         has_conversational_patterns or
         is_very_short or
-        (is_statement and word_count <= 5 and not any(word in lower for word in [
-            'who', 'what', 'when', 'where', 'why', 'how', 'which', 'explain'
-        ]))
+        (is_statement and word_count <= 5 and not hits.has("question_words"))
     )
 
     return {
@@ -147,40 +216,10 @@ def _detect_conversational_intent(text: str) -> Dict[str, bool]:
 
 def _detect_factual_intent(text: str) -> Dict[str, bool]:
     """Detect if query requires factual research"""
-    lower = text.lower()
-
-    # Factual/research indicators
-    factual_indicators = [
-        # Research questions
-        "what is the difference", "how does it work", "why does", "when did",
-        "where is", "who invented", "who discovered", "how to make",
-        "recipe for", "what are the benefits", "what causes",
-
-        # Technical/programming
-        "how do i", "how to", "tutorial", "guide", "documentation",
-        "api", "function", "class", "method", "variable",
-
-        # Historical/scientific
-        "history of", "science of", "theory of", "principle of",
-
-        # Comparisons
-        "vs", "versus", "better than", "comparison between",
-
-        # Lists and explanations
-        "list of", "types of", "kinds of", "examples of", "best practices",
-
-        # Complex questions
-        "explain", "describe", "analyze", "evaluate", "assess"
-    ]
+    hits = _lexicon_hits(text)
 
-    # Check for research question patterns
-    research_questions = [
-        "what are", "how do", "why do", "when was", "where can",
-        "who was", "which is", "can you explain"
-    ]
-
-    has_research_indicators = any(indicator in lower for indicator in factual_indicators)
-    has_research_questions = any(question in lower for question in research_questions)
+    has_research_indicators = hits.has("factual")
+    has_research_questions = hits.has("research_questions")
 
     # Length-based assessment
     word_count = len(text.split())
@@ -190,8 +229,7 @@ def _detect_factual_intent(text: str) -> Dict[str, bool]:
     has_question_mark = '?' in text
 
     # Complex question markers
-    complex_markers = ['because', 'although', 'however', 'therefore', 'moreover', 'furthermore']
-    has_complex_structure = any(marker in lower for marker in complex_markers)
+    has_complex_structure = hits.has("complex_markers")
 
     is_factual = (
         has_research_indicators or
@@ -210,80 +248,31 @@ def _detect_factual_intent(text: str) -> Dict[str, bool]:
 
 
 def _detect_safety_sensitive(text: str) -> bool:
-    lower = text.lower()
-    nsfw_indicators = [
-        "nsfw", "explicit", "adult", "not safe for work",
-        "violent", "gore", "harm", "self-harm", "suicide", "kill", "murder",
-    ]
-    return any(ind in lower for ind in nsfw_indicators)
+    return _lexicon_hits(text).has("nsfw")
 
 
 def _detect_music_video_intent(text: str) -> bool:
     """Detect if the user is explicitly asking about music or video content"""
-    lower = text.lower()
-
-    # Explicit music/video intent indicators
-    music_video_indicators = [
-        "music", "song", "songs", "video", "videos", "youtube", "spotify",
-        "listen", "play", "watch", "album", "artist", "band", "concert",
-        "musical", "singer", "playlist", "track", "tracks", "audio",
-        "film", "movie", "cinema", "tv show", "series", "episode",
-        "entertainment", "hollywood", "bollywood", "netflix", "hulu",
-        "streaming", "vlog", "tutorial video"
-    ]
-
-    # Check for explicit intent words
-    intent_words = ["tell me about", "show me", "recommend", "find", "search for",
-                   "what's", "who's", "where can i", "how do i", "play me",
-                   "watch", "listen to", "recommend me"]
-
-    # Combine intent + music/video for stronger detection
-    has_intent = any(intent in lower for intent in intent_words)
-    has_music_video = any(indicator in lower for indicator in music_video_indicators)
-
-    # If user explicitly mentions music/video topics, consider it music/video intent
-    if has_music_video:
-        return True
-
-    # If they have intent words + music/video, definitely music/video intent
-    if has_intent and has_music_video:
-        return True
-
-    return False
+    # Explicitly mentioning music/video topics is enough on its own
+    return _lexicon_hits(text).has("music_video")
 
 
 def _detect_greeting_intent(text: str) -> bool:
     """Detect if query is a greeting or farewell"""
-    lower = text.lower()
-
-    greeting_patterns = [
-        # Greetings
-        "hi", "hello", "hey", "good morning", "good afternoon",
-        "good evening", "good night", "greetings", "howdy",
-
-        # Farewells
-        "bye", "goodbye", "see you", "farewell", "take care",
-        "talk to you later", "catch you later", "bye bye",
-
-        # Well-being inquiries
-        "how are you", "how do you do", "how's it going",
-        "what's up", "what's new", "how have you been"
-    ]
+    hits = _lexicon_hits(text)
 
     # Very short queries that are likely greetings
     word_count = len(text.split())
-    is_very_short_greeting = word_count <= 2 and any(word in lower for word in [
-        "hi", "hey", "hello", "bye", "sup"
-    ])
+    is_very_short_greeting = word_count <= 2 and hits.has("short_greeting")
 
-    return any(pattern in lower for pattern in greeting_patterns) or is_very_short_greeting
+    return hits.has("greeting") or is_very_short_greeting
 
 
 def _detect_tone(text: str) -> str:
-    lower = text.lower()
-    if any(p in lower for p in ["please", "could you", "would you", "can you"]):
+    hits = _lexicon_hits(text)
+    if hits.has("tone_polite"):
         return "polite"
-    if any(p in lower for p in ["now", "quick", "urgent", "asap", "fast"]):
+    if hits.has("tone_urgent"):
         return "urgent"
     return "neutral"
 
@@ -450,17 +439,20 @@ def debug_intent(query: str, intent: Dict, hints: Dict) -> str:
     )
 
 
+_DOMAINS = {
+    "ml": ["model", "training", "inference", "dataset", "pytorch", "tensor"],
+    "security": ["token", "auth", "oauth", "encryption", "jwt", "password"],
+    "frontend": ["react", "vue", "dom", "css", "html", "nextjs"],
+    "backend": ["api", "rest", "graphql", "database", "sql", "server"],
+    "devops": ["docker", "kubernetes", "k8s", "helm", "terraform", "ci", "cd"],
+}
+_DOMAIN_LEXICON = KeywordMatcher(_DOMAINS)
+
+
 def enrich_with_domain(intent: Dict, normalized_query: str) -> Dict:
-    lower = normalized_query.lower()
-    domains = {
-        "ml": ["model", "training", "inference", "dataset", "pytorch", "tensor"],
-        "security": ["token", "auth", "oauth", "encryption", "jwt", "password"],
-        "frontend": ["react", "vue", "dom", "css", "html", "nextjs"],
-        "backend": ["api", "rest", "graphql", "database", "sql", "server"],
-        "devops": ["docker", "kubernetes", "k8s", "helm", "terraform", "ci", "cd"],
-    }
-    for domain, keys in domains.items():
-        if any(k in lower for k in keys):
+    hits = _DOMAIN_LEXICON.find(normalized_query)
+    for domain in _DOMAINS:  # first listed domain wins
+        if hits.has(domain):
             intent = dict(intent)
             intent["domain"] = domain
             return intent
@@ -10,15 +10,24 @@ strategy. Goals:
 - Surface trace data for observability
 
 All behavior is enabled by default; no toggles are added.
+
+Research can return dozens of candidates per query, so everything that
+depends only on the query (how-to/comparison/news/time-sensitivity flags,
+authoritative-source bonuses) is computed once per rerank in a
+_QueryProfile, each item's timestamp is parsed once, and the recency decay
+is shared by the recency and temporal bonuses.
 """
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime
+import heapq
 import math
 import re
 
+from services.keyword_matcher import KeywordMatcher
 from services.semantic_relevance import get_semantic_scorer
 
 
@@ -38,29 +47,46 @@ def _parse_timestamp(value) -> Optional[datetime]:
         except Exception:
             return None
     if isinstance(value, str):
-        for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%d %H:%M:%S"):
-            try:
-                return datetime.strptime(value[:26], fmt)
-            except Exception:
-                continue
+        return _parse_timestamp_str(value[:26])
     return None
 
 
-def _recency_boost(timestamp: Optional[datetime], weight: float = 0.1) -> float:
+@lru_cache(maxsize=2048)
+def _parse_timestamp_str(value: str) -> Optional[datetime]:
+    # Cached: the same source dates come back across queries, and a miss tries up to four formats
+    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except Exception:
+            continue
+    return None
+
+
+def _item_timestamp(item: Dict) -> Optional[datetime]:
+    return _parse_timestamp(item.get("timestamp") or item.get("updated_at") or item.get("last_updated"))
+
+
+def _recency_decay(timestamp: Optional[datetime], now: Optional[datetime] = None) -> float:
+    """exp(-age_days / 90) for timestamp, 0.0 without one."""
     if not timestamp:
         return 0.0
-    delta_days = max((datetime.utcnow() - timestamp).days, 0)
+    delta_days = max(((now or datetime.utcnow()) - timestamp).days, 0)
+    return math.exp(-delta_days / 90.0)
+
+
+def _recency_boost(timestamp: Optional[datetime], weight: float = 0.1, now: Optional[datetime] = None) -> float:
     # Decay: newer items get closer to weight, older trend toward 0
-    return weight * math.exp(-delta_days / 90.0)
+    return weight * _recency_decay(timestamp, now)
+
+
+_PROMO_LEXICON = KeywordMatcher([
+    "click here", "subscribe", "buy now", "signup", "sign up", "join now", "limited offer",
+    "official website", "discount", "deal", "coupon", "sale",
+])
 
 
 def _penalize_promotional(text: str) -> float:
-    promos = [
-        "click here", "subscribe", "buy now", "signup", "sign up", "join now", "limited offer",
-        "official website", "discount", "deal", "coupon", "sale",
-    ]
-    lower = (text or "").lower()
-    if any(p in lower for p in promos):
+    if _PROMO_LEXICON.search(text):
         return -0.2
     return 0.0
 
@@ -100,44 +126,49 @@ def _cluster_by_source(items: List[Dict]) -> Dict[str, List[Dict]]:
 
 
 def _diversity_sample(items: List[Tuple[float, Dict]], per_source: int = 2, limit: int = 6) -> List[Dict]:
-    clusters = _cluster_by_source([itm for _, itm in items])
-    selected: List[Dict] = []
+    # Group (score, position, item) by source in one pass; dict order keeps first appearance
+    by_source: Dict[str, List[Tuple[float, int, Dict]]] = {}
+    for pos, (score, item) in enumerate(items):
+        by_source.setdefault(item.get("source", "unknown"), []).append((score, pos, item))
 
     # Enhanced diversity sampling with better source balancing
     # Sort sources by average score to prioritize high-quality sources
-    source_scores = {}
-    for src, members in clusters.items():
-        if members:
-            avg_score = sum(score for score, _ in [(s, i) for s, i in items if i in members]) / len(members)
-            source_scores[src] = avg_score
-
+    source_scores = {src: sum(score for score, _, _ in members) / len(members) for src, members in by_source.items()}
     sorted_sources = sorted(source_scores.keys(), key=lambda s: source_scores[s], reverse=True)
 
+    selected: List[Dict] = []
+    selected_ids: Set[int] = set()
+    selected_by_source: Dict[str, List[Dict]] = {}
+
+    def select(src: str, item: Dict) -> None:
+        selected.append(item)
+        selected_ids.add(id(item))
+        selected_by_source.setdefault(src, []).append(item)
+
     # First pass: take top items from highest-scoring sources
     for src in sorted_sources:
-        members = clusters[src]
-        # Sort members by score within each source
-        members_with_scores = [(score, item) for score, item in items if item in members]
-        members_with_scores.sort(key=lambda x: x[0], reverse=True)
-        take = [item for _, item in members_with_scores[:per_source]]
-        selected.extend(take)
+        # Best members of each source (ties keep their input order)
+        for _, _, item in heapq.nlargest(per_source, by_source[src], key=lambda m: (m[0], -m[1])):
+            select(src, item)
         if len(selected) >= limit:
             return selected[:limit]
 
     # Second pass: fill remainder from global ranking, ensuring diversity
     remaining_needed = limit - len(selected)
     if remaining_needed > 0:
-        used_sources = {item.get('source', 'unknown') for item in selected}
+        used_sources = set(selected_by_source)
         for score, item in items:
-            if item not in selected:
-                item_source = item.get('source', 'unknown')
-                # Prefer sources not yet represented, but don't exclude good content
-                if item_source not in used_sources or len(used_sources) >= 3:
-                    selected.append(item)
-                    used_sources.add(item_source)
-                    remaining_needed -= 1
-                    if remaining_needed <= 0:
-                        break
+            item_source = item.get('source', 'unknown')
+            # Equal (duplicate) dicts share a source, so this matches `item not in selected`
+            if id(item) in selected_ids or item in selected_by_source.get(item_source, ()):
+                continue
+            # Prefer sources not yet represented, but don't exclude good content
+            if item_source not in used_sources or len(used_sources) >= 3:
+                select(item_source, item)
+                used_sources.add(item_source)
+                remaining_needed -= 1
+                if remaining_needed <= 0:
+                    break
 
     return selected[:limit]
 
@@ -169,6 +200,42 @@ def _extract_title_snippet(item: Dict) -> str:
     return f"{title} :: {snippet}"
 
 
+_HOW_TO_WORDS = ['how to', 'tutorial', 'guide', 'steps', 'install', 'setup']
+_COMPARISON_WORDS = ['vs', 'versus', 'compare', 'comparison', 'difference']
+_NEWS_WORDS = ['latest', 'recent', 'new', 'update', '2024', '2025']
+_TIME_SENSITIVE_KEYWORDS = [
+    'latest', 'recent', 'new', 'update', 'breaking', 'today', 'yesterday',
+    '2024', '2025', 'current', 'now', 'modern', 'contemporary'
+]
+_TECH_NEWS_KEYWORDS = [
+    'technology', 'tech', 'ai', 'artificial intelligence', 'software',
+    'update', 'release', 'version', 'news', 'announcement'
+]
+
+
+class _QueryProfile:
+    """Query-dependent scoring inputs, computed once per rerank instead of once per item."""
+
+    __slots__ = ("how_to", "comparison", "news", "authoritative", "temporal_weight")
+
+    def __init__(self, query: str, query_intent: Dict):
+        query_lower = query.lower()
+        self.how_to = any(word in query_lower for word in _HOW_TO_WORDS)
+        self.comparison = any(word in query_lower for word in _COMPARISON_WORDS)
+        self.news = any(word in query_lower for word in _NEWS_WORDS)
+
+        intent = query_intent.get('intent', '') if query_intent else ''
+        self.authoritative = intent in ['factual', 'definition', 'biographical']
+
+        # Time-sensitive topics double the recency weight; tech/news topics get a moderate boost
+        if any(keyword in query_lower for keyword in _TIME_SENSITIVE_KEYWORDS):
+            self.temporal_weight: Optional[float] = 0.16
+        elif any(keyword in query_lower for keyword in _TECH_NEWS_KEYWORDS):
+            self.temporal_weight = 0.12
+        else:
+            self.temporal_weight = None
+
+
 class KnowledgeReranker:
     """Rerank knowledge using semantic relevance plus lightweight recency."""
 
@@ -178,18 +245,29 @@ class KnowledgeReranker:
         self.relationship_limit = 8
         self.min_score = 0.0
 
-    def _score_item(self, query: str, item: Dict, query_intent: Dict) -> float:
-        semantic_score = self.semantic_scorer.calculate_semantic_score(query, item, query_intent)
-        ts = item.get("timestamp") or item.get("updated_at") or item.get("last_updated")
-        recency = _recency_boost(_parse_timestamp(ts), weight=0.08)
-        promo_penalty = _penalize_promotional(item.get("content", ""))
-        low_content_penalty = _penalize_low_content(item.get("content", ""))
+    def _score_item(
+        self,
+        query: str,
+        item: Dict,
+        query_intent: Dict,
+        profile: Optional[_QueryProfile] = None,
+        now: Optional[datetime] = None,
+        semantic_score: Optional[float] = None,
+    ) -> float:
+        profile = profile or _QueryProfile(query, query_intent)
+        if semantic_score is None:
+            semantic_score = self.semantic_scorer.calculate_semantic_score(query, item, query_intent)
+        content = item.get("content", "")
+        decay = _recency_decay(_item_timestamp(item), now)
+        recency = 0.08 * decay
+        promo_penalty = _penalize_promotional(content)
+        low_content_penalty = _penalize_low_content(content)
 
         # Enhanced query-specific boosting
-        query_specific_boost = self._calculate_query_specific_boost(query, item, query_intent)
+        query_specific_boost = self._calculate_query_specific_boost(query, item, query_intent, profile)
 
         # Improved temporal relevance for time-sensitive topics
-        temporal_boost = self._calculate_temporal_relevance(query, item)
+        temporal_boost = self._temporal_boost(profile, decay)
 
         # Diversity penalty to avoid redundant information
         diversity_penalty = self._calculate_diversity_penalty(item)
@@ -204,36 +282,40 @@ class KnowledgeReranker:
 
         return max(0.0, total_score)
 
-    def _calculate_query_specific_boost(self, query: str, item: Dict, query_intent: Dict) -> float:
+    def _calculate_query_specific_boost(
+        self, query: str, item: Dict, query_intent: Dict, profile: Optional[_QueryProfile] = None
+    ) -> float:
         """Calculate boost based on query type and source alignment."""
+        profile = profile or _QueryProfile(query, query_intent)
         boost = 0.0
-        query_lower = query.lower()
-        content_lower = item.get("content", "").lower()
         source = item.get("source", "").lower()
+        content_lower = None
 
         # Technical queries: boost sources that typically contain tutorials/code
-        if any(word in query_lower for word in ['how to', 'tutorial', 'guide', 'steps', 'install', 'setup']):
+        if profile.how_to:
+            content_lower = item.get("content", "").lower()
             if any(tech_source in source for tech_source in ['wikipedia', 'brain', 'gem_source']):
                 boost += 0.15  # Technical sources get boost for how-to questions
             if any(tech_indicator in content_lower for tech_indicator in ['step', 'first', 'then', 'install', 'run']):
                 boost += 0.1
 
         # Comparison queries: boost sources that handle relationships well
-        if any(word in query_lower for word in ['vs', 'versus', 'compare', 'comparison', 'difference']):
+        if profile.comparison:
+            if content_lower is None:
+                content_lower = item.get("content", "").lower()
             if source in ['wikipedia', 'brain']:  # Authoritative sources for comparisons
                 boost += 0.12
             if any(comp_word in content_lower for comp_word in ['compared to', 'versus', 'unlike', 'whereas']):
                 boost += 0.08
 
         # Recent events/news: boost recent content more aggressively
-        if any(word in query_lower for word in ['latest', 'recent', 'new', 'update', '2024', '2025']):
+        if profile.news:
             # Already handled by temporal boost, but add small additional boost for news sources
             if source in ['google', 'duckduckgo', 'bing']:
                 boost += 0.05
 
         # Factual queries: boost authoritative sources
-        intent = query_intent.get('intent', '') if query_intent else ''
-        if intent in ['factual', 'definition', 'biographical']:
+        if profile.authoritative:
             if source == 'wikipedia':
                 boost += 0.1
             elif source == 'brain':
@@ -243,37 +325,14 @@ class KnowledgeReranker:
 
     def _calculate_temporal_relevance(self, query: str, item: Dict) -> float:
         """Enhanced temporal relevance based on query content."""
-        query_lower = query.lower()
-        ts = item.get("timestamp") or item.get("updated_at") or item.get("last_updated")
-        timestamp = _parse_timestamp(ts)
-
-        if not timestamp:
-            return 0.0
-
-        base_recency = _recency_boost(timestamp, weight=0.08)
-
-        # Time-sensitive topics get stronger recency boost
-        time_sensitive_keywords = [
-            'latest', 'recent', 'new', 'update', 'breaking', 'today', 'yesterday',
-            '2024', '2025', 'current', 'now', 'modern', 'contemporary'
-        ]
+        return self._temporal_boost(_QueryProfile(query, {}), _recency_decay(_item_timestamp(item)))
 
-        if any(keyword in query_lower for keyword in time_sensitive_keywords):
-            # Double the recency weight for time-sensitive queries
-            enhanced_recency = _recency_boost(timestamp, weight=0.16)
-            return enhanced_recency - base_recency  # Return the additional boost
-
-        # Technology/news topics: moderate boost for recent content
-        tech_news_keywords = [
-            'technology', 'tech', 'ai', 'artificial intelligence', 'software',
-            'update', 'release', 'version', 'news', 'announcement'
-        ]
-
-        if any(keyword in query_lower for keyword in tech_news_keywords):
-            enhanced_recency = _recency_boost(timestamp, weight=0.12)
-            return enhanced_recency - base_recency
-
-        return 0.0  # No additional boost for non-time-sensitive queries
+    @staticmethod
+    def _temporal_boost(profile: _QueryProfile, decay: float) -> float:
+        """Extra recency on top of the base 0.08 weight for time-sensitive queries."""
+        if not decay or profile.temporal_weight is None:
+            return 0.0  # No additional boost for non-time-sensitive queries
+        return profile.temporal_weight * decay - 0.08 * decay
 
     def _calculate_diversity_penalty(self, item: Dict) -> float:
         """Calculate penalty to encourage source diversity."""
@@ -288,15 +347,25 @@ class KnowledgeReranker:
         return 0.0
 
     def _score_all(self, query: str, knowledge_items: List[Dict], query_intent: Dict) -> List[Tuple[float, Dict]]:
-        scored: List[Tuple[float, Dict]] = []
-        for item in knowledge_items:
-            score = self._score_item(query, item, query_intent)
-            scored.append((score, item))
+        profile = _QueryProfile(query, query_intent)
+        now = datetime.utcnow()
+        score_batch = getattr(self.semantic_scorer, "score_batch", None)
+        if score_batch is not None:
+            semantic = score_batch(query, knowledge_items, query_intent)
+        else:
+            semantic = [None] * len(knowledge_items)
+        scored = [
+            (self._score_item(query, item, query_intent, profile, now, semantic_score), item)
+            for item, semantic_score in zip(knowledge_items, semantic)
+        ]
         scored.sort(key=lambda pair: pair[0], reverse=True)
         return scored
 
-    def _apply_diversity(self, scored: List[Tuple[float, Dict]], query_intent: Dict, limit: int) -> List[Dict]:
-        if _relationship_boost(query_intent):
+    def _apply_diversity(self, scored: List[Tuple[float, Dict]], query_intent: Dict, limit: int,
+                         relationship: Optional[bool] = None) -> List[Dict]:
+        if relationship is None:
+            relationship = _relationship_boost(query_intent)
+        if relationship:
             return _diversity_sample(scored, per_source=2, limit=limit)
         return [itm for _, itm in scored[:limit]]
 
@@ -316,7 +385,8 @@ class KnowledgeReranker:
         if not knowledge_items:
             return []
 
-        effective_limit = limit or (self.relationship_limit if _relationship_boost(query_intent) else self.base_limit)
+        relationship = _relationship_boost(query_intent)
+        effective_limit = limit or (self.relationship_limit if relationship else self.base_limit)
 
         # Deduplicate by title to reduce noise
         knowledge_items = _dedup_by_title(knowledge_items)
@@ -329,7 +399,7 @@ class KnowledgeReranker:
         if trace:
             print("[Refinement:Reranker] candidates:", "; ".join(trace))
 
-        reranked = self._apply_diversity(filtered, query_intent, effective_limit)
+        reranked = self._apply_diversity(filtered, query_intent, effective_limit, relationship)
         return reranked
 
 
@@ -0,0 +1,128 @@
+"""Single-pass analysis of one chat message, shared by every pipeline stage.
+
+A chat turn used to lowercase, split, and keyword-scan the same message
+many times: normalization ran twice (before and after conversation context
+was available), and the conversational analyzer, emotional intelligence,
+conversation flow, personalization and the quick-path checks in /api/chat
+each re-tokenized it. A MessageAnalysis is built once per message and
+carries everything those stages derive from the text alone:
+
+- the context-free normalization (normalized query, entities, keywords,
+  numbers, sentences, language flags)
+- lowercased original and normalized text
+- whitespace words, word tokens, the token set, and bigrams/trigrams
+- lexicon hits, computed once per KeywordMatcher on first use
+
+Nothing here depends on the conversation. Context is applied afterwards
+with normalization(conversation_context), which only recomputes the
+follow-up flag.
+
+Analyses are immutable apart from the lazily filled hit cache, so
+analyze_message() memoizes them by text: a repeated message ("thanks",
+"tell me more") is analyzed once per process.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from services.keyword_matcher import KeywordMatcher, LexiconHits
+
+from .question_normalizer import get_question_normalizer, tokenize
+
+ANALYSIS_CACHE_SIZE = 512
+
+
+def _ngrams(tokens: Tuple[str, ...], n: int) -> Tuple[str, ...]:
+    return tuple(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+class MessageAnalysis:
+    """Everything the pipeline derives from a message's text, computed once."""
+
+    def __init__(self, text: str):
+        normalizer = get_question_normalizer()
+        self.original = text or ""
+        self.lower = self.original.lower()
+        self._normalized = normalizer.normalize_text(self.original)
+
+        # Normalized text: lowercased, URLs/handles/code fences stripped, aliases expanded
+        self.text = self._normalized["normalized_query"].lower().strip()
+        self.words: Tuple[str, ...] = tuple(self.original.split())
+        self.text_words: Tuple[str, ...] = tuple(self.text.split())
+        self.tokens: Tuple[str, ...] = tuple(tokenize(self.lower))
+        self.token_set: FrozenSet[str] = frozenset(self.tokens)
+        self.bigrams: Tuple[str, ...] = _ngrams(self.tokens, 2)
+        self.trigrams: Tuple[str, ...] = _ngrams(self.tokens, 3)
+
+        self.question_marks = self.original.count("?")
+        self.has_exclamation = "!" in self.original
+
+        self._hits: Dict[Tuple[KeywordMatcher, bool], LexiconHits] = {}
+
+    @property
+    def normalized_query(self) -> str:
+        return self._normalized["normalized_query"]
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @property
+    def entities(self) -> List[str]:
+        return self._normalized["entities"]
+
+    @property
+    def keywords(self) -> List[str]:
+        return self._normalized["keywords"]
+
+    @property
+    def numbers(self) -> Dict[str, List[str]]:
+        return self._normalized["numbers"]
+
+    def normalization(self, conversation_context: Optional[List[Dict]] = None) -> Dict:
+        """The QuestionNormalizer.normalize() result for this message and context."""
+        return get_question_normalizer().with_context(self._normalized, conversation_context)
+
+    def has_phrase(self, phrase: str) -> bool:
+        """True if `phrase` (one to three words) occurs as whole tokens."""
+        n = phrase.count(" ") + 1
+        if n == 1:
+            return phrase in self.token_set
+        if n == 2:
+            return phrase in self.bigrams
+        if n == 3:
+            return phrase in self.trigrams
+        return phrase in " ".join(self.tokens)
+
+    def hits(self, matcher: KeywordMatcher, normalized: bool = False) -> LexiconHits:
+        """
+        matcher.find() over the original (or normalized) text, scanned at most
+        once per matcher for the lifetime of this analysis.
+        """
+        key = (matcher, normalized)
+        found = self._hits.get(key)
+        if found is None:
+            found = matcher.find(self.text if normalized else self.original)
+            found = self._hits.setdefault(key, found)  # another thread may have got there first
+        return found
+
+    def summary(self) -> Dict:
+        return {
+            "words": self.word_count,
+            "tokens": len(self.tokens),
+            "entities": self.entities[:5],
+            "lexicons_scanned": len(self._hits),
+        }
+
+
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def analyze_message(text: str) -> MessageAnalysis:
+    """The (memoized) MessageAnalysis for `text`."""
+    return MessageAnalysis(text)
+
+
+def analysis_cache_info() -> Dict[str, int]:
+    info = analyze_message.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -18,6 +18,21 @@ import json
 from collections import defaultdict, Counter
 from pathlib import Path
 
+from services.keyword_matcher import KeywordMatcher
+
+from .message_analysis import MessageAnalysis
+
+# Keyword lexicon for message classification and simple emotional state detection
+_MESSAGE_LEXICON = KeywordMatcher({
+    'gratitude': ['thanks', 'thank you', 'appreciate'],
+    'acknowledgment': ['yes', 'no', 'okay', 'sure', 'alright'],
+    'positive': ['great', 'awesome', 'amazing', 'excited', 'happy', 'love'],
+    'frustrated': ['frustrated', 'annoying', 'stuck', 'problem', 'issue', 'hate', 'angry'],
+    'confused': ['confused', 'lost', 'not sure', 'unclear', 'bewildered', 'huh'],
+    'excited': ['excited', 'thrilled', 'wow', 'amazing'],
+})
+_TECHNICAL_TERMS = KeywordMatcher(['function', 'class', 'method', 'algorithm', 'implementation'])
+
 
 class PersonalizationEngine:
     """
@@ -77,13 +92,20 @@ class PersonalizationEngine:
             'education': ['learning', 'study', 'course', 'knowledge', 'skill']
         }
 
+        self._style_matcher = KeywordMatcher({
+            'formal': self.formal_indicators,
+            'casual': self.casual_indicators,
+        })
+        self._topic_matcher = KeywordMatcher(self.topic_categories)
+
     def get_user_key(self, chat_id: str, user_id: Optional[str] = None) -> str:
         """Generate a unique key for user identification."""
         if user_id:
             return f"{chat_id}:{user_id}"
         return f"chat:{chat_id}"
 
-    def update_user_profile(self, user_key: str, message: str, response: str = None):
+    def update_user_profile(self, user_key: str, message: str, response: str = None,
+                            analysis: Optional[MessageAnalysis] = None):
         """
         Update user profile based on message and response interaction.
 
@@ -91,6 +113,7 @@ class PersonalizationEngine:
             user_key: Unique user identifier
             message: User's message
             response: Assistant's response (optional)
+            analysis: Shared MessageAnalysis of message (optional)
         """
         if user_key not in self.user_profiles:
             self.user_profiles[user_key] = {
@@ -129,10 +152,11 @@ class PersonalizationEngine:
         profile['interaction_count'] += 1
 
         # Analyze communication style from message
-        self._analyze_communication_style(profile, message)
+        self._analyze_communication_style(profile, message, analysis)
 
         # Track topic interests
-        self._analyze_topic_interests(profile, message)
+        detected_topics = self._detect_topics(message, analysis)
+        self._analyze_topic_interests(profile, message, detected_topics)
 
         # Learn from response preferences (if response provided)
         if response:
@@ -141,9 +165,9 @@ class PersonalizationEngine:
         # Update interaction history (keep last 50)
         profile['interaction_history'].append({
             'timestamp': time.time(),
-            'message_length': len(message.split()),
+            'message_length': analysis.word_count if analysis is not None else len(message.split()),
             'has_questions': '?' in message,
-            'topics_detected': list(self._detect_topics(message))
+            'topics_detected': list(detected_topics)
         })
 
         if len(profile['interaction_history']) > 50:
@@ -153,13 +177,15 @@ class PersonalizationEngine:
         if profile['interaction_count'] % 10 == 0:
             self._save_profiles()
 
-    def _analyze_communication_style(self, profile: Dict, message: str):
+    def _analyze_communication_style(self, profile: Dict, message: str, analysis: Optional[MessageAnalysis] = None):
         """Analyze and update communication style preferences."""
-        message_lower = message.lower()
-
         # Formality analysis
-        formal_count = sum(1 for indicator in self.formal_indicators if indicator in message_lower)
-        casual_count = sum(1 for indicator in self.casual_indicators if indicator in message_lower)
+        if analysis is not None:
+            style_hits = analysis.hits(self._style_matcher)
+        else:
+            style_hits = self._style_matcher.find(message)
+        formal_count = style_hits.count('formal')
+        casual_count = style_hits.count('casual')
 
         if formal_count + casual_count > 0:
             formality_ratio = formal_count / (formal_count + casual_count)
@@ -169,8 +195,7 @@ class PersonalizationEngine:
             profile['communication_style']['formality'] = new_formality
 
         # Verbosity analysis
-        word_count = len(message.split())
-        avg_sentence_length = self._get_average_sentence_length(message)
+        word_count = analysis.word_count if analysis is not None else len(message.split())
 
         # Adjust verbosity based on message patterns
         if word_count < 5:
@@ -199,9 +224,10 @@ class PersonalizationEngine:
         total_words = sum(len(s.split()) for s in sentences)
         return total_words / len(sentences)
 
-    def _analyze_topic_interests(self, profile: Dict, message: str):
+    def _analyze_topic_interests(self, profile: Dict, message: str, detected_topics: Optional[Set[str]] = None):
         """Analyze and update topic interests."""
-        detected_topics = self._detect_topics(message)
+        if detected_topics is None:
+            detected_topics = self._detect_topics(message)
 
         for topic in detected_topics:
             # Increase interest score for detected topics
@@ -211,18 +237,11 @@ class PersonalizationEngine:
         for topic in list(profile['topic_interests'].keys()):
             profile['topic_interests'][topic] *= 0.99
 
-    def _detect_topics(self, message: str) -> Set[str]:
+    def _detect_topics(self, message: str, analysis: Optional[MessageAnalysis] = None) -> Set[str]:
         """Detect topics present in a message."""
-        message_lower = message.lower()
-        detected_topics = set()
-
-        for category, keywords in self.topic_categories.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    detected_topics.add(category)
-                    break
-
-        return detected_topics
+        if analysis is not None:
+            return set(analysis.hits(self._topic_matcher).labels)
+        return set(self._topic_matcher.find(message).labels)
 
     def _learn_from_response(self, profile: Dict, message: str, response: str):
         """Learn user preferences from response patterns."""
@@ -243,8 +262,7 @@ class PersonalizationEngine:
                 profile['preferred_response_length'] = 'long'
 
         # Learn technical detail preference
-        technical_terms = ['function', 'class', 'method', 'algorithm', 'implementation']
-        if any(term in response.lower() for term in technical_terms):
+        if _TECHNICAL_TERMS.search(response):
             profile['response_preferences']['technical_detail'] += 0.05
 
         # Learn example preference
@@ -544,13 +562,12 @@ class PersonalizationEngine:
 
     def _classify_message_type(self, message: str) -> str:
         """Classify the type of user message."""
-        message_lower = message.lower()
-
         if '?' in message:
             return 'question'
-        elif any(word in message_lower for word in ['thanks', 'thank you', 'appreciate']):
+        hits = _MESSAGE_LEXICON.find(message)
+        if hits.has('gratitude'):
             return 'gratitude'
-        elif any(word in message_lower for word in ['yes', 'no', 'okay', 'sure', 'alright']):
+        elif hits.has('acknowledgment'):
             return 'acknowledgment'
         elif len(message.split()) <= 3:
             return 'short_statement'
@@ -559,36 +576,19 @@ class PersonalizationEngine:
 
     def _detect_emotional_state(self, message: str) -> str:
         """Simple emotional state detection for personalization."""
-        message_lower = message.lower()
-
-        # Positive emotions
-        if any(word in message_lower for word in ['great', 'awesome', 'amazing', 'excited', 'happy', 'love']):
-            return 'positive'
-
-        # Negative emotions
-        if any(word in message_lower for word in ['frustrated', 'annoying', 'stuck', 'problem', 'issue', 'hate', 'angry']):
-            return 'frustrated'
+        hits = _MESSAGE_LEXICON.find(message)
 
-        # Confusion
-        if any(word in message_lower for word in ['confused', 'lost', 'not sure', 'unclear', 'bewildered', 'huh']):
-            return 'confused'
-
-        # Excitement
-        if any(word in message_lower for word in ['excited', 'thrilled', 'wow', 'amazing']):
-            return 'excited'
+        # Positive, then negative, confusion and excitement
+        for state in ('positive', 'frustrated', 'confused', 'excited'):
+            if hits.has(state):
+                return state
 
         return 'neutral'
 
     def _extract_topics(self, message: str) -> List[str]:
         """Extract topics from message for personalization."""
-        message_lower = message.lower()
-        topics = []
-
-        for category, keywords in self.topic_categories.items():
-            if any(keyword in message_lower for keyword in keywords):
-                topics.append(category)
-
-        return topics
+        found = self._topic_matcher.find(message).labels
+        return [category for category in self.topic_categories if category in found]
 
     def get_personalized_greeting(self, user_key: str) -> Optional[str]:
         """Generate a personalized greeting based on user profile."""
@@ -262,6 +262,22 @@ class QuestionNormalizer:
 
     def normalize(self, text: str, conversation_context: Optional[List[Dict]] = None) -> Dict:
         """Return a normalized query plus lightweight entity extraction."""
+        return self.with_context(self.normalize_text(text), conversation_context)
+
+    def with_context(self, normalized: Dict, conversation_context: Optional[List[Dict]] = None) -> Dict:
+        """
+        Apply conversation context to a context-free normalize_text() result.
+
+        Only the follow-up flag depends on context, so one normalize_text() can
+        serve both the pre-context and the with-context pass.
+        """
+        result = dict(normalized)
+        context_follow_up = bool(conversation_context and len(conversation_context) >= 2)
+        result["is_follow_up_like"] = self._aggregate_follow_up(normalized["sentences"]) or context_follow_up
+        return result
+
+    def normalize_text(self, text: str) -> Dict:
+        """normalize() without conversation context."""
         original = text or ""
         base = self._base_cleanup(original)
         lowered = base["text"].lower().strip()
@@ -278,11 +294,7 @@ class QuestionNormalizer:
 
         # Sentence-level follow-up hints
         sentence_info = self._analyze_sentences(original)
-        follow_up_from_sentences = self._aggregate_follow_up(sentence_info)
-
-        # Context-based follow-up hint
-        context_follow_up = bool(conversation_context and len(conversation_context) >= 2)
-        follow_up = follow_up_from_sentences or context_follow_up
+        follow_up = self._aggregate_follow_up(sentence_info)
 
         # Additional metadata
         language_flags = _detect_language_flags(original)
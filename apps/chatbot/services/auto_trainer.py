@@ -22,6 +22,7 @@ sys.path.append('../../../models/thor-1.1')
 sys.path.append('../../../models/thor-1.0')
 
 from config import CHATS_DIR, CONVERSATIONS_DIR, DATA_ROOT
+from app_utils.chat_store import get_chat_store
 
 
 class AutoTrainer:
@@ -145,34 +146,19 @@ class AutoTrainer:
         """Collect new conversations since last training"""
         new_conversations = []
 
-        # Check chats directory
-        if self.chats_dir.exists():
-            for chat_file in self.chats_dir.glob("*.json"):
+        # Check chats directory and the conversations archive (snapshot + append log)
+        for store in (get_chat_store(self.chats_dir), get_chat_store(self.conversations_dir, indexed=False)):
+            for chat_id in store.list_ids():
                 try:
-                    with open(chat_file, 'r', encoding='utf-8') as f:
-                        chat_data = json.load(f)
-
                     # Check if chat was modified since last training
-                    modified_time = datetime.fromtimestamp(chat_file.stat().st_mtime)
-                    if modified_time > self.last_training_time:
-                        new_conversations.append(chat_data)
-
-                except Exception as e:
-                    self.logger.warning(f"Failed to read chat file {chat_file}: {e}")
-
-        # Check conversations archive
-        if self.conversations_dir.exists():
-            for conv_file in self.conversations_dir.glob("*.json"):
-                try:
-                    with open(conv_file, 'r', encoding='utf-8') as f:
-                        conv_data = json.load(f)
-
-                    modified_time = datetime.fromtimestamp(conv_file.stat().st_mtime)
+                    modified_time = datetime.fromtimestamp(store.modified_time(chat_id))
                     if modified_time > self.last_training_time:
-                        new_conversations.append(conv_data)
+                        chat_data = store.load(chat_id)
+                        if chat_data:
+                            new_conversations.append(chat_data)
 
                 except Exception as e:
-                    self.logger.warning(f"Failed to read conversation file {conv_file}: {e}")
+                    self.logger.warning(f"Failed to read chat {chat_id} in {store.chats_dir}: {e}")
 
         # Limit number of conversations to process
         if len(new_conversations) > self.max_conversations:
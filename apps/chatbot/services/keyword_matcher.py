@@ -0,0 +1,130 @@
+"""
+Compiled multi-keyword matcher for the lexicon-driven analyzers.
+
+The refinement modules classify messages by testing hand-written keyword
+lists. Testing each keyword with `kw in text` rescans the message once per
+keyword. A KeywordMatcher compiles a whole labelled lexicon into one regex and
+returns every hit in a single pass over the text.
+
+Matching is case-insensitive and anchored at the start of a word: a keyword
+must not follow a letter or digit ("hi" no longer matches inside "this"), but
+it may run on into a longer word, so the lexicons keep catching inflected
+forms ("kill" matches "killing", "error" matches "errors", "example" matches
+"examples"). Keywords that begin with a non-word character ("```") have no
+left boundary.
+
+Usage:
+    matcher = KeywordMatcher({"greeting": ["hi", "hello"], "farewell": ["bye"]})
+    hits = matcher.find("Hi there, bye!")
+    hits.has("greeting")        -> True
+    hits.matched("farewell")    -> ["bye"]
+    hits.position("hi")         -> 0
+    matcher.find("this says hellos").matched("greeting")  -> ["hello"]
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple, Union
+
+Lexicon = Union[Mapping[str, Iterable[str]], Iterable[str]]
+
+DEFAULT_LABEL = "match"
+
+
+class LexiconHits:
+    """Result of one KeywordMatcher.find: each matched keyword with its first position."""
+
+    __slots__ = ("_positions", "_labels", "_by_label")
+
+    def __init__(self, positions: Dict[str, int], labels: Mapping[str, Tuple[str, ...]]):
+        self._positions = positions
+        self._labels = labels
+        self._by_label: Dict[str, List[str]] = {}
+        for term in sorted(positions, key=positions.get):
+            for label in labels[term]:
+                self._by_label.setdefault(label, []).append(term)
+
+    def __bool__(self) -> bool:
+        return bool(self._positions)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._positions
+
+    @property
+    def terms(self) -> FrozenSet[str]:
+        return frozenset(self._positions)
+
+    @property
+    def labels(self) -> FrozenSet[str]:
+        return frozenset(self._by_label)
+
+    def has(self, label: str = DEFAULT_LABEL) -> bool:
+        return label in self._by_label
+
+    def matched(self, label: str = DEFAULT_LABEL) -> List[str]:
+        """Keywords of `label` found in the text, in order of first appearance."""
+        return list(self._by_label.get(label, ()))
+
+    def count(self, label: str = DEFAULT_LABEL) -> int:
+        """Number of distinct keywords of `label` found."""
+        return len(self._by_label.get(label, ()))
+
+    def position(self, term: str) -> int:
+        """Index of the first occurrence of `term` (-1 if absent)."""
+        return self._positions.get(term, -1)
+
+
+class KeywordMatcher:
+    """A labelled keyword lexicon compiled into a single alternation regex."""
+
+    def __init__(self, lexicon: Lexicon):
+        if isinstance(lexicon, Mapping):
+            items = lexicon.items()
+        else:
+            items = [(DEFAULT_LABEL, lexicon)]
+
+        labels: Dict[str, List[str]] = {}
+        for label, terms in items:
+            for term in terms:
+                term = term.lower()
+                if term and label not in labels.setdefault(term, []):
+                    labels[term].append(label)
+        self._labels: Dict[str, Tuple[str, ...]] = {t: tuple(ls) for t, ls in labels.items()}
+
+        # Longest first: at each position the alternation reports the longest keyword.
+        ordered = sorted(self._labels, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?=(" + "|".join(_bounded(t) for t in ordered) + r"))"
+        ) if ordered else None
+
+        # Shorter keywords that also match where a longer one did ("how do" in "how do i").
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            t: tuple(p for p in ordered if len(p) < len(t) and t.startswith(p)) for t in ordered
+        }
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def find(self, text: Optional[str]) -> LexiconHits:
+        """Every keyword present in `text` (one regex scan)."""
+        positions: Dict[str, int] = {}
+        if text and self._pattern is not None:
+            lower = text.lower()
+            for m in self._pattern.finditer(lower):
+                start = m.start()
+                term = m.group(1)
+                positions.setdefault(term, start)
+                for prefix in self._prefixes[term]:
+                    positions.setdefault(prefix, start)
+        return LexiconHits(positions, self._labels)
+
+    def search(self, text: Optional[str]) -> bool:
+        """True if any keyword occurs in `text` (stops at the first hit)."""
+        return bool(text) and self._pattern is not None and self._pattern.search(text.lower()) is not None
+
+
+def _bounded(term: str) -> str:
+    left = r"(?<!\w)" if _is_word(term[0]) else ""
+    return left + re.escape(term)
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
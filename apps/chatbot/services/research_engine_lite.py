@@ -6,7 +6,18 @@ Multi-engine snippet retrieval:
 - DuckDuckGo (HTML)
 - Wikipedia (API)
 
-No persistence; results are returned in-memory.
+The engines for a query run concurrently on a shared thread pool over one
+pooled HTTP session; the query's expansions are only searched, one at a time,
+while the results so far fall short. A search has a single deadline: each request's
+timeout is capped by the time left, the search returns as soon as enough
+deduplicated results are in (or the deadline passes), and requests that have not
+started by then are cancelled. Per-engine latency and failure counts decide the
+order engines are tried and listed in; an engine that keeps failing is skipped
+for a cool-down period.
+
+Results are cached per (normalized query, engine) in the shared research cache
+(app_utils/research_cache.py) when it is available: cached engines are answered
+without a request, and stale entries are served while a background refresh runs.
 """
 
 from __future__ import annotations
@@ -14,38 +25,247 @@ from __future__ import annotations
 import hashlib
 import os
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
 from .response_cleaner import get_response_cleaner
 
+try:
+    from app_utils.research_cache import get_research_cache
+except ImportError:  # services used without the chatbot's app_utils package
+    get_research_cache = None
+
+# Whole-search budget in seconds, and the cap for any single engine request
+RESEARCH_DEADLINE = float(os.environ.get("ATLAS_RESEARCH_DEADLINE", "8"))
+RESEARCH_REQUEST_TIMEOUT = float(os.environ.get("ATLAS_RESEARCH_REQUEST_TIMEOUT", "6"))
+RESEARCH_WORKERS = int(os.environ.get("ATLAS_RESEARCH_WORKERS", "8"))
+
+# After this many consecutive failures an engine sits out for ENGINE_COOLDOWN seconds
+ENGINE_FAILURE_LIMIT = 3
+ENGINE_COOLDOWN = 60.0
+
+
+class EngineStats:
+    """Latency/failure counters for one engine (EWMA latency in seconds)."""
+
+    __slots__ = ("calls", "failures", "consecutive_failures", "latency", "skipped_until")
 
-class ResearchEngineLite:
     def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.skipped_until = 0.0
+
+    def record(self, elapsed: float, ok: bool) -> None:
+        self.calls += 1
+        self.latency = elapsed if self.latency is None else 0.7 * self.latency + 0.3 * elapsed
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= ENGINE_FAILURE_LIMIT:
+            self.skipped_until = time.monotonic() + ENGINE_COOLDOWN
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.skipped_until
+
+    def cost(self) -> float:
+        """Expected seconds per useful answer; unknown engines sort first so they get measured."""
+        if self.latency is None:
+            return 0.0
+        failure_rate = (self.failures + 1) / (self.calls + 2)
+        return self.latency / max(0.05, 1.0 - failure_rate)
+
+    def as_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "avg_latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "available": self.available(),
+        }
+
+
+class ResearchEngineLite:
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, cache=None):
+        self._cache = cache
         self._ua = (
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/120.0.0.0 Safari/537.36"
         )
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(RESEARCH_WORKERS, 10))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._engines: Dict[str, Callable[..., List[Dict]]] = {
+            "google": self._search_google_html,
+            "bing": self._search_bing_html,
+            "duckduckgo": self._search_duckduckgo_html,
+            "wikipedia": self._search_wikipedia,
+        }
+        self._stats = {name: EngineStats() for name in self._engines}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=RESEARCH_WORKERS, thread_name_prefix="research")
+        return cls._executor
+
+    def engine_order(self) -> List[str]:
+        """Available engines, cheapest (fast and reliable) first."""
+        with self._stats_lock:
+            ranked = sorted(self._engines, key=lambda name: self._stats[name].cost())
+            return [name for name in ranked if self._stats[name].available()]
+
+    def engine_stats(self) -> Dict[str, Dict]:
+        with self._stats_lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def search(
+        self,
+        query: str,
+        *,
+        max_results: int = 5,
+        deadline: Optional[float] = None,
+        enough: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Search every engine for the query, then for up to two expansions while
+        the results fall short of `enough`.
+
+        Returns the deduplicated results gathered within `deadline` seconds, in
+        (query variation, engine order) order. Returns early once `enough`
+        deduplicated results (default 2 * max_results) have arrived.
+        """
+        return self.search_with_info(query, max_results=max_results, deadline=deadline, enough=enough)[0]
+
+    def search_with_info(
+        self,
+        query: str,
+        *,
+        max_results: int = 5,
+        deadline: Optional[float] = None,
+        enough: Optional[int] = None,
+    ) -> Tuple[List[Dict], Dict]:
+        """
+        Like search(), also returning cache info: {cache_hits, stale_hits, misses,
+        age_seconds}, where age_seconds is the age of the oldest cached result used.
+        """
+        deadline_at = time.monotonic() + (RESEARCH_DEADLINE if deadline is None else deadline)
+        enough = enough or max_results * 2
+        queries = self._expand_query(query)[:3]
+        engines = self.engine_order()
+        info = {"cache_hits": 0, "stale_hits": 0, "misses": 0, "age_seconds": 0.0}
+
+        done_results: Dict[Tuple[int, int], List[Dict]] = {}
+        misses = []
+        for qi, q in enumerate(queries):
+            for ei, name in enumerate(engines):
+                limit = 1 if name == "wikipedia" else max_results
+                cached = self._cached(name, q, limit)
+                if cached is not None:
+                    done_results[(qi, ei)] = cached.results
+                    info["stale_hits" if cached.stale else "cache_hits"] += 1
+                    info["age_seconds"] = max(info["age_seconds"], round(cached.age, 1))
+                    continue
+                info["misses"] += 1
+                misses.append(((qi, ei), name, q, limit))
+        if len(self._dedupe(self._collect(done_results))) >= enough:
+            return self._dedupe(self._collect(done_results)), info  # answered from cache; nothing fetched
+
+        # The query first; an expansion is only fetched if the variants before it fell short
+        pool = self._pool()
+        for qi in range(len(queries)):
+            futures = {
+                pool.submit(self._run_engine, name, q, limit, deadline_at): key
+                for key, name, q, limit in misses if key[0] == qi
+            }
+            pending = set(futures)
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done_results[futures[future]] = future.result()
+                if len(self._dedupe(self._collect(done_results))) >= enough:
+                    break
+            for future in pending:
+                future.cancel()  # not started yet; running requests end by the deadline
+            if pending or len(self._dedupe(self._collect(done_results))) >= enough:
+                break  # enough results, or out of time
+
+        return self._dedupe(self._collect(done_results)), info
+
+    def _cache_store(self):
+        if self._cache is None and get_research_cache is not None:
+            self._cache = get_research_cache()
+        return self._cache
+
+    def _cached(self, name: str, query: str, max_results: int):
+        """Cached results for one engine, scheduling a refresh when they are stale."""
+        cache = self._cache_store()
+        if cache is None:
+            return None
+        key = f"{name}:{max_results}"
+        try:
+            hit = cache.lookup(query, key)
+        except Exception as e:
+            print(f"[ResearchLite] Research cache lookup failed: {e}")
+            return None
+        if hit is not None and hit.stale:
+            cache.refresh(query, key, lambda: self._run_engine(
+                name, query, max_results, time.monotonic() + RESEARCH_DEADLINE, store=False))
+        return hit
+
+    @staticmethod
+    def _collect(done_results: Dict[Tuple[int, int], List[Dict]]) -> List[Dict]:
+        out: List[Dict] = []
+        for key in sorted(done_results):
+            out.extend(done_results[key])
+        return out
 
-    def search(self, query: str, *, max_results: int = 5) -> List[Dict]:
-        # Enhanced search with query expansion and reformulation
-        expanded_queries = self._expand_query(query)
-
-        all_results = []
-        for expanded_query in expanded_queries[:3]:  # Try up to 3 variations
-            results = self._search_single_query(expanded_query, max_results=max_results)
-            all_results.extend(results)
-
-            # If we got good results from the first query, don't try expansions
-            if len(results) >= max_results and expanded_query == query:
-                break
-
-        return self._dedupe(all_results)
+    def _run_engine(self, name: str, query: str, max_results: int, deadline_at: float,
+                    store: bool = True) -> List[Dict]:
+        """Run one engine request within the search deadline, recording its latency and outcome."""
+        timeout = min(RESEARCH_REQUEST_TIMEOUT, deadline_at - time.monotonic())
+        if timeout <= 0.05:
+            return []
+        started = time.monotonic()
+        ok = True
+        try:
+            results = self._engines[name](query, max_results=max_results, timeout=timeout, deadline_at=deadline_at)
+        except Exception as e:
+            ok = False
+            print(f"[ResearchLite] {name} failed for {query!r}: {e}")
+            return []
+        finally:
+            with self._stats_lock:
+                self._stats[name].record(time.monotonic() - started, ok)
+        cache = self._cache_store() if store else None
+        if cache is not None:
+            try:
+                cache.store(query, f"{name}:{max_results}", results)
+            except Exception as e:
+                print(f"[ResearchLite] Could not cache {name} results: {e}")
+        return results
 
     def _expand_query(self, query: str) -> List[str]:
         """Generate query variations for better search results."""
@@ -78,16 +298,17 @@ class ResearchEngineLite:
         if any(word in query_lower for word in ['latest', 'recent', 'new', 'current', '2024', '2025']):
             expansions.append(f"{query} latest updates")
 
-        return list(set(expansions))  # Remove duplicates
+        return list(dict.fromkeys(expansions))  # Remove duplicates, original first
 
-    def _search_single_query(self, query: str, *, max_results: int = 5) -> List[Dict]:
-        """Search with a single query across all engines."""
-        out: List[Dict] = []
-        out.extend(self._search_google_html(query, max_results=max_results))
-        out.extend(self._search_bing_html(query, max_results=max_results))
-        out.extend(self._search_duckduckgo_html(query, max_results=max_results))
-        out.extend(self._search_wikipedia(query, max_results=1))
-        return out
+    def _get(self, url: str, *, timeout: float, **kwargs) -> requests.Response:
+        """GET on the pooled session; non-200 responses count as engine failures."""
+        r = self._session.get(url, timeout=timeout, **kwargs)
+        if r.status_code != 200:
+            raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+        return r
+
+    def _html_headers(self) -> Dict[str, str]:
+        return {"User-Agent": self._ua, "Accept-Language": "en-US,en;q=0.9"}
 
     def _reformulate_query(self, original_query: str, initial_results: List[Dict]) -> str:
         """Reformulate query based on initial search results."""
@@ -140,21 +361,24 @@ class ResearchEngineLite:
             uniq.append(it)
         return uniq
 
-    def _search_wikipedia(self, query: str, max_results: int = 1) -> List[Dict]:
+    def _search_wikipedia(self, query: str, max_results: int = 1, *, timeout: float = 10,
+                          deadline_at: Optional[float] = None) -> List[Dict]:
         cleaner = get_response_cleaner()
         out: List[Dict] = []
         api = "https://en.wikipedia.org/w/api.php"
         params = {"action": "query", "list": "search", "srsearch": query, "srlimit": max_results, "format": "json"}
-        r = requests.get(api, params=params, timeout=10)
-        if r.status_code != 200:
-            return out
+        r = self._get(api, params=params, timeout=timeout)
         hits = ((r.json().get('query') or {}).get('search') or [])[:max_results]
         for hit in hits:
             title = hit.get('title')
             if not title:
                 continue
+            # The summary is a second round trip: only make it if the deadline allows
+            summary_timeout = timeout if deadline_at is None else min(timeout, deadline_at - time.monotonic())
+            if summary_timeout <= 0.05:
+                break
             summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{quote_plus(title)}"
-            rs = requests.get(summary_url, timeout=10)
+            rs = self._session.get(summary_url, timeout=summary_timeout)
             if rs.status_code != 200:
                 continue
             sd = rs.json()
@@ -174,13 +398,12 @@ class ResearchEngineLite:
                 })
         return out
 
-    def _search_duckduckgo_html(self, query: str, max_results: int = 5) -> List[Dict]:
+    def _search_duckduckgo_html(self, query: str, max_results: int = 5, *, timeout: float = 15,
+                                deadline_at: Optional[float] = None) -> List[Dict]:
         cleaner = get_response_cleaner()
         out: List[Dict] = []
         url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-        r = requests.get(url, headers={"User-Agent": self._ua, "Accept-Language": "en-US,en;q=0.9"}, timeout=15)
-        if r.status_code != 200:
-            return out
+        r = self._get(url, headers=self._html_headers(), timeout=timeout)
         soup = BeautifulSoup(r.text, 'html.parser')
         results = soup.find_all('div', class_='result')[: max_results + 6]
         for res in results:
@@ -208,13 +431,12 @@ class ResearchEngineLite:
             })
         return out
 
-    def _search_bing_html(self, query: str, max_results: int = 5) -> List[Dict]:
+    def _search_bing_html(self, query: str, max_results: int = 5, *, timeout: float = 15,
+                          deadline_at: Optional[float] = None) -> List[Dict]:
         cleaner = get_response_cleaner()
         out: List[Dict] = []
         url = f"https://www.bing.com/search?q={quote_plus(query)}&count={max_results}&setlang=en-US&cc=US"
-        r = requests.get(url, headers={"User-Agent": self._ua, "Accept-Language": "en-US,en;q=0.9"}, timeout=15)
-        if r.status_code != 200:
-            return out
+        r = self._get(url, headers=self._html_headers(), timeout=timeout)
         soup = BeautifulSoup(r.text, 'html.parser')
         results = soup.select('li.b_algo')[: max_results + 6]
         for item in results:
@@ -242,13 +464,12 @@ class ResearchEngineLite:
             })
         return out
 
-    def _search_google_html(self, query: str, max_results: int = 5) -> List[Dict]:
+    def _search_google_html(self, query: str, max_results: int = 5, *, timeout: float = 15,
+                            deadline_at: Optional[float] = None) -> List[Dict]:
         cleaner = get_response_cleaner()
         out: List[Dict] = []
         url = f"https://www.google.com/search?q={quote_plus(query)}&num={max_results}&hl=en&gl=us"
-        r = requests.get(url, headers={"User-Agent": self._ua, "Accept-Language": "en-US,en;q=0.9"}, timeout=15)
-        if r.status_code != 200:
-            return out
+        r = self._get(url, headers=self._html_headers(), timeout=timeout)
         soup = BeautifulSoup(r.text, 'html.parser')
         items = soup.select('div.tF2Cxc')[: max_results + 6]
         for item in items:
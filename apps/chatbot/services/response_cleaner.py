@@ -10,6 +10,35 @@ from __future__ import annotations
 import re
 from typing import Optional, Dict, List
 
+from .text_rules import Rule, RuleSet
+
+_WIKI_CLEANUP = RuleSet("wiki_cleanup", [
+    Rule(r'\s{2,}', ' '),
+    Rule(r'\(\s*\)', '', when='('),
+    Rule(r'\[\s*\]', '', when='['),
+])
+
+_GRAMMAR = RuleSet("grammar", [
+    Rule(r'\b(is|are|was|were)\s+\1\b', r'\1', re.IGNORECASE),
+    Rule(r'\b(the)\s+\1\b', r'\1', re.IGNORECASE),
+    Rule(r'^([A-Z][a-z]+)\s+\1\b', r'\1'),
+    Rule(r'([.!?]\s+)([a-z])', lambda m: m.group(1) + m.group(2).upper(), when=('.', '!', '?')),
+    Rule(r'\.{2,}', '.', when='..'),
+])
+
+_SENTENCE_END = re.compile(r'[.!?](?:\s|$)')
+_MULTI_SPACE = Rule(r'\s{2,}', ' ')
+
+_FACTUAL_LEADS = RuleSet("factual_leads", [
+    Rule(r'^Official\s+\w+.*?website\s*[-–—]?\s*', '', re.IGNORECASE),
+    Rule(r'^\w+\s+Official.*?[-–—]\s*', '', re.IGNORECASE),
+    Rule(r'^.*?(live\s+matches|scores|news|highlights|rankings|videos).*?[-–—,]', '', re.IGNORECASE),
+])
+
+
+def _compile_all(patterns: List[str], flags: int = re.IGNORECASE) -> List["re.Pattern"]:
+    return [re.compile(p, flags) for p in patterns]
+
 
 class ResponseCleaner:
     """Cleans and validates AI responses to ensure quality output."""
@@ -46,12 +75,19 @@ class ResponseCleaner:
             r'(Official .* website)',
         ]
 
+        # Compiled once here; the string lists above stay the editable source
+        self._corruption_res = _compile_all(self.corruption_patterns)
+        self._wiki_rules = RuleSet("wiki_artifacts", [Rule(p, '', re.IGNORECASE) for p in self.wiki_artifacts])
+        self._promotional_rules = RuleSet(
+            "promotional", [Rule(p, '', re.IGNORECASE) for p in self.promotional_patterns]
+        )
+
     def is_corrupted(self, text: str) -> bool:
         if not text:
             return True
         text_lower = text.lower()
-        for pattern in self.corruption_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
+        for pattern in self._corruption_res:
+            if pattern.search(text_lower):
                 return True
         words = text_lower.split()
         if len(words) > 5:
@@ -70,21 +106,14 @@ class ResponseCleaner:
     def clean_wikipedia_artifacts(self, text: str) -> str:
         if not text:
             return text
-        cleaned = text
-        for pattern in self.wiki_artifacts:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'\s{2,}', ' ', cleaned)
-        cleaned = re.sub(r'\(\s*\)', '', cleaned)
-        cleaned = re.sub(r'\[\s*\]', '', cleaned)
+        cleaned = self._wiki_rules.apply(text)
+        cleaned = _WIKI_CLEANUP.apply(cleaned)
         return cleaned.strip()
 
     def clean_promotional_content(self, text: str) -> str:
         if not text:
             return text
-        cleaned = text
-        for pattern in self.promotional_patterns:
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        return cleaned.strip()
+        return self._promotional_rules.apply(text).strip()
 
     def fix_grammar_issues(self, text: str) -> str:
         if not text:
@@ -92,11 +121,7 @@ class ResponseCleaner:
         words = text.split()
         if len(words) >= 2 and words[0].lower() == words[1].lower():
             text = ' '.join(words[1:])
-        text = re.sub(r'\b(is|are|was|were)\s+\1\b', r'\1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(the)\s+\1\b', r'\1', text, flags=re.IGNORECASE)
-        text = re.sub(r'^([A-Z][a-z]+)\s+\1\b', r'\1', text)
-        text = re.sub(r'([.!?]\s+)([a-z])', lambda m: m.group(1) + m.group(2).upper(), text)
-        text = re.sub(r'\.{2,}', '.', text)
+        text = _GRAMMAR.apply(text)
         if text and text[0].islower():
             text = text[0].upper() + text[1:]
         return text.strip()
@@ -106,7 +131,7 @@ class ResponseCleaner:
             return text
         if not text.rstrip().endswith(('.', '!', '?', '...')):
             last_good_end = -1
-            for match in re.finditer(r'[.!?](?:\s|$)', text):
+            for match in _SENTENCE_END.finditer(text):
                 last_good_end = match.end()
             if last_good_end > len(text) * 0.5:
                 text = text[:last_good_end].strip()
@@ -123,16 +148,14 @@ class ResponseCleaner:
         text = self.clean_promotional_content(text)
         text = self.fix_grammar_issues(text)
         text = self.fix_incomplete_sentences(text)
-        text = re.sub(r'\s{2,}', ' ', text).strip()
+        text = _MULTI_SPACE.apply(text).strip()
         return text
 
     def format_factual_response(self, content: str, entity: Optional[str] = None) -> str:
         if not content:
             return ""
         content = self.clean_response(content)
-        content = re.sub(r'^Official\s+\w+.*?website\s*[-–—]?\s*', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'^\w+\s+Official.*?[-–—]\s*', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'^.*?(live\s+matches|scores|news|highlights|rankings|videos).*?[-–—,]', '', content, flags=re.IGNORECASE)
+        content = _FACTUAL_LEADS.apply(content)
         if len(content.strip()) < 20:
             return ""
         content = content.strip()
@@ -1,12 +1,165 @@
 """
-Minimal semantic relevance scorer: keyword overlap and simple scoring.
+Semantic relevance scorer over hashed term vectors.
 Provides get_semantic_scorer() for use by knowledge_reranker and app.
+
+Query and knowledge text are tokenized into words and adjacent-word bigrams,
+and each term is hashed (crc32) into a fixed 2**20-bucket feature space. A
+knowledge item's vector is the set of its term buckets plus its lowercased
+text. Vectors are cached by text in an LRU, so brain entries and gem sources
+that come back request after request are only vectorized once. Gem sources
+can be warmed up front with precompute().
+
+The score is the IDF-weighted fraction of the query that an item covers:
+- a query word present as a token counts fully
+- a query word found only inside a longer word ("learn" in "learning")
+  counts half
+- matched query bigrams add a small phrase bonus
+
+IDF comes from document frequencies over the candidate list being scored,
+so a score depends only on the query and that list, not on what else the
+process has seen (a single item scores with every word weighted alike).
+Common stopwords
+are left out of the query unless nothing else is left. Scores stay in
+[0, 1], like the keyword-overlap ratio this replaces, so existing thresholds
+(0.3/0.35 in app.py) keep their meaning.
+
+No network, GPU or third-party packages: this shim must stay deployable
+without Thor's ML stack.
 """
-from typing import Dict, List, Any, Optional
+import heapq
+import math
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Any, Optional, Sequence, Tuple
+
+HASH_BITS = 20
+_MASK = (1 << HASH_BITS) - 1
+DOCUMENT_CACHE_SIZE = 8192
+
+# Share of the score carried by query bigrams (phrase matches), when the query has any
+_BIGRAM_WEIGHT = 0.15
+# Credit for a query word that only occurs inside a longer word
+_SUBSTRING_CREDIT = 0.5
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+
+_STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am", "do", "does", "did",
+    "of", "to", "in", "on", "at", "for", "with", "by", "from", "as", "and", "or", "but",
+    "it", "its", "this", "that", "these", "those", "i", "me", "my", "you", "your", "we",
+    "what", "which", "who", "whom", "how", "why", "when", "where", "can", "could",
+    "would", "should", "will", "about", "tell", "please", "some", "any",
+})
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & _MASK
+
+
+def _item_text(item: Dict[str, Any]) -> str:
+    return (
+        (item.get("content") or "")
+        + " "
+        + (item.get("title") or "")
+        + " "
+        + (item.get("query") or "")
+    ).lower()
+
+
+class _DocumentVector:
+    __slots__ = ("text", "terms")
+
+    def __init__(self, text: str):
+        tokens = _TOKEN.findall(text)
+        self.text = text
+        self.terms: FrozenSet[int] = frozenset(
+            [_bucket(t) for t in tokens] + [_bucket(a + " " + b) for a, b in zip(tokens, tokens[1:])]
+        )
+
+
+class _QueryVector:
+    __slots__ = ("words", "bigrams")
+
+    def __init__(self, query: str):
+        tokens = _TOKEN.findall(query.lower())
+        content = [t for t in tokens if t not in _STOPWORDS] or tokens
+        # (word, bucket), unique in first-seen order
+        self.words: Tuple[Tuple[str, int], ...] = tuple((w, _bucket(w)) for w in dict.fromkeys(content))
+        self.bigrams: Tuple[int, ...] = tuple(dict.fromkeys(
+            _bucket(a + " " + b) for a, b in zip(tokens, tokens[1:])
+            if a not in _STOPWORDS and b not in _STOPWORDS
+        ))
+
+
+@lru_cache(maxsize=1024)
+def _query_vector(query: str) -> _QueryVector:
+    return _QueryVector(query)
 
 
 class _SemanticScorer:
-    """Simple scorer: keyword overlap between query and item content."""
+    """IDF-weighted query coverage over cached, hashed term vectors."""
+
+    def __init__(self, cache_size: int = DOCUMENT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._documents: "OrderedDict[str, _DocumentVector]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # -- document vectors -------------------------------------------------
+
+    def _vector(self, text: str) -> _DocumentVector:
+        with self._lock:
+            doc = self._documents.get(text)
+            if doc is not None:
+                self._documents.move_to_end(text)
+                self._hits += 1
+                return doc
+        doc = _DocumentVector(text)
+        with self._lock:
+            if text in self._documents:
+                return self._documents[text]
+            self._misses += 1
+            self._documents[text] = doc
+            while len(self._documents) > self.cache_size:
+                self._documents.popitem(last=False)
+        return doc
+
+    def precompute(self, knowledge: Sequence[Dict[str, Any]]) -> int:
+        """Vectorize items ahead of scoring (e.g. a gem's sources); returns how many."""
+        for item in knowledge:
+            self._vector(_item_text(item))
+        return len(knowledge)
+
+    @staticmethod
+    def _idf_weights(q: _QueryVector, docs: Sequence[_DocumentVector]) -> Tuple[float, ...]:
+        """Smoothed IDF of each query word over the candidate documents (flat for one item)."""
+        if len(docs) < 2:
+            return (1.0,) * len(q.words)
+        n = float(len(docs))
+        return tuple(
+            math.log((1.0 + n) / (1.0 + sum(1 for doc in docs if bucket in doc.terms))) + 1.0
+            for _, bucket in q.words
+        )
+
+    # -- scoring ----------------------------------------------------------
+
+    @staticmethod
+    def _score(q: _QueryVector, weights: Tuple[float, ...], doc: _DocumentVector) -> float:
+        matched = 0.0
+        for (word, bucket), weight in zip(q.words, weights):
+            if bucket in doc.terms:
+                matched += weight
+            elif word in doc.text:
+                matched += weight * _SUBSTRING_CREDIT
+        score = matched / sum(weights)
+        if q.bigrams:
+            phrase = sum(1 for b in q.bigrams if b in doc.terms) / len(q.bigrams)
+            score = (1.0 - _BIGRAM_WEIGHT) * score + _BIGRAM_WEIGHT * phrase
+        return score
 
     def calculate_semantic_score(
         self,
@@ -16,19 +169,25 @@ class _SemanticScorer:
     ) -> float:
         if not query:
             return 0.0
-        text = (
-            (item.get("content") or "")
-            + " "
-            + (item.get("title") or "")
-            + " "
-            + (item.get("query") or "")
-        ).lower()
-        q = query.lower()
-        words = set(q.split())
-        if not words:
+        q = _query_vector(query)
+        if not q.words:
             return 0.0
-        hits = sum(1 for w in words if w in text)
-        return hits / len(words)
+        doc = self._vector(_item_text(item))
+        return self._score(q, self._idf_weights(q, (doc,)), doc)
+
+    def score_batch(
+        self,
+        query: str,
+        knowledge: Sequence[Dict[str, Any]],
+        query_intent: Optional[Dict[str, Any]] = None,
+    ) -> List[float]:
+        """calculate_semantic_score for every item, with the query vectorized once."""
+        q = _query_vector(query) if query else None
+        if q is None or not q.words:
+            return [0.0] * len(knowledge)
+        docs = [self._vector(_item_text(item)) for item in knowledge]
+        weights = self._idf_weights(q, docs)
+        return [self._score(q, weights, doc) for doc in docs]
 
     def filter_knowledge_by_relevance(
         self,
@@ -40,11 +199,37 @@ class _SemanticScorer:
         """Return list of (score, item) sorted by score descending."""
         if not knowledge:
             return []
-        scored = [(self.calculate_semantic_score(query, item, query_intent), item) for item in knowledge]
-        scored = [(s, item) for s, item in scored if s >= min_score]
+        scores = self.score_batch(query, knowledge, query_intent)
+        scored = [(s, item) for s, item in zip(scores, knowledge) if s >= min_score]
         scored.sort(key=lambda x: -x[0])
         return scored
 
+    def top_k(
+        self,
+        query: str,
+        knowledge: List[Dict[str, Any]],
+        k: int = 5,
+        query_intent: Optional[Dict[str, Any]] = None,
+        min_score: float = 0.0,
+    ) -> List[tuple]:
+        """The k best (score, item) pairs, without sorting the whole list."""
+        if not knowledge or k <= 0:
+            return []
+        scores = self.score_batch(query, knowledge, query_intent)
+        best = heapq.nlargest(k, range(len(knowledge)), key=scores.__getitem__)
+        return [(scores[i], knowledge[i]) for i in best if scores[i] >= min_score]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "documents": len(self._documents),
+                "capacity": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
 
 _scorer: Optional[_SemanticScorer] = None
 
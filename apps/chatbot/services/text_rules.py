@@ -0,0 +1,108 @@
+"""
+Precompiled rewrite rules for the response post-processing chain.
+
+After generation a response passes through the answer refiner, the accuracy
+check, the final formatter and the response cleaner, each applying its own
+regex substitutions. Written inline as re.sub(pattern, ...), every call
+looks the pattern up in re's small internal cache (recompiling once it
+overflows) and scans the whole response even when it could not match: there
+is nothing to un-bullet in a response without "-", and no doubled periods
+without "..".
+
+Stages declare their substitutions as Rules instead. A Rule is compiled once
+at import and may carry a cheap guard: substrings, at least one of which must
+occur in the text, or a predicate. When the guard fails the regex is skipped.
+A RuleSet applies rules in order and can be guarded as a whole. literal_rule()
+merges many fixed-string replacements (contractions, emphasis words) into a
+single alternation, so they cost one pass instead of one pass each.
+
+Usage:
+    SQUASH = RuleSet("whitespace", [
+        Rule(r"[ \\t]{2,}", " ", when=("  ", "\\t")),
+        Rule(r"\\n{3,}", "\\n\\n", when="\\n\\n\\n"),
+    ])
+    text = SQUASH.apply(text)
+"""
+import re
+from typing import Callable, Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+Guard = Union[None, str, Sequence[str], Callable[[str], bool]]
+Replacement = Union[str, Callable[["re.Match"], str]]
+
+
+def _guard_passes(guard: Guard, text: str) -> bool:
+    if guard is None:
+        return True
+    if isinstance(guard, str):
+        return guard in text
+    if callable(guard):
+        return guard(text)
+    return any(s in text for s in guard)
+
+
+class Rule:
+    """One compiled substitution, skipped when its guard does not match the text."""
+
+    __slots__ = ("pattern", "repl", "when", "count")
+
+    def __init__(self, pattern: Union[str, "re.Pattern"], repl: Replacement, flags: int = 0,
+                 when: Guard = None, count: int = 0):
+        self.pattern = re.compile(pattern, flags) if isinstance(pattern, str) else pattern
+        self.repl = repl
+        self.when = when
+        self.count = count
+
+    def apply(self, text: str) -> str:
+        if not text or not _guard_passes(self.when, text):
+            return text
+        return self.pattern.sub(self.repl, text, self.count)
+
+    def search(self, text: str) -> Optional["re.Match"]:
+        if not text or not _guard_passes(self.when, text):
+            return None
+        return self.pattern.search(text)
+
+    def __repr__(self) -> str:
+        return f"Rule({self.pattern.pattern!r})"
+
+
+class RuleSet:
+    """Rules applied in order; the whole set is skipped when its guard fails."""
+
+    __slots__ = ("name", "rules", "when")
+
+    def __init__(self, name: str, rules: Iterable[Rule], when: Guard = None):
+        self.name = name
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self.when = when
+
+    def apply(self, text: str) -> str:
+        if not text or not _guard_passes(self.when, text):
+            return text
+        for rule in self.rules:
+            text = rule.apply(text)
+        return text
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+def literal_rule(mapping: Mapping[str, str], flags: int = 0, word_boundary: bool = True,
+                 guard: bool = False) -> Rule:
+    """
+    One rule replacing every key of `mapping` with its value in a single pass.
+
+    Equivalent to applying the replacements one after another as long as no
+    replacement creates a new match for another key. Longer keys are tried first.
+    With guard=True the rule is skipped unless some key occurs verbatim (only
+    sound for case-sensitive mappings).
+    """
+    keys = sorted(mapping, key=len, reverse=True)
+    body = "|".join(re.escape(k) for k in keys)
+    pattern = rf"\b(?:{body})\b" if word_boundary else f"(?:{body})"
+    if flags & re.IGNORECASE:
+        lookup = {k.lower(): v for k, v in mapping.items()}
+        repl: Replacement = lambda m: lookup[m.group(0).lower()]
+    else:
+        repl = lambda m: mapping[m.group(0)]
+    return Rule(pattern, repl, flags, when=tuple(keys) if guard else None)
@@ -9,6 +9,25 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import re
 
+from services.keyword_matcher import KeywordMatcher
+
+_PREFERENCE_CATEGORIES = {
+    "technology": ["python", "javascript", "java", "react", "node", "code", "programming", "software", "app"],
+    "languages": ["english", "spanish", "french", "german", "language"],
+    "format": ["markdown", "json", "csv", "table", "list", "bullet", "paragraph"],
+    "style": ["detailed", "brief", "simple", "complex", "formal", "casual"],
+    "interests": ["music", "movies", "books", "games", "sports", "travel", "food", "cooking"],
+}
+_PREFERENCE_LEXICON = KeywordMatcher(_PREFERENCE_CATEGORIES)
+
+_FACT_CATEGORIES = {
+    "profession": ["work", "job", "developer", "engineer", "designer"],
+    "location": ["from", "live", "located", "country", "city"],
+    "education": ["study", "student", "university", "college"],
+    "possessions": ["have", "own", "use"],
+}
+_FACT_LEXICON = KeywordMatcher(_FACT_CATEGORIES)
+
 
 class UserMemory:
     """Manages user preferences and information across all chats"""
@@ -51,9 +70,9 @@ class UserMemory:
         except Exception as e:
             print(f"[User Memory] Error saving memory: {e}")
     
-    def extract_preferences_from_message(self, message: str, response: str = None):
-        """Extract user preferences from messages"""
-        message_lower = message.lower()
+    def extract_preferences_from_message(self, message: str, response: str = None, analysis=None):
+        """Extract user preferences from messages (reusing the message's MessageAnalysis when given)"""
+        message_lower = analysis.lower if analysis is not None else message.lower()
         
         # Extract preferences (e.g., "I prefer", "I like", "I don't like")
         preference_patterns = [
@@ -109,36 +128,24 @@ class UserMemory:
     
     def _categorize_preference(self, preference: str) -> Optional[str]:
         """Categorize a preference"""
-        pref_lower = preference.lower()
-        categories = {
-            "technology": ["python", "javascript", "java", "react", "node", "code", "programming", "software", "app"],
-            "languages": ["english", "spanish", "french", "german", "language"],
-            "format": ["markdown", "json", "csv", "table", "list", "bullet", "paragraph"],
-            "style": ["detailed", "brief", "simple", "complex", "formal", "casual"],
-            "interests": ["music", "movies", "books", "games", "sports", "travel", "food", "cooking"],
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in pref_lower for keyword in keywords):
+        hits = _PREFERENCE_LEXICON.find(preference)
+        for category in _PREFERENCE_CATEGORIES:  # first listed category wins
+            if hits.has(category):
                 return category
         return "general"
     
     def _categorize_fact(self, fact: str) -> str:
         """Categorize a fact"""
-        fact_lower = fact.lower()
-        if any(word in fact_lower for word in ["work", "job", "developer", "engineer", "designer"]):
-            return "profession"
-        elif any(word in fact_lower for word in ["from", "live", "located", "country", "city"]):
-            return "location"
-        elif any(word in fact_lower for word in ["study", "student", "university", "college"]):
-            return "education"
-        elif any(word in fact_lower for word in ["have", "own", "use"]):
-            return "possessions"
+        hits = _FACT_LEXICON.find(fact)
+        for category in _FACT_CATEGORIES:  # first listed category wins
+            if hits.has(category):
+                return category
         return "general"
     
-    def get_relevant_context(self, query: str) -> str:
-        """Get relevant user context for a query"""
-        query_lower = query.lower()
+    def get_relevant_context(self, query: str, analysis=None) -> str:
+        """Get relevant user context for a query (reusing its MessageAnalysis when given)"""
+        query_lower = analysis.lower if analysis is not None else query.lower()
+        query_words = query_lower.split()[:5]
         context_parts = []
         
         # Check preferences
@@ -150,7 +157,7 @@ class UserMemory:
         relevant_facts = []
         for fact in self.memory["facts"][-10:]:  # Check recent facts
             fact_content = fact.get("content", "").lower()
-            if any(word in fact_content for word in query_lower.split()[:5]):
+            if any(word in fact_content for word in query_words):
                 relevant_facts.append(fact.get("content"))
         
         if relevant_facts:
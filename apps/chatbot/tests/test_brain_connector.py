@@ -0,0 +1,31 @@
+"""Runtime-learned brain items are capped, dropping the least recently used."""
+from brain import BrainConnector
+
+
+def _item(i):
+    return {"title": f"Fact {i}", "content": f"Learned fact number {i} about zebra{i}."}
+
+
+def test_learned_items_are_capped_lru(tmp_path):
+    brain = BrainConnector(tmp_path, max_learned=3)
+    for i in range(3):
+        assert brain.add_item(_item(i))
+    # Retrieving fact 0 makes it recent, so fact 1 is the one dropped next
+    assert brain.get_relevant_knowledge("zebra0", limit=1)[0]["title"] == "Fact 0"
+    assert brain.add_item(_item(3))
+
+    assert brain.item_count == 3
+    assert brain.get_relevant_knowledge("zebra1") == []
+    assert [k["title"] for k in brain.get_relevant_knowledge("zebra0")] == ["Fact 0"]
+    # A dropped item can be learned again
+    assert brain.add_item(_item(1))
+    assert brain.get_relevant_knowledge("zebra2") == []
+
+
+def test_removed_documents_leave_no_postings(tmp_path):
+    brain = BrainConnector(tmp_path, max_learned=1)
+    brain.add_item(_item(0))
+    brain.add_item(_item(1))
+    assert brain._index.n_docs == 1
+    assert brain._index.df("zebra0") == 0
+    assert brain._index.total_len == brain._index.doc_len(1)
@@ -0,0 +1,43 @@
+"""Brain shards answer duplicate checks from their key section, without a scan."""
+import json
+
+import pytest
+
+from brain import BrainConnector
+from brain.shard_store import ShardReader, convert_json_shards
+
+
+def _item(i):
+    return {"title": f"Topic {i}", "content": f"Some content about topic {i}.", "url": f"https://example.com/{i}"}
+
+
+@pytest.fixture
+def brain_dir(tmp_path):
+    for letter, items in (("A", [_item(i) for i in range(20)]), ("B", [_item(i) for i in range(20, 30)])):
+        (tmp_path / letter).mkdir()
+        (tmp_path / letter / "keywords.json").write_text(json.dumps({"knowledge": items}), encoding="utf-8")
+    convert_json_shards(tmp_path)
+    return tmp_path
+
+
+def test_add_item_checks_shards_without_scanning_them(brain_dir, monkeypatch):
+    monkeypatch.setattr(ShardReader, "key_hashes", lambda self: pytest.fail("shard key table was scanned"))
+    brain = BrainConnector(brain_dir)
+    assert brain.item_count == 30
+
+    assert not brain.add_item(_item(3))
+    assert not brain.add_item(_item(25))
+    assert brain.add_item(_item(99))
+    assert not brain.add_item(_item(99))
+    assert brain.item_count == 31
+    assert brain.get_relevant_knowledge("topic 99", limit=1)[0]["title"] == "Topic 99"
+
+
+def test_has_key_matches_key_hashes(brain_dir):
+    shard = ShardReader(brain_dir / "A" / "knowledge.shard")
+    try:
+        keys = shard.key_hashes()
+        assert all(shard.has_key(k) for k in keys)
+        assert not any(shard.has_key(k ^ 1) for k in keys if k ^ 1 not in keys)
+    finally:
+        shard.close()
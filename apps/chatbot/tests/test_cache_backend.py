@@ -0,0 +1,42 @@
+"""Cache backends share one abstract interface and honour their size limits."""
+import pytest
+
+from app_utils.cache_backend import CacheBackend, MemoryBackend, SQLiteBackend
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key, default=None):
+            return default
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_sqlite_backend_enforces_max_bytes(tmp_path):
+    cache = SQLiteBackend(str(tmp_path / "cache.sqlite3"), "responses", max_entries=0, max_bytes=100,
+                          prune_every=1)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 28)  # 30 bytes once JSON-encoded
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["max_bytes"] == 100
+    assert [cache.get(f"k{i}") is not None for i in range(10)] == [False] * 7 + [True] * 3
+
+
+def test_sqlite_backend_without_byte_limit_keeps_entries(tmp_path):
+    cache = SQLiteBackend(str(tmp_path / "cache.sqlite3"), "rate_limit", max_entries=5, prune_every=1)
+    for i in range(5):
+        assert cache.incr(f"ip{i}") == 1
+    assert cache.incr("ip4", 2) == 3
+    assert cache.stats()["entries"] == 5
+
+
+def test_memory_backend_is_a_cache_backend():
+    cache = MemoryBackend("memory-test", max_entries=2)
+    assert isinstance(cache, CacheBackend)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
@@ -0,0 +1,72 @@
+"""ChatStore recovery from a torn log line, and metadata index migration."""
+import json
+
+from app_utils.chat_index import ChatMetaIndex
+from app_utils.chat_store import ChatStore, INDEX_FILENAME
+
+
+def _message(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+
+
+def test_append_after_torn_line_keeps_every_message(tmp_path):
+    store = ChatStore(str(tmp_path), index=None)
+    messages = [_message(i) for i in range(2)]
+    store.save("c1", messages, {"name": "torn"})
+    messages += [_message(2), _message(3)]
+    store.save("c1", messages, {"name": "torn"})
+
+    # Crash in the middle of writing the next record
+    with open(store.log_path("c1"), "a", encoding="utf-8") as f:
+        f.write('{"op": "append", "index": 4, "mess')
+
+    reopened = ChatStore(str(tmp_path), index=None)
+    assert len(reopened.load("c1")["messages"]) == 4
+    messages += [_message(4), _message(5)]
+    reopened.save("c1", messages, {"name": "torn"})
+
+    assert ChatStore(str(tmp_path), index=None).load("c1")["messages"] == messages
+    with open(store.log_path("c1"), encoding="utf-8") as f:
+        assert f.read().endswith("\n")
+
+
+def test_replay_skips_undecodable_line_but_stops_at_gap(tmp_path):
+    store = ChatStore(str(tmp_path), index=None)
+    store.save("c2", [_message(0)], {})
+    with open(store.log_path("c2"), "w", encoding="utf-8") as f:
+        f.write('{"op": "append", "index": 1, "message": {"content": "a"}}\n')
+        f.write('{"op": "app\n')
+        f.write('{"op": "append", "index": 2, "message": {"content": "b"}}\n')
+        f.write('{"op": "append", "index": 4, "message": {"content": "gap"}}\n')
+
+    contents = [m["content"] for m in store.load("c2")["messages"]]
+    assert contents == ["message 0", "a", "b"]
+
+
+def test_last_line_end_scans_back_across_chunks(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes(b"first\n" + b"x" * 50)
+    with open(path, "rb") as f:
+        assert ChatStore._last_line_end(f, 56, chunk=8) == 6
+        assert ChatStore._last_line_end(f, 5, chunk=8) == 0
+
+
+def test_index_migration_backfills_unnamed_chats(tmp_path):
+    # A legacy chat file saved before chats were named
+    (tmp_path / "old.json").write_text(json.dumps({"chat_id": "old", "messages": [_message(0), _message(1)]}),
+                                       encoding="utf-8")
+    (tmp_path / "empty.json").write_text(json.dumps({"chat_id": "empty", "messages": []}), encoding="utf-8")
+    index = ChatMetaIndex(str(tmp_path / INDEX_FILENAME))
+    store = ChatStore(str(tmp_path), index=index)
+
+    def namer(messages):
+        return f"About {messages[0]['content']}"
+
+    assert store.reconcile_index(namer) == 2
+    assert index.version == ChatMetaIndex.VERSION
+    names = {c["chat_id"]: c["name"] for c in index.list()}
+    assert names == {"old": "About message 0", "empty": "New Chat"}
+    assert ChatStore(str(tmp_path), index=None).load("old")["name"] == "About message 0"
+
+    # Up to date: nothing to rebuild
+    assert store.reconcile_index(namer) == 0
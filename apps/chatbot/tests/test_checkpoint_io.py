@@ -0,0 +1,44 @@
+"""torch_load_hook only patches torch.load while a model is being built; stale conversions are skipped."""
+import os
+
+import pytest
+
+from app_utils.checkpoint_io import find_safetensors_checkpoint, torch_load_hook
+
+
+def test_hook_restores_torch_load():
+    torch = pytest.importorskip("torch")
+    original = torch.load
+    with torch_load_hook() as active:
+        assert active
+        assert torch.load is not original
+        assert torch.load.__wrapped__ is original
+        with torch_load_hook():
+            pass
+        assert torch.load is not original  # still held by the outer hook
+    assert torch.load is original
+
+
+def test_hook_restores_torch_load_on_error():
+    torch = pytest.importorskip("torch")
+    original = torch.load
+    with pytest.raises(RuntimeError):
+        with torch_load_hook():
+            raise RuntimeError("build failed")
+    assert torch.load is original
+
+
+def test_find_safetensors_checkpoint_skips_stale_conversion(tmp_path):
+    converted = tmp_path / "final_model.safetensors"
+    pickled = tmp_path / "final_model.pt"
+    assert find_safetensors_checkpoint(str(tmp_path)) is None
+
+    converted.write_bytes(b"")
+    assert find_safetensors_checkpoint(str(tmp_path)) == str(converted)
+    pickled.write_bytes(b"")
+    os.utime(pickled, (1000, 1000))
+    os.utime(converted, (1000, 1000))
+    assert find_safetensors_checkpoint(str(tmp_path)) == str(converted)
+
+    os.utime(pickled, (2000, 2000))  # retrained after the conversion
+    assert find_safetensors_checkpoint(str(tmp_path)) is None
@@ -0,0 +1,98 @@
+"""Compact (int8/int4) safetensors files map and dequantize back to their float weights."""
+import json
+import struct
+
+import pytest
+
+from app_utils.compact_weights import CompactWeights, find_compact_weights, load_compact_weights
+
+
+def _write_safetensors(path, tensors, metadata=None):
+    """tensors: {key: (dtype, shape, raw bytes)} in the safetensors layout."""
+    header, blobs, offset = {}, [], 0
+    for key, (dtype, shape, data) in tensors.items():
+        header[key] = {"dtype": dtype, "shape": list(shape), "data_offsets": [offset, offset + len(data)]}
+        blobs.append(data)
+        offset += len(data)
+    if metadata:
+        header["__metadata__"] = metadata
+    encoded = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)) + encoded + b"".join(blobs))
+    return str(path)
+
+
+def _per_tensor_file(path):
+    return _write_safetensors(path, {
+        "fc.weight": ("I8", (2, 3), struct.pack("<6b", -4, -2, 0, 1, 2, 127)),
+        "__qt_scale__fc.weight": ("F16", (), struct.pack("<e", 0.5)),
+        "fc.bias": ("F32", (2,), struct.pack("<2f", 1.0, -1.0)),
+    }, {"atlas_quant_scheme": "int8_sym_per_tensor_v1"})
+
+
+def test_header_keys_and_sizes(tmp_path):
+    weights = CompactWeights(_per_tensor_file(tmp_path / "r1.safetensors"))
+    try:
+        assert weights.quantized and weights.per_tensor
+        assert sorted(weights.keys()) == ["fc.bias", "fc.weight"]
+        assert "__qt_scale__fc.weight" not in weights
+        assert weights.shape("fc.weight") == (2, 3)
+        # 6 int8 + 2 fp16 scale + 8 bias on disk; 6 fp32 + 8 bias once dequantized
+        assert weights.size_bytes() == (16, 32)
+    finally:
+        weights.close()
+
+
+def test_unknown_scheme_is_rejected(tmp_path):
+    path = _write_safetensors(tmp_path / "r2.safetensors", {"w": ("I8", (1,), b"\x01")},
+                              {"atlas_quant_scheme": "int3_magic_v9"})
+    with pytest.raises(ValueError):
+        CompactWeights(path)
+
+
+def test_find_compact_weights_layouts(tmp_path):
+    flat = tmp_path / "r3"
+    flat.mkdir()
+    _per_tensor_file(flat / "r3.safetensors")
+    nested = tmp_path / "r4"
+    (nested / "weights").mkdir(parents=True)
+    _per_tensor_file(nested / "weights" / "r4.safetensors")
+
+    assert find_compact_weights(str(flat)) == str(flat / "r3.safetensors")
+    assert find_compact_weights(str(nested)) == str(nested / "weights" / "r4.safetensors")
+    assert load_compact_weights(str(tmp_path / "missing")) is None
+
+
+def test_per_tensor_dequantize(tmp_path):
+    torch = pytest.importorskip("torch")
+    weights = CompactWeights(_per_tensor_file(tmp_path / "r1.safetensors"))
+    expected = torch.tensor([[-2.0, -1.0, 0.0], [0.5, 1.0, 63.5]])
+    assert torch.equal(weights.tensor("fc.weight"), expected)
+    assert torch.equal(weights.tensor("fc.bias"), torch.tensor([1.0, -1.0]))
+
+
+def test_int4_group_dequantize(tmp_path):
+    torch = pytest.importorskip("torch")
+    # One row of 3 values (-1, 2, 7) in groups of 2: nibbles offset by 8, low nibble first
+    packed = bytes([(10 << 4) | 7, 15])
+    path = _write_safetensors(tmp_path / "r5.safetensors", {
+        "w": ("U8", (1, 2), packed),
+        "__qt_scale__w": ("F16", (1, 2), struct.pack("<2e", 0.5, 2.0)),
+        "__qt_shape__w": ("I64", (2,), struct.pack("<2q", 1, 3)),
+    }, {"atlas_quant_scheme": "int4_sym_group_v1", "atlas_quant_group_size": "2"})
+    weights = CompactWeights(path)
+    assert weights.shape("w") == (1, 3)
+    assert torch.equal(weights.tensor("w"), torch.tensor([[-0.5, 1.0, 14.0]]))
+
+
+def test_apply_compact_weights_swaps_linear(tmp_path):
+    torch = pytest.importorskip("torch")
+    from app_utils.compact_weights import apply_compact_weights
+
+    weights = CompactWeights(_per_tensor_file(tmp_path / "r1.safetensors"))
+    module = torch.nn.Sequential()
+    module.add_module("fc", torch.nn.Linear(3, 2))
+    counts = apply_compact_weights(module, weights)
+    assert counts["linear_int8"] == 1
+    out = module(torch.tensor([[1.0, 1.0, 1.0]]))
+    assert torch.allclose(out, torch.tensor([[-2.0, 64.0]]))
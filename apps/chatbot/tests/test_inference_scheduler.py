@@ -0,0 +1,78 @@
+"""Every request submitted to an InferenceScheduler gets a result or an exception."""
+import threading
+
+import pytest
+
+from app_utils.inference_scheduler import InferenceScheduler
+
+
+class _EchoModel:
+    def predict(self, text, task="text_generation", **kwargs):
+        return {"generated_text": text.upper()}
+
+
+class _ShortBatchModel(_EchoModel):
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict(self, text, task="text_generation", **kwargs):
+        self.release.wait(5)
+        return super().predict(text, task=task, **kwargs)
+
+    def predict_batch(self, texts, task="text_generation", max_new_tokens=None, **kwargs):
+        return [{"generated_text": t} for t in texts[:-1]]
+
+
+def test_unhashable_kwargs_still_run():
+    scheduler = InferenceScheduler("echo", _EchoModel(), max_batch=4, max_wait_ms=20)
+    try:
+        futures = [scheduler.submit("hi", stop=["\n"]), scheduler.submit("yo", stop={"a": 1})]
+        assert [f.result(timeout=5) for f in futures] == [{"generated_text": "HI"}, {"generated_text": "YO"}]
+    finally:
+        scheduler.close()
+
+
+def test_short_predict_batch_fails_every_request():
+    model = _ShortBatchModel()
+    scheduler = InferenceScheduler("short", model, max_batch=4, max_wait_ms=50)
+    try:
+        blocker = scheduler.submit("first", task="warmup")  # holds the worker so the next three batch together
+        futures = [scheduler.submit(text) for text in ("a", "b", "c")]
+        model.release.set()
+        assert blocker.result(timeout=5) == {"generated_text": "FIRST"}
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+    finally:
+        scheduler.close()
+
+
+def test_close_finishes_queued_work_and_rejects_new():
+    scheduler = InferenceScheduler("closing", _EchoModel(), max_batch=2, max_wait_ms=0)
+    futures = [scheduler.submit(str(i)) for i in range(5)]
+    scheduler.close()
+    scheduler.close()
+    assert [f.result(timeout=5)["generated_text"] for f in futures] == [str(i) for i in range(5)]
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late")
+
+
+def test_submit_racing_close_never_strands_a_future():
+    scheduler = InferenceScheduler("race", _EchoModel(), max_batch=8, max_wait_ms=1)
+    accepted = []
+
+    def client():
+        for i in range(200):
+            try:
+                accepted.append(scheduler.submit(str(i)))
+            except RuntimeError:
+                return
+
+    threads = [threading.Thread(target=client) for _ in range(4)]
+    for t in threads:
+        t.start()
+    scheduler.close()
+    for t in threads:
+        t.join()
+    for future in accepted:
+        assert future.result(timeout=5)["generated_text"]
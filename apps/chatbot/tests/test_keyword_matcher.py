@@ -0,0 +1,54 @@
+"""KeywordMatcher word-start matching and the lexicons that depend on inflected forms."""
+import importlib.util
+import os
+
+import pytest
+
+from refinement import intent_router
+from services.keyword_matcher import KeywordMatcher
+
+
+def test_keyword_must_start_a_word():
+    matcher = KeywordMatcher({"greeting": ["hi", "hello"], "farewell": ["bye"]})
+    hits = matcher.find("this says hellos")
+    assert hits.matched("greeting") == ["hello"]
+    assert "hi" not in hits
+
+
+def test_keyword_matches_inflected_forms():
+    matcher = KeywordMatcher(["kill", "error", "help"])
+    hits = matcher.find("Killing time, two errors, helping out")
+    assert hits.matched() == ["kill", "error", "help"]
+    assert hits.position("error") == 18
+
+
+def test_shorter_keyword_found_where_longer_one_matched():
+    hits = KeywordMatcher(["how do", "how do i"]).find("how do i start")
+    assert "how do" in hits and "how do i" in hits
+
+
+@pytest.mark.parametrize("text", [
+    "I keep thinking about killing myself",
+    "is it harmful",
+    "he murdered them",
+])
+def test_safety_lexicon_catches_inflections(text):
+    assert intent_router._detect_safety_sensitive(text)
+
+
+@pytest.mark.parametrize("text", ["getting errors", "app crashes"])
+def test_troubleshooting_catches_plurals(text):
+    assert intent_router._detect_troubleshooting(text)
+
+
+def test_examples_request():
+    assert intent_router._detect_modal_intent("give me examples")["asks_for_examples"]
+
+
+def test_user_memory_loads_by_file_path():
+    # app.py loads services/user_memory.py by path, outside the services package
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "user_memory.py")
+    spec = importlib.util.spec_from_file_location("user_memory", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module._PREFERENCE_LEXICON.find("I write python").matched("technology") == ["python"]
@@ -0,0 +1,195 @@
+"""
+Batch scoring and linear diversity sampling must rank exactly like the
+original per-item scorer and quadratic sampler, reproduced here as references.
+"""
+import math
+import random
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from refinement import knowledge_reranker as kr
+
+
+class _FixedSemanticScorer:
+    """Deterministic stand-in so both paths see the same semantic scores."""
+
+    def calculate_semantic_score(self, query, item, query_intent=None):
+        text = (item.get("content") or "") + (item.get("title") or "") + query
+        return (zlib.crc32(text.encode("utf-8")) % 1000) / 1000.0
+
+    def score_batch(self, query, knowledge, query_intent=None):
+        return [self.calculate_semantic_score(query, item, query_intent) for item in knowledge]
+
+
+# -- reference: the implementation before batch scoring ----------------------
+
+def _ref_recency_boost(timestamp, weight=0.1):
+    if not timestamp:
+        return 0.0
+    delta_days = max((datetime.utcnow() - timestamp).days, 0)
+    return weight * math.exp(-delta_days / 90.0)
+
+
+def _ref_query_specific_boost(query, item, query_intent):
+    boost = 0.0
+    query_lower = query.lower()
+    content_lower = item.get("content", "").lower()
+    source = item.get("source", "").lower()
+    if any(word in query_lower for word in ['how to', 'tutorial', 'guide', 'steps', 'install', 'setup']):
+        if any(tech_source in source for tech_source in ['wikipedia', 'brain', 'gem_source']):
+            boost += 0.15
+        if any(tech_indicator in content_lower for tech_indicator in ['step', 'first', 'then', 'install', 'run']):
+            boost += 0.1
+    if any(word in query_lower for word in ['vs', 'versus', 'compare', 'comparison', 'difference']):
+        if source in ['wikipedia', 'brain']:
+            boost += 0.12
+        if any(comp_word in content_lower for comp_word in ['compared to', 'versus', 'unlike', 'whereas']):
+            boost += 0.08
+    if any(word in query_lower for word in ['latest', 'recent', 'new', 'update', '2024', '2025']):
+        if source in ['google', 'duckduckgo', 'bing']:
+            boost += 0.05
+    intent = query_intent.get('intent', '') if query_intent else ''
+    if intent in ['factual', 'definition', 'biographical']:
+        if source == 'wikipedia':
+            boost += 0.1
+        elif source == 'brain':
+            boost += 0.08
+    return boost
+
+
+def _ref_temporal_relevance(query, item):
+    query_lower = query.lower()
+    timestamp = kr._parse_timestamp(item.get("timestamp") or item.get("updated_at") or item.get("last_updated"))
+    if not timestamp:
+        return 0.0
+    base_recency = _ref_recency_boost(timestamp, weight=0.08)
+    if any(k in query_lower for k in ['latest', 'recent', 'new', 'update', 'breaking', 'today', 'yesterday',
+                                      '2024', '2025', 'current', 'now', 'modern', 'contemporary']):
+        return _ref_recency_boost(timestamp, weight=0.16) - base_recency
+    if any(k in query_lower for k in ['technology', 'tech', 'ai', 'artificial intelligence', 'software',
+                                      'update', 'release', 'version', 'news', 'announcement']):
+        return _ref_recency_boost(timestamp, weight=0.12) - base_recency
+    return 0.0
+
+
+def _ref_score_all(scorer, query, items, query_intent):
+    scored = []
+    for item in items:
+        ts = item.get("timestamp") or item.get("updated_at") or item.get("last_updated")
+        source = item.get("source", "").lower()
+        total = (scorer.calculate_semantic_score(query, item, query_intent)
+                 + _ref_recency_boost(kr._parse_timestamp(ts), weight=0.08)
+                 + _ref_query_specific_boost(query, item, query_intent)
+                 + _ref_temporal_relevance(query, item)
+                 + kr._penalize_promotional(item.get("content", ""))
+                 + kr._penalize_low_content(item.get("content", ""))
+                 + (-0.02 if source in ['bing', 'google'] else 0.0))
+        scored.append((max(0.0, total), item))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return scored
+
+
+def _ref_diversity_sample(items, per_source=2, limit=6):
+    clusters = kr._cluster_by_source([itm for _, itm in items])
+    selected = []
+    source_scores = {}
+    for src, members in clusters.items():
+        if members:
+            source_scores[src] = sum(s for s, i in items if i in members) / len(members)
+    for src in sorted(source_scores, key=lambda s: source_scores[s], reverse=True):
+        members = clusters[src]
+        members_with_scores = [(score, item) for score, item in items if item in members]
+        members_with_scores.sort(key=lambda x: x[0], reverse=True)
+        selected.extend(item for _, item in members_with_scores[:per_source])
+        if len(selected) >= limit:
+            return selected[:limit]
+    remaining_needed = limit - len(selected)
+    if remaining_needed > 0:
+        used_sources = {item.get('source', 'unknown') for item in selected}
+        for score, item in items:
+            if item not in selected:
+                item_source = item.get('source', 'unknown')
+                if item_source not in used_sources or len(used_sources) >= 3:
+                    selected.append(item)
+                    used_sources.add(item_source)
+                    remaining_needed -= 1
+                    if remaining_needed <= 0:
+                        break
+    return selected[:limit]
+
+
+# -- fixtures ----------------------------------------------------------------
+
+_QUERIES = [
+    ("how to install python", {"intent": "instructional"}),
+    ("python vs java comparison", {"intent": "comparison"}),
+    ("latest ai news", {"intent": "factual"}),
+    ("software release version", {"intent": "definition"}),
+    ("who was ada lovelace", {"intent": "biographical"}),
+]
+_SOURCES = ["wikipedia", "brain", "google", "bing", "duckduckgo", "gem_source", "web"]
+_SNIPPETS = [
+    "First install the package, then run the setup step.",
+    "Python compared to Java is slower, whereas Java is verbose.",
+    "Click here to subscribe for a limited offer.",
+    "Short text.",
+    "The latest update to the software release brings new version features.",
+    "Ada Lovelace wrote the first published algorithm for a machine.",
+    "",
+]
+
+
+def _candidates(rng, n):
+    now = datetime.utcnow()
+    items = []
+    for i in range(n):
+        item = {
+            "title": f"Title {rng.randint(0, n)}",
+            "content": " ".join(rng.sample(_SNIPPETS, rng.randint(1, 3))),
+            "source": rng.choice(_SOURCES),
+        }
+        stamp = rng.choice(["str", "int", "iso", None])
+        if stamp == "str":
+            item["timestamp"] = (now - timedelta(days=rng.randint(0, 400))).strftime("%Y-%m-%d")
+        elif stamp == "int":
+            item["updated_at"] = (now - timedelta(days=rng.randint(0, 400))).timestamp()
+        elif stamp == "iso":
+            item["last_updated"] = (now - timedelta(days=rng.randint(0, 400))).strftime("%Y-%m-%dT%H:%M:%S")
+        items.append(item)
+        if rng.random() < 0.1:
+            items.append(dict(item))  # equal but distinct dict
+    return items
+
+
+@pytest.fixture
+def reranker():
+    r = kr.KnowledgeReranker()
+    r.semantic_scorer = _FixedSemanticScorer()
+    return r
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_batch_scoring_matches_reference(reranker, seed):
+    rng = random.Random(seed)
+    query, intent = _QUERIES[seed % len(_QUERIES)]
+    items = _candidates(rng, rng.randint(1, 40))
+
+    expected = _ref_score_all(reranker.semantic_scorer, query, items, intent)
+    actual = reranker._score_all(query, items, intent)
+
+    assert [id(item) for _, item in actual] == [id(item) for _, item in expected]
+    assert [score for score, _ in actual] == pytest.approx([score for score, _ in expected], abs=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_diversity_sample_matches_reference(reranker, seed):
+    rng = random.Random(1000 + seed)
+    query, intent = _QUERIES[seed % len(_QUERIES)]
+    scored = reranker._score_all(query, _candidates(rng, rng.randint(1, 60)), intent)
+
+    for limit in (1, 3, 6, 8, 20):
+        expected = _ref_diversity_sample(scored, per_source=2, limit=limit)
+        actual = kr._diversity_sample(scored, per_source=2, limit=limit)
+        assert [id(item) for item in actual] == [id(item) for item in expected]
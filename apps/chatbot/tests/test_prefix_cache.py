@@ -0,0 +1,27 @@
+"""History windows for prefix reuse: append-only until the budget overflows."""
+from app_utils.prefix_cache import stable_window_start
+
+
+def _windows(lengths, budget):
+    return [stable_window_start(lengths[:n], budget) for n in range(1, len(lengths) + 1)]
+
+
+def test_window_keeps_every_turn_while_it_fits():
+    assert _windows([10] * 8, budget=100) == [0] * 8
+
+
+def test_window_start_only_moves_on_overflow():
+    lengths = [10] * 30
+    starts = _windows(lengths, budget=100)
+    # Turns 0-9 fill the budget; turn 10 overflows and the window drops to half
+    assert starts[:10] == [0] * 10
+    assert starts[10] == 6
+    # ...after which the start stays put until the next overflow
+    moves = [i for i in range(1, len(starts)) if starts[i] != starts[i - 1]]
+    assert moves == [10, 16, 22, 28]
+    for n, start in enumerate(starts, 1):
+        assert sum(lengths[start:n]) <= 100
+
+
+def test_oversized_turn_is_kept_alone():
+    assert stable_window_start([10, 10, 500], budget=100) == 2
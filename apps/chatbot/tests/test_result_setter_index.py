@@ -0,0 +1,51 @@
+"""ResultSetterIndex lookups read one consistent build of the index."""
+import json
+import os
+import threading
+
+from app_utils.result_setter_index import ResultSetterIndex
+
+
+def _write(path, pairs, mtime):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"qa_pairs": pairs}), encoding="utf-8")
+    os.utime(tmp, (mtime, mtime))
+    os.replace(tmp, path)
+
+
+def test_exact_fuzzy_and_merge(tmp_path):
+    base, extra = tmp_path / "base.json", tmp_path / "extra.json"
+    _write(base, [{"question": "What is the capital of France?", "answer": "Paris"}], 1_000_000)
+    _write(extra, [{"question": "what is the capital of france?", "answer": "ignored"},
+                   {"question": "Who is Ada Lovelace", "answer": "A mathematician"}], 1_000_000)
+    index = ResultSetterIndex([str(base), str(extra)])
+
+    assert index.lookup("what is the capital of france?") == "Paris"
+    assert index.lookup("who is ada lovelace?") == "A mathematician"
+    assert index.lookup("who is grace hopper") is None
+
+
+def test_lookups_during_rebuilds_never_mix_builds(tmp_path):
+    path = tmp_path / "qa.json"
+    builds = [[{"question": f"question {i} number {n}", "answer": f"answer {n}"} for i in range(50)]
+              for n in range(2)]
+    _write(path, builds[0], 1_000_000)
+    index = ResultSetterIndex([str(path)])
+    errors = []
+
+    def reader():
+        for _ in range(300):
+            try:
+                answer = index.lookup("question 7 number 0") or index.lookup("question 7 number 1")
+                assert answer in ("answer 0", "answer 1")
+            except Exception as e:  # IndexError/KeyError if entries and maps came from different builds
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for step in range(1, 40):
+        _write(path, builds[step % 2], 1_000_000 + step)
+    for t in threads:
+        t.join()
+    assert not errors
@@ -0,0 +1,30 @@
+"""Search falls back to a substring scan with the index's result shape."""
+from app_utils.search_index import TITLE_WEIGHT, substring_search
+
+DOCS = [
+    ("c1", "Python tips", [(0, "How do I sort a list?"), (1, "Use sorted(list) in Python.")]),
+    ("c2", "Cooking", [(0, "A python recipe? No, a pasta recipe.")]),
+    ("c3", "Travel", [(0, "Nothing relevant here.")]),
+]
+
+
+def test_substring_search_ranks_title_matches_first():
+    results = substring_search(DOCS, "Python", limit=5)
+    assert [r["doc_id"] for r in results] == ["c1", "c2"]
+    first = results[0]
+    assert first["title_match"] and first["title"] == "<mark>Python</mark> tips"
+    assert first["score"] == TITLE_WEIGHT + 1.0
+    assert [h["part"] for h in first["hits"]] == [1]
+    assert "<mark>Python</mark>" in first["hits"][0]["snippet"]
+    assert results[1]["title"] is None and not results[1]["title_match"]
+
+
+def test_substring_search_matches_the_whole_query():
+    assert [r["doc_id"] for r in substring_search(DOCS, "pasta recipe")] == ["c2"]
+    assert substring_search(DOCS, "recipe pasta") == []
+    assert substring_search(DOCS, "   ") == []
+
+
+def test_substring_snippet_escapes_html():
+    results = substring_search([("d", "", [(0, "<b>x</b> & python")])], "python")
+    assert results[0]["hits"][0]["snippet"] == "&lt;b&gt;x&lt;/b&gt; &amp; <mark>python</mark>"
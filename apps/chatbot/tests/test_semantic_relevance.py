@@ -0,0 +1,32 @@
+"""Semantic scores depend only on the query and the candidates being scored."""
+from services.semantic_relevance import _SemanticScorer
+
+ITEMS = [
+    {"title": "Photosynthesis", "content": "Plants turn light into chemical energy."},
+    {"title": "Solar panels", "content": "Panels turn light into electricity."},
+    {"title": "Cell biology", "content": "Chloroplasts hold the pigments plants use."},
+]
+QUERY = "how do plants use light"
+
+
+def test_scores_do_not_depend_on_previously_seen_items():
+    fresh = _SemanticScorer()
+    expected = fresh.score_batch(QUERY, ITEMS)
+
+    warmed = _SemanticScorer()
+    warmed.precompute([{"content": f"light light light filler {i}"} for i in range(200)])
+    warmed.score_batch("unrelated query about light", [{"content": "light"}] * 10)
+    assert warmed.score_batch(QUERY, ITEMS) == expected
+
+
+def test_single_item_score_is_stable_and_bounded():
+    scorer = _SemanticScorer()
+    first = [scorer.calculate_semantic_score(QUERY, item) for item in ITEMS]
+    scorer.precompute([{"content": "plants plants plants"}] * 50)
+    assert [scorer.calculate_semantic_score(QUERY, item) for item in ITEMS] == first
+    assert all(0.0 <= s <= 1.0 for s in first)
+
+
+def test_batch_ranking_follows_query_coverage():
+    ranked = _SemanticScorer().filter_knowledge_by_relevance(QUERY, ITEMS)
+    assert [item["title"] for _score, item in ranked] == ["Cell biology", "Photosynthesis", "Solar panels"]
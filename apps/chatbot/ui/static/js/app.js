@@ -4,6 +4,8 @@ let currentChatId = null;
 let isLoading = false;
 let thinkDeeperMode = false;
 let allChats = [];
+let chatsTotal = 0;
+const CHATS_PAGE_SIZE = 50;
 let currentTheme = 'light';
 let themePreference = 'system';
 let currentModel = 'thor-1.2';
@@ -775,11 +777,16 @@ function startModelLoadingPolling(modelName, initialProgress, initialMessage, us
     }, 500); // Poll every 500ms
 }
 
-async function loadChats() {
+async function loadChats(append = false) {
     try {
-        const response = await fetch('/api/chats');
+        // Page through the sidebar; a reload keeps as many chats as were already shown
+        const offset = append ? allChats.length : 0;
+        const limit = append ? CHATS_PAGE_SIZE : Math.max(CHATS_PAGE_SIZE, allChats.length);
+        const response = await fetch(`/api/chats?offset=${offset}&limit=${limit}`);
         const data = await response.json();
-        allChats = Array.isArray(data.chats) ? data.chats : [];
+        const page = Array.isArray(data.chats) ? data.chats : [];
+        allChats = append ? allChats.concat(page) : page;
+        chatsTotal = typeof data.total === 'number' ? data.total : allChats.length;
         displayChats(allChats);
     } catch (error) {
         console.error('Error loading chats:', error);
@@ -810,7 +817,17 @@ function displayChats(chats) {
                 </span>
             </button>
         `;
-    }).join('');
+    }).join('') + (chats.length < chatsTotal
+        ? `<button class="chats-load-more" id="chatsLoadMore">Show more (${chatsTotal - chats.length})</button>`
+        : '');
+    
+    const loadMore = document.getElementById('chatsLoadMore');
+    if (loadMore) {
+        loadMore.addEventListener('click', () => {
+            loadMore.disabled = true;
+            loadChats(true);
+        });
+    }
     
     // Add click listeners
     chatsList.querySelectorAll('.chat-item').forEach(item => {
@@ -2676,12 +2693,12 @@ function renderSearchResults(data) {
             html += `
                 <div class="search-item" onclick="loadChat('${chat.chat_id}')">
                     <div class="search-item-header">
-                        <span class="search-item-title">${chat.name}</span>
+                        <span class="search-item-title">${chat.name_highlight || chat.name}</span>
                         <span class="search-item-meta">${chat.message_count} messages</span>
                     </div>
                     <div class="search-item-content">
                         ${chat.message_matches ? chat.message_matches.map(match =>
-                            `<div class="search-match">${match.content.substring(0, 100)}...</div>`
+                            `<div class="search-match">${match.snippet || match.content.substring(0, 100) + '...'}</div>`
                         ).join('') : ''}
                     </div>
                 </div>
@@ -2698,10 +2715,10 @@ function renderSearchResults(data) {
             html += `
                 <div class="search-item" onclick="openProjectModal('${project.project_id}')">
                     <div class="search-item-header">
-                        <span class="search-item-title">${project.name}</span>
+                        <span class="search-item-title">${project.name_highlight || project.name}</span>
                         <span class="search-item-meta">${project.chat_count} chats</span>
                     </div>
-                    <div class="search-item-content">${project.description}</div>
+                    <div class="search-item-content">${project.snippet || project.description}</div>
                 </div>
             `;
         });
@@ -2716,10 +2733,10 @@ function renderSearchResults(data) {
             html += `
                 <div class="search-item" onclick="selectGem('${gem.gem_id}')">
                     <div class="search-item-header">
-                        <span class="search-item-title">${gem.name}</span>
+                        <span class="search-item-title">${gem.name_highlight || gem.name}</span>
                         <span class="search-item-meta">${gem.tone} tone</span>
                     </div>
-                    <div class="search-item-content">${gem.description}</div>
+                    <div class="search-item-content">${gem.snippet || gem.description}</div>
                 </div>
             `;
         });
@@ -2737,7 +2754,7 @@ function renderSearchResults(data) {
                         <span class="search-item-title">${item.title}</span>
                         <span class="search-item-meta">${item.source}</span>
                     </div>
-                    <div class="search-item-content">${item.content}</div>
+                    <div class="search-item-content">${item.snippet || item.content}</div>
                 </div>
             `;
         });
@@ -2,8 +2,37 @@
 API client for communicating with Atlas AI server
 """
 
+import json
 import requests
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Iterator, Tuple
+
+
+def iter_sse(lines) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse server-sent events into (event, data) pairs.
+    
+    Args:
+        lines: Iterable of SSE lines (bytes or str)
+    
+    Returns:
+        Iterator of (event name, JSON-decoded data)
+    """
+    event, data = "message", []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # keep-alive comment
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, json.loads("\n".join(data))
 
 
 class AtlasAPIClient:
@@ -20,6 +49,7 @@ class AtlasAPIClient:
         """
         self.base_url = base_url.rstrip('/')
         self.api_endpoint = f"{self.base_url}/api/chat"
+        self.stream_endpoint = f"{self.base_url}/api/chat/stream"
         self.model_status_endpoint = f"{self.base_url}/api/model/status"
         self.model = "thor-1.1"  # Default model
     
@@ -106,7 +136,8 @@ class AtlasAPIClient:
             # Fallback to default models on any error
             return ["thor-1.0", "thor-1.1", "antelope-1.0"]
     
-    def query(self, message: str, model: Optional[str] = None, timeout: int = 60) -> Dict[str, Any]:
+    def query(self, message: str, model: Optional[str] = None, timeout: int = 60,
+              on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Send a query to the Atlas AI server.
         
@@ -114,9 +145,11 @@ class AtlasAPIClient:
             message: The user's query message
             model: Model to use (overrides current model if provided)
             timeout: Request timeout in seconds (default: 60)
+            on_token: If given, stream the reply and call this with each chunk of
+                generated text as it arrives (timeout then applies between chunks)
         
         Returns:
-            Response dictionary containing the AI response
+            Response dictionary containing the AI response (the final, refined text)
         
         Raises:
             ConnectionError: If server is not reachable
@@ -140,6 +173,9 @@ class AtlasAPIClient:
         }
         
         try:
+            if on_token is not None:
+                return self._stream_query(data, timeout, on_token)
+
             response = requests.post(
                 self.api_endpoint,
                 json=data,
@@ -148,18 +184,7 @@ class AtlasAPIClient:
             
             if response.status_code == 200:
                 result = response.json()
-                
-                # Check if we're hitting the simple mock server
-                response_text = result.get('response', '')
-                if 'simple server without ML models' in response_text.lower():
-                    raise RuntimeError(
-                        "❌ Error: Connected to simple mock server instead of full Atlas AI server.\n"
-                        "   The server running is 'simple_server.py' which doesn't have ML models.\n\n"
-                        "   Please stop the current server and start the full server:\n"
-                        "   cd apps/chatbot && python3 app.py\n\n"
-                        "   The full server will load and use the actual ML models."
-                    )
-                
+                self._check_not_simple_server(result)
                 return result
             elif response.status_code == 401:
                 raise RuntimeError("Invalid API key (if using API key authentication)")
@@ -179,3 +204,39 @@ class AtlasAPIClient:
             )
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"Network error: {str(e)}")
+    
+    def _stream_query(self, data: Dict[str, Any], timeout: int,
+                      on_token: Callable[[str], None]) -> Dict[str, Any]:
+        """POST to the streaming chat endpoint, forwarding token events to on_token."""
+        with requests.post(self.stream_endpoint, json=data, stream=True, timeout=timeout) as response:
+            if response.status_code == 404:
+                # Older server without streaming: fall back to a normal query
+                result = requests.post(self.api_endpoint, json=data, timeout=timeout).json()
+                self._check_not_simple_server(result)
+                return result
+            if response.status_code != 200:
+                raise RuntimeError(f"API call failed: HTTP {response.status_code}")
+            for event, payload in iter_sse(response.iter_lines(decode_unicode=False)):
+                if event == "token":
+                    on_token(payload.get("text", ""))
+                elif event == "final":
+                    self._check_not_simple_server(payload)
+                    return payload
+                elif event == "error":
+                    if payload.get("status") == 429:
+                        raise RuntimeError("Rate limit exceeded. Please wait a moment before trying again.")
+                    raise RuntimeError(f"API call failed: {payload.get('error', 'HTTP ' + str(payload.get('status')))}")
+        raise RuntimeError("API call failed: stream ended without a response")
+    
+    def _check_not_simple_server(self, result: Dict[str, Any]):
+        """Raise if the reply came from simple_server.py instead of the full server."""
+        # Check if we're hitting the simple mock server
+        response_text = result.get('response', '')
+        if 'simple server without ML models' in response_text.lower():
+            raise RuntimeError(
+                "❌ Error: Connected to simple mock server instead of full Atlas AI server.\n"
+                "   The server running is 'simple_server.py' which doesn't have ML models.\n\n"
+                "   Please stop the current server and start the full server:\n"
+                "   cd apps/chatbot && python3 app.py\n\n"
+                "   The full server will load and use the actual ML models."
+            )
@@ -254,14 +254,27 @@ Make sure the server is running before using the CLI:
             else:
                 print("🤔 Thinking...", end="", flush=True)
             
-            # Make API call with selected model
-            response = self.client.query(query, model=model_to_use)
+            # Stream the reply: show generated text as it arrives
+            streamed = []
             
-            # Clear processing indicator
-            print("\r" + " " * 70 + "\r", end="")  # Clear line
+            def on_token(text: str):
+                if not streamed:
+                    print("\r" + " " * 70 + "\r\n", end="")  # Clear indicator before first token
+                streamed.append(text)
+                print(text, end="", flush=True)
             
-            # Print response
-            self._print_response(response)
+            response = self.client.query(query, model=model_to_use, on_token=on_token)
+            
+            if not streamed:
+                # Clear processing indicator
+                print("\r" + " " * 70 + "\r", end="")  # Clear line
+                self._print_response(response)
+            elif response.get('response', '').strip() != "".join(streamed).strip():
+                # The server refined the raw generation; show the final version
+                print("\n")
+                self._print_response(response)
+            else:
+                print("\n")
             
         except ConnectionError as e:
             print(f"\n❌ Connection Error: {str(e)}\n")
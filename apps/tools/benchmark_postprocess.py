@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the chatbot's response post-processing chain.
+
+Runs saved assistant responses (apps/chatbot/chats/*.json) through the same
+stages /api/chat applies after generation and reports time per stage:
+
+    AnswerRefiner.refine -> verify_response_accuracy -> FinalResponseFormatter.format
+    -> ResponseCleaner (is_corrupted, fix_grammar_issues, fix_incomplete_sentences)
+    -> MarkdownHandler.enhance_markdown -> ResponseFormatter.format_response
+
+Chat responses are short, so --long also stitches consecutive responses into
+~2400-character answers (the size of a 512-token think-deeper answer).
+
+    python apps/tools/benchmark_postprocess.py --runs 20 --long
+    python apps/tools/benchmark_postprocess.py --dump before.json   # outputs, for diffing two revisions
+
+The accuracy check lists unverified claims in set order, so fix
+PYTHONHASHSEED when comparing dumps from two runs.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'chatbot')
+sys.path.insert(0, CHATBOT_DIR)
+
+from refinement import get_answer_refiner, verify_response_accuracy  # noqa: E402
+from formatting import get_final_response_formatter  # noqa: E402
+from services.response_cleaner import get_response_cleaner  # noqa: E402
+from handlers.markdown_handler import get_markdown_handler  # noqa: E402
+from handlers.response_formatter import get_response_formatter  # noqa: E402
+
+INTENTS = [
+    {},
+    {'hints': {'asks_for_steps': True}},
+    {'hints': {'allow_bullets': True, 'tone': 'formal'}},
+    {'is_follow_up': True, 'hints': {'is_follow_up': True}},
+]
+TONES = ['normal', 'formal', 'critical']
+
+
+def load_corpus(chats_dir, long_chars=0):
+    """(user message, assistant response) pairs from saved chats."""
+    pairs = []
+    for path in sorted(glob.glob(os.path.join(chats_dir, '*.json'))):
+        try:
+            with open(path, encoding='utf-8') as f:
+                messages = json.load(f).get('messages', [])
+        except (OSError, ValueError):
+            continue
+        question = ''
+        for msg in messages:
+            content = msg.get('content') or ''
+            if msg.get('role') == 'user':
+                question = content
+            elif msg.get('role') == 'assistant' and content.strip():
+                pairs.append((question, content))
+
+    if long_chars:
+        stitched, buf = [], []
+        for question, answer in pairs:
+            buf.append(answer)
+            if sum(len(a) for a in buf) >= long_chars:
+                stitched.append((question, '\n\n'.join(buf)))
+                buf = []
+        pairs = stitched
+    return pairs
+
+
+def run_chain(question, answer, intent, tone, knowledge, timings):
+    def timed(stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        out = fn(*args, **kwargs)
+        timings[stage] += time.perf_counter() - start
+        return out
+
+    refiner = get_answer_refiner()
+    final_formatter = get_final_response_formatter()
+    cleaner = get_response_cleaner()
+
+    text = timed('refine', refiner.refine, answer, knowledge, intent, 'thor-1.2')
+    text = timed('accuracy', verify_response_accuracy, text, knowledge, query=question)
+    text = timed('final_format', final_formatter.format, text, user_message=question, hints={'tone': tone})
+    if not timed('cleaner', cleaner.is_corrupted, text):
+        text = timed('cleaner', cleaner.fix_grammar_issues, text)
+        text = timed('cleaner', cleaner.fix_incomplete_sentences, text)
+    text = timed('markdown', get_markdown_handler().enhance_markdown, text)
+    text = timed('response_format', get_response_formatter().format_response, text, {'query': question})
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the response post-processing chain")
+    parser.add_argument('--chats', default=os.path.join(CHATBOT_DIR, 'chats'), help="Directory of saved chats")
+    parser.add_argument('--runs', type=int, default=10, help="Passes over the corpus")
+    parser.add_argument('--long', action='store_true', help="Stitch responses into ~2400-char answers")
+    parser.add_argument('--dump', help="Write every output to this JSON file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.chats, long_chars=2400 if args.long else 0)
+    if not corpus:
+        print(f"No assistant responses found in {args.chats}")
+        return 1
+
+    # Stitched answers double as "retrieved knowledge" so the accuracy check has work to do
+    knowledge = [{'title': 'corpus', 'content': answer, 'source': 'brain'} for _, answer in corpus[:5]]
+    cases = [(q, a, intent, tone) for q, a in corpus for intent in INTENTS for tone in TONES]
+
+    outputs = [run_chain(q, a, intent, tone, knowledge, defaultdict(float)) for q, a, intent, tone in cases]  # warm-up
+    timings = defaultdict(float)
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        for q, a, intent, tone in cases:
+            run_chain(q, a, intent, tone, knowledge, timings)
+    total = time.perf_counter() - start
+
+    n = len(cases) * args.runs
+    avg_chars = sum(len(a) for _, a in corpus) / len(corpus)
+    print(f"{len(corpus)} responses (avg {avg_chars:.0f} chars) x {len(INTENTS) * len(TONES)} variants x {args.runs} runs")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<16} {seconds / n * 1000:8.3f} ms/response")
+    print(f"  {'total':<16} {total / n * 1000:8.3f} ms/response")
+
+    if args.dump:
+        with open(args.dump, 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, ensure_ascii=False, indent=0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,15 +4,64 @@ Checkpoint Migration Utility for Atlas AI Model Architecture Updates
 
 This script helps migrate old model checkpoints to be compatible with the new architecture
 that uses RoPE positional embeddings and other improvements.
+
+With --safetensors (or an output path ending in .safetensors) the checkpoint is written
+as <name>.safetensors plus a <name>.config.json sidecar instead of a pickle. The chatbot
+maps such files straight into memory instead of unpickling them.
 """
 
 import torch
 import argparse
+import json
 import os
 from pathlib import Path
 
+ALIASES_KEY = 'tied_aliases'
+
 
-def migrate_checkpoint(input_path: str, output_path: str, verbose: bool = True):
+def save_safetensors_checkpoint(checkpoint: dict, output_path: str):
+    """
+    Write a {'model_state_dict': ..., 'config': ...} checkpoint as safetensors + JSON sidecar.
+
+    Tensors sharing storage (tied embeddings) are stored once; the other names are
+    recorded under 'tied_aliases' in the sidecar. Non-tensor entries that JSON can
+    hold (config, epoch, loss, ...) go to the sidecar; optimizer/scheduler state is dropped.
+    """
+    from safetensors.torch import save_file
+
+    tensors = {}
+    aliases = {}
+    seen = {}
+    for key, value in checkpoint['model_state_dict'].items():
+        if not isinstance(value, torch.Tensor):
+            continue
+        ident = (value.untyped_storage().data_ptr(), value.storage_offset(), tuple(value.shape), value.dtype)
+        if ident in seen:
+            aliases[key] = seen[ident]
+            continue
+        seen[ident] = key
+        tensors[key] = value.detach().cpu().contiguous()
+
+    sidecar = {}
+    for key, value in checkpoint.items():
+        if key in ('model_state_dict', 'optimizer_state_dict', 'scheduler_state_dict'):
+            continue
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        sidecar[key] = value
+    sidecar[ALIASES_KEY] = aliases
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    save_file(tensors, output_path, metadata={'format': 'pt'})
+    with open(os.path.splitext(output_path)[0] + '.config.json', 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, indent=2)
+
+
+def migrate_checkpoint(input_path: str, output_path: str, verbose: bool = True, safetensors: bool = False):
     """
     Migrate an old checkpoint to be compatible with the new architecture.
 
@@ -20,6 +69,7 @@ def migrate_checkpoint(input_path: str, output_path: str, verbose: bool = True):
         input_path: Path to the old checkpoint
         output_path: Path to save the migrated checkpoint
         verbose: Whether to print migration information
+        safetensors: Save as safetensors + config sidecar (implied by a .safetensors output path)
     """
     if verbose:
         print(f"Loading checkpoint from {input_path}")
@@ -59,8 +109,13 @@ def migrate_checkpoint(input_path: str, output_path: str, verbose: bool = True):
     }
 
     # Save migrated checkpoint
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    torch.save(new_checkpoint, output_path)
+    if safetensors or output_path.endswith('.safetensors'):
+        if not output_path.endswith('.safetensors'):
+            output_path = os.path.splitext(output_path)[0] + '.safetensors'
+        save_safetensors_checkpoint(new_checkpoint, output_path)
+    else:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        torch.save(new_checkpoint, output_path)
 
     if verbose:
         print(f"✓ Migrated checkpoint saved to {output_path}")
@@ -74,6 +129,8 @@ def main():
     parser.add_argument('input', help='Path to input checkpoint')
     parser.add_argument('output', help='Path to output migrated checkpoint')
     parser.add_argument('--quiet', '-q', action='store_true', help='Suppress verbose output')
+    parser.add_argument('--safetensors', action='store_true',
+                        help='Write <output>.safetensors + <output>.config.json instead of a pickle')
 
     args = parser.parse_args()
 
@@ -82,7 +139,8 @@ def main():
         return 1
 
     try:
-        migrations = migrate_checkpoint(args.input, args.output, verbose=not args.quiet)
+        migrations = migrate_checkpoint(args.input, args.output, verbose=not args.quiet,
+                                        safetensors=args.safetensors)
         print(f"\nMigration completed successfully!")
         print(f"Applied {len(migrations)} migration(s)")
 
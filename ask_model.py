@@ -15,6 +15,9 @@ Usage:
   # Use Thor 1.0 instead of 1.1
   python ask_model.py --model thor-1.0 "Hello"
 
+  # Wait for the whole reply instead of streaming tokens as they are generated
+  python ask_model.py --no-stream "Hello"
+
 Requires the Atlas chatbot to be running. Start it with:
   ./start_chatbot_thor11.sh
 or
@@ -46,6 +49,61 @@ def chat(base_url: str, message: str, model: str = "thor-1.1", chat_id: str | No
         return json.loads(r.read().decode("utf-8"))
 
 
+def iter_sse(lines):
+    """Parse server-sent event lines into (event, JSON data) pairs."""
+    event, data = "message", []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event, json.loads("\n".join(data))
+
+
+def chat_stream(base_url: str, message: str, model: str = "thor-1.1", chat_id: str | None = None) -> tuple[dict, bool]:
+    """Send a message to /api/chat/stream, printing tokens as they arrive.
+
+    Returns (final JSON response, whether any tokens were printed).
+    """
+    url = f"{base_url.rstrip('/')}/api/chat/stream"
+    payload = {"message": message, "model": model}
+    if chat_id:
+        payload["chat_id"] = chat_id
+    req = Request(url, data=json.dumps(payload).encode("utf-8"), method="POST")
+    req.add_header("Content-Type", "application/json")
+    req.add_header("Accept", "text/event-stream")
+    printed = False
+    with urlopen(req, timeout=TIMEOUT) as r:
+        for event, data in iter_sse(r):
+            if event == "token":
+                print(data.get("text", ""), end="", flush=True)
+                printed = True
+            elif event in ("final", "error"):
+                if printed:
+                    print()
+                return data, printed
+    return {"error": "stream ended without a response"}, printed
+
+
+def ask(base_url: str, message: str, model: str, chat_id: str | None, stream: bool) -> tuple[dict, bool]:
+    """Streamed or plain chat; falls back to /api/chat on servers without streaming."""
+    if stream:
+        try:
+            return chat_stream(base_url, message, model=model, chat_id=chat_id)
+        except HTTPError as e:
+            if e.code != 404:
+                raise
+    return chat(base_url, message, model=model, chat_id=chat_id), False
+
+
 def check_server(base_url: str) -> bool:
     """Quick health check: GET /api/model/status."""
     try:
@@ -63,6 +121,7 @@ def main() -> int:
     ap.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Chatbot port (default: {DEFAULT_PORT})")
     ap.add_argument("--host", default="127.0.0.1", help="Chatbot host (default: 127.0.0.1)")
     ap.add_argument("--model", default="thor-1.1", help="Model: thor-1.1 (default) or thor-1.0")
+    ap.add_argument("--no-stream", action="store_true", help="Wait for the full reply instead of streaming tokens")
     args = ap.parse_args()
     base_url = f"http://{args.host}:{args.port}"
     model = args.model
@@ -80,7 +139,7 @@ def main() -> int:
 
     if one_shot:
         try:
-            out = chat(base_url, one_shot, model=model, chat_id=chat_id)
+            out, streamed = ask(base_url, one_shot, model, chat_id, stream=not args.no_stream)
         except HTTPError as e:
             body = e.read().decode("utf-8") if e.fp else ""
             try:
@@ -101,7 +160,10 @@ def main() -> int:
             return 1
         text = out.get("response", "")
         model_used = out.get("model_used", f"Atlas AI ({model})")
-        print(f"[{model_used}]\n{text}")
+        if streamed:
+            print(f"\n[{model_used}, refined]\n{text}")
+        else:
+            print(f"[{model_used}]\n{text}")
         return 0
 
     # Interactive
@@ -119,7 +181,7 @@ def main() -> int:
             print("Bye.")
             return 0
         try:
-            out = chat(base_url, line, model=model, chat_id=chat_id)
+            out, streamed = ask(base_url, line, model, chat_id, stream=not args.no_stream)
         except HTTPError as e:
             body = e.read().decode("utf-8") if e.fp else ""
             try:
@@ -141,7 +203,10 @@ def main() -> int:
         chat_id = out.get("chat_id") or chat_id
         text = out.get("response", "")
         model_used = out.get("model_used", f"Atlas AI ({model})")
-        print(f"\n[{model_used}]\n{text}\n")
+        if streamed:
+            print(f"\n[{model_used}, refined]\n{text}\n")
+        else:
+            print(f"\n[{model_used}]\n{text}\n")
 
 
 if __name__ == "__main__":
@@ -2,13 +2,25 @@
 """
 Compact R-series weights on disk:
 
-- Convert `weights/model.safetensors` (fp32/fp16) to an int8-on-disk format:
-    - store weights as int8 tensors under original keys
-    - store per-tensor scale under `__qt_scale__<key>` as float16 scalar tensor
-  This typically shrinks ~4x from fp32 while keeping runtime efficiency since
-  loaders dequantize to fp16 at load time.
+- Convert `weights/model.safetensors` (fp32/fp16) to an int-on-disk format:
+    - store quantized weights under their original keys
+    - store scales under `__qt_scale__<key>` as float16 tensors
+  The source is read tensor by tensor (row chunks via `safe_open`) and the
+  output is written incrementally, so peak memory stays around one chunk no
+  matter how large the checkpoint is.
+
+- Quantization schemes (`--scheme`, recorded in the file metadata):
+    - int8-tensor   `int8_sym_per_tensor_v1`  one scale per tensor (~4x smaller)
+    - int8-channel  `int8_sym_per_channel_v1` one scale per output row
+    - int8-group    `int8_sym_group_v1`       one scale per row per `--group-size` columns
+    - int4-group    `int4_sym_group_v1`       as int8-group, two values per byte (~8x smaller);
+                    the original shape is kept under `__qt_shape__<key>`
+  `--model-scheme r3=int4-group` picks a different tradeoff for one model.
 
 - Write `weights/rN.safetensors` (or `weights/r{N}.safetensors`) for each model.
+  The r-series models are compacted in parallel (`--jobs`).
+- `--verify` reports per-layer reconstruction error (relative L2 and max abs)
+  of each compact file against its source.
 - Delete the original `weights/model.safetensors` when --apply is set.
 - For Thor reply-enhancement models, prefer hardlinking to the corresponding
   r-series compact file to avoid duplicate storage.
@@ -17,75 +29,308 @@ Compact R-series weights on disk:
 from __future__ import annotations
 
 import argparse
+import json
+import math
 import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import torch
 
 try:
-    from safetensors.torch import load_file, save_file
+    from safetensors import safe_open
 except Exception as e:  # pragma: no cover
     raise SystemExit("safetensors is required: pip install safetensors") from e
 
 QT_SCALE_PREFIX = "__qt_scale__"
+QT_SHAPE_PREFIX = "__qt_shape__"
+
+# CLI name -> (metadata scheme, bits, grouped)
+SCHEMES = {
+    "int8-tensor": ("int8_sym_per_tensor_v1", 8, False),
+    "int8-channel": ("int8_sym_per_channel_v1", 8, False),
+    "int8-group": ("int8_sym_group_v1", 8, True),
+    "int4-group": ("int4_sym_group_v1", 4, True),
+}
+
+# Elements per chunk read from the source (~64 MB of fp32 working memory)
+CHUNK_ELEMENTS = 16 * 1024 * 1024
+
+_FLOAT_DTYPES = {"F32", "F16", "BF16", "F64"}
+_DTYPE_NAMES = {
+    torch.int8: "I8", torch.uint8: "U8", torch.int16: "I16", torch.int32: "I32", torch.int64: "I64",
+    torch.float16: "F16", torch.bfloat16: "BF16", torch.float32: "F32", torch.float64: "F64", torch.bool: "BOOL",
+}
+_DTYPE_SIZES = {"I8": 1, "U8": 1, "BOOL": 1, "I16": 2, "F16": 2, "BF16": 2, "I32": 4, "F32": 4, "I64": 8, "F64": 8}
 
 
 def _human_gb(num_bytes: int) -> str:
     return f"{num_bytes / (1024**3):.3f} GB"
 
 
-def _quantize_tensor_int8(x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+@dataclass(frozen=True)
+class QuantSpec:
+    scheme: str  # CLI name, see SCHEMES
+    group_size: int = 128
+
+    @property
+    def meta_scheme(self) -> str:
+        return SCHEMES[self.scheme][0]
+
+    @property
+    def bits(self) -> int:
+        return SCHEMES[self.scheme][1]
+
+    @property
+    def grouped(self) -> bool:
+        return SCHEMES[self.scheme][2]
+
+    @property
+    def qmax(self) -> int:
+        return 127 if self.bits == 8 else 7
+
+
+def _rows_cols(shape: List[int]) -> Tuple[int, int]:
+    """2-D view used for quantization: output rows x everything else (1-D/0-D tensors are one row)."""
+    if len(shape) >= 2:
+        return shape[0], math.prod(shape[1:])
+    return 1, math.prod(shape) if shape else 1
+
+
+def _row_chunks(rows: int, cols: int) -> Iterator[Tuple[int, int]]:
+    step = max(1, CHUNK_ELEMENTS // max(1, cols))
+    for start in range(0, rows, step):
+        yield start, min(rows, start + step)
+
+
+def _read_rows(handle, key: str, shape: List[int], start: int, end: int) -> torch.Tensor:
+    """Rows [start, end) of a source tensor as a float32 2-D chunk (only those rows are read)."""
+    rows, cols = _rows_cols(shape)
+    if len(shape) >= 2:
+        chunk = handle.get_slice(key)[start:end]
+    else:
+        chunk = handle.get_tensor(key)
+    return chunk.reshape(end - start, cols).float()
+
+
+def _pack_int4(q: torch.Tensor) -> torch.Tensor:
+    """[r, c] values in [-7, 7] -> [r, ceil(c/2)] uint8, low nibble first."""
+    if q.shape[1] % 2:
+        q = torch.nn.functional.pad(q, (0, 1))
+    u = (q + 8).to(torch.uint8)
+    return u[:, 0::2] | (u[:, 1::2] << 4)
+
+
+def _unpack_int4(p: torch.Tensor, cols: int) -> torch.Tensor:
+    lo = (p & 0x0F).to(torch.int8) - 8
+    hi = (p >> 4).to(torch.int8) - 8
+    return torch.stack((lo, hi), dim=-1).reshape(p.shape[0], -1)[:, :cols]
+
+
+def _quantize_chunk(x: torch.Tensor, spec: QuantSpec, tensor_scale: Optional[float]) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
     """
-    Symmetric per-tensor int8 quantization.
-    Returns (q_int8, scale_fp16_scalar_tensor).
+    Quantize a float32 [r, c] chunk. Returns (q, scales) where scales is None for
+    per-tensor (tensor_scale is used), [r] per channel or [r, groups] per group.
     """
-    # Always quantize on CPU for predictable memory.
-    x = x.detach().cpu()
-    xf = x.float()
-    max_abs = xf.abs().max().item()
-    if max_abs == 0.0 or not (max_abs > 0.0):
-        scale = 1.0
-        q = torch.zeros_like(xf, dtype=torch.int8)
-        s = torch.tensor(scale, dtype=torch.float16)
-        return q, s
-
-    scale = max_abs / 127.0
-    q = torch.clamp((xf / scale).round(), -127, 127).to(torch.int8)
-    s = torch.tensor(scale, dtype=torch.float16)
-    return q, s
-
-
-def compact_safetensors(in_path: Path, out_path: Path) -> None:
+    qmax = spec.qmax
+    if spec.scheme == "int8-tensor":
+        q = torch.clamp((x / tensor_scale).round(), -qmax, qmax).to(torch.int8)
+        return q, None
+    if not spec.grouped:
+        amax = x.abs().amax(dim=1)
+        scale = torch.where(amax > 0, amax / qmax, torch.ones_like(amax))
+        q = torch.clamp((x / scale[:, None]).round(), -qmax, qmax).to(torch.int8)
+        return q, scale
+    g = spec.group_size
+    rows, cols = x.shape
+    groups = -(-cols // g)
+    xp = torch.nn.functional.pad(x, (0, groups * g - cols)).view(rows, groups, g)
+    amax = xp.abs().amax(dim=2)
+    scale = torch.where(amax > 0, amax / qmax, torch.ones_like(amax))
+    q = torch.clamp((xp / scale[..., None]).round(), -qmax, qmax).to(torch.int8).view(rows, groups * g)[:, :cols]
+    if spec.bits == 4:
+        q = _pack_int4(q)
+    return q, scale
+
+
+def dequantize_chunk(q: torch.Tensor, scale, spec: QuantSpec, cols: int) -> torch.Tensor:
+    """Inverse of _quantize_chunk for a [r, ...] chunk; returns float32 [r, cols]."""
+    if spec.bits == 4:
+        q = _unpack_int4(q, cols)
+    q = q.reshape(q.shape[0], cols).float()
+    if spec.scheme == "int8-tensor":
+        return q * float(scale)
+    if not spec.grouped:
+        return q * scale.float()[:, None]
+    g = spec.group_size
+    groups = scale.shape[1]
+    qp = torch.nn.functional.pad(q, (0, groups * g - cols)).view(q.shape[0], groups, g)
+    return (qp * scale.float()[..., None]).view(q.shape[0], groups * g)[:, :cols]
+
+
+class _StreamingWriter:
+    """Writes a safetensors file whose tensor layout is known up front, one chunk at a time."""
+
+    def __init__(self, path: Path, layout: List[Tuple[str, str, List[int]]], metadata: Dict[str, str]):
+        header: Dict[str, object] = {"__metadata__": metadata}
+        offset = 0
+        for key, dtype, shape in layout:
+            size = _DTYPE_SIZES[dtype] * (math.prod(shape) if shape else 1)
+            header[key] = {"dtype": dtype, "shape": shape, "data_offsets": [offset, offset + size]}
+            offset += size
+        raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        raw += b" " * (-len(raw) % 8)  # keep the data section 8-byte aligned
+        self._file = open(path, "wb")
+        self._file.write(struct.pack("<Q", len(raw)))
+        self._file.write(raw)
+        self._expected = offset
+        self._written = 0
+
+    def write(self, t: torch.Tensor) -> None:
+        data = t.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes()
+        self._file.write(data)
+        self._written += len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        if self._written != self._expected:
+            raise RuntimeError(f"wrote {self._written} bytes, header declares {self._expected}")
+
+
+def compact_safetensors(in_path: Path, out_path: Path, spec: QuantSpec = QuantSpec("int8-tensor")) -> None:
     """
-    Read a safetensors file, write a compact int8-on-disk safetensors file.
+    Stream a safetensors file into a compact quantized safetensors file.
+
+    Float tensors are read and quantized in row chunks; the quantized data is
+    written as it is produced, scales (and int4 shapes) at the end.
     """
-    state: Dict[str, torch.Tensor] = load_file(str(in_path))
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    tmp.parent.mkdir(parents=True, exist_ok=True)
 
-    out: Dict[str, torch.Tensor] = {}
-    scales: Dict[str, torch.Tensor] = {}
+    with safe_open(str(in_path), framework="pt") as src:
+        keys = list(src.keys())
+        info = {k: (src.get_slice(k).get_dtype(), list(src.get_slice(k).get_shape())) for k in keys}
+
+        layout: List[Tuple[str, str, List[int]]] = []
+        tail: List[Tuple[str, str, List[int]]] = []
+        for k in keys:
+            dtype, shape = info[k]
+            if dtype not in _FLOAT_DTYPES:
+                layout.append((k, dtype, shape))
+                continue
+            rows, cols = _rows_cols(shape)
+            if spec.bits == 4:
+                layout.append((k, "U8", [rows, -(-cols // 2)]))
+                tail.append((f"{QT_SHAPE_PREFIX}{k}", "I64", [len(shape)]))
+            else:
+                layout.append((k, "I8", shape))
+            if spec.scheme == "int8-tensor":
+                scale_shape: List[int] = []
+            elif not spec.grouped:
+                scale_shape = [rows]
+            else:
+                scale_shape = [rows, -(-cols // spec.group_size)]
+            tail.append((f"{QT_SCALE_PREFIX}{k}", "F16", scale_shape))
+
+        meta = {
+            "atlas_quant_scheme": spec.meta_scheme,
+            "atlas_quant_bits": str(spec.bits),
+            "atlas_quant_scale_prefix": QT_SCALE_PREFIX,
+            "source": str(in_path),
+        }
+        if spec.grouped:
+            meta["atlas_quant_group_size"] = str(spec.group_size)
+        if spec.bits == 4:
+            meta["atlas_quant_shape_prefix"] = QT_SHAPE_PREFIX
+
+        writer = _StreamingWriter(tmp, layout + tail, meta)
+        tail_tensors: Dict[str, torch.Tensor] = {}
+        try:
+            for k in keys:
+                dtype, shape = info[k]
+                if dtype not in _FLOAT_DTYPES:
+                    writer.write(src.get_tensor(k))
+                    continue
+                rows, cols = _rows_cols(shape)
+                tensor_scale = None
+                if spec.scheme == "int8-tensor":
+                    max_abs = 0.0
+                    for a, b in _row_chunks(rows, cols):
+                        max_abs = max(max_abs, _read_rows(src, k, shape, a, b).abs().max().item())
+                    tensor_scale = max_abs / spec.qmax if max_abs > 0.0 else 1.0
+                scales = []
+                for a, b in _row_chunks(rows, cols):
+                    q, scale = _quantize_chunk(_read_rows(src, k, shape, a, b), spec, tensor_scale)
+                    writer.write(q)
+                    if scale is not None:
+                        scales.append(scale.to(torch.float16))
+                if tensor_scale is not None:
+                    tail_tensors[f"{QT_SCALE_PREFIX}{k}"] = torch.tensor(tensor_scale, dtype=torch.float16)
+                else:
+                    tail_tensors[f"{QT_SCALE_PREFIX}{k}"] = torch.cat(scales)
+                if spec.bits == 4:
+                    tail_tensors[f"{QT_SHAPE_PREFIX}{k}"] = torch.tensor(shape, dtype=torch.int64)
+            for key, _dtype, _shape in tail:
+                writer.write(tail_tensors[key])
+        finally:
+            writer.close()
+    tmp.replace(out_path)
 
-    for k, v in state.items():
-        if v.dtype in (torch.float32, torch.float16, torch.bfloat16):
-            q, s = _quantize_tensor_int8(v)
-            out[k] = q
-            scales[f"{QT_SCALE_PREFIX}{k}"] = s
-        else:
-            # Keep non-float tensors as-is.
-            out[k] = v.detach().cpu()
 
-    out.update(scales)
-    meta = {
-        "atlas_quant_scheme": "int8_sym_per_tensor_v1",
-        "atlas_quant_scale_prefix": QT_SCALE_PREFIX,
-        "source": str(in_path),
-    }
+def _spec_from_metadata(meta: Dict[str, str]) -> QuantSpec:
+    by_meta = {v[0]: k for k, v in SCHEMES.items()}
+    scheme = by_meta.get(meta.get("atlas_quant_scheme", ""))
+    if scheme is None:
+        raise ValueError(f"unknown quantization scheme: {meta.get('atlas_quant_scheme')!r}")
+    return QuantSpec(scheme, int(meta.get("atlas_quant_group_size", "128")))
 
-    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
-    tmp.parent.mkdir(parents=True, exist_ok=True)
-    save_file(out, str(tmp), metadata=meta)
-    tmp.replace(out_path)
+
+def verify_compact(in_path: Path, compact_path: Path) -> List[Tuple[str, float, float]]:
+    """
+    Per-layer reconstruction error of a compact file against its source.
+    Returns [(key, relative L2 error, max abs error)], worst first.
+    """
+    results = []
+    with safe_open(str(in_path), framework="pt") as src, safe_open(str(compact_path), framework="pt") as cq:
+        spec = _spec_from_metadata(cq.metadata() or {})
+        compact_keys = set(cq.keys())
+        for k in src.keys():
+            scale_key = f"{QT_SCALE_PREFIX}{k}"
+            if scale_key not in compact_keys:
+                continue
+            shape = list(src.get_slice(k).get_shape())
+            rows, cols = _rows_cols(shape)
+            scale_all = cq.get_tensor(scale_key)
+            err_sq = ref_sq = 0.0
+            max_abs = 0.0
+            for a, b in _row_chunks(rows, cols):
+                ref = _read_rows(src, k, shape, a, b)
+                if spec.bits == 4 or len(shape) >= 2:
+                    q = cq.get_slice(k)[a:b]
+                else:
+                    q = cq.get_tensor(k).reshape(1, -1)
+                scale = scale_all if scale_all.dim() == 0 else scale_all[a:b]
+                diff = dequantize_chunk(q, scale, spec, cols) - ref
+                err_sq += float((diff * diff).sum())
+                ref_sq += float((ref * ref).sum())
+                max_abs = max(max_abs, float(diff.abs().max()))
+            rel = math.sqrt(err_sq / ref_sq) if ref_sq > 0 else 0.0
+            results.append((k, rel, max_abs))
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results
+
+
+def _print_verification(label: str, results: List[Tuple[str, float, float]], top: int = 10) -> None:
+    if not results:
+        print(f"- verify {label}: no quantized tensors")
+        return
+    mean_rel = sum(r[1] for r in results) / len(results)
+    print(f"- verify {label}: {len(results)} layers, mean rel err {mean_rel:.4%}, worst {results[0][1]:.4%}")
+    for key, rel, max_abs in results[:top]:
+        print(f"    {rel:9.4%}  max|e| {max_abs:.3e}  {key}")
 
 
 @dataclass(frozen=True)
@@ -140,22 +385,53 @@ def _hardlink_or_copy(src: Path, dst: Path) -> None:
         shutil.copy2(src, dst)
 
 
+def _parse_model_schemes(values: List[str]) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for value in values:
+        name, sep, scheme = value.partition("=")
+        if not sep or scheme not in SCHEMES:
+            raise SystemExit(f"--model-scheme expects NAME=SCHEME with SCHEME in {sorted(SCHEMES)}: {value!r}")
+        out[name.strip()] = scheme
+    return out
+
+
+def _compact_job(full_path: Path, compact_path: Path, spec: QuantSpec) -> Path:
+    compact_safetensors(full_path, compact_path, spec)
+    return compact_path
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--repo-root", default=".", help="Path to atlas-ai repo root (default: .)")
     ap.add_argument("--apply", action="store_true", help="Actually delete model.safetensors after compaction")
     ap.add_argument("--force", action="store_true", help="Recreate compact files even if they exist")
+    ap.add_argument("--scheme", choices=sorted(SCHEMES), default="int8-tensor",
+                    help="Quantization scheme (default: int8-tensor)")
+    ap.add_argument("--group-size", type=int, default=128, help="Columns per scale for group schemes (default: 128)")
+    ap.add_argument("--model-scheme", action="append", default=[], metavar="NAME=SCHEME",
+                    help="Per-model scheme override, e.g. r3=int4-group (repeatable)")
+    ap.add_argument("--jobs", type=int, default=1, help="Models to compact in parallel (default: 1)")
+    ap.add_argument("--verify", action="store_true",
+                    help="Report per-layer reconstruction error against the full weights")
     args = ap.parse_args()
 
     repo_root = Path(args.repo_root).resolve()
     if not (repo_root / "models").exists():
         raise SystemExit(f"Not a repo root (no models/): {repo_root}")
+    if args.group_size < 2 or args.group_size % 2:
+        raise SystemExit("--group-size must be an even number >= 2")
+    model_schemes = _parse_model_schemes(args.model_scheme)
+
+    def quant_spec(name: str) -> QuantSpec:
+        return QuantSpec(model_schemes.get(name, args.scheme), args.group_size)
 
     # 1) Build compact files for r-series.
     reclaimed = 0
     created = 0
 
     print("Compacting r-series weights...")
+    todo: List[ModelSpec] = []
+    ready: List[ModelSpec] = []
     for spec in _iter_r_series(repo_root):
         if not spec.model_dir.exists():
             print(f"- skip (missing): {spec.model_dir}")
@@ -163,14 +439,26 @@ def main() -> int:
         if not spec.full_path.exists():
             print(f"- skip (no full weights): {spec.full_path}")
             continue
-
         if spec.compact_path.exists() and not args.force:
             print(f"- ok (exists): {spec.compact_path}")
         else:
-            print(f"- create: {spec.compact_path} <- {spec.full_path}")
-            compact_safetensors(spec.full_path, spec.compact_path)
-            created += 1
+            print(f"- create [{quant_spec(spec.name).scheme}]: {spec.compact_path} <- {spec.full_path}")
+            todo.append(spec)
+        ready.append(spec)
+
+    if args.jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(todo))) as pool:
+            futures = [pool.submit(_compact_job, s.full_path, s.compact_path, quant_spec(s.name)) for s in todo]
+            for future in futures:
+                print(f"- done: {future.result()}")
+    else:
+        for spec in todo:
+            compact_safetensors(spec.full_path, spec.compact_path, quant_spec(spec.name))
+    created += len(todo)
 
+    for spec in ready:
+        if args.verify:
+            _print_verification(spec.name, verify_compact(spec.full_path, spec.compact_path))
         if args.apply:
             sz = _safe_stat(spec.full_path)
             spec.full_path.unlink(missing_ok=True)
@@ -191,9 +479,11 @@ def main() -> int:
             if spec.compact_path.exists() and not args.force:
                 print(f"- ok (exists): {spec.compact_path}")
             else:
-                print(f"- create: {spec.compact_path} <- {spec.full_path}")
-                compact_safetensors(spec.full_path, spec.compact_path)
+                print(f"- create [{quant_spec(spec.name).scheme}]: {spec.compact_path} <- {spec.full_path}")
+                compact_safetensors(spec.full_path, spec.compact_path, quant_spec(spec.name))
                 created += 1
+            if args.verify:
+                _print_verification(f"reply-enhancement/{spec.name}", verify_compact(spec.full_path, spec.compact_path))
         else:
             print(f"- skip (no weights): {spec.model_dir}")
             continue
@@ -214,4 +504,3 @@ def main() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-